@@ -61,11 +61,13 @@ INSTALLED_APPS = [
     'agendamentos',
     'dashboard',
     'frotas',
+    'exportacoes',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'common.middleware.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -120,6 +122,13 @@ else:
         }
     }
 
+# Restrição de exclusão (PostgreSQL + btree_gist) que impede, no próprio
+# banco, agendamentos sobrepostos do mesmo veículo. Lida pela migration
+# agendamentos.0005; ative apenas em bancos sem sobreposições existentes.
+AGENDAMENTO_RESTRICAO_CONFLITO = os.getenv(
+    'AGENDAMENTO_RESTRICAO_CONFLITO', 'False'
+).lower() in ('true', '1', 'yes', 'on')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -172,6 +181,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 WHITENOISE_USE_FINDERS = True
 WHITENOISE_AUTOREFRESH = True
 
+# Arquivos gerados pelo sistema (ex.: exportações)
+# Não são servidos por URL pública; o download passa por views autenticadas
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -211,3 +224,93 @@ DEFAULT_FROM_EMAIL = os.getenv(
     'DEFAULT_FROM_EMAIL',
     'noreply@uespi.br'
 )
+
+# Cache
+# Padrão: memória local do processo. Com mais de um processo (ex.: vários
+# workers do Gunicorn), use um backend compartilhado para que as
+# invalidações alcancem todos, inclusive as feitas por management commands
+# (recalcular_totais_agendamentos, load_sample_data), ex.:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+# Validade das listas de referência em cache (common/referencia.py); elas
+# são invalidadas pelos sinais a cada alteração, o TTL é só uma garantia
+CACHE_REFERENCIA_SEGUNDOS = int(
+    os.getenv('CACHE_REFERENCIA_SEGUNDOS', '3600')
+)
+# Validade dos fragmentos dos relatórios em cache; eles são invalidados
+# pelas versões dos dados (VersaoRelatorioService) a cada gravação de
+# agendamento ou trajeto, e pelo TTL para nomes de professores e veículos
+CACHE_RELATORIOS_SEGUNDOS = int(
+    os.getenv('CACHE_RELATORIOS_SEGUNDOS', '900')
+)
+
+# Exportações de relatórios
+# Com EXPORTACAO_ASSINCRONA ligado, as exportações são enfileiradas e
+# geradas pelo worker (python manage.py processar_exportacoes); desligado,
+# são geradas na própria requisição (útil em desenvolvimento sem worker).
+EXPORTACAO_ASSINCRONA = os.getenv(
+    'EXPORTACAO_ASSINCRONA', 'True'
+).lower() in ('true', '1', 'yes', 'on')
+# Horas em que um arquivo gerado pode ser reaproveitado, se os dados
+# não mudarem
+EXPORTACAO_VALIDADE_HORAS = int(os.getenv('EXPORTACAO_VALIDADE_HORAS', '24'))
+# Tentativas antes de marcar a exportação como erro
+EXPORTACAO_MAX_TENTATIVAS = int(os.getenv('EXPORTACAO_MAX_TENTATIVAS', '3'))
+
+# Caixa de saída de e-mails
+# Com EMAIL_ASSINCRONO ligado, as views apenas enfileiram os e-mails, que
+# são enviados pelo worker (python manage.py enviar_emails); desligado,
+# são enviados na própria requisição.
+EMAIL_ASSINCRONO = os.getenv(
+    'EMAIL_ASSINCRONO', 'True'
+).lower() in ('true', '1', 'yes', 'on')
+# E-mails enviados por conexão com o servidor
+EMAIL_LOTE = int(os.getenv('EMAIL_LOTE', '50'))
+# Tentativas antes de marcar o e-mail como erro
+EMAIL_MAX_TENTATIVAS = int(os.getenv('EMAIL_MAX_TENTATIVAS', '5'))
+# Espera antes da 2ª tentativa; dobra a cada nova falha
+EMAIL_ESPERA_SEGUNDOS = int(os.getenv('EMAIL_ESPERA_SEGUNDOS', '60'))
+
+# Métricas de desempenho por view (common/middleware.py)
+# Expostas em /metricas/ para usuários staff ou com o cabeçalho
+# "Authorization: Bearer <METRICAS_TOKEN>" (ex.: coleta do Prometheus).
+METRICAS_ATIVAS = os.getenv(
+    'METRICAS_ATIVAS', 'True'
+).lower() in ('true', '1', 'yes', 'on')
+# Requisições mantidas por view no buffer circular
+METRICAS_JANELA = int(os.getenv('METRICAS_JANELA', '500'))
+# Consultas SQL por requisição acima das quais é registrado um aviso
+METRICAS_ORCAMENTO_CONSULTAS = int(
+    os.getenv('METRICAS_ORCAMENTO_CONSULTAS', '30')
+)
+# Orçamentos específicos por view (nome da URL com namespace)
+METRICAS_ORCAMENTOS = {
+    'agendamentos:relatorio_geral': 20,
+    'agendamentos:json': 10,
+    'frotas:boletim_diario': 20,
+}
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Avisos de orçamento de consultas excedido
+        'common.middleware': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -10,4 +10,5 @@ urlpatterns = [
     path('veiculos/', include('veiculos.urls')),
     path('agendamentos/', include('agendamentos.urls')),
     path('frotas/', include('frotas.urls')),
+    path('exportacoes/', include('exportacoes.urls')),
 ]
@@ -20,8 +20,9 @@ class AgendamentoAdmin(admin.ModelAdmin):
     inlines = [TrajetoInline]
     
     def get_total_km(self, obj):
-        return f"{obj.get_total_km()} km"
+        return f"{obj.total_km} km"
     get_total_km.short_description = 'Total KM'
+    get_total_km.admin_order_field = 'total_km'
 
 
 @admin.register(Trajeto)
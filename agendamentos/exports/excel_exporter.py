@@ -5,12 +5,12 @@ Este módulo contém classes especializadas para exportar relatórios
 de agendamentos em formato Excel (.xlsx).
 """
 
-import io
+import tempfile
 
 import xlsxwriter
-from django.http import HttpResponse
+from django.http import FileResponse
 
-from common.constants import NOMES_MESES
+from common.constants import EXPORTACAO_CHUNK_SIZE, NOMES_MESES
 
 from .base import BaseExporter
 
@@ -18,6 +18,12 @@ from .base import BaseExporter
 class ExcelExporter(BaseExporter):
     """
     Exportador base para relatórios em Excel.
+
+    O arquivo é gerado em modo constant_memory do xlsxwriter (cada linha
+    vai para disco assim que a próxima começa) em um arquivo temporário,
+    servido por FileResponse em blocos. Assim a memória do worker não
+    cresce com o número de linhas exportadas. Nesse modo as linhas de cada
+    aba devem ser escritas em ordem crescente.
     """
 
     def __init__(self, dados, titulo, filename):
@@ -32,10 +38,35 @@ class ExcelExporter(BaseExporter):
         super().__init__(dados)
         self.titulo = titulo
         self.filename = filename
-        self.output = io.BytesIO()
+        self.output = None
         self.workbook = None
         self.formats = {}
 
+    def criar_workbook(self):
+        """Cria o workbook em modo constant_memory em arquivo temporário."""
+        self.output = tempfile.TemporaryFile(suffix='.xlsx')
+        self.workbook = xlsxwriter.Workbook(
+            self.output, {'constant_memory': True}
+        )
+        self.criar_formatos()
+
+    def gerar_resposta(self):
+        """
+        Fecha o workbook e serve o arquivo temporário em streaming.
+
+        Returns:
+            FileResponse: Resposta com o arquivo Excel; o arquivo
+            temporário é removido quando a resposta é fechada
+        """
+        self.workbook.close()
+        self.output.seek(0)
+        return FileResponse(
+            self.output,
+            as_attachment=True,
+            filename=self.get_filename(),
+            content_type=self.get_content_type()
+        )
+
     def criar_formatos(self):
         """Cria os formatos de células usados no Excel."""
         self.formats['title'] = self.workbook.add_format({
@@ -86,28 +117,16 @@ class AgendamentosExcelExporter(ExcelExporter):
         Exporta relatório geral de agendamentos em Excel.
 
         Returns:
-            HttpResponse: Resposta HTTP com o arquivo Excel
+            FileResponse: Resposta HTTP com o arquivo Excel
         """
-        self.workbook = xlsxwriter.Workbook(self.output)
-        self.criar_formatos()
+        self.criar_workbook()
 
         # Criar abas
         self._criar_aba_agendamentos()
         self._criar_aba_estatisticas_curso()
         self._criar_aba_estatisticas_professor()
 
-        self.workbook.close()
-        self.output.seek(0)
-
-        response = HttpResponse(
-            self.output.read(),
-            content_type=self.get_content_type()
-        )
-        response['Content-Disposition'] = (
-            f'attachment; filename="{self.get_filename()}"'
-        )
-
-        return response
+        return self.gerar_resposta()
 
     def _criar_aba_agendamentos(self):
         """Cria a aba principal com lista de agendamentos."""
@@ -132,9 +151,15 @@ class AgendamentosExcelExporter(ExcelExporter):
             worksheet.write(2, col, header, self.formats['header'])
 
         # Dados
-        agendamentos = self.dados['agendamentos']
+        agendamentos = self.dados['agendamentos'].order_by(
+            '-data_inicio'
+        ).select_related(
+            'curso', 'professor', 'veiculo'
+        )
         row = 3
-        for agendamento in agendamentos.order_by('-data_inicio'):
+        for agendamento in agendamentos.iterator(
+            chunk_size=EXPORTACAO_CHUNK_SIZE
+        ):
             worksheet.write(
                 row, 0,
                 agendamento.data_inicio.strftime('%d/%m/%Y %H:%M'),
@@ -351,10 +376,9 @@ class CursoExcelExporter(ExcelExporter):
         Exporta relatório por curso em Excel.
 
         Returns:
-            HttpResponse: Resposta HTTP com o arquivo Excel
+            FileResponse: Resposta HTTP com o arquivo Excel
         """
-        self.workbook = xlsxwriter.Workbook(self.output)
-        self.criar_formatos()
+        self.criar_workbook()
 
         worksheet = self.workbook.add_worksheet('Dados Mensais')
         worksheet.merge_range('A1:G1', self.titulo, self.formats['title'])
@@ -425,18 +449,7 @@ class CursoExcelExporter(ExcelExporter):
         worksheet.set_column('B:F', 12)
         worksheet.set_column('G:G', 10)
 
-        self.workbook.close()
-        self.output.seek(0)
-
-        response = HttpResponse(
-            self.output.read(),
-            content_type=self.get_content_type()
-        )
-        response['Content-Disposition'] = (
-            f'attachment; filename="{self.get_filename()}"'
-        )
-
-        return response
+        return self.gerar_resposta()
 
 
 class ProfessorExcelExporter(ExcelExporter):
@@ -449,10 +462,9 @@ class ProfessorExcelExporter(ExcelExporter):
         Exporta relatório por professor em Excel.
 
         Returns:
-            HttpResponse: Resposta HTTP com o arquivo Excel
+            FileResponse: Resposta HTTP com o arquivo Excel
         """
-        self.workbook = xlsxwriter.Workbook(self.output)
-        self.criar_formatos()
+        self.criar_workbook()
 
         # Aba de agendamentos
         self._criar_aba_agendamentos_professor()
@@ -460,18 +472,7 @@ class ProfessorExcelExporter(ExcelExporter):
         # Aba de estatísticas
         self._criar_aba_estatisticas()
 
-        self.workbook.close()
-        self.output.seek(0)
-
-        response = HttpResponse(
-            self.output.read(),
-            content_type=self.get_content_type()
-        )
-        response['Content-Disposition'] = (
-            f'attachment; filename="{self.get_filename()}"'
-        )
-
-        return response
+        return self.gerar_resposta()
 
     def _criar_aba_agendamentos_professor(self):
         """Cria aba com agendamentos do professor."""
@@ -500,9 +501,13 @@ class ProfessorExcelExporter(ExcelExporter):
             worksheet.write(5, col, header, self.formats['header'])
 
         # Dados
-        agendamentos = self.dados['agendamentos']
+        agendamentos = self.dados['agendamentos'].select_related(
+            'curso', 'veiculo'
+        ).prefetch_related('trajetos')
         row = 6
-        for agendamento in agendamentos:
+        for agendamento in agendamentos.iterator(
+            chunk_size=EXPORTACAO_CHUNK_SIZE
+        ):
             worksheet.write(
                 row, 0,
                 agendamento.data_inicio.strftime('%d/%m/%Y %H:%M'),
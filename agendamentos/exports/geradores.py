@@ -0,0 +1,201 @@
+"""
+Geradores das exportações de relatórios de agendamentos.
+
+Cada gerador reconstrói, a partir dos parâmetros normalizados da
+exportação, os dados que a view de exportação montava na requisição. São
+executados pelo worker de exportações (ver app exportacoes).
+"""
+
+from common.constants import NOMES_MESES
+from common.periodos import filtro_periodo, intervalo_ano, intervalo_mes
+from cursos.models import Curso
+from exportacoes.geradores import GeradorExportacao
+from usuarios.models import Usuario
+
+from ..models import Agendamento
+from ..services import RelatorioService
+from ..view_helpers import (preparar_dados_exportacao_geral,
+                            preparar_dados_relatorio_curso,
+                            preparar_dados_relatorio_professor)
+from .excel_exporter import (AgendamentosExcelExporter, CursoExcelExporter,
+                             ProfessorExcelExporter)
+from .pdf_exporter import AgendamentosPDFExporter, ProfessorPDFExporter
+
+
+class RelatorioGeralGerador(GeradorExportacao):
+    """
+    Base das exportações do relatório geral (mês/ano com filtros).
+
+    Parâmetros: ano, mes, curso, status e, para não administradores,
+    campus.
+    """
+
+    escopo_campus = True
+    extensao = ''
+
+    def agendamentos(self, parametros):
+        """Monta o queryset de agendamentos do relatório."""
+        agendamentos = Agendamento.objects.filter(
+            **filtro_periodo(
+                'data_inicio',
+                *intervalo_mes(parametros['ano'], parametros['mes'])
+            )
+        ).select_related('curso', 'professor', 'veiculo')
+
+        if 'campus' in parametros:
+            agendamentos = agendamentos.filter(
+                professor__campus=parametros['campus']
+            )
+
+        return RelatorioService.aplicar_filtros(
+            agendamentos, self.filtros(parametros)
+        )
+
+    def filtros(self, parametros):
+        return {
+            'curso_id': parametros.get('curso'),
+            'status': parametros.get('status'),
+        }
+
+    def versao(self, parametros):
+        return self.impressao_digital(
+            self.agregados_agendamentos(self.agendamentos(parametros))
+        )
+
+    def dados(self, parametros):
+        return preparar_dados_exportacao_geral(
+            self.agendamentos(parametros),
+            parametros['ano'],
+            parametros['mes'],
+            self.filtros(parametros)
+        )
+
+    def titulo(self, parametros):
+        nome_mes = NOMES_MESES[parametros['mes']]
+        return f'Relatório de Agendamentos - {nome_mes} {parametros["ano"]}'
+
+    def nome_arquivo(self, parametros):
+        nome_mes = NOMES_MESES[parametros['mes']].lower()
+        return (
+            f'relatorio_agendamentos_{nome_mes}_{parametros["ano"]}'
+            f'{self.extensao}'
+        )
+
+
+class RelatorioExcelGerador(RelatorioGeralGerador):
+    descricao = 'Relatório geral (Excel)'
+    extensao = '.xlsx'
+
+    def exportador(self, parametros):
+        return AgendamentosExcelExporter(
+            self.dados(parametros),
+            self.titulo(parametros),
+            self.nome_arquivo(parametros)
+        )
+
+
+class RelatorioPDFGerador(RelatorioGeralGerador):
+    descricao = 'Relatório geral (PDF)'
+    extensao = '.pdf'
+
+    def exportador(self, parametros):
+        return AgendamentosPDFExporter(
+            self.dados(parametros),
+            self.titulo(parametros),
+            self.nome_arquivo(parametros)
+        )
+
+
+class CursoExcelGerador(GeradorExportacao):
+    """
+    Exportação do relatório anual por curso.
+
+    Parâmetros: curso, ano.
+    """
+
+    descricao = 'Relatório por curso (Excel)'
+
+    def versao(self, parametros):
+        curso = Curso.objects.get(id=parametros['curso'])
+        ano = parametros['ano']
+        agendamentos = Agendamento.objects.filter(
+            curso=curso,
+            **filtro_periodo('data_inicio', *intervalo_ano(ano))
+        )
+        return self.impressao_digital(
+            curso.limite_km_mensal,
+            self.agregados_agendamentos(agendamentos),
+        )
+
+    def exportador(self, parametros):
+        curso = Curso.objects.get(id=parametros['curso'])
+        ano = parametros['ano']
+        dados = preparar_dados_relatorio_curso(curso, ano)
+
+        titulo = f'{curso.nome} - {ano}'
+        filename = (
+            f'relatorio_{curso.nome.lower().replace(" ", "_")}_{ano}.xlsx'
+        )
+        return CursoExcelExporter(dados, titulo, filename)
+
+
+class ProfessorGerador(GeradorExportacao):
+    """
+    Base das exportações do relatório por professor.
+
+    Parâmetros: professor, data_inicio, data_fim, status.
+    """
+
+    extensao = ''
+
+    def agendamentos(self, parametros, professor):
+        """Monta o queryset de agendamentos do professor."""
+        agendamentos = RelatorioService.aplicar_filtros(
+            Agendamento.objects.filter(professor=professor), {
+                'data_inicio': parametros.get('data_inicio'),
+                'data_fim': parametros.get('data_fim'),
+                'status': parametros.get('status'),
+            }
+        )
+        return agendamentos.order_by('-data_inicio')
+
+    def professor(self, parametros):
+        return Usuario.objects.get(
+            id=parametros['professor'],
+            groups__name='Professores'
+        )
+
+    def versao(self, parametros):
+        professor = self.professor(parametros)
+        return self.impressao_digital(
+            self.agregados_agendamentos(
+                self.agendamentos(parametros, professor)
+            )
+        )
+
+    def montar(self, parametros, classe_exportador):
+        professor = self.professor(parametros)
+        dados = preparar_dados_relatorio_professor(
+            professor, self.agendamentos(parametros, professor)
+        )
+
+        titulo = f'Relatório - {professor.get_full_name()}'
+        nome_professor = professor.get_full_name().lower().replace(" ", "_")
+        filename = f'relatorio_professor_{nome_professor}{self.extensao}'
+        return classe_exportador(dados, titulo, filename)
+
+
+class ProfessorExcelGerador(ProfessorGerador):
+    descricao = 'Relatório por professor (Excel)'
+    extensao = '.xlsx'
+
+    def exportador(self, parametros):
+        return self.montar(parametros, ProfessorExcelExporter)
+
+
+class ProfessorPDFGerador(ProfessorGerador):
+    descricao = 'Relatório por professor (PDF)'
+    extensao = '.pdf'
+
+    def exportador(self, parametros):
+        return self.montar(parametros, ProfessorPDFExporter)
@@ -7,6 +7,7 @@ de agendamentos em formato PDF.
 
 import io
 
+from django.db.models import Sum
 from django.http import HttpResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -153,10 +154,9 @@ class AgendamentosPDFExporter(PDFExporter):
         aprovados = agendamentos.filter(status='aprovado').count()
         pendentes = agendamentos.filter(status='pendente').count()
         reprovados = agendamentos.filter(status='reprovado').count()
-        total_km = sum(
-            a.get_total_km()
-            for a in agendamentos.filter(status='aprovado')
-        )
+        total_km = agendamentos.filter(status='aprovado').aggregate(
+            total=Sum('total_km')
+        )['total'] or 0
 
         stats_data = [
             ['Estatísticas Gerais', '', '', ''],
@@ -196,9 +196,7 @@ class AgendamentosPDFExporter(PDFExporter):
                 curso_data.append([
                     nome_curso,
                     f'{curso.total_km or 0} km',
-                    str(self.dados['agendamentos'].filter(
-                        curso=curso, status='aprovado'
-                    ).count())
+                    str(curso.total_agendamentos)
                 ])
 
             curso_table = Table(
@@ -1,10 +1,12 @@
+from datetime import timedelta
+
 from django import forms
 from django.core.exceptions import ValidationError
 from django.forms import inlineformset_factory
 from django.utils import timezone
 
-from cursos.models import Curso
-from veiculos.models import Veiculo
+from common.constants import RECORRENCIA_MAX_OCORRENCIAS
+from common.referencia import CampoReferencia
 
 from .models import Agendamento, Trajeto
 
@@ -42,9 +44,13 @@ class AgendamentoForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
-        # Filtra apenas cursos e veículos ativos
-        self.fields['curso'].queryset = Curso.objects.filter(ativo=True)
-        self.fields['veiculo'].queryset = Veiculo.objects.filter(ativo=True)
+        # Apenas cursos e veículos ativos, das listas em cache
+        self.fields['curso'] = CampoReferencia.a_partir_de(
+            self.fields['curso'], 'cursos'
+        )
+        self.fields['veiculo'] = CampoReferencia.a_partir_de(
+            self.fields['veiculo'], 'veiculos'
+        )
 
         # Formata as datas para o formato datetime-local ao editar
         if self.instance and self.instance.pk:
@@ -64,7 +70,6 @@ class AgendamentoForm(forms.ModelForm):
         cleaned_data = super().clean()
         data_inicio = cleaned_data.get('data_inicio')
         data_fim = cleaned_data.get('data_fim')
-        veiculo = cleaned_data.get('veiculo')
 
         # Validação de datas
         if data_inicio and data_fim and data_fim <= data_inicio:
@@ -74,32 +79,8 @@ class AgendamentoForm(forms.ModelForm):
                 )
             })
 
-        # Validação de conflito de veículo
-        if veiculo and data_inicio and data_fim:
-            agendamento_id = self.instance.id if self.instance else None
-            if veiculo.tem_conflito(data_inicio, data_fim, agendamento_id):
-                conflitos = veiculo.get_agendamentos_periodo(
-                    data_inicio, data_fim
-                )
-                if agendamento_id:
-                    conflitos = conflitos.exclude(id=agendamento_id)
-
-                msg = (
-                    f"O veículo {veiculo.placa} tem um "
-                    f"agendamento neste período:"
-                )
-                for conflito in conflitos:
-                    dt_inicio = conflito.data_inicio.strftime(
-                        '%d/%m/%Y %H:%M'
-                    )
-                    dt_fim = conflito.data_fim.strftime('%d/%m/%Y %H:%M')
-                    msg += (
-                        f"\n- {dt_inicio} até {dt_fim} "
-                    )
-
-                raise ValidationError({
-                    'veiculo': msg
-                })
+        # O conflito de veículo é validado uma única vez por
+        # Agendamento.clean(), chamado pelo ModelForm após este método
 
         # Validação de limite de KM do curso
         # (só se já temos o total de KM dos trajetos)
@@ -108,8 +89,8 @@ class AgendamentoForm(forms.ModelForm):
             total_km_trajetos = self._trajetos_km
 
             if total_km_trajetos > 0:  # Só valida se há KM para validar
-                ano = data_inicio.year
-                mes = data_inicio.month
+                inicio = timezone.localtime(data_inicio)
+                ano, mes = inicio.year, inicio.month
 
                 # Calcula KM já utilizados no mês
                 km_utilizados = curso.get_km_utilizados_mes(ano, mes)
@@ -152,8 +133,8 @@ class AgendamentoForm(forms.ModelForm):
         data_inicio = self.cleaned_data.get('data_inicio')
 
         if curso and data_inicio and total_km_trajetos > 0:
-            ano = data_inicio.year
-            mes = data_inicio.month
+            inicio = timezone.localtime(data_inicio)
+            ano, mes = inicio.year, inicio.month
 
             # Calcula KM já utilizados no mês
             km_utilizados = curso.get_km_utilizados_mes(ano, mes)
@@ -176,6 +157,106 @@ class AgendamentoForm(forms.ModelForm):
                 )
 
 
+class RecorrenciaForm(forms.Form):
+    """
+    Repetição de um novo agendamento (semanal ou quinzenal).
+
+    O fim da série é dado pelo número de ocorrências ou por uma data
+    final; a primeira ocorrência é o próprio agendamento do formulário.
+    """
+
+    # Intervalo entre ocorrências, em dias
+    INTERVALOS = {'semanal': 7, 'quinzenal': 14}
+
+    frequencia = forms.ChoiceField(
+        choices=[
+            ('', 'Não repetir'),
+            ('semanal', 'Semanal'),
+            ('quinzenal', 'Quinzenal'),
+        ],
+        required=False,
+        label='Repetir',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    ocorrencias = forms.IntegerField(
+        min_value=2,
+        max_value=RECORRENCIA_MAX_OCORRENCIAS,
+        required=False,
+        label='Número de ocorrências',
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    ate = forms.DateField(
+        required=False,
+        label='Repetir até',
+        widget=forms.DateInput(
+            attrs={'class': 'form-control', 'type': 'date'}
+        ),
+    )
+    apenas_livres = forms.BooleanField(
+        required=False,
+        label='Criar apenas as datas sem conflito',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('frequencia'):
+            return cleaned_data
+
+        ocorrencias = cleaned_data.get('ocorrencias')
+        ate = cleaned_data.get('ate')
+        if bool(ocorrencias) == bool(ate):
+            raise ValidationError(
+                'Informe o número de ocorrências ou a data final da '
+                'repetição (apenas um dos dois).'
+            )
+        return cleaned_data
+
+    @property
+    def repetir(self):
+        """Se o agendamento deve ser repetido."""
+        return bool(self.cleaned_data.get('frequencia'))
+
+    def deslocamentos(self, data_inicio, data_fim):
+        """
+        Calcula o deslocamento de cada ocorrência em relação à primeira.
+
+        Args:
+            data_inicio: Início da primeira ocorrência
+            data_fim: Fim da primeira ocorrência
+
+        Returns:
+            list: timedeltas, começando em zero
+
+        Raises:
+            ValidationError: Se a série tiver menos de 2 ou mais de
+                RECORRENCIA_MAX_OCORRENCIAS ocorrências, ou se cada
+                ocorrência durar mais que o intervalo (as ocorrências se
+                sobreporiam no mesmo veículo)
+        """
+        frequencia = self.cleaned_data['frequencia']
+        intervalo = timedelta(days=self.INTERVALOS[frequencia])
+        if data_fim - data_inicio > intervalo:
+            raise ValidationError(
+                f'Um agendamento com repetição {frequencia} não pode '
+                f'durar mais de {intervalo.days} dias: as ocorrências '
+                f'se sobreporiam.'
+            )
+        ocorrencias = self.cleaned_data.get('ocorrencias')
+        if not ocorrencias:
+            dias = (
+                self.cleaned_data['ate']
+                - timezone.localtime(data_inicio).date()
+            ).days
+            ocorrencias = dias // intervalo.days + 1
+        if not 2 <= ocorrencias <= RECORRENCIA_MAX_OCORRENCIAS:
+            raise ValidationError(
+                f'A repetição deve ter de 2 a '
+                f'{RECORRENCIA_MAX_OCORRENCIAS} ocorrências.'
+            )
+        return [intervalo * indice for indice in range(ocorrencias)]
+
+
 class TrajetoForm(forms.ModelForm):
     """Formulário para trajetos"""
 
@@ -0,0 +1,151 @@
+"""
+Management command para medir a memória da exportação Excel.
+
+Gera agendamentos sintéticos (dentro de uma transação desfeita ao final),
+exporta com AgendamentosExcelExporter e mede o pico de memória Python
+(tracemalloc) ao gerar e consumir a resposta. Com a exportação em
+streaming o pico deve ficar praticamente igual entre os tamanhos.
+
+Uso:
+  python manage.py benchmark_exportacao
+  python manage.py benchmark_exportacao --linhas 1000 10000 100000
+  python manage.py benchmark_exportacao --limite-mb 50
+"""
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from agendamentos.exports.excel_exporter import AgendamentosExcelExporter
+from agendamentos.models import Agendamento, Trajeto
+from cursos.models import Curso
+from usuarios.models import Usuario
+from veiculos.models import Veiculo
+
+MARCADOR = '[benchmark-exportacao]'
+LOTE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o pico de memória da exportação Excel de agendamentos '
+        'para quantidades crescentes de linhas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='Quantidades de agendamentos a exportar (padrão: 10000 100000)',
+        )
+        parser.add_argument(
+            '--limite-mb',
+            type=float,
+            default=None,
+            help='Falha se o pico de memória de alguma medição passar do limite',
+        )
+
+    def handle(self, *args, **options):
+        curso = Curso.objects.first()
+        professor = Usuario.objects.first()
+        veiculo = Veiculo.objects.first()
+        if not (curso and professor and veiculo):
+            raise CommandError(
+                'É necessário ao menos um curso, um usuário e um veículo. '
+                'Execute load_sample_data antes.'
+            )
+
+        resultados = []
+        with transaction.atomic():
+            criados = 0
+            for linhas in sorted(set(options['linhas'])):
+                self._criar_agendamentos(
+                    criados, linhas, curso, professor, veiculo
+                )
+                criados = linhas
+                resultados.append((linhas, *self._medir()))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'Linhas':>10} {'Pico (MB)':>10} "
+                          f"{'Arquivo (MB)':>13} {'Tempo (s)':>10}")
+        for linhas, pico, tamanho, duracao in resultados:
+            self.stdout.write(
+                f'{linhas:>10} {pico / 2**20:>10.1f} '
+                f'{tamanho / 2**20:>13.1f} {duracao:>10.1f}'
+            )
+
+        limite = options['limite_mb']
+        if limite is not None:
+            excedidos = [r for r in resultados if r[1] / 2**20 > limite]
+            if excedidos:
+                raise CommandError(
+                    f'Pico de memória acima de {limite} MB em '
+                    f'{len(excedidos)} medição(ões).'
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f'Pico de memória dentro de {limite} MB.')
+            )
+
+    def _criar_agendamentos(self, inicio, fim, curso, professor, veiculo):
+        """Cria agendamentos sintéticos (um trajeto cada) em lotes."""
+        base = timezone.now()
+        for lote_inicio in range(inicio, fim, LOTE):
+            agendamentos = []
+            for i in range(lote_inicio, min(lote_inicio + LOTE, fim)):
+                data_inicio = base + timedelta(hours=i)
+                agendamentos.append(Agendamento(
+                    curso=curso,
+                    professor=professor,
+                    veiculo=veiculo,
+                    data_inicio=data_inicio,
+                    data_fim=data_inicio + timedelta(minutes=50),
+                    status='aprovado',
+                    observacoes=MARCADOR,
+                    # bulk_create não dispara os signals de Trajeto
+                    total_km=10 + i % 90,
+                    total_trajetos=1,
+                ))
+            Agendamento.objects.bulk_create(agendamentos)
+            Trajeto.objects.bulk_create([
+                Trajeto(
+                    agendamento=agendamento,
+                    origem='Campus',
+                    destino=f'Destino {i}',
+                    data_saida=agendamento.data_inicio,
+                    data_chegada=agendamento.data_fim,
+                    quilometragem=agendamento.total_km,
+                    descricao=MARCADOR,
+                )
+                for i, agendamento in enumerate(agendamentos)
+            ])
+
+    def _medir(self):
+        """Exporta os agendamentos sintéticos e retorna (pico, bytes, s)."""
+        dados = {
+            'agendamentos': Agendamento.objects.filter(observacoes=MARCADOR),
+            'mes': 1,
+            'ano': timezone.now().year,
+            'cursos_km': {},
+            'professores_stats': [],
+        }
+        exporter = AgendamentosExcelExporter(
+            dados, 'Benchmark', 'benchmark.xlsx'
+        )
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            response = exporter.exportar()
+            tamanho = sum(len(bloco) for bloco in response)
+            # Não usa response.close(): o sinal request_finished fecharia
+            # a conexão no meio da transação do benchmark
+            exporter.output.close()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return pico, tamanho, time.perf_counter() - inicio
@@ -0,0 +1,91 @@
+"""
+Management command para escalar motoristas nos trajetos aprovados sem
+motorista de uma janela de dias.
+
+Uso:
+  python manage.py escalar_motoristas                       # próximos 7 dias
+  python manage.py escalar_motoristas --inicio 2025-03-10 --dias 14
+  python manage.py escalar_motoristas --campus <id> --dry-run   # só prévia
+"""
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from agendamentos.services import EscalaMotoristaService
+from common.constants import ESCALA_DIAS_PADRAO, ESCALA_MAX_DIAS
+from common.periodos import intervalo_dias, ler_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Atribui motoristas do campus do veículo aos trajetos aprovados '
+        'sem motorista, equilibrando as horas de cada motorista'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inicio',
+            help='Primeiro dia da janela, AAAA-MM-DD (padrão: hoje)',
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=ESCALA_DIAS_PADRAO,
+            help=f'Dias da janela (padrão: {ESCALA_DIAS_PADRAO})',
+        )
+        parser.add_argument(
+            '--campus',
+            help='Id do campus dos veículos (padrão: todos)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra a escala proposta, sem alterar o banco',
+        )
+
+    def handle(self, *args, **options):
+        inicio = timezone.localdate()
+        if options['inicio']:
+            inicio = ler_data(options['inicio'])
+            if inicio is None:
+                raise CommandError('Data inicial inválida (use AAAA-MM-DD).')
+        if not 1 <= options['dias'] <= ESCALA_MAX_DIAS:
+            raise CommandError(f'Informe de 1 a {ESCALA_MAX_DIAS} dias.')
+        campus_id = None
+        if options['campus']:
+            try:
+                campus_id = uuid.UUID(options['campus'])
+            except ValueError:
+                raise CommandError('Campus inválido.')
+
+        ultimo_dia = inicio + timedelta(days=options['dias'] - 1)
+        escala = EscalaMotoristaService.escalar(
+            *intervalo_dias(inicio, ultimo_dia),
+            campus_id=campus_id,
+            aplicar=not options['dry_run'],
+        )
+
+        for item in escala:
+            trajeto, motorista = item['trajeto'], item['motorista']
+            saida = timezone.localtime(trajeto.data_saida)
+            nome = (
+                motorista.get_full_name() or motorista.username
+                if motorista else '✗ sem motorista livre'
+            )
+            self.stdout.write(
+                f"   {saida.strftime('%d/%m/%Y %H:%M')} "
+                f"{trajeto.origem} → {trajeto.destino} "
+                f"({trajeto.agendamento.veiculo.placa}): {nome}"
+            )
+
+        escalados = sum(1 for item in escala if item['motorista'])
+        resumo = (
+            f'{escalados} de {len(escala)} trajeto(s) sem motorista '
+            f'receberiam motorista.'
+            if options['dry_run'] else
+            f'Motoristas atribuídos a {escalados} de {len(escala)} '
+            f'trajeto(s) sem motorista.'
+        )
+        self.stdout.write(self.style.SUCCESS(resumo))
@@ -0,0 +1,59 @@
+"""
+Management command para verificar ou corrigir os totais de trajetos
+gravados nos agendamentos (total_km e total_trajetos).
+
+Uso:
+  python manage.py recalcular_totais_agendamentos            # corrige
+  python manage.py recalcular_totais_agendamentos --verify   # só reporta
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from agendamentos.services import TotaisTrajetosService
+from common.versoes import cache_compartilhado
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula (ou verifica) o KM total e a quantidade de trajetos '
+        'gravados em cada agendamento'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Apenas verifica divergências, sem alterar o banco',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            divergencias = TotaisTrajetosService.verificar()
+            for agendamento_id, gravado, calculado in divergencias:
+                self.stdout.write(
+                    f'   ✗ agendamento {agendamento_id}: '
+                    f'gravado {gravado[0]} km / {gravado[1]} trajeto(s), '
+                    f'calculado {calculado[0]} km / {calculado[1]} '
+                    f'trajeto(s)'
+                )
+            if divergencias:
+                raise CommandError(
+                    f'{len(divergencias)} divergência(s) encontrada(s). '
+                    f'Execute recalcular_totais_agendamentos sem --verify '
+                    f'para corrigir.'
+                )
+            self.stdout.write(
+                self.style.SUCCESS('Totais dos agendamentos consistentes.')
+            )
+            return
+
+        total = TotaisTrajetosService.reconstruir()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Totais recalculados: {total} agendamento(s) corrigido(s).'
+            )
+        )
+        if total and not cache_compartilhado():
+            self.stdout.write(self.style.WARNING(
+                'Cache local (CACHE_BACKEND): o servidor só verá os '
+                'relatórios atualizados após CACHE_RELATORIOS_SEGUNDOS.'
+            ))
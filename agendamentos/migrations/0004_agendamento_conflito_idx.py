@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0003_trajeto_motorista'),
+        ('cursos', '0003_consumokmmensal'),
+        ('veiculos', '0002_veiculo_campus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['veiculo', 'status', 'data_inicio', 'data_fim'], name='agendamento_conflito_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+"""
+Restrição de exclusão opcional contra sobreposição de agendamentos.
+
+Só é instalada no PostgreSQL e quando AGENDAMENTO_RESTRICAO_CONFLITO está
+ativo nas settings, pois exige a extensão btree_gist e falha se o banco
+já tiver agendamentos sobrepostos. Nos demais bancos (SQLite) o conflito
+é garantido pelo bloqueio do veículo em ConflitoVeiculoService.salvar().
+"""
+
+from django.conf import settings
+from django.db import migrations
+
+RESTRICAO = 'agendamento_veiculo_sem_sobreposicao'
+
+
+def _habilitada(schema_editor):
+    return (
+        schema_editor.connection.vendor == 'postgresql'
+        and getattr(settings, 'AGENDAMENTO_RESTRICAO_CONFLITO', False)
+    )
+
+
+def criar_restricao(apps, schema_editor):
+    if not _habilitada(schema_editor):
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f'ALTER TABLE agendamentos_agendamento '
+        f'ADD CONSTRAINT {RESTRICAO} EXCLUDE USING gist ('
+        f'veiculo_id WITH =, '
+        f"tstzrange(data_inicio, data_fim, '[)') WITH &&"
+        f") WHERE (status IN ('aprovado', 'pendente'))"
+    )
+
+
+def remover_restricao(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE agendamentos_agendamento '
+        f'DROP CONSTRAINT IF EXISTS {RESTRICAO}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0004_agendamento_conflito_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_restricao, remover_restricao),
+    ]
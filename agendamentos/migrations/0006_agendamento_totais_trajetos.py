@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def popular_totais(apps, schema_editor):
+    Agendamento = apps.get_model('agendamentos', 'Agendamento')
+    Trajeto = apps.get_model('agendamentos', 'Trajeto')
+
+    trajetos = Trajeto.objects.filter(
+        agendamento=OuterRef('pk')
+    ).order_by().values('agendamento')
+
+    Agendamento.objects.update(
+        total_km=Coalesce(
+            Subquery(
+                trajetos.annotate(km=Sum('quilometragem')).values('km'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        total_trajetos=Coalesce(
+            Subquery(
+                trajetos.annotate(quantidade=Count('id')).values('quantidade'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0005_agendamento_restricao_conflito'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='total_km',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de KM'),
+        ),
+        migrations.AddField(
+            model_name='agendamento',
+            name='total_trajetos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Trajetos'),
+        ),
+        migrations.RunPython(popular_totais, migrations.RunPython.noop),
+    ]
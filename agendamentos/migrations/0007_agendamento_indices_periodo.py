@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0006_agendamento_totais_trajetos'),
+        ('cursos', '0003_consumokmmensal'),
+        ('veiculos', '0002_veiculo_campus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['data_inicio'], name='agendamento_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['curso', 'data_inicio'], name='agendamento_curso_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0007_agendamento_indices_periodo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='serie',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True, verbose_name='Série'),
+        ),
+    ]
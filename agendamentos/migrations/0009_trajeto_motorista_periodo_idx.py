@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0008_agendamento_serie'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trajeto',
+            index=models.Index(fields=['motorista', 'data_saida', 'data_chegada'], name='trajeto_motorista_periodo_idx'),
+        ),
+    ]
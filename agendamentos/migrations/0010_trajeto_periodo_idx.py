@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0009_trajeto_motorista_periodo_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trajeto',
+            index=models.Index(fields=['data_chegada', 'data_saida'], name='trajeto_periodo_idx'),
+        ),
+    ]
@@ -2,7 +2,8 @@ import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class Agendamento(models.Model):
@@ -52,6 +53,26 @@ class Agendamento(models.Model):
         verbose_name='Motivo da Reprovação'
     )
     observacoes = models.TextField(blank=True, verbose_name='Observações')
+    # Agendamentos criados juntos por uma recorrência compartilham a série
+    # (ver SerieAgendamentoService)
+    serie = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Série'
+    )
+    # Totais dos trajetos, mantidos por atualizar_totais_trajetos()
+    total_km = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Total de KM'
+    )
+    total_trajetos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Total de Trajetos'
+    )
     criado_em = models.DateTimeField(
         auto_now_add=True, verbose_name='Criado em')
     atualizado_em = models.DateTimeField(
@@ -61,6 +82,51 @@ class Agendamento(models.Model):
         verbose_name = 'Agendamento'
         verbose_name_plural = 'Agendamentos'
         ordering = ['-data_inicio']
+        indexes = [
+            # Consulta de sobreposição de ConflitoVeiculoService
+            models.Index(
+                fields=['veiculo', 'status', 'data_inicio', 'data_fim'],
+                name='agendamento_conflito_idx'
+            ),
+            # Filtros por período (common.periodos): relatórios mensais,
+            # dashboard e exportações
+            models.Index(
+                fields=['data_inicio'],
+                name='agendamento_inicio_idx'
+            ),
+            # Relatório anual por curso e consumo mensal de KM
+            models.Index(
+                fields=['curso', 'data_inicio'],
+                name='agendamento_curso_inicio_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda a chave do consumo mensal de KM como foi lida do banco,
+        # para que os signals saibam qual mês recalcular após mudanças
+        instance._chave_consumo_original = instance.get_chave_consumo_km()
+        # Professor e início como lidos do banco, para que os signals
+        # invalidem também o campus e o mês anteriores nos relatórios
+        instance._chave_versao_original = instance.get_chave_versao()
+        return instance
+
+    def get_chave_versao(self):
+        """Retorna (professor_id, data_inicio) para as versões dos relatórios"""
+        campos = self.__dict__
+        return campos.get('professor_id'), campos.get('data_inicio')
+
+    def get_chave_consumo_km(self):
+        """Retorna a chave (curso_id, ano, mes) no consumo mensal de KM"""
+        from cursos.services import ConsumoKmService
+
+        campos = self.__dict__
+        return ConsumoKmService.chave(
+            campos.get('curso_id'),
+            campos.get('data_inicio'),
+            campos.get('status')
+        )
 
     def __str__(self):
         try:
@@ -70,9 +136,58 @@ class Agendamento(models.Model):
         except AttributeError:
             return f"Agendamento {self.id or 'novo'}"
 
+    # Campos gravados apenas por atualizar_totais_trajetos()
+    CAMPOS_TOTAIS = ('total_km', 'total_trajetos')
+
+    def save(self, *args, **kwargs):
+        # Os totais dos trajetos são gravados por atualizar_totais_trajetos();
+        # um save() comum não os sobrescreve com valores da instância, que
+        # podem estar desatualizados
+        if (not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key
+                and campo.name not in self.CAMPOS_TOTAIS
+            ]
+        super().save(*args, **kwargs)
+
     def get_total_km(self):
         """Retorna a quilometragem total de todos os trajetos do agendamento"""
-        return sum(trajeto.quilometragem for trajeto in self.trajetos.all())
+        return self.total_km
+
+    def calcular_totais_trajetos(self):
+        """
+        Calcula no banco o KM total e a quantidade de trajetos.
+
+        Returns:
+            dict: {'total_km': int, 'total_trajetos': int}
+        """
+        agregado = Trajeto.objects.filter(agendamento_id=self.pk).aggregate(
+            km=models.Sum('quilometragem'),
+            quantidade=models.Count('id'),
+        )
+        return {
+            'total_km': agregado['km'] or 0,
+            'total_trajetos': agregado['quantidade'],
+        }
+
+    def atualizar_totais_trajetos(self):
+        """
+        Recalcula e grava total_km e total_trajetos a partir dos trajetos.
+
+        Chamado pelos signals de Trajeto (ver signals.py), o que cobre o
+        TrajetoFormSet, o inline do admin e gravações diretas. Também
+        atualiza atualizado_em, já que os trajetos fazem parte do
+        agendamento.
+        """
+        totais = self.calcular_totais_trajetos()
+        Agendamento.objects.filter(pk=self.pk).update(
+            atualizado_em=timezone.now(), **totais
+        )
+        for campo, valor in totais.items():
+            setattr(self, campo, valor)
 
     def clean(self):
         """Validações do model"""
@@ -84,29 +199,18 @@ class Agendamento(models.Model):
                 'data_fim': 'A data de fim deve ser posterior à data de início.'
             })
 
-        # Validação 2: Verificar conflito de veículo
+        # Validação 2: Verificar conflito de veículo (uma única consulta)
         if self.veiculo_id and self.data_inicio and self.data_fim:
+            from veiculos.services import ConflitoVeiculoService
+
             try:
                 veiculo = self.veiculo
-                if veiculo.tem_conflito(self.data_inicio, self.data_fim, self.id):
-                    conflitos = veiculo.get_agendamentos_periodo(
-                        self.data_inicio, self.data_fim)
-                    if self.id:
-                        conflitos = conflitos.exclude(id=self.id)
-
-                    mensagem = f"O veículo {veiculo.placa} tem um agendamento neste período:"
-                    for conflito in conflitos:
-                        data_inicio = conflito.data_inicio.strftime(
-                            '%d/%m/%Y %H:%M')
-                        data_fim = conflito.data_fim.strftime('%d/%m/%Y %H:%M')
-                        mensagem += f"\n- {data_inicio} até {data_fim}"
-
-                    raise ValidationError({
-                        'veiculo': mensagem
-                    })
             except AttributeError:
                 # Se o veículo não existe, deixa passar para outras validações capturarem
-                pass
+                return
+            ConflitoVeiculoService.validar(
+                veiculo, self.data_inicio, self.data_fim, self.id
+            )
 
     def validar_limite_km(self):
         """
@@ -116,8 +220,10 @@ class Agendamento(models.Model):
         if self.status == 'aprovado' and self.curso_id and self.data_inicio:
             try:
                 curso = self.curso
-                ano = self.data_inicio.year
-                mes = self.data_inicio.month
+                # Mês local, como as chaves do consumo mensal
+                # (ConsumoKmService.chave); o valor lido do banco é UTC
+                inicio = timezone.localtime(self.data_inicio)
+                ano, mes = inicio.year, inicio.month
 
                 # Calcula KM já utilizados no mês (excluindo este agendamento)
                 km_utilizados = curso.get_km_utilizados_mes(ano, mes)
@@ -136,29 +242,38 @@ class Agendamento(models.Model):
                 km_total = km_utilizados + total_km
 
                 if km_total > curso.limite_km_mensal:
-                    km_disponiveis = curso.limite_km_mensal - km_utilizados
-                    raise ValidationError(
-                        f"Este agendamento ultrapassa o limite mensal de {curso.limite_km_mensal} km do curso {curso.nome}. "
-                        f"KM já utilizados no mês: {km_utilizados} km. "
-                        f"KM disponíveis: {km_disponiveis} km. "
-                        f"KM solicitados: {total_km} km."
-                    )
+                    raise ValidationError(self.mensagem_limite_km(
+                        curso, km_utilizados, total_km
+                    ))
             except AttributeError:
                 # Se não conseguir acessar curso, pula a validação
                 pass
 
+    @staticmethod
+    def mensagem_limite_km(curso, km_utilizados, km_solicitados):
+        """Mensagem de erro de limite mensal de KM ultrapassado"""
+        km_disponiveis = curso.limite_km_mensal - km_utilizados
+        return (
+            f"Este agendamento ultrapassa o limite mensal de {curso.limite_km_mensal} km do curso {curso.nome}. "
+            f"KM já utilizados no mês: {km_utilizados} km. "
+            f"KM disponíveis: {km_disponiveis} km. "
+            f"KM solicitados: {km_solicitados} km."
+        )
+
     def aprovar(self):
         """Aprova o agendamento após validar limite de KM"""
         self.status = 'aprovado'
         self.motivo_reprovacao = ''
         self.validar_limite_km()  # Valida antes de aprovar
-        self.save()
+        with transaction.atomic():
+            self.save()
 
     def reprovar(self, motivo):
         """Reprova o agendamento"""
         self.status = 'reprovado'
         self.motivo_reprovacao = motivo
-        self.save()
+        with transaction.atomic():
+            self.save()
 
 
 class Trajeto(models.Model):
@@ -198,6 +313,20 @@ class Trajeto(models.Model):
         verbose_name = 'Trajeto'
         verbose_name_plural = 'Trajetos'
         ordering = ['data_saida']
+        indexes = [
+            # Consulta de sobreposição de DisponibilidadeMotoristaService
+            models.Index(
+                fields=['motorista', 'data_saida', 'data_chegada'],
+                name='trajeto_motorista_periodo_idx'
+            ),
+            # Ocupação dos motoristas na janela de cada trajeto
+            # (DisponibilidadeMotoristaService.consultar_janelas): a
+            # chegada primeiro deixa de fora os trajetos já encerrados
+            models.Index(
+                fields=['data_chegada', 'data_saida'],
+                name='trajeto_periodo_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.origem} → {self.destino} ({self.quilometragem} km)"
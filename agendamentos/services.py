@@ -5,11 +5,29 @@ Este módulo contém a lógica de negócio relacionada a agendamentos,
 separada das views (Single Responsibility Principle).
 """
 
+import heapq
+import uuid
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from django.db.models import Count, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from common.constants import ESCALA_CARGA_DIAS, NOMES_MESES
+from common.periodos import (
+    filtro_periodo,
+    inicio_do_dia,
+    intervalo_ano,
+    ler_data,
+)
+from common.versoes import incrementar, versoes
 
 from usuarios.models import Usuario
+from usuarios.services import BuscaUsuarioService
+from veiculos.models import Veiculo
+from veiculos.services import RESTRICAO_CONFLITO, ConflitoVeiculoService
 
 
 class AgendamentoService:
@@ -59,7 +77,8 @@ class AgendamentoService:
             agendamento = form.save(commit=False)
             agendamento.professor = usuario
             agendamento.status = 'pendente'
-            agendamento.save()
+            # Revalida o conflito com o veículo bloqueado antes de gravar
+            ConflitoVeiculoService.salvar(agendamento)
 
             # Salva os trajetos
             formset.instance = agendamento
@@ -137,8 +156,14 @@ class AgendamentoService:
 
         # Atualiza o agendamento
         with transaction.atomic():
-            agendamento = form.save()
+            agendamento = form.save(commit=False)
+            # Revalida o conflito com o veículo bloqueado antes de gravar
+            ConflitoVeiculoService.salvar(agendamento)
+            form.save_m2m()
             formset.save()
+            # Os trajetos mantêm o motorista; com os novos horários ele
+            # não pode ficar com trajetos sobrepostos
+            DisponibilidadeMotoristaService.validar_agendamento(agendamento)
 
         return agendamento
 
@@ -221,15 +246,849 @@ class AgendamentoService:
         agendamento.reprovar(motivo)
 
 
+class AprovacaoLoteService:
+    """
+    Aprovação e reprovação de vários agendamentos pendentes de uma vez.
+
+    Aprovar um a um (Agendamento.aprovar) consulta o consumo do mês e o
+    próprio agendamento a cada item, e os signals recalculam o consumo do
+    mês a partir dos trajetos a cada gravação. O lote, em uma transação:
+        1. trava os agendamentos pendentes selecionados, em ordem
+           cronológica (data_inicio, criado_em)
+        2. lê em uma consulta o consumo (ConsumoKmMensal) de todos os
+           pares (curso, mês) afetados
+        3. valida cada agendamento contra o consumo acumulado do seu par,
+           somando o KM dos que forem aprovados antes dele
+        4. grava status, consumo e versões dos relatórios em lote
+    Agendamentos que ultrapassariam o limite continuam pendentes.
+    """
+
+    @staticmethod
+    def _pendentes(agendamentos):
+        """Agendamentos pendentes da seleção, travados e em ordem."""
+        return list(
+            agendamentos
+            .filter(status='pendente')
+            .select_for_update(of=('self',))
+            .select_related('curso', 'professor')
+            .order_by('data_inicio', 'criado_em')
+        )
+
+    @staticmethod
+    def _gravar(agendamentos, **campos):
+        """Atualiza os agendamentos e invalida os relatórios afetados."""
+        from .models import Agendamento
+
+        campos['atualizado_em'] = timezone.now()
+        Agendamento.objects.filter(
+            pk__in=[agendamento.pk for agendamento in agendamentos]
+        ).update(**campos)
+        for agendamento in agendamentos:
+            for campo, valor in campos.items():
+                setattr(agendamento, campo, valor)
+            agendamento._chave_consumo_original = (
+                agendamento.get_chave_consumo_km()
+            )
+        VersaoRelatorioService.registrar_alteracao({
+            (agendamento.professor.campus_id, agendamento.data_inicio)
+            for agendamento in agendamentos
+        })
+
+    @staticmethod
+    def aprovar(agendamentos):
+        """
+        Aprova os agendamentos pendentes da seleção.
+
+        Args:
+            agendamentos: QuerySet de Agendamento selecionados; os que não
+                estiverem pendentes são ignorados
+
+        Returns:
+            list: Um dict por agendamento pendente, em ordem cronológica:
+                {'agendamento': Agendamento, 'sucesso': bool,
+                 'mensagem': str}
+        """
+        from cursos.models import ConsumoKmMensal
+        from cursos.services import ConsumoKmService
+
+        with transaction.atomic():
+            pendentes = AprovacaoLoteService._pendentes(agendamentos)
+            chaves = {
+                agendamento.pk: ConsumoKmService.chave(
+                    agendamento.curso_id, agendamento.data_inicio,
+                    'aprovado'
+                )
+                for agendamento in pendentes
+            }
+            consumo = ConsumoKmService.obter(
+                set(chaves.values()), travar=True
+            )
+
+            resultados = []
+            aprovados = []
+            for agendamento in pendentes:
+                chave = chaves[agendamento.pk]
+                km_utilizados = consumo[chave]
+                curso = agendamento.curso
+                if (km_utilizados + agendamento.total_km
+                        > curso.limite_km_mensal):
+                    resultados.append({
+                        'agendamento': agendamento,
+                        'sucesso': False,
+                        'mensagem': agendamento.mensagem_limite_km(
+                            curso, km_utilizados, agendamento.total_km
+                        ),
+                    })
+                    continue
+                consumo[chave] = km_utilizados + agendamento.total_km
+                aprovados.append(agendamento)
+                resultados.append({
+                    'agendamento': agendamento,
+                    'sucesso': True,
+                    'mensagem': 'Agendamento aprovado.',
+                })
+
+            if aprovados:
+                AprovacaoLoteService._gravar(
+                    aprovados, status='aprovado', motivo_reprovacao=''
+                )
+                alterados = {
+                    chaves[agendamento.pk] for agendamento in aprovados
+                }
+                ConsumoKmMensal.objects.bulk_create(
+                    [
+                        ConsumoKmMensal(
+                            curso_id=curso_id, ano=ano, mes=mes,
+                            km_utilizados=consumo[(curso_id, ano, mes)],
+                        )
+                        for curso_id, ano, mes in sorted(alterados)
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['curso', 'ano', 'mes'],
+                    update_fields=['km_utilizados', 'atualizado_em'],
+                )
+        return resultados
+
+    @staticmethod
+    def reprovar(agendamentos, motivo):
+        """
+        Reprova os agendamentos pendentes da seleção.
+
+        Agendamentos pendentes não contam no consumo de KM, que não muda.
+
+        Args:
+            agendamentos: QuerySet de Agendamento selecionados
+            motivo: Motivo da reprovação, gravado em todos
+
+        Returns:
+            list: Um dict por agendamento pendente (ver aprovar)
+        """
+        with transaction.atomic():
+            pendentes = AprovacaoLoteService._pendentes(agendamentos)
+            if pendentes:
+                AprovacaoLoteService._gravar(
+                    pendentes, status='reprovado', motivo_reprovacao=motivo
+                )
+        return [
+            {
+                'agendamento': agendamento,
+                'sucesso': True,
+                'mensagem': 'Agendamento reprovado.',
+            }
+            for agendamento in pendentes
+        ]
+
+
+class SerieAgendamentoService:
+    """
+    Criação de uma série de agendamentos recorrentes.
+
+    O agendamento do formulário e seus trajetos são repetidos em cada
+    ocorrência da recorrência (ver RecorrenciaForm). A série não valida
+    as ocorrências uma a uma como agendamentos avulsos. Em uma transação:
+        1. trava o veículo (como ConflitoVeiculoService.reservar)
+        2. busca em uma consulta os agendamentos bloqueantes do veículo
+           que se sobrepõem a alguma ocorrência
+        3. lê em uma consulta o consumo de KM dos pares (curso, mês) e
+           soma, em ordem cronológica, o KM das ocorrências de cada mês
+        4. grava ocorrências e trajetos com bulk_create
+    Se alguma ocorrência for inválida, nada é gravado, a menos que se
+    peça para criar apenas as válidas.
+    """
+
+    @staticmethod
+    def conflitos(veiculo_id, periodos):
+        """
+        Busca os agendamentos do veículo sobrepostos a cada período.
+
+        Args:
+            veiculo_id: ID do veículo
+            periodos: Lista de (data_inicio, data_fim)
+
+        Returns:
+            list: Para cada período, a lista de agendamentos conflitantes
+        """
+        from .models import Agendamento
+
+        sobreposicao = Q()
+        for inicio, fim in periodos:
+            sobreposicao |= Q(data_inicio__lt=fim, data_fim__gt=inicio)
+        existentes = list(Agendamento.objects.filter(
+            sobreposicao,
+            veiculo_id=veiculo_id,
+            status__in=ConflitoVeiculoService.STATUS_BLOQUEANTES,
+        ).order_by('data_inicio'))
+        return [
+            [
+                agendamento for agendamento in existentes
+                if agendamento.data_inicio < fim
+                and agendamento.data_fim > inicio
+            ]
+            for inicio, fim in periodos
+        ]
+
+    @staticmethod
+    def criar(form, formset, recorrencia, usuario):
+        """
+        Cria a série de agendamentos com seus trajetos.
+
+        Args:
+            form: Form de agendamento validado (primeira ocorrência)
+            formset: Formset de trajetos validado
+            recorrencia: RecorrenciaForm validado, com repetição
+            usuario: Usuário que está criando os agendamentos
+
+        Returns:
+            tuple: (agendamentos criados, ocorrências), onde cada
+            ocorrência é um dict com data_inicio, data_fim, conflitos
+            (agendamentos), mensagem (vazia se válida) e criada (bool)
+
+        Raises:
+            ValidationError: Sem trajetos, com número de ocorrências
+                inválido ou em conflito gravado em paralelo
+        """
+        from cursos.services import ConsumoKmService
+
+        from .models import Agendamento, Trajeto
+
+        trajetos = [
+            f.cleaned_data for f in formset
+            if f.cleaned_data and not f.cleaned_data.get('DELETE', False)
+        ]
+        if not trajetos:
+            raise ValidationError(
+                'Adicione pelo menos um trajeto ao agendamento.'
+            )
+        total_km = sum(t.get('quilometragem') or 0 for t in trajetos)
+
+        base = form.save(commit=False)
+        curso = base.curso
+        periodos = [
+            (base.data_inicio + deslocamento, base.data_fim + deslocamento)
+            for deslocamento in recorrencia.deslocamentos(
+                base.data_inicio, base.data_fim
+            )
+        ]
+
+        with transaction.atomic():
+            veiculo = Veiculo.objects.select_for_update().get(
+                pk=base.veiculo_id
+            )
+            conflitos = SerieAgendamentoService.conflitos(
+                veiculo.pk, periodos
+            )
+            chaves = [
+                ConsumoKmService.chave(curso.pk, inicio, 'aprovado')
+                for inicio, _ in periodos
+            ]
+            consumo = ConsumoKmService.obter(set(chaves))
+
+            ocorrencias = []
+            for (inicio, fim), chave, conflitantes in zip(
+                periodos, chaves, conflitos
+            ):
+                mensagem = ''
+                if conflitantes:
+                    mensagem = ConflitoVeiculoService.mensagem(
+                        veiculo, conflitantes
+                    )
+                elif consumo[chave] + total_km > curso.limite_km_mensal:
+                    mensagem = Agendamento.mensagem_limite_km(
+                        curso, consumo[chave], total_km
+                    )
+                else:
+                    consumo[chave] += total_km
+                ocorrencias.append({
+                    'data_inicio': inicio,
+                    'data_fim': fim,
+                    'conflitos': conflitantes,
+                    'mensagem': mensagem,
+                    'criada': False,
+                })
+
+            validas = [o for o in ocorrencias if not o['mensagem']]
+            if not validas or (
+                len(validas) < len(ocorrencias)
+                and not recorrencia.cleaned_data.get('apenas_livres')
+            ):
+                return [], ocorrencias
+
+            serie = uuid.uuid4()
+            agendamentos = [
+                Agendamento(
+                    curso=curso,
+                    professor=usuario,
+                    veiculo=veiculo,
+                    data_inicio=ocorrencia['data_inicio'],
+                    data_fim=ocorrencia['data_fim'],
+                    observacoes=base.observacoes,
+                    status='pendente',
+                    serie=serie,
+                    total_km=total_km,
+                    total_trajetos=len(trajetos),
+                )
+                for ocorrencia in validas
+            ]
+            try:
+                with transaction.atomic():
+                    Agendamento.objects.bulk_create(agendamentos)
+            except IntegrityError as e:
+                if RESTRICAO_CONFLITO not in str(e):
+                    raise
+                raise ValidationError(
+                    f"O veículo {veiculo.placa} já possui um agendamento "
+                    f"em uma das datas da série."
+                )
+            Trajeto.objects.bulk_create([
+                Trajeto(
+                    agendamento=agendamento,
+                    origem=trajeto['origem'],
+                    destino=trajeto['destino'],
+                    data_saida=trajeto['data_saida'] + (
+                        agendamento.data_inicio - base.data_inicio
+                    ),
+                    data_chegada=trajeto['data_chegada'] + (
+                        agendamento.data_inicio - base.data_inicio
+                    ),
+                    quilometragem=trajeto['quilometragem'],
+                    descricao=trajeto['descricao'],
+                )
+                for agendamento in agendamentos
+                for trajeto in trajetos
+            ])
+
+            # bulk_create não dispara os signals: invalida os relatórios
+            # (ocorrências pendentes não entram no consumo de KM)
+            VersaoRelatorioService.registrar_alteracao({
+                (usuario.campus_id, agendamento.data_inicio)
+                for agendamento in agendamentos
+            })
+
+        for ocorrencia, agendamento in zip(validas, agendamentos):
+            ocorrencia['criada'] = True
+            ocorrencia['agendamento'] = agendamento
+        return agendamentos, ocorrencias
+
+
+class DisponibilidadeMotoristaService:
+    """
+    Serviço para disponibilidade de motoristas em trajetos.
+
+    Um motorista está ocupado em um período quando tem um trajeto
+    atribuído que se sobrepõe a ele, em agendamento aprovado ou pendente.
+    A consulta de sobreposição usa o índice (motorista, data_saida,
+    data_chegada) de Trajeto. A atribuição revalida a disponibilidade com
+    a linha do motorista bloqueada, o que serializa atribuições
+    concorrentes do mesmo motorista.
+    """
+
+    @staticmethod
+    def consultar(motorista_id, data_saida, data_chegada, trajeto_id=None):
+        """
+        Monta a consulta de trajetos do motorista sobrepostos ao período.
+
+        Args:
+            motorista_id: ID do motorista
+            data_saida: Início do período
+            data_chegada: Fim do período
+            trajeto_id: Trajeto sendo atribuído (não conflita consigo)
+
+        Returns:
+            QuerySet: Trajetos conflitantes, ordenados pela saída
+        """
+        from .models import Trajeto
+
+        conflitos = Trajeto.objects.filter(
+            motorista_id=motorista_id,
+            data_saida__lt=data_chegada,
+            data_chegada__gt=data_saida,
+            agendamento__status__in=(
+                ConflitoVeiculoService.STATUS_BLOQUEANTES
+            ),
+        )
+        if trajeto_id:
+            conflitos = conflitos.exclude(pk=trajeto_id)
+        return conflitos.order_by('data_saida')
+
+    @staticmethod
+    def consultar_janelas(trajetos):
+        """
+        Monta a consulta de trajetos atribuídos sobrepostos a algum dos
+        trajetos informados.
+
+        Além das janelas, o filtro limita a chegada ao início da primeira
+        janela, o que permite buscar pelo índice (data_chegada,
+        data_saida) de Trajeto só os trajetos que terminam depois dele.
+
+        Args:
+            trajetos: Lista de trajetos (não vazia)
+
+        Returns:
+            QuerySet: Trajetos com motorista, ordenados pela saída
+        """
+        from .models import Trajeto
+
+        janelas = Q()
+        for trajeto in trajetos:
+            janelas |= Q(
+                data_saida__lt=trajeto.data_chegada,
+                data_chegada__gt=trajeto.data_saida,
+            )
+        return Trajeto.objects.filter(
+            janelas,
+            data_chegada__gt=min(t.data_saida for t in trajetos),
+            data_saida__lt=max(t.data_chegada for t in trajetos),
+            motorista__isnull=False,
+            agendamento__status__in=(
+                ConflitoVeiculoService.STATUS_BLOQUEANTES
+            ),
+        ).only(
+            'motorista_id', 'data_saida', 'data_chegada', 'origem', 'destino'
+        ).order_by('data_saida')
+
+    @staticmethod
+    def ocupacao(trajetos):
+        """
+        Motoristas ocupados no período de cada trajeto, em uma consulta.
+
+        Args:
+            trajetos: Trajetos (ex.: os de um agendamento)
+
+        Returns:
+            dict: {trajeto_id: {motorista_id: trajeto conflitante}}
+        """
+        trajetos = list(trajetos)
+        ocupacao = {trajeto.pk: {} for trajeto in trajetos}
+        if not trajetos:
+            return ocupacao
+
+        atribuidos = DisponibilidadeMotoristaService.consultar_janelas(
+            trajetos
+        )
+        for outro in atribuidos:
+            for trajeto in trajetos:
+                if (outro.pk != trajeto.pk
+                        and outro.data_saida < trajeto.data_chegada
+                        and outro.data_chegada > trajeto.data_saida):
+                    ocupacao[trajeto.pk].setdefault(outro.motorista_id, outro)
+        return ocupacao
+
+    @staticmethod
+    def mensagem(motorista, conflitos):
+        """
+        Monta a mensagem de erro de conflito exibida ao usuário.
+
+        Args:
+            motorista: Motorista em conflito
+            conflitos: Trajetos conflitantes
+
+        Returns:
+            str: Mensagem com os trajetos que ocupam o motorista
+        """
+        nome = motorista.get_full_name() or motorista.username
+        mensagem = f"O motorista {nome} já tem trajeto neste período:"
+        for conflito in conflitos:
+            saida = timezone.localtime(conflito.data_saida)
+            chegada = timezone.localtime(conflito.data_chegada)
+            mensagem += (
+                f"\n- {saida.strftime('%d/%m/%Y %H:%M')} até "
+                f"{chegada.strftime('%d/%m/%Y %H:%M')} "
+                f"({conflito.origem} → {conflito.destino})"
+            )
+        return mensagem
+
+    @staticmethod
+    def validar_agendamento(agendamento):
+        """
+        Revalida os motoristas já atribuídos aos trajetos do agendamento.
+
+        Deve ser chamado dentro de transaction.atomic(), depois de gravar
+        os trajetos (ex.: edição que muda os horários). Os motoristas são
+        bloqueados como em atribuir(), em ordem de id.
+
+        Args:
+            agendamento: Agendamento com os trajetos já gravados
+
+        Raises:
+            ValidationError: Se algum motorista ficar com trajetos
+                sobrepostos
+        """
+        if agendamento.status not in ConflitoVeiculoService.STATUS_BLOQUEANTES:
+            return
+        trajetos = list(
+            agendamento.trajetos.filter(motorista__isnull=False)
+            .select_related('motorista')
+        )
+        for motorista_id in sorted({t.motorista_id for t in trajetos}):
+            Usuario.objects.select_for_update().get(pk=motorista_id)
+        for trajeto in trajetos:
+            conflitos = list(DisponibilidadeMotoristaService.consultar(
+                trajeto.motorista_id,
+                trajeto.data_saida,
+                trajeto.data_chegada,
+                trajeto.pk,
+            ))
+            if conflitos:
+                raise ValidationError(
+                    DisponibilidadeMotoristaService.mensagem(
+                        trajeto.motorista, conflitos
+                    )
+                )
+
+    @staticmethod
+    def atribuir(trajeto, motorista):
+        """
+        Atribui o motorista ao trajeto, ou remove o atual se None.
+
+        A verificação e a gravação acontecem na mesma transação, com o
+        motorista bloqueado (SELECT ... FOR UPDATE).
+
+        Args:
+            trajeto: Trajeto a atribuir
+            motorista: Usuario do grupo Motoristas, ou None
+
+        Raises:
+            ValidationError: Se o motorista já tiver trajeto sobreposto
+        """
+        with transaction.atomic():
+            if motorista is not None:
+                Usuario.objects.select_for_update().get(pk=motorista.pk)
+                conflitos = list(DisponibilidadeMotoristaService.consultar(
+                    motorista.pk,
+                    trajeto.data_saida,
+                    trajeto.data_chegada,
+                    trajeto.pk,
+                ))
+                if conflitos:
+                    raise ValidationError(
+                        DisponibilidadeMotoristaService.mensagem(
+                            motorista, conflitos
+                        )
+                    )
+            trajeto.motorista = motorista
+            trajeto.save(update_fields=['motorista'])
+
+
+class EscalaMotoristaService:
+    """
+    Escala automática de motoristas para os trajetos sem motorista.
+
+    Os trajetos aprovados sem motorista de uma janela são percorridos em
+    ordem de saída (particionamento de intervalos guloso). Cada motorista
+    está em um de dois heaps: livres, ordenados pela carga em horas, ou
+    ocupados, ordenados pelo horário em que ficam livres. Cada trajeto
+    recebe o motorista livre do campus do veículo com menor carga, que
+    soma as horas dos trajetos dos últimos ESCALA_CARGA_DIAS dias, os já
+    atribuídos e os desta escala. Trajetos já atribuídos que se sobrepõem
+    ao trajeto tiram o motorista dos livres até o fim desses trajetos.
+
+    São três consultas (trajetos, motoristas e trajetos já atribuídos) e
+    O(n log n) operações; as atribuições são gravadas com um bulk_update.
+    """
+
+    @staticmethod
+    def pendentes(inicio, fim, campus_id=None):
+        """
+        Trajetos aprovados sem motorista com saída na janela.
+
+        Args:
+            inicio: Início da janela (inclusivo)
+            fim: Fim da janela (exclusivo)
+            campus_id: Campus do veículo (None para todos)
+
+        Returns:
+            QuerySet: Trajetos em ordem de saída
+        """
+        from .models import Trajeto
+
+        trajetos = Trajeto.objects.filter(
+            motorista__isnull=True,
+            agendamento__status='aprovado',
+            **filtro_periodo('data_saida', inicio, fim)
+        )
+        if campus_id:
+            trajetos = trajetos.filter(
+                agendamento__veiculo__campus_id=campus_id
+            )
+        return trajetos.select_related(
+            'agendamento__veiculo', 'agendamento__professor'
+        ).order_by('data_saida', 'data_chegada', 'pk')
+
+    @staticmethod
+    def _distribuir(trajetos, motoristas, atribuidos, desde):
+        """
+        Escolhe o motorista de cada trajeto (ver docstring da classe).
+
+        Args:
+            trajetos: Trajetos em ordem de saída
+            motoristas: Motoristas candidatos
+            atribuidos: (motorista_id, data_saida, data_chegada) dos
+                trajetos já atribuídos, em ordem de saída
+            desde: Início do período de carga
+
+        Returns:
+            dict: {trajeto_id: motorista}
+        """
+        por_id = {motorista.pk: motorista for motorista in motoristas}
+        carga = dict.fromkeys(por_id, 0.0)
+        fixos = {motorista_id: [] for motorista_id in por_id}
+        for motorista_id, saida, chegada in atribuidos:
+            carga[motorista_id] += (
+                chegada - max(saida, desde)
+            ).total_seconds() / 3600
+            fixos[motorista_id].append((saida, chegada))
+        proximo = dict.fromkeys(por_id, 0)
+
+        # Por campus: (heap de livres, heap de ocupados)
+        heaps = {}
+        for motorista in motoristas:
+            livres, _ = heaps.setdefault(motorista.campus_id, ([], []))
+            livres.append((carga[motorista.pk], motorista.pk))
+        for livres, _ in heaps.values():
+            heapq.heapify(livres)
+
+        escala = {}
+        for trajeto in trajetos:
+            campus_id = trajeto.agendamento.veiculo.campus_id
+            if campus_id not in heaps:
+                continue
+            livres, ocupados = heaps[campus_id]
+            saida, chegada = trajeto.data_saida, trajeto.data_chegada
+
+            while ocupados and ocupados[0][0] <= saida:
+                _, motorista_id = heapq.heappop(ocupados)
+                heapq.heappush(livres, (carga[motorista_id], motorista_id))
+
+            while livres:
+                _, motorista_id = heapq.heappop(livres)
+                intervalos = fixos[motorista_id]
+                i = proximo[motorista_id]
+                while i < len(intervalos) and intervalos[i][1] <= saida:
+                    i += 1
+                proximo[motorista_id] = i
+                if i < len(intervalos) and intervalos[i][0] < chegada:
+                    heapq.heappush(ocupados, (intervalos[i][1], motorista_id))
+                    continue
+                carga[motorista_id] += (
+                    chegada - saida
+                ).total_seconds() / 3600
+                heapq.heappush(ocupados, (chegada, motorista_id))
+                escala[trajeto.pk] = por_id[motorista_id]
+                break
+        return escala
+
+    @staticmethod
+    def escalar(inicio, fim, campus_id=None, aplicar=False):
+        """
+        Distribui motoristas entre os trajetos sem motorista da janela.
+
+        Args:
+            inicio: Início da janela (inclusivo)
+            fim: Fim da janela (exclusivo)
+            campus_id: Campus do veículo (None para todos)
+            aplicar: Se False, apenas simula (prévia) sem gravar
+
+        Returns:
+            list: Dicts com trajeto e motorista (None se não houver
+            motorista livre no campus), em ordem de saída
+        """
+        from .models import Trajeto
+
+        with transaction.atomic():
+            trajetos = EscalaMotoristaService.pendentes(
+                inicio, fim, campus_id
+            )
+            if aplicar:
+                trajetos = trajetos.select_for_update(of=('self',))
+            trajetos = list(trajetos)
+            if not trajetos:
+                return []
+
+            campi = {
+                trajeto.agendamento.veiculo.campus_id
+                for trajeto in trajetos
+            } - {None}
+            motoristas = Usuario.objects.filter(
+                groups__name='Motoristas',
+                is_active=True,
+                campus_id__in=campi,
+            ).order_by('pk')
+            if aplicar:
+                # Mesmo bloqueio de DisponibilidadeMotoristaService.atribuir
+                motoristas = motoristas.select_for_update(of=('self',))
+            motoristas = list(motoristas)
+
+            desde = inicio - timedelta(days=ESCALA_CARGA_DIAS)
+            atribuidos = Trajeto.objects.filter(
+                motorista__in=motoristas,
+                data_chegada__gt=desde,
+                data_saida__lt=max(
+                    trajeto.data_chegada for trajeto in trajetos
+                ),
+                agendamento__status__in=(
+                    ConflitoVeiculoService.STATUS_BLOQUEANTES
+                ),
+            ).values_list(
+                'motorista_id', 'data_saida', 'data_chegada'
+            ).order_by('data_saida')
+
+            escala = EscalaMotoristaService._distribuir(
+                trajetos, motoristas, atribuidos, desde
+            )
+            for trajeto in trajetos:
+                trajeto.motorista = escala.get(trajeto.pk)
+
+            escalados = [trajeto for trajeto in trajetos if trajeto.motorista]
+            if aplicar and escalados:
+                Trajeto.objects.bulk_update(escalados, ['motorista'])
+                VersaoRelatorioService.registrar_alteracao({
+                    (
+                        trajeto.agendamento.professor.campus_id,
+                        trajeto.agendamento.data_inicio,
+                    )
+                    for trajeto in escalados
+                })
+
+        return [
+            {'trajeto': trajeto, 'motorista': trajeto.motorista}
+            for trajeto in trajetos
+        ]
+
+
+class TotaisTrajetosService:
+    """
+    Serviço para verificação dos totais de trajetos gravados em cada
+    agendamento (total_km e total_trajetos).
+
+    Os totais são mantidos pelos signals de Trajeto; este serviço os
+    compara com os trajetos e corrige divergências causadas por gravações
+    que não disparam signals (bulk_create, update(), SQL direto).
+    """
+
+    @staticmethod
+    def calcular_todos():
+        """
+        Calcula os totais de todos os agendamentos em uma consulta.
+
+        Returns:
+            dict: {agendamento_id: (total_km, total_trajetos)}; apenas
+            agendamentos com trajetos
+        """
+        from .models import Trajeto
+
+        linhas = Trajeto.objects.order_by().values('agendamento').annotate(
+            km=Sum('quilometragem'),
+            quantidade=Count('id'),
+        )
+        return {
+            linha['agendamento']: (linha['km'] or 0, linha['quantidade'])
+            for linha in linhas
+        }
+
+    @staticmethod
+    def verificar():
+        """
+        Compara os totais gravados com os calculados a partir dos trajetos.
+
+        Returns:
+            list: Tuplas (agendamento_id, gravado, calculado) divergentes,
+            com gravado e calculado no formato (total_km, total_trajetos)
+        """
+        from .models import Agendamento
+
+        calculado = TotaisTrajetosService.calcular_todos()
+        gravados = Agendamento.objects.values_list(
+            'id', 'total_km', 'total_trajetos'
+        )
+
+        divergencias = []
+        for agendamento_id, total_km, total_trajetos in gravados.iterator():
+            gravado = (total_km, total_trajetos)
+            esperado = calculado.get(agendamento_id, (0, 0))
+            if gravado != esperado:
+                divergencias.append((agendamento_id, gravado, esperado))
+        return divergencias
+
+    @staticmethod
+    def reconstruir():
+        """
+        Corrige os agendamentos cujos totais divergem dos trajetos.
+
+        Returns:
+            int: Quantidade de agendamentos corrigidos
+        """
+        from .models import Agendamento
+
+        divergencias = TotaisTrajetosService.verificar()
+        with transaction.atomic():
+            Agendamento.objects.bulk_update(
+                [
+                    Agendamento(
+                        id=agendamento_id,
+                        total_km=total_km,
+                        total_trajetos=total_trajetos,
+                    )
+                    for agendamento_id, _, (total_km, total_trajetos)
+                    in divergencias
+                ],
+                ['total_km', 'total_trajetos'],
+                batch_size=500,
+            )
+        if divergencias:
+            VersaoRelatorioService.invalidar_tudo()
+        return len(divergencias)
+
+
 class RelatorioService:
     """
     Serviço para geração de relatórios e estatísticas.
     """
 
+    @staticmethod
+    def contagens_por_status(campo='id', prefixo=''):
+        """
+        Monta as agregações condicionais de contagem por status.
+
+        Args:
+            campo: Campo contado (distinct, para tolerar joins com trajetos)
+            prefixo: Caminho até o agendamento (ex.: 'agendamentos__')
+
+        Returns:
+            dict: Expressões Count para total, aprovado, pendente e reprovado
+        """
+        contagens = {'total': Count(campo, distinct=True)}
+        for status in ('aprovado', 'pendente', 'reprovado'):
+            contagens[status] = Count(
+                campo,
+                distinct=True,
+                filter=Q(**{f'{prefixo}status': status})
+            )
+        return contagens
+
     @staticmethod
     def obter_estatisticas_status(agendamentos):
         """
-        Calcula estatísticas por status.
+        Calcula estatísticas por status em uma única consulta.
 
         Args:
             agendamentos: QuerySet de agendamentos
@@ -237,18 +1096,14 @@ class RelatorioService:
         Returns:
             dict: Estatísticas por status
         """
-        stats = {
-            'total': agendamentos.count(),
-            'aprovado': agendamentos.filter(status='aprovado').count(),
-            'pendente': agendamentos.filter(status='pendente').count(),
-            'reprovado': agendamentos.filter(status='reprovado').count(),
-        }
-        return stats
+        return agendamentos.order_by().aggregate(
+            **RelatorioService.contagens_por_status()
+        )
 
     @staticmethod
     def obter_estatisticas_cursos(agendamentos):
         """
-        Calcula estatísticas de KM por curso.
+        Calcula estatísticas de KM por curso em uma única consulta.
 
         Args:
             agendamentos: QuerySet de agendamentos aprovados
@@ -256,59 +1111,57 @@ class RelatorioService:
         Returns:
             dict: Dicionário com estatísticas por curso
         """
-        cursos_km = {}
-        for agendamento in agendamentos:
-            curso_nome = agendamento.curso.nome
-            km_agendamento = agendamento.get_total_km()
-
-            if curso_nome not in cursos_km:
-                cursos_km[curso_nome] = {
-                    'km_total': 0,
-                    'agendamentos': 0,
-                    'limite_mensal': agendamento.curso.limite_km_mensal
-                }
+        linhas = agendamentos.order_by().values(
+            'curso__nome', 'curso__limite_km_mensal'
+        ).annotate(
+            km_total=Sum('total_km'),
+            total_agendamentos=Count('id')
+        ).order_by('curso__nome')
 
-            cursos_km[curso_nome]['km_total'] += km_agendamento
-            cursos_km[curso_nome]['agendamentos'] += 1
-
-        # Calcular percentual de uso do limite para cada curso
-        for curso_nome, dados in cursos_km.items():
-            if dados['limite_mensal'] > 0:
-                dados['percentual_uso'] = (
-                    dados['km_total'] / dados['limite_mensal']
-                ) * 100
-            else:
-                dados['percentual_uso'] = 0
-            dados['km_disponivel'] = (
-                dados['limite_mensal'] - dados['km_total']
-            )
+        cursos_km = {}
+        for linha in linhas:
+            km_total = linha['km_total'] or 0
+            limite_mensal = linha['curso__limite_km_mensal']
+            cursos_km[linha['curso__nome']] = {
+                'km_total': km_total,
+                'agendamentos': linha['total_agendamentos'],
+                'limite_mensal': limite_mensal,
+                # Percentual de uso do limite do curso
+                'percentual_uso': (
+                    (km_total / limite_mensal) * 100
+                    if limite_mensal > 0 else 0
+                ),
+                'km_disponivel': limite_mensal - km_total,
+            }
 
         return cursos_km
 
     @staticmethod
-    def obter_estatisticas_veiculos(agendamentos, page_size=5):
+    def obter_estatisticas_veiculos(agendamentos):
         """
-        Calcula estatísticas por veículo.
+        Calcula estatísticas por veículo em uma única consulta.
 
         Args:
             agendamentos: QuerySet de agendamentos
-            page_size: Número de itens por página (não paginado aqui)
 
         Returns:
-            QuerySet: Estatísticas por veículo
+            QuerySet: Veículos anotados com total_agendamentos e
+            total_km (apenas aprovados)
         """
-        return agendamentos.values(
-            'veiculo__placa',
-            'veiculo__marca',
-            'veiculo__modelo'
+        return Veiculo.objects.filter(
+            agendamentos__in=agendamentos.order_by().values('id')
         ).annotate(
-            total_agendamentos=Count('id')
-        ).order_by('-total_agendamentos')
+            total_agendamentos=Count('agendamentos', distinct=True),
+            total_km=Sum(
+                'agendamentos__total_km',
+                filter=Q(agendamentos__status='aprovado')
+            )
+        ).order_by('-total_agendamentos', 'placa')
 
     @staticmethod
     def obter_estatisticas_professores(agendamentos):
         """
-        Calcula estatísticas por professor.
+        Calcula estatísticas por professor com uma consulta agrupada.
 
         Args:
             agendamentos: QuerySet de agendamentos
@@ -316,50 +1169,116 @@ class RelatorioService:
         Returns:
             list: Lista com estatísticas por professor
         """
-        professores_stats_list = []
-        professores = Usuario.objects.filter(
-            groups__name='Professores'
-        ).order_by('first_name', 'last_name')
-
-        for professor in professores:
-            professor_agendamentos = agendamentos.filter(
-                professor=professor
-            )
+        contagens = RelatorioService.contagens_por_status()
+        linhas = agendamentos.filter(
+            professor__groups__name='Professores'
+        ).order_by().values('professor').annotate(
+            total_km=Sum('total_km'),
+            **contagens
+        )
+        linhas = list(linhas)
 
-            # Calcular total de KM
-            total_km = sum(
-                ag.get_total_km() for ag in professor_agendamentos
-            )
+        professores = Usuario.objects.in_bulk(
+            [linha['professor'] for linha in linhas]
+        )
 
-            stats = {
+        professores_stats_list = []
+        for linha in linhas:
+            professor = professores[linha['professor']]
+            professores_stats_list.append({
                 'professor': professor,
                 'professor__first_name': professor.first_name,
                 'professor__last_name': professor.last_name,
-                'total_km': total_km,
-                'total_agendamentos': professor_agendamentos.count(),
-                'pendentes': professor_agendamentos.filter(
-                    status='pendente'
-                ).count(),
-                'aprovados': professor_agendamentos.filter(
-                    status='aprovado'
-                ).count(),
-                'reprovados': professor_agendamentos.filter(
-                    status='reprovado'
-                ).count(),
-            }
-
-            # Só incluir professores com agendamentos
-            if stats['total_agendamentos'] > 0:
-                professores_stats_list.append(stats)
-
-        # Ordenar por total de KM (maior para menor)
+                'total_km': linha['total_km'] or 0,
+                'total_agendamentos': linha['total'],
+                'pendentes': linha['pendente'],
+                'aprovados': linha['aprovado'],
+                'reprovados': linha['reprovado'],
+            })
+
+        # Ordenar por total de KM (maior para menor), depois por nome
         professores_stats_list.sort(
-            key=lambda x: x['total_km'],
-            reverse=True
+            key=lambda x: (
+                -x['total_km'],
+                x['professor__first_name'],
+                x['professor__last_name'],
+            )
         )
 
         return professores_stats_list
 
+    @staticmethod
+    def obter_uso_anual_curso(curso, ano):
+        """
+        Calcula o uso mensal e anual de um curso com uma consulta agrupada.
+
+        Os agendamentos do ano são agrupados por TruncMonth (no fuso
+        local), retornando KM aprovado e contagens por status de cada mês.
+        Os totais do ano são somados a partir dos meses, sem consultas
+        adicionais.
+
+        Args:
+            curso: Objeto Curso
+            ano: Ano do relatório
+
+        Returns:
+            dict: {'dados_mensais': lista com os 12 meses,
+            'stats_ano': estatísticas do ano}
+        """
+        from .models import Agendamento
+
+        linhas = Agendamento.objects.filter(
+            curso=curso,
+            **filtro_periodo('data_inicio', *intervalo_ano(ano))
+        ).annotate(
+            mes=TruncMonth('data_inicio')
+        ).order_by().values('mes').annotate(
+            km=Sum('total_km', filter=Q(status='aprovado')),
+            **RelatorioService.contagens_por_status()
+        )
+        por_mes = {linha['mes'].month: linha for linha in linhas}
+
+        limite = curso.limite_km_mensal
+        dados_mensais = []
+        totais = {'total': 0, 'aprovado': 0, 'pendente': 0, 'reprovado': 0}
+        total_km_ano = 0
+
+        for mes_num in range(1, 13):
+            linha = por_mes.get(mes_num, {})
+            km_mes = linha.get('km') or 0
+            for status in totais:
+                totais[status] += linha.get(status, 0)
+            total_km_ano += km_mes
+
+            dados_mensais.append({
+                'mes_numero': mes_num,
+                'mes_nome': NOMES_MESES[mes_num],
+                'km_utilizados': km_mes,
+                'agendamentos': linha.get('aprovado', 0),
+                'pendentes': linha.get('pendente', 0),
+                'reprovados': linha.get('reprovado', 0),
+                'percentual_limite': (
+                    (km_mes / limite) * 100 if limite > 0 else 0
+                ),
+                'km_disponiveis': limite - km_mes,
+            })
+
+        limite_anual = limite * 12
+        stats_ano = {
+            'total_km': total_km_ano,
+            'limite_anual': limite_anual,
+            'percentual_uso_anual': (
+                (total_km_ano / limite_anual) * 100
+                if limite_anual > 0 else 0
+            ),
+            'total_agendamentos': totais['total'],
+            'agendamentos_aprovados': totais['aprovado'],
+            'agendamentos_pendentes': totais['pendente'],
+            'agendamentos_reprovados': totais['reprovado'],
+        }
+
+        return {'dados_mensais': dados_mensais, 'stats_ano': stats_ano}
+
     @staticmethod
     def aplicar_filtros(queryset, filtros):
         """
@@ -379,20 +1298,114 @@ class RelatorioService:
             queryset = queryset.filter(curso_id=filtros['curso_id'])
 
         if filtros.get('professor_search'):
-            search = filtros['professor_search']
+            # Busca indexada em Usuario.busca, resolvida antes nos ids dos
+            # professores (sem varrer usuários e agendamentos juntos)
             queryset = queryset.filter(
-                Q(professor__first_name__icontains=search) |
-                Q(professor__last_name__icontains=search) |
-                Q(professor__email__icontains=search) |
-                Q(professor__username__icontains=search)
+                professor_id__in=BuscaUsuarioService.ids(
+                    filtros['professor_search']
+                )
             )
 
-        if filtros.get('data_inicio'):
+        # Datas (AAAA-MM-DD, inclusivas): começa a partir de data_inicio e
+        # termina até o fim do dia data_fim
+        data_inicio = ler_data(filtros.get('data_inicio'))
+        if data_inicio:
             queryset = queryset.filter(
-                data_inicio__gte=filtros['data_inicio']
+                data_inicio__gte=inicio_do_dia(data_inicio)
             )
 
-        if filtros.get('data_fim'):
-            queryset = queryset.filter(data_fim__lte=filtros['data_fim'])
+        data_fim = ler_data(filtros.get('data_fim'))
+        if data_fim:
+            queryset = queryset.filter(
+                data_fim__lt=inicio_do_dia(data_fim + timedelta(days=1))
+            )
 
         return queryset
+
+
+class VersaoRelatorioService:
+    """
+    Versões dos dados de agendamentos, usadas nas chaves do cache dos
+    fragmentos dos relatórios (ver common/versoes.py).
+
+    Há um contador por campus (do professor) e mês de início do
+    agendamento, um por mês para todos os campi, um por campus para todo o
+    período e um geral. Os signals de Agendamento e Trajeto incrementam os
+    contadores do campus e do mês afetados; gravações em massa, que não
+    disparam signals, chamam invalidar_tudo().
+    """
+
+    # Escopo dos relatórios que abrangem todos os campi
+    TODOS = 'todos'
+
+    CHAVE_GERAL = 'relatorio:versao:geral'
+
+    @staticmethod
+    def chave(campus_id, periodo):
+        """
+        Chave do contador de um campus e período.
+
+        Args:
+            campus_id: Id do campus, TODOS ou None (professor sem campus)
+            periodo: 'AAAA-MM' ou '*' (todo o período)
+        """
+        return f'relatorio:versao:{campus_id or "sem_campus"}:{periodo}'
+
+    @staticmethod
+    def registrar_alteracao(alteracoes):
+        """
+        Incrementa os contadores afetados por gravações de agendamentos.
+
+        Args:
+            alteracoes: Iterável de (campus_id, data_inicio)
+        """
+        chave = VersaoRelatorioService.chave
+        chaves = set()
+        for campus_id, data_inicio in alteracoes:
+            chaves.add(chave(campus_id, '*'))
+            if data_inicio is not None:
+                local = timezone.localtime(data_inicio)
+                periodo = f'{local.year}-{local.month:02d}'
+                chaves.add(chave(campus_id, periodo))
+                chaves.add(chave(VersaoRelatorioService.TODOS, periodo))
+        incrementar(*sorted(chaves))
+
+    @staticmethod
+    def invalidar_tudo():
+        """
+        Invalida os relatórios de todos os campi e períodos.
+
+        Chamado de management commands, só alcança o servidor se o cache
+        for compartilhado (ver common.versoes.cache_compartilhado).
+        """
+        incrementar(VersaoRelatorioService.CHAVE_GERAL)
+
+    @staticmethod
+    def _combinar(*chaves):
+        return '.'.join(str(versao) for versao in versoes(
+            VersaoRelatorioService.CHAVE_GERAL, *chaves
+        ))
+
+    @staticmethod
+    def versao_mes(campus_id, ano, mes):
+        """Versão dos agendamentos de um mês no campus (ou TODOS)."""
+        return VersaoRelatorioService._combinar(
+            VersaoRelatorioService.chave(campus_id, f'{ano}-{mes:02d}')
+        )
+
+    @staticmethod
+    def versao_ano(ano):
+        """Versão dos agendamentos de um ano, em todos os campi."""
+        return VersaoRelatorioService._combinar(*[
+            VersaoRelatorioService.chave(
+                VersaoRelatorioService.TODOS, f'{ano}-{mes:02d}'
+            )
+            for mes in range(1, 13)
+        ])
+
+    @staticmethod
+    def versao_campus(campus_id):
+        """Versão de todos os agendamentos do campus."""
+        return VersaoRelatorioService._combinar(
+            VersaoRelatorioService.chave(campus_id, '*')
+        )
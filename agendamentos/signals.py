@@ -0,0 +1,140 @@
+"""
+Signals de agendamentos.
+
+Mantém sincronizados com agendamentos e trajetos os totais de cada
+agendamento (total_km e total_trajetos) e o consumo mensal de KM por curso
+(cursos.ConsumoKmMensal), e incrementam as versões usadas no cache dos
+relatórios (VersaoRelatorioService). Os handlers rodam na mesma transação
+da gravação que os disparou.
+
+Nas remoções em cascata, o `origin` do post_delete diz o que foi removido:
+os trajetos de um agendamento removido não recalculam nada (o agendamento
+recalcula uma vez), e os agendamentos de um curso removido não regravam o
+consumo, que sai junto com o curso.
+"""
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cursos.models import Curso
+from cursos.services import ConsumoKmService
+from usuarios.models import Usuario
+
+from .models import Agendamento, Trajeto
+from .services import VersaoRelatorioService
+
+
+def _modelo_origem(origin):
+    """Modelo da instância ou queryset cujo delete() disparou o signal."""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _removido_com_agendamento(origin):
+    """
+    Indica se o trajeto foi removido em cascata com o agendamento.
+
+    Trajetos só são removidos em cascata pelo agendamento (diretamente ou
+    via curso, professor ou veículo), então basta a origem não ser Trajeto.
+    """
+    return origin is not None and _modelo_origem(origin) is not Trajeto
+
+
+@receiver(post_save, sender=Agendamento)
+def atualizar_consumo_agendamento(sender, instance, raw=False, **kwargs):
+    """Recalcula os meses afetados por mudança de curso, data ou status."""
+    if raw:
+        return
+
+    chave_original = getattr(instance, '_chave_consumo_original', None)
+    chave_atual = instance.get_chave_consumo_km()
+
+    # O KM vem dos trajetos: se a chave não mudou, o total não mudou
+    if chave_original != chave_atual:
+        ConsumoKmService.recalcular_chaves([chave_original, chave_atual])
+
+    instance._chave_consumo_original = chave_atual
+
+
+@receiver(post_delete, sender=Agendamento)
+def remover_consumo_agendamento(sender, instance, origin=None, **kwargs):
+    """
+    Recalcula o mês de um agendamento aprovado removido.
+
+    Se o curso também está sendo removido, o consumo dele é removido em
+    cascata e não deve ser regravado.
+    """
+    if origin is not None and _modelo_origem(origin) is Curso:
+        return
+    chave = getattr(
+        instance, '_chave_consumo_original', instance.get_chave_consumo_km()
+    )
+    ConsumoKmService.recalcular_chaves([chave])
+
+
+@receiver(post_save, sender=Trajeto)
+@receiver(post_delete, sender=Trajeto)
+def atualizar_consumo_trajeto(sender, instance, raw=False, origin=None,
+                              **kwargs):
+    """
+    Recalcula os totais do agendamento e o consumo do mês quando um
+    trajeto é criado, alterado ou removido.
+
+    Trajetos removidos junto com o agendamento são ignorados: o
+    agendamento recalcula o mês uma vez ao ser removido.
+    """
+    if raw or _removido_com_agendamento(origin):
+        return
+
+    try:
+        agendamento = instance.agendamento
+    except Agendamento.DoesNotExist:
+        return
+
+    agendamento.atualizar_totais_trajetos()
+    ConsumoKmService.recalcular_chaves([agendamento.get_chave_consumo_km()])
+
+
+def _campus_professor(agendamento, professor_id):
+    """Campus do professor, sem consulta se ele já estiver carregado."""
+    if (professor_id == agendamento.professor_id
+            and Agendamento.professor.is_cached(agendamento)):
+        return agendamento.professor.campus_id
+    return Usuario.objects.filter(pk=professor_id).values_list(
+        'campus_id', flat=True
+    ).first()
+
+
+def _registrar_versao(agendamento):
+    """Incrementa as versões do campus e mês atuais e dos anteriores."""
+    atual = agendamento.get_chave_versao()
+    original = getattr(agendamento, '_chave_versao_original', atual)
+    alteracoes = {
+        (_campus_professor(agendamento, professor_id), data_inicio)
+        for professor_id, data_inicio in {atual, original}
+    }
+    VersaoRelatorioService.registrar_alteracao(alteracoes)
+    agendamento._chave_versao_original = atual
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_delete, sender=Agendamento)
+def registrar_versao_agendamento(sender, instance, raw=False, **kwargs):
+    """Invalida os relatórios do campus e mês do agendamento."""
+    if raw:
+        return
+    _registrar_versao(instance)
+
+
+@receiver(post_save, sender=Trajeto)
+@receiver(post_delete, sender=Trajeto)
+def registrar_versao_trajeto(sender, instance, raw=False, origin=None,
+                             **kwargs):
+    """Invalida os relatórios do agendamento do trajeto."""
+    if raw or _removido_com_agendamento(origin):
+        return
+    try:
+        agendamento = instance.agendamento
+    except Agendamento.DoesNotExist:
+        return
+    _registrar_versao(agendamento)
@@ -1,3 +1,885 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from common.periodos import (filtro_periodo, intervalo_ano, intervalo_dias,
+                             intervalo_mes, ler_data_hora)
+from common.testes import PlanoConsultaMixin
+from cursos.models import Curso
+from cursos.services import ConsumoKmService
+from usuarios.models import Usuario
+from veiculos.models import Veiculo
+
+from .exports.geradores import RelatorioExcelGerador
+from .models import Agendamento, Trajeto
+
+
+class PeriodosTest(TestCase):
+
+    def test_intervalo_mes(self):
+        inicio, fim = intervalo_mes(2025, 12)
+        self.assertEqual(timezone.localtime(inicio).date(), date(2025, 12, 1))
+        self.assertEqual(timezone.localtime(fim).date(), date(2026, 1, 1))
+        self.assertEqual(timezone.localtime(inicio).hour, 0)
+
+    def test_intervalo_dias_inclui_o_ultimo_dia(self):
+        inicio, fim = intervalo_dias(date(2025, 3, 10), date(2025, 3, 10))
+        self.assertEqual((fim - inicio).days, 1)
+
+
+class FiltroPeriodoIndiceTest(PlanoConsultaMixin, TestCase):
+    """
+    Os filtros por período devem comparar a coluna pura (sem conversão de
+    fuso) e usar os índices de data.
+    """
+
+    def test_sem_conversao_de_fuso(self):
+        self.assertSemConversaoDeFuso(Agendamento.objects.filter(
+            **filtro_periodo('data_inicio', *intervalo_mes(2025, 3))
+        ))
+
+    def test_relatorio_mensal(self):
+        agendamentos = RelatorioExcelGerador().agendamentos(
+            {'ano': 2025, 'mes': 3}
+        )
+        self.assertUsaIndice(agendamentos, 'agendamento_inicio_idx')
+
+    def test_dashboard(self):
+        from dashboard.views import agendamentos_do_mes
+
+        admin = Usuario.objects.create_superuser(
+            'admin', email='admin@uespi.br', password='x'
+        )
+        professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        for usuario in (admin, professor):
+            with self.subTest(usuario=usuario.username):
+                agendamentos = agendamentos_do_mes(usuario, 2025, 3)
+                self.assertSemConversaoDeFuso(agendamentos)
+                self.assertUsaIndice(agendamentos, 'agendamento_inicio_idx')
+
+    def test_relatorio_anual_curso(self):
+        agendamentos = Agendamento.objects.filter(
+            curso_id=uuid.uuid4(),
+            **filtro_periodo('data_inicio', *intervalo_ano(2025))
+        )
+        self.assertUsaIndice(agendamentos, 'agendamento_curso_inicio_idx')
+
+    def test_consumo_km_mensal(self):
+        trajetos = ConsumoKmService.trajetos_aprovados(uuid.uuid4(), 2025, 3)
+        self.assertSemConversaoDeFuso(trajetos)
+        self.assertUsaIndice(trajetos, 'agendamento_curso_inicio_idx')
+
+    def test_disponibilidade_motorista(self):
+        from .services import DisponibilidadeMotoristaService
+
+        inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        trajetos = DisponibilidadeMotoristaService.consultar(
+            1, inicio, inicio + timedelta(hours=2)
+        )
+        self.assertUsaIndice(trajetos, 'trajeto_motorista_periodo_idx')
+
+    def test_ocupacao_dos_motoristas(self):
+        from .services import DisponibilidadeMotoristaService
+
+        inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        trajetos = [
+            Trajeto(data_saida=inicio + timedelta(hours=horas),
+                    data_chegada=inicio + timedelta(hours=horas + 1))
+            for horas in (0, 4)
+        ]
+        atribuidos = DisponibilidadeMotoristaService.consultar_janelas(
+            trajetos
+        )
+        self.assertUsaIndice(atribuidos, 'trajeto_periodo_idx')
+
+
+class RelatorioCacheTest(TestCase):
+    """
+    As estatísticas dos relatórios ficam em cache até que um agendamento
+    ou trajeto do período seja gravado.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_superuser('admin', password='x')
+        self.client.force_login(self.admin)
+        inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        self.agendamento = Agendamento.objects.create(
+            curso=Curso.objects.create(nome='Agronomia'),
+            professor=self.admin,
+            veiculo=Veiculo.objects.create(
+                placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+                capacidade_passageiros=5,
+            ),
+            data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=2),
+            status='aprovado',
+        )
+        self.parametros = {'ano': 2025, 'mes': 3}
+
+    def relatorio(self, **extra):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                '/agendamentos/relatorios/', {**self.parametros, **extra}
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(consultas)
+
+    def test_estatisticas_em_cache(self):
+        _, consultas_sem_cache = self.relatorio()
+        _, consultas_com_cache = self.relatorio()
+        self.assertLess(consultas_com_cache, consultas_sem_cache)
+
+        # Trocar de página na lista não refaz as estatísticas
+        _, consultas_pagina = self.relatorio(page=2)
+        self.assertEqual(consultas_pagina, consultas_com_cache)
+
+    def test_trajeto_invalida_o_mes(self):
+        self.relatorio()
+        Trajeto.objects.create(
+            agendamento=self.agendamento,
+            origem='Campus',
+            destino='Fazenda-escola',
+            data_saida=self.agendamento.data_inicio,
+            data_chegada=self.agendamento.data_fim,
+            quilometragem=137,
+            descricao='Aula de campo',
+        )
+        html, _ = self.relatorio()
+        self.assertIn('137 km', html)
+
+    def test_mudanca_de_mes_invalida_os_dois_meses(self):
+        total = '<strong>Total de Agendamentos:</strong> {} |'
+        self.assertIn(total.format(1), self.relatorio()[0])
+        self.assertIn(total.format(0), self.relatorio(mes=4)[0])
+
+        self.agendamento.data_inicio += timedelta(days=30)
+        self.agendamento.data_fim += timedelta(days=30)
+        self.agendamento.save()
+
+        self.assertIn(total.format(0), self.relatorio()[0])
+        self.assertIn(total.format(1), self.relatorio(mes=4)[0])
+
+
+class AprovacaoLoteTest(TestCase):
+    """
+    Aprovação em lote valida o limite de KM de cada curso e mês com o
+    consumo acumulado dos agendamentos aprovados antes no mesmo lote.
+    """
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', password='x')
+        self.client.force_login(self.admin)
+        self.curso = Curso.objects.create(
+            nome='Agronomia', limite_km_mensal=100
+        )
+        self.veiculo = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            capacidade_passageiros=5,
+        )
+
+    def agendamento(self, dia, km, status='pendente'):
+        inicio = timezone.make_aware(datetime(2025, 3, dia, 8))
+        agendamento = Agendamento.objects.create(
+            curso=self.curso,
+            professor=self.admin,
+            veiculo=self.veiculo,
+            data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=2),
+            status=status,
+        )
+        Trajeto.objects.create(
+            agendamento=agendamento,
+            origem='Campus',
+            destino='Fazenda-escola',
+            data_saida=inicio,
+            data_chegada=inicio + timedelta(hours=1),
+            quilometragem=km,
+            descricao='Aula de campo',
+        )
+        return agendamento
+
+    def test_aprova_em_ordem_cronologica_ate_o_limite(self):
+        self.agendamento(3, 30, status='aprovado')
+        terceiro = self.agendamento(20, 40)
+        primeiro = self.agendamento(5, 40)
+        segundo = self.agendamento(10, 40)
+
+        response = self.client.post('/agendamentos/aprovacao/lote/', {
+            'acao': 'aprovar',
+            'agendamentos': [terceiro.pk, primeiro.pk, segundo.pk],
+        })
+        self.assertRedirects(response, '/agendamentos/aprovacao/')
+
+        # 30 + 40 = 70 cabe no limite; + 40 ultrapassaria 100
+        status = dict(Agendamento.objects.values_list('pk', 'status'))
+        self.assertEqual(status[primeiro.pk], 'aprovado')
+        self.assertEqual(status[segundo.pk], 'pendente')
+        self.assertEqual(status[terceiro.pk], 'pendente')
+        self.assertEqual(self.curso.get_km_utilizados_mes(2025, 3), 70)
+        self.assertEqual(ConsumoKmService.verificar(), [])
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        from .services import AprovacaoLoteService
+
+        def aprovar(quantidade):
+            ids = [
+                self.agendamento(dia, 1).pk
+                for dia in range(1, quantidade + 1)
+            ]
+            with CaptureQueriesContext(connection) as consultas:
+                resultados = AprovacaoLoteService.aprovar(
+                    Agendamento.objects.filter(pk__in=ids)
+                )
+            self.assertTrue(all(r['sucesso'] for r in resultados))
+            Agendamento.objects.all().delete()
+            return len(consultas)
+
+        self.assertEqual(aprovar(2), aprovar(8))
+
+    def test_reprovacao_exige_motivo(self):
+        pendente = self.agendamento(5, 10)
+        self.client.post('/agendamentos/aprovacao/lote/', {
+            'acao': 'reprovar', 'agendamentos': [pendente.pk],
+        })
+        pendente.refresh_from_db()
+        self.assertEqual(pendente.status, 'pendente')
+
+        self.client.post('/agendamentos/aprovacao/lote/', {
+            'acao': 'reprovar', 'agendamentos': [pendente.pk],
+            'motivo': 'Veículo em manutenção',
+        })
+        pendente.refresh_from_db()
+        self.assertEqual(pendente.status, 'reprovado')
+        self.assertEqual(pendente.motivo_reprovacao, 'Veículo em manutenção')
+
+
+class SerieAgendamentoTest(TestCase):
+    """
+    Séries recorrentes são validadas com uma consulta de sobreposição e
+    uma de consumo, e gravadas com bulk_create.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.client.force_login(self.professor)
+        self.curso = Curso.objects.create(
+            nome='Agronomia', limite_km_mensal=1000
+        )
+        self.veiculo = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            capacidade_passageiros=5,
+        )
+
+    def criar(self, data_fim='2025-03-03T12:00', **recorrencia):
+        dados = {
+            'curso': self.curso.pk,
+            'veiculo': self.veiculo.pk,
+            'data_inicio': '2025-03-03T08:00',
+            'data_fim': data_fim,
+            'observacoes': 'Aula prática',
+            'trajetos-TOTAL_FORMS': 2,
+            'trajetos-INITIAL_FORMS': 0,
+            'trajetos-MIN_NUM_FORMS': 0,
+            'trajetos-MAX_NUM_FORMS': 1000,
+            'trajetos-0-origem': 'Campus',
+            'trajetos-0-destino': 'Fazenda-escola',
+            'trajetos-0-data_saida': '2025-03-03T08:00',
+            'trajetos-0-data_chegada': '2025-03-03T09:00',
+            'trajetos-0-quilometragem': 100,
+            'trajetos-0-descricao': 'Ida',
+            'recorrencia-frequencia': 'semanal',
+        }
+        dados.update({
+            f'recorrencia-{campo}': valor
+            for campo, valor in recorrencia.items()
+        })
+        return self.client.post('/agendamentos/novo/', dados)
+
+    def test_cria_serie_com_trajetos_deslocados(self):
+        response = self.criar(ocorrencias=4)
+        self.assertRedirects(response, '/agendamentos/')
+
+        agendamentos = list(Agendamento.objects.order_by('data_inicio'))
+        self.assertEqual(len(agendamentos), 4)
+        self.assertEqual(len({a.serie for a in agendamentos}), 1)
+        self.assertEqual(
+            [timezone.localtime(a.data_inicio).day for a in agendamentos],
+            [3, 10, 17, 24],
+        )
+        self.assertTrue(all(a.total_km == 100 for a in agendamentos))
+        ultimo = agendamentos[-1].trajetos.get()
+        self.assertEqual(
+            timezone.localtime(ultimo.data_saida),
+            timezone.make_aware(datetime(2025, 3, 24, 8)),
+        )
+
+    def test_conflito_em_uma_data_nao_cria_a_serie(self):
+        inicio = timezone.make_aware(datetime(2025, 3, 17, 10))
+        Agendamento.objects.create(
+            curso=self.curso, professor=self.professor,
+            veiculo=self.veiculo, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=1), status='aprovado',
+        )
+
+        response = self.criar(ocorrencias=4)
+        self.assertEqual(response.status_code, 200)
+        situacao = [
+            bool(ocorrencia['mensagem'])
+            for ocorrencia in response.context['ocorrencias_serie']
+        ]
+        self.assertEqual(situacao, [False, False, True, False])
+        self.assertEqual(Agendamento.objects.count(), 1)
+
+        self.criar(ocorrencias=4, apenas_livres='on')
+        self.assertEqual(Agendamento.objects.count(), 4)
+
+    def test_ocorrencias_mais_longas_que_o_intervalo(self):
+        # 8 dias com repetição semanal: cada ocorrência invadiria a seguinte
+        response = self.criar(data_fim='2025-03-11T12:00', ocorrencias=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'as ocorrências se sobreporiam')
+        self.assertEqual(Agendamento.objects.count(), 0)
+
+        # Exatamente uma semana: as ocorrências só se encostam
+        self.criar(data_fim='2025-03-10T08:00', ocorrencias=3)
+        self.assertEqual(Agendamento.objects.count(), 3)
+
+    def test_limite_de_km_acumulado_no_mes(self):
+        self.curso.limite_km_mensal = 250
+        self.curso.save()
+
+        # 03, 10, 17, 24 e 31/03 e 07/04: só cabem 2 por mês de março
+        self.criar(ate='2025-04-07', apenas_livres='on')
+
+        dias = [
+            timezone.localtime(a.data_inicio).day
+            for a in Agendamento.objects.order_by('data_inicio')
+        ]
+        self.assertEqual(dias, [3, 10, 7])
+
+    def test_consultas_nao_crescem_com_a_serie(self):
+        def consultas(ocorrencias):
+            with CaptureQueriesContext(connection) as capturadas:
+                self.criar(ocorrencias=ocorrencias)
+            Agendamento.objects.all().delete()
+            return len(capturadas)
+
+        # A primeira requisição carrega as listas de referência no cache
+        consultas(2)
+        self.assertEqual(consultas(2), consultas(12))
+
+
+class DisponibilidadeMotoristaTest(TestCase):
+    """
+    Um motorista não pode ser atribuído a trajetos sobrepostos em
+    agendamentos aprovados ou pendentes.
+    """
+
+    def setUp(self):
+        from django.contrib.auth.models import Group
+
+        cache.clear()
+        self.admin = Usuario.objects.create_superuser(
+            'admin', email='admin@uespi.br', password='x'
+        )
+        self.client.force_login(self.admin)
+        grupo = Group.objects.get_or_create(name='Motoristas')[0]
+        self.ana = Usuario.objects.create_user(
+            'ana', email='ana@uespi.br', password='x', first_name='Ana'
+        )
+        self.bruno = Usuario.objects.create_user(
+            'bruno', email='bruno@uespi.br', password='x',
+            first_name='Bruno',
+        )
+        for motorista in (self.ana, self.bruno):
+            motorista.groups.add(grupo)
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.veiculo = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            capacidade_passageiros=5,
+        )
+
+    def trajeto(self, hora, horas=2, motorista=None, status='aprovado',
+                veiculo=None):
+        inicio = timezone.make_aware(datetime(2025, 3, 10, hora))
+        agendamento = Agendamento.objects.create(
+            curso=self.curso, professor=self.admin,
+            veiculo=veiculo or self.veiculo,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=horas),
+            status=status,
+        )
+        return Trajeto.objects.create(
+            agendamento=agendamento, motorista=motorista,
+            origem='Campus', destino='Fazenda-escola',
+            data_saida=inicio, data_chegada=inicio + timedelta(hours=horas),
+            quilometragem=10, descricao='Aula de campo',
+        )
+
+    def atribuir(self, trajeto, motorista):
+        return self.client.post(
+            reverse('agendamentos:atribuir_motorista_trajeto',
+                    args=[trajeto.pk]),
+            {'motorista_id': motorista.pk if motorista else ''},
+            follow=True,
+        )
+
+    def test_rejeita_trajeto_sobreposto(self):
+        self.trajeto(8, motorista=self.ana)
+        novo = self.trajeto(9)
+
+        response = self.atribuir(novo, self.ana)
+
+        novo.refresh_from_db()
+        self.assertIsNone(novo.motorista)
+        self.assertContains(response, 'já tem trajeto neste período')
+
+        self.atribuir(novo, self.bruno)
+        novo.refresh_from_db()
+        self.assertEqual(novo.motorista, self.bruno)
+
+    def test_ignora_reprovados_periodos_encostados_e_o_proprio(self):
+        from .services import DisponibilidadeMotoristaService
+
+        self.trajeto(8, motorista=self.ana, status='reprovado')
+        self.trajeto(6, motorista=self.ana)
+        atual = self.trajeto(8, motorista=self.ana)
+
+        DisponibilidadeMotoristaService.atribuir(atual, self.ana)
+        self.assertFalse(DisponibilidadeMotoristaService.consultar(
+            self.ana.pk, atual.data_saida, atual.data_chegada, atual.pk
+        ).exists())
+
+    def test_detalhe_marca_motoristas_ocupados_em_uma_consulta(self):
+        from .services import DisponibilidadeMotoristaService
+
+        ocupado = self.trajeto(8, motorista=self.ana)
+        trajeto = self.trajeto(9)
+
+        with self.assertNumQueries(1):
+            ocupacao = DisponibilidadeMotoristaService.ocupacao([
+                ocupado, trajeto,
+            ])
+        self.assertEqual(ocupacao[ocupado.pk], {})
+        self.assertEqual(ocupacao[trajeto.pk], {self.ana.pk: ocupado})
+
+        response = self.client.get(
+            reverse('agendamentos:detalhe', args=[trajeto.agendamento_id])
+        )
+        self.assertContains(
+            response, 'Ana — ocupado (10/03 08:00–10/03 10:00)'
+        )
+
+    def test_edicao_do_agendamento_revalida_o_motorista(self):
+        self.trajeto(8, motorista=self.ana)
+        van = Veiculo.objects.create(
+            placa='XYZ9W87', modelo='Sprinter', marca='MB', ano=2021,
+            capacidade_passageiros=15,
+        )
+        trajeto = self.trajeto(11, horas=1, motorista=self.ana,
+                               status='pendente', veiculo=van)
+        agendamento = trajeto.agendamento
+
+        def editar(hora):
+            return self.client.post(
+                reverse('agendamentos:editar', args=[agendamento.pk]),
+                {
+                    'curso': self.curso.pk,
+                    'veiculo': van.pk,
+                    'data_inicio': f'2025-03-10T{hora:02d}:00',
+                    'data_fim': f'2025-03-10T{hora + 1:02d}:00',
+                    'observacoes': '',
+                    'trajetos-TOTAL_FORMS': 1,
+                    'trajetos-INITIAL_FORMS': 1,
+                    'trajetos-MIN_NUM_FORMS': 1,
+                    'trajetos-MAX_NUM_FORMS': 1000,
+                    'trajetos-0-id': trajeto.pk,
+                    'trajetos-0-origem': 'Campus',
+                    'trajetos-0-destino': 'Fazenda-escola',
+                    'trajetos-0-data_saida': f'2025-03-10T{hora:02d}:00',
+                    'trajetos-0-data_chegada':
+                        f'2025-03-10T{hora + 1:02d}:00',
+                    'trajetos-0-quilometragem': 10,
+                    'trajetos-0-descricao': 'Aula de campo',
+                },
+                follow=True,
+            )
+
+        response = editar(9)
+        self.assertContains(response, 'já tem trajeto neste período')
+        trajeto.refresh_from_db()
+        agendamento.refresh_from_db()
+        self.assertEqual(timezone.localtime(trajeto.data_saida).hour, 11)
+        self.assertEqual(timezone.localtime(agendamento.data_inicio).hour, 11)
+
+        editar(13)
+        trajeto.refresh_from_db()
+        self.assertEqual(timezone.localtime(trajeto.data_saida).hour, 13)
+        self.assertEqual(trajeto.motorista, self.ana)
+
+
+class EscalaMotoristaTest(TestCase):
+    """
+    A escala distribui os trajetos aprovados sem motorista entre os
+    motoristas livres do campus do veículo, pela menor carga de horas.
+    """
+
+    def setUp(self):
+        from django.contrib.auth.models import Group
+
+        from campus.models import Campus
+
+        cache.clear()
+        self.central = Campus.objects.create(nome='Central')
+        self.norte = Campus.objects.create(nome='Norte')
+        self.admin = Usuario.objects.create_superuser(
+            'admin', email='admin@uespi.br', password='x'
+        )
+        self.motoristas = Group.objects.get_or_create(name='Motoristas')[0]
+        self.ana = self.motorista('ana', self.central)
+        self.bruno = self.motorista('bruno', self.central)
+        self.carla = self.motorista('carla', self.norte)
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.gol = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            capacidade_passageiros=5, campus=self.central,
+        )
+
+    def motorista(self, nome, campus):
+        usuario = Usuario.objects.create_user(
+            nome, email=f'{nome}@uespi.br', password='x',
+            first_name=nome.title(), campus=campus,
+        )
+        usuario.groups.add(self.motoristas)
+        return usuario
+
+    def trajeto(self, dia, hora, horas, motorista=None, status='aprovado'):
+        inicio = timezone.make_aware(datetime(2025, 3, dia, hora))
+        fim = inicio + timedelta(hours=horas)
+        agendamento = Agendamento.objects.create(
+            curso=self.curso, professor=self.admin, veiculo=self.gol,
+            data_inicio=inicio, data_fim=fim, status=status,
+        )
+        return Trajeto.objects.create(
+            agendamento=agendamento, motorista=motorista,
+            origem='Campus', destino='Fazenda-escola',
+            data_saida=inicio, data_chegada=fim,
+            quilometragem=10, descricao='Aula de campo',
+        )
+
+    def escalar(self, aplicar=False):
+        from .services import EscalaMotoristaService
+
+        inicio = timezone.make_aware(datetime(2025, 3, 10))
+        escala = EscalaMotoristaService.escalar(
+            inicio, inicio + timedelta(days=7), aplicar=aplicar
+        )
+        return [item['motorista'] for item in escala]
+
+    def test_sem_sobreposicao_e_pela_menor_carga(self):
+        # Horas da semana anterior pesam contra a Ana
+        self.trajeto(3, 8, 10, motorista=self.ana)
+        self.trajeto(10, 8, 2)
+        self.trajeto(10, 9, 2)
+        self.trajeto(10, 10, 2)
+        self.trajeto(10, 13, 1)
+        # Reprovados e pendentes não entram na escala
+        self.trajeto(10, 15, 1, status='reprovado')
+        self.trajeto(10, 15, 1, status='pendente')
+
+        self.assertEqual(
+            self.escalar(),
+            [self.bruno, self.ana, self.bruno, self.bruno],
+        )
+
+    def test_respeita_trajetos_ja_atribuidos_e_o_campus(self):
+        self.trajeto(10, 7, 4, motorista=self.ana)
+        self.trajeto(10, 7, 4, motorista=self.bruno, status='pendente')
+        self.trajeto(10, 8, 1)
+        self.trajeto(10, 11, 1)
+
+        # Carla é de outro campus
+        self.assertEqual(self.escalar(), [None, self.ana])
+
+    def test_previa_nao_grava_e_aplicacao_usa_um_update(self):
+        # Saídas distintas: a ordem da escala não depende do pk (UUID)
+        trajetos = [self.trajeto(10, 8, 2), self.trajeto(10, 9, 1)]
+
+        self.assertEqual(self.escalar(), [self.ana, self.bruno])
+        self.assertFalse(
+            Trajeto.objects.filter(motorista__isnull=False).exists()
+        )
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.escalar(aplicar=True)
+        updates = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            {trajeto.pk: trajeto.motorista_id
+             for trajeto in Trajeto.objects.filter(pk__in=[
+                 trajeto.pk for trajeto in trajetos
+             ])},
+            {trajetos[0].pk: self.ana.pk, trajetos[1].pk: self.bruno.pk},
+        )
+
+    def test_acao_do_responsavel_limitada_ao_campus(self):
+        from django.contrib.auth.models import Group
+
+        onibus = Veiculo.objects.create(
+            placa='XYZ9W87', modelo='Ônibus', marca='MB', ano=2020,
+            capacidade_passageiros=40, campus=self.norte,
+        )
+        central = self.trajeto(10, 8, 1)
+        norte = self.trajeto(10, 8, 1)
+        Agendamento.objects.filter(pk=norte.agendamento_id).update(
+            veiculo=onibus
+        )
+        responsavel = Usuario.objects.create_user(
+            'resp', email='resp@uespi.br', password='x', campus=self.central
+        )
+        responsavel.groups.add(Group.objects.get_or_create(
+            name='Responsaveis de Campus'
+        )[0])
+        self.client.force_login(responsavel)
+        url = reverse('agendamentos:escala_motoristas')
+        parametros = {'inicio': '2025-03-10', 'dias': 7,
+                      'campus': self.norte.pk}
+
+        response = self.client.get(url, parametros)
+        self.assertEqual(
+            [item['trajeto'] for item in response.context['escala']],
+            [central],
+        )
+        self.assertFalse(
+            Trajeto.objects.filter(motorista__isnull=False).exists()
+        )
+
+        self.client.post(url, parametros)
+        central.refresh_from_db()
+        norte.refresh_from_db()
+        self.assertEqual(central.motorista, self.ana)
+        self.assertIsNone(norte.motorista)
+
+    def test_comando(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        trajeto = self.trajeto(10, 8, 1)
+        saida = StringIO()
+
+        call_command('escalar_motoristas', '--inicio', '2025-03-10',
+                     '--dry-run', stdout=saida)
+        self.assertIn('1 de 1 trajeto(s)', saida.getvalue())
+        trajeto.refresh_from_db()
+        self.assertIsNone(trajeto.motorista)
+
+        call_command('escalar_motoristas', '--inicio', '2025-03-10',
+                     stdout=StringIO())
+        trajeto.refresh_from_db()
+        self.assertEqual(trajeto.motorista, self.ana)
+
+
+class TotaisTrajetosTest(TestCase):
+    """
+    total_km e total_trajetos acompanham os trajetos do agendamento e
+    não são sobrescritos por um save() com valores desatualizados.
+    """
+
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        self.agendamento = Agendamento.objects.create(
+            curso=Curso.objects.create(nome='Agronomia'),
+            professor=self.professor,
+            veiculo=Veiculo.objects.create(
+                placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            ),
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=4),
+        )
+
+    def trajeto(self, km):
+        return Trajeto.objects.create(
+            agendamento=self.agendamento, origem='Campus',
+            destino='Fazenda-escola',
+            data_saida=self.agendamento.data_inicio,
+            data_chegada=self.agendamento.data_fim,
+            quilometragem=km, descricao='Aula de campo',
+        )
+
+    def assertTotais(self, km, quantidade):
+        gravado = Agendamento.objects.values_list(
+            'total_km', 'total_trajetos'
+        ).get(pk=self.agendamento.pk)
+        self.assertEqual(gravado, (km, quantidade))
+
+    def test_acompanham_trajetos(self):
+        from .services import TotaisTrajetosService
+
+        ida = self.trajeto(40)
+        self.trajeto(60)
+        self.assertTotais(100, 2)
+
+        ida.quilometragem = 50
+        ida.save()
+        self.assertTotais(110, 2)
+
+        ida.delete()
+        self.assertTotais(60, 1)
+        self.assertEqual(TotaisTrajetosService.verificar(), [])
+
+    def test_save_com_instancia_desatualizada_nao_sobrescreve(self):
+        desatualizado = Agendamento.objects.get(pk=self.agendamento.pk)
+        self.trajeto(40)
+        self.assertEqual(desatualizado.total_km, 0)
+
+        desatualizado.observacoes = 'Levar EPIs'
+        desatualizado.save()
+
+        self.assertTotais(40, 1)
+        desatualizado.refresh_from_db()
+        self.assertEqual(desatualizado.observacoes, 'Levar EPIs')
+
+    def test_reconstruir_corrige_divergencias(self):
+        from .services import TotaisTrajetosService
+
+        self.trajeto(40)
+        Agendamento.objects.filter(pk=self.agendamento.pk).update(
+            total_km=999
+        )
+        self.assertEqual(len(TotaisTrajetosService.verificar()), 1)
+
+        TotaisTrajetosService.reconstruir()
+        self.assertTotais(40, 1)
+
+    def test_comando_avisa_sobre_cache_local(self):
+        from io import StringIO
+        from unittest import mock
+
+        from django.core.management import call_command
+
+        self.trajeto(40)
+        for compartilhado in (False, True):
+            with self.subTest(compartilhado=compartilhado):
+                Agendamento.objects.filter(pk=self.agendamento.pk).update(
+                    total_km=999
+                )
+                saida = StringIO()
+                with mock.patch(
+                    'agendamentos.management.commands.'
+                    'recalcular_totais_agendamentos.cache_compartilhado',
+                    return_value=compartilhado,
+                ):
+                    call_command('recalcular_totais_agendamentos',
+                                 stdout=saida)
+                self.assertEqual(
+                    'Cache local' in saida.getvalue(), not compartilhado
+                )
+
+class CalendarioJsonTest(TestCase):
+    """
+    O JSON do calendário responde 304 a validações condicionais e, com
+    `desde`, devolve só o que mudou.
+    """
+
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.client.force_login(self.professor)
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.veiculo = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+        )
+        self.antes = timezone.make_aware(datetime(2025, 3, 1, 12))
+        self.aprovado = self.agendamento(10, 'aprovado')
+        self.pendente = self.agendamento(11, 'pendente')
+        self.agendamento(12, 'reprovado')
+
+    def agendamento(self, dia, status):
+        inicio = timezone.make_aware(datetime(2025, 3, dia, 8))
+        agendamento = Agendamento.objects.create(
+            curso=self.curso, professor=self.professor,
+            veiculo=self.veiculo, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=2), status=status,
+        )
+        Agendamento.objects.filter(pk=agendamento.pk).update(
+            atualizado_em=self.antes
+        )
+        return agendamento
+
+    def get(self, **parametros):
+        cabecalhos = {}
+        for cabecalho in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'):
+            if cabecalho in parametros:
+                cabecalhos[cabecalho] = parametros.pop(cabecalho)
+        return self.client.get(
+            reverse('agendamentos:json'),
+            {'start': '2025-03-01', 'end': '2025-04-01', **parametros},
+            **cabecalhos,
+        )
+
+    def ids(self, eventos):
+        return {str(evento['id']) for evento in eventos}
+
+    def test_status_visiveis(self):
+        self.assertEqual(
+            self.ids(self.get().json()),
+            {str(self.aprovado.pk), str(self.pendente.pk)},
+        )
+        self.client.logout()
+        self.assertEqual(
+            self.ids(self.get().json()), {str(self.aprovado.pk)}
+        )
+
+    def test_etag_e_last_modified(self):
+        response = self.get()
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.get(
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code,
+            304,
+        )
+
+        self.pendente.reprovar('Sem motorista')
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.ids(response.json()), {str(self.aprovado.pk)})
+
+    def test_delta_desde(self):
+        desde = self.antes + timedelta(minutes=1)
+        response = self.get(desde=desde.isoformat())
+        self.assertEqual(response.json()['eventos'], [])
+        self.assertEqual(response.json()['removidos'], [])
+
+        self.pendente.reprovar('Sem motorista')
+        self.aprovado.observacoes = 'Levar EPIs'
+        self.aprovado.save()
+
+        dados = self.get(desde=desde.isoformat()).json()
+        self.assertEqual(self.ids(dados['eventos']), {str(self.aprovado.pk)})
+        self.assertEqual(dados['removidos'], [str(self.pendente.pk)])
+        self.assertIsNotNone(ler_data_hora(dados['ate']))
 
-# Create your tests here.
+        self.assertEqual(self.get(desde='ontem').status_code, 400)
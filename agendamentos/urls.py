@@ -13,7 +13,10 @@ urlpatterns = [
     path('trajetos/<uuid:pk>/atribuir-motorista/',
          views.atribuir_motorista_trajeto,
          name='atribuir_motorista_trajeto'),
+    path('escala-motoristas/', views.escala_motoristas,
+         name='escala_motoristas'),
     path('aprovacao/', views.aprovacao_agendamentos, name='aprovacao'),
+    path('aprovacao/lote/', views.acao_em_lote, name='acao_em_lote'),
     path('<uuid:pk>/aprovar/', views.aprovar_agendamento, name='aprovar'),
     path('<uuid:pk>/reprovar/', views.reprovar_agendamento, name='reprovar'),
     path('json/', views.agendamentos_json, name='json'),
@@ -7,14 +7,14 @@ separando lógica de apresentação das views principais.
 
 import calendar
 
-from django.db import models
 from django.db.models import Count, Sum
 from django.utils import timezone
 
 from common.constants import NOMES_MESES
+from common.periodos import filtro_periodo, intervalo_ano
+from common.referencia import cursos_ativos
 from cursos.models import Curso
 from usuarios.models import Usuario
-from veiculos.models import Veiculo
 
 from .services import RelatorioService
 
@@ -47,15 +47,9 @@ def preparar_dados_relatorio_geral(agendamentos, ano, mes, filtros):
     )
 
     # Veículos com estatísticas
-    veiculos_stats = Veiculo.objects.filter(
-        agendamentos__in=agendamentos
-    ).annotate(
-        total_agendamentos=models.Count('agendamentos'),
-        total_km=Sum(
-            'agendamentos__trajetos__quilometragem',
-            filter=models.Q(agendamentos__status='aprovado')
-        )
-    ).order_by('-total_agendamentos')
+    veiculos_stats = RelatorioService.obter_estatisticas_veiculos(
+        agendamentos
+    )
 
     # Total de KM
     total_km = sum(dados['km_total'] for dados in cursos_km.values())
@@ -84,76 +78,37 @@ def preparar_dados_relatorio_curso(curso, ano):
     Returns:
         dict: Dados preparados para o template
     """
-    from .models import Agendamento
-
-    dados_mensais = []
-    total_km_ano = 0
-
-    for mes_num in range(1, 13):
-        agendamentos_mes = Agendamento.objects.filter(
-            curso=curso,
-            status='aprovado',
-            data_inicio__year=ano,
-            data_inicio__month=mes_num
-        )
-
-        km_mes = sum(a.get_total_km() for a in agendamentos_mes)
-        total_agendamentos_mes = agendamentos_mes.count()
-
-        percentual_limite = 0
-        if curso.limite_km_mensal > 0:
-            percentual_limite = (
-                km_mes / curso.limite_km_mensal
-            ) * 100
-
-        dados_mensais.append({
-            'mes_numero': mes_num,
-            'mes_nome': NOMES_MESES[mes_num],
-            'km_utilizados': km_mes,
-            'agendamentos': total_agendamentos_mes,
-            'percentual_limite': percentual_limite,
-            'km_disponiveis': curso.limite_km_mensal - km_mes
-        })
-
-        total_km_ano += km_mes
-
-    # Agendamentos do ano
-    agendamentos_ano = Agendamento.objects.filter(
-        curso=curso,
-        data_inicio__year=ano
-    ).select_related('professor', 'veiculo').order_by('-data_inicio')
-
-    # Estatísticas do ano
-    limite_anual = curso.limite_km_mensal * 12
-    percentual_uso_anual = 0
-    if limite_anual > 0:
-        percentual_uso_anual = (total_km_ano / limite_anual) * 100
-
-    stats_ano = {
-        'total_km': total_km_ano,
-        'limite_anual': limite_anual,
-        'percentual_uso_anual': percentual_uso_anual,
-        'total_agendamentos': agendamentos_ano.count(),
-        'agendamentos_aprovados': agendamentos_ano.filter(
-            status='aprovado'
-        ).count(),
-        'agendamentos_pendentes': agendamentos_ano.filter(
-            status='pendente'
-        ).count(),
-        'agendamentos_reprovados': agendamentos_ano.filter(
-            status='reprovado'
-        ).count(),
-    }
+    # Meses e totais do ano em uma única consulta agrupada
+    uso_anual = RelatorioService.obter_uso_anual_curso(curso, ano)
 
     return {
         'curso': curso,
         'ano': ano,
-        'dados_mensais': dados_mensais,
-        'agendamentos_ano': agendamentos_ano,
-        'stats_ano': stats_ano,
+        'dados_mensais': uso_anual['dados_mensais'],
+        'agendamentos_ano': obter_agendamentos_ano_curso(curso, ano),
+        'stats_ano': uso_anual['stats_ano'],
     }
 
 
+def obter_agendamentos_ano_curso(curso, ano):
+    """
+    Retorna os agendamentos do curso no ano.
+
+    Args:
+        curso: Objeto Curso
+        ano: Ano do relatório
+
+    Returns:
+        QuerySet: Agendamentos, do mais recente ao mais antigo
+    """
+    from .models import Agendamento
+
+    return Agendamento.objects.filter(
+        curso=curso,
+        **filtro_periodo('data_inicio', *intervalo_ano(ano))
+    ).select_related('professor', 'veiculo').order_by('-data_inicio')
+
+
 def preparar_dados_relatorio_professor(professor, agendamentos):
     """
     Prepara dados para o relatório por professor.
@@ -165,15 +120,18 @@ def preparar_dados_relatorio_professor(professor, agendamentos):
     Returns:
         dict: Dados preparados para o template
     """
-    total_agendamentos = agendamentos.count()
-    total_km = sum(a.get_total_km() for a in agendamentos)
+    # Contagens por status e KM total em uma única consulta
+    agregado = agendamentos.order_by().aggregate(
+        total_km=Sum('total_km'),
+        **RelatorioService.contagens_por_status()
+    )
 
     estatisticas = {
-        'total_agendamentos': total_agendamentos,
-        'pendentes': agendamentos.filter(status='pendente').count(),
-        'aprovados': agendamentos.filter(status='aprovado').count(),
-        'reprovados': agendamentos.filter(status='reprovado').count(),
-        'total_km': total_km,
+        'total_agendamentos': agregado['total'],
+        'pendentes': agregado['pendente'],
+        'aprovados': agregado['aprovado'],
+        'reprovados': agregado['reprovado'],
+        'total_km': agregado['total_km'] or 0,
         'agendamentos_por_curso': agendamentos.values(
             'curso__nome'
         ).annotate(
@@ -221,32 +179,24 @@ def preparar_dados_exportacao_geral(agendamentos, ano, mes, filtros):
 
     # Cursos com KM (para PDF)
     cursos_km_list = Curso.objects.filter(
-        agendamentos__in=agendamentos_aprovados
+        agendamentos__in=agendamentos_aprovados.order_by().values('id')
     ).annotate(
-        total_km=Sum('agendamentos__trajetos__quilometragem')
+        total_km=Sum('agendamentos__total_km'),
+        total_agendamentos=Count('agendamentos', distinct=True)
     ).order_by('-total_km')
 
     # Veículos com estatísticas
-    veiculos_stats = Veiculo.objects.filter(
-        agendamentos__in=agendamentos
-    ).annotate(
-        total_agendamentos=models.Count('agendamentos'),
-        total_km=Sum(
-            'agendamentos__trajetos__quilometragem',
-            filter=models.Q(agendamentos__status='aprovado')
-        )
-    ).order_by('-total_agendamentos')
+    veiculos_stats = RelatorioService.obter_estatisticas_veiculos(
+        agendamentos
+    )
 
     # Professores com KM (para PDF)
     professores_km = Usuario.objects.filter(
         groups__name='Professores',
-        agendamentos__in=agendamentos_aprovados
+        agendamentos__in=agendamentos_aprovados.order_by().values('id')
     ).annotate(
-        total_km=Sum('agendamentos__trajetos__quilometragem'),
-        total_agendamentos=models.Count(
-            'agendamentos',
-            filter=models.Q(agendamentos__status='aprovado')
-        )
+        total_km=Sum('agendamentos__total_km'),
+        total_agendamentos=Count('agendamentos', distinct=True)
     ).order_by('-total_km')
 
     curso_nome = 'Todos os Cursos'
@@ -287,6 +237,22 @@ def obter_opcoes_filtros():
     return {
         'anos_disponiveis': list(range(2023, hoje.year + 2)),
         'meses_disponiveis': MESES_DO_ANO,
-        'cursos_disponiveis': Curso.objects.filter(ativo=True),
+        'cursos_disponiveis': cursos_ativos(),
         'status_choices': Agendamento.STATUS_CHOICES,
     }
+
+
+def chave_cache_relatorio(versao, *filtros):
+    """
+    Monta a chave dos fragmentos de relatório em cache.
+
+    Args:
+        versao: Versão dos dados (VersaoRelatorioService)
+        *filtros: Parâmetros que mudam o conteúdo do fragmento
+
+    Returns:
+        str: Ex.: '1712.1713:2025:3::aprovado'
+    """
+    return ':'.join(
+        '' if parte is None else str(parte) for parte in (versao, *filtros)
+    )
@@ -8,19 +8,22 @@ Estrutura:
 - crud_views.py: Operações CRUD (Create, Read, Update, Delete)
 - aprovacao_views.py: Aprovação e reprovação de agendamentos
 - calendario_views.py: Dados para visualização em calendário
+- escala_views.py: Escala automática de motoristas
 - relatorio_views.py: Relatórios gerais, por curso e por professor
 - export_views.py: Exportação de relatórios (Excel e PDF)
 """
 
 # Importar views de aprovação
-from .aprovacao_views import (aprovacao_agendamentos, aprovar_agendamento,
-                              reprovar_agendamento)
+from .aprovacao_views import (acao_em_lote, aprovacao_agendamentos,
+                              aprovar_agendamento, reprovar_agendamento)
 # Importar views de calendário
 from .calendario_views import agendamentos_json
 # Importar views CRUD
 from .crud_views import (atribuir_motorista_trajeto, criar_agendamento,
                          deletar_agendamento, detalhe_agendamento,
                          editar_agendamento, lista_agendamentos)
+# Importar views da escala de motoristas
+from .escala_views import escala_motoristas
 # Importar views de exportação
 from .export_views import (exportar_curso_excel, exportar_professor_excel,
                            exportar_professor_pdf, exportar_relatorio_excel,
@@ -38,10 +41,13 @@ __all__ = [
     'detalhe_agendamento',
     'deletar_agendamento',
     'atribuir_motorista_trajeto',
+    # Escala de motoristas
+    'escala_motoristas',
     # Aprovação
     'aprovacao_agendamentos',
     'aprovar_agendamento',
     'reprovar_agendamento',
+    'acao_em_lote',
     # Calendário
     'agendamentos_json',
     # Relatórios
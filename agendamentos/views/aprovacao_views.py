@@ -2,21 +2,25 @@
 Views para aprovação e reprovação de agendamentos.
 
 Este módulo contém views que permitem administradores aprovar ou reprovar
-agendamentos pendentes.
+agendamentos pendentes, um a um ou em lote.
 """
 
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
 from common.constants import AGENDAMENTOS_APROVACAO_POR_PAGINA
 from common.decorators import is_responsavel_ou_admin
 from common.pagination import PaginationHelper
-from cursos.models import Curso
+from common.referencia import cursos_ativos
 
 from ..models import Agendamento
-from ..services import AgendamentoService, RelatorioService
+from ..services import (AgendamentoService, AprovacaoLoteService,
+                        RelatorioService)
 
 
 @login_required
@@ -26,7 +30,9 @@ def aprovacao_agendamentos(request):
     # Buscar apenas agendamentos pendentes
     agendamentos = Agendamento.objects.filter(
         status='pendente'
-    ).select_related('curso', 'professor', 'veiculo')
+    ).select_related(
+        'curso', 'professor', 'veiculo'
+    ).prefetch_related('trajetos')
 
     if not request.user.is_administrador():
         agendamentos = agendamentos.filter(
@@ -46,7 +52,9 @@ def aprovacao_agendamentos(request):
     # Paginação com helper
     pagination = PaginationHelper(
         agendamentos,
-        AGENDAMENTOS_APROVACAO_POR_PAGINA
+        AGENDAMENTOS_APROVACAO_POR_PAGINA,
+        cursor=True,
+        estimar_total=True,
     )
     agendamentos_paginados = pagination.get_page(request.GET.get('page'))
 
@@ -54,7 +62,7 @@ def aprovacao_agendamentos(request):
         'agendamentos': agendamentos_paginados,
         'curso_filter': filtros['curso_id'],
         'professor_filter': filtros['professor_search'],
-        'cursos_disponiveis': Curso.objects.filter(ativo=True),
+        'cursos_disponiveis': cursos_ativos(),
     }
 
     return render(request, 'agendamentos/aprovacao.html', context)
@@ -109,3 +117,62 @@ def reprovar_agendamento(request, pk):
 
     context = {'agendamento': agendamento}
     return render(request, 'agendamentos/reprovar.html', context)
+
+
+@login_required
+@user_passes_test(is_responsavel_ou_admin)
+@require_POST
+def acao_em_lote(request):
+    """Aprova ou reprova os agendamentos pendentes selecionados."""
+    acao = request.POST.get('acao')
+    motivo = request.POST.get('motivo', '').strip()
+    destino = 'agendamentos:aprovacao'
+
+    ids = []
+    for valor in request.POST.getlist('agendamentos'):
+        try:
+            ids.append(uuid.UUID(valor))
+        except ValueError:
+            continue
+    if not ids:
+        messages.error(request, 'Selecione ao menos um agendamento.')
+        return redirect(destino)
+
+    agendamentos = Agendamento.objects.filter(pk__in=ids)
+    if not request.user.is_administrador():
+        agendamentos = agendamentos.filter(
+            professor__campus=request.user.campus
+        )
+
+    if acao == 'aprovar':
+        resultados = AprovacaoLoteService.aprovar(agendamentos)
+    elif acao == 'reprovar':
+        if not motivo:
+            messages.error(
+                request,
+                'É necessário informar o motivo da reprovação.'
+            )
+            return redirect(destino)
+        resultados = AprovacaoLoteService.reprovar(agendamentos, motivo)
+    else:
+        messages.error(request, 'Ação inválida.')
+        return redirect(destino)
+
+    sucessos = sum(1 for resultado in resultados if resultado['sucesso'])
+    if sucessos:
+        verbo = 'aprovado(s)' if acao == 'aprovar' else 'reprovado(s)'
+        messages.success(request, f'{sucessos} agendamento(s) {verbo}.')
+    for resultado in resultados:
+        if not resultado['sucesso']:
+            messages.error(
+                request,
+                f"{resultado['agendamento']}: {resultado['mensagem']}"
+            )
+    ignorados = len(ids) - len(resultados)
+    if ignorados > 0:
+        messages.warning(
+            request,
+            f'{ignorados} agendamento(s) ignorado(s): não estão mais '
+            f'pendentes ou não pertencem ao seu campus.'
+        )
+    return redirect(destino)
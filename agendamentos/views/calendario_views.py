@@ -5,103 +5,185 @@ Este módulo fornece dados em formato JSON para integração com
 bibliotecas de calendário front-end.
 """
 
-from django.db.models import Q
-from django.http import JsonResponse
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from common.periodos import ler_data_hora
 
 from ..models import Agendamento
 
+# Mapa de cores por status
+CORES_STATUS = {
+    'pendente': '#ffc107',   # Amarelo
+    'aprovado': '#28a745',   # Verde
+    'reprovado': '#dc3545',  # Vermelho
+}
+
+
+def _status_visiveis(user):
+    """Retorna os status de agendamento visíveis para o usuário."""
+    if not user.is_authenticated:
+        # Não autenticado: apenas aprovados
+        return {'aprovado'}
+    # Autenticados (administradores inclusive): aprovados e pendentes
+    return {'aprovado', 'pendente'}
+
+
+def _serializar_evento(agendamento, user, is_admin):
+    """Monta o evento do calendário conforme a permissão do usuário."""
+    color = CORES_STATUS.get(agendamento.status, '#6c757d')
+
+    if not user.is_authenticated:
+        # Usuário não logado - informações básicas
+        return {
+            'id': agendamento.id,
+            'title': f"{agendamento.curso.nome} - Agendado",
+            'start': agendamento.data_inicio.isoformat(),
+            'end': agendamento.data_fim.isoformat(),
+            'color': color,
+            'extendedProps': {'requires_login': True}
+        }
+
+    is_owner = agendamento.professor_id == user.pk
+
+    # Se não é admin e não é dono, mostra info limitada
+    if not is_owner and not is_admin:
+        return {
+            'id': agendamento.id,
+            'title': f"{agendamento.veiculo.placa} - Reservado",
+            'start': agendamento.data_inicio.isoformat(),
+            'end': agendamento.data_fim.isoformat(),
+            'color': color,
+            'extendedProps': {
+                'is_owner': False,
+                'can_edit': False,
+                'can_view': False,
+                'status': agendamento.status
+            }
+        }
+
+    # Informações completas (admin ou dono)
+    return {
+        'id': agendamento.id,
+        'title': f"{agendamento.curso.nome} - {agendamento.veiculo.placa}",
+        'start': agendamento.data_inicio.isoformat(),
+        'end': agendamento.data_fim.isoformat(),
+        'color': color,
+        'url': f'/agendamentos/{agendamento.id}/',
+        'extendedProps': {
+            'is_owner': is_owner,
+            'can_edit': is_admin or is_owner,
+            'can_view': True,
+            'professor_name': (
+                agendamento.professor.get_full_name() or
+                agendamento.professor.username
+            ),
+            'status': agendamento.status
+        }
+    }
+
 
 def agendamentos_json(request):
-    """Retorna agendamentos em formato JSON para o calendário."""
+    """
+    Retorna agendamentos em formato JSON para o calendário.
+
+    Parâmetros GET (opcionais):
+        start, end: janela visível do calendário (ISO 8601). Apenas
+            agendamentos que se sobrepõem à janela são retornados.
+        desde: modo incremental. Retorna somente agendamentos alterados
+            após o instante informado, no formato
+            ``{'eventos': [...], 'removidos': [ids], 'ate': iso}``, onde
+            ``removidos`` lista os que deixaram de ser visíveis (ex.:
+            reprovados). Exclusões definitivas não aparecem no delta; o
+            cliente deve recarregar a janela periodicamente.
+
+    A resposta traz ETag e Last-Modified (maior ``atualizado_em`` da
+    janela) e responde 304 a If-None-Match/If-Modified-Since válidos.
+    """
     # Administradores veem todos os agendamentos (exceto reprovados)
     # Usuários comuns veem:
     #   - Todos os agendamentos aprovados e pendentes
     #     (para ver disponibilidade e conflitos de veículos)
     #   - Não veem detalhes de agendamentos pendentes de outros
     # Usuários não autenticados veem apenas aprovados
+    user = request.user
+    is_admin = user.is_authenticated and user.is_administrador()
 
-    if not request.user.is_authenticated:
-        # Não autenticado: apenas aprovados
-        agendamentos = Agendamento.objects.filter(status='aprovado')
-    elif request.user.is_administrador():
-        # Admin: todos exceto reprovados
-        agendamentos = Agendamento.objects.exclude(status='reprovado')
+    inicio = ler_data_hora(request.GET.get('start'))
+    fim = ler_data_hora(request.GET.get('end'))
+    desde = ler_data_hora(request.GET.get('desde'))
+    if request.GET.get('desde') and desde is None:
+        return HttpResponseBadRequest('Parâmetro "desde" inválido.')
+
+    agendamentos = Agendamento.objects.all()
+    if inicio:
+        agendamentos = agendamentos.filter(data_fim__gt=inicio)
+    if fim:
+        agendamentos = agendamentos.filter(data_inicio__lt=fim)
+
+    gerado_em = timezone.now()
+    visiveis = _status_visiveis(user)
+    if desde:
+        # No delta também entram os que deixaram de ser visíveis
+        agendamentos = agendamentos.filter(atualizado_em__gt=desde)
     else:
-        # Usuários comuns: aprovados e pendentes de todos
-        agendamentos = Agendamento.objects.filter(
-            Q(status='aprovado') | Q(status='pendente')
-        )
+        agendamentos = agendamentos.filter(status__in=visiveis)
+
+    # Validação condicional com uma única agregação
+    agregado = agendamentos.aggregate(
+        ultima_alteracao=Max('atualizado_em'),
+        total=Count('id')
+    )
+    ultima_alteracao = agregado['ultima_alteracao']
+    chave = ':'.join(str(parte) for parte in (
+        user.pk, is_admin, inicio, fim, desde,
+        ultima_alteracao, agregado['total'],
+    ))
+    etag = '"%s"' % hashlib.md5(chave.encode()).hexdigest()
+
+    resposta_condicional = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=(
+            int(ultima_alteracao.timestamp()) if ultima_alteracao else None
+        ),
+    )
+    if resposta_condicional is not None:
+        return resposta_condicional
 
     agendamentos = agendamentos.select_related(
         'professor', 'curso', 'veiculo'
     )
 
-    # Mapa de cores por status
-    cores_status = {
-        'pendente': '#ffc107',   # Amarelo
-        'aprovado': '#28a745',   # Verde
-        'reprovado': '#dc3545',  # Vermelho
-    }
-
-    eventos = []
-    for agendamento in agendamentos:
-        color = cores_status.get(agendamento.status, '#6c757d')
-
-        if request.user.is_authenticated:
-            # Usuário logado
-            is_owner = agendamento.professor == request.user
-            is_admin = request.user.is_administrador()
-
-            # Se não é admin e não é dono, mostra info limitada
-            if not is_owner and not is_admin:
-                evento = {
-                    'id': agendamento.id,
-                    'title': f"{agendamento.veiculo.placa} - Reservado",
-                    'start': agendamento.data_inicio.isoformat(),
-                    'end': agendamento.data_fim.isoformat(),
-                    'color': color,
-                    'extendedProps': {
-                        'is_owner': False,
-                        'can_edit': False,
-                        'can_view': False,
-                        'status': agendamento.status
-                    }
-                }
-            else:
-                # Informações completas (admin ou dono)
-                title = (
-                    f"{agendamento.curso.nome} - {agendamento.veiculo.placa}"
+    if desde:
+        eventos = []
+        removidos = []
+        for agendamento in agendamentos:
+            if agendamento.status in visiveis:
+                eventos.append(
+                    _serializar_evento(agendamento, user, is_admin)
                 )
+            else:
+                removidos.append(agendamento.id)
+        response = JsonResponse({
+            'eventos': eventos,
+            'removidos': removidos,
+            'ate': gerado_em.isoformat(),
+        })
+    else:
+        eventos = [
+            _serializar_evento(agendamento, user, is_admin)
+            for agendamento in agendamentos
+        ]
+        response = JsonResponse(eventos, safe=False)
 
-                evento = {
-                    'id': agendamento.id,
-                    'title': title,
-                    'start': agendamento.data_inicio.isoformat(),
-                    'end': agendamento.data_fim.isoformat(),
-                    'color': color,
-                    'url': f'/agendamentos/{agendamento.id}/',
-                    'extendedProps': {
-                        'is_owner': is_owner,
-                        'can_edit': is_admin or is_owner,
-                        'can_view': True,
-                        'professor_name': (
-                            agendamento.professor.get_full_name() or
-                            agendamento.professor.username
-                        ),
-                        'status': agendamento.status
-                    }
-                }
-        else:
-            # Usuário não logado - informações básicas
-            evento = {
-                'id': agendamento.id,
-                'title': f"{agendamento.curso.nome} - Agendado",
-                'start': agendamento.data_inicio.isoformat(),
-                'end': agendamento.data_fim.isoformat(),
-                'color': color,
-                'extendedProps': {'requires_login': True}
-            }
-
-        eventos.append(evento)
-
-    return JsonResponse(eventos, safe=False)
+    response['ETag'] = etag
+    if ultima_alteracao:
+        response['Last-Modified'] = http_date(ultima_alteracao.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
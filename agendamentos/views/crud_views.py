@@ -9,14 +9,18 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 
 from common.constants import AGENDAMENTOS_POR_PAGINA
 from common.pagination import PaginationHelper
-from cursos.models import Curso
+from common.referencia import cursos_ativos, motoristas
 
-from ..forms import AgendamentoForm, TrajetoFormSet, TrajetoFormSetEdit
+from ..forms import (AgendamentoForm, RecorrenciaForm, TrajetoFormSet,
+                     TrajetoFormSetEdit)
 from ..models import Agendamento, Trajeto
-from ..services import AgendamentoService, RelatorioService
+from ..services import (AgendamentoService,
+                        DisponibilidadeMotoristaService, RelatorioService,
+                        SerieAgendamentoService)
 
 
 @login_required
@@ -30,7 +34,7 @@ def lista_agendamentos(request):
 
     agendamentos = agendamentos.select_related(
         'curso', 'professor', 'veiculo'
-    )
+    ).prefetch_related('trajetos')
 
     # Aplicar filtros usando service
     filtros = {
@@ -44,7 +48,10 @@ def lista_agendamentos(request):
     agendamentos = agendamentos.order_by('-criado_em')
 
     # Paginação com helper
-    pagination = PaginationHelper(agendamentos, AGENDAMENTOS_POR_PAGINA)
+    pagination = PaginationHelper(
+        agendamentos, AGENDAMENTOS_POR_PAGINA,
+        cursor=True, estimar_total=True
+    )
     agendamentos_paginados = pagination.get_page(request.GET.get('page'))
 
     context = {
@@ -52,41 +59,84 @@ def lista_agendamentos(request):
         'status_filter': filtros['status'],
         'curso_filter': filtros['curso_id'],
         'professor_filter': filtros['professor_search'],
-        'cursos_disponiveis': Curso.objects.filter(ativo=True),
+        'cursos_disponiveis': cursos_ativos(),
     }
 
     return render(request, 'agendamentos/lista.html', context)
 
 
+def _mensagens_serie(request, criados, ocorrencias):
+    """Mensagens do resultado da criação de uma série."""
+    messages.success(
+        request,
+        f'{len(criados)} agendamento(s) criado(s) na série. '
+        f'Aguarde a aprovação do administrador.'
+    )
+    for ocorrencia in ocorrencias:
+        if not ocorrencia['criada']:
+            data = timezone.localtime(ocorrencia['data_inicio'])
+            messages.warning(
+                request,
+                f"{data.strftime('%d/%m/%Y %H:%M')} não foi criado: "
+                f"{ocorrencia['mensagem']}"
+            )
+
+
 @login_required
 def criar_agendamento(request):
     """Cria um novo agendamento."""
+    ocorrencias_serie = None
     if request.method == 'POST':
         form = AgendamentoForm(request.POST, user=request.user)
         formset = TrajetoFormSet(request.POST)
+        recorrencia = RecorrenciaForm(request.POST, prefix='recorrencia')
 
-        if form.is_valid() and formset.is_valid():
+        if (form.is_valid() and formset.is_valid()
+                and recorrencia.is_valid()):
             try:
-                agendamento = AgendamentoService.criar_agendamento(
-                    form=form,
-                    formset=formset,
-                    usuario=request.user
-                )
-                messages.success(
-                    request,
-                    'Agendamento criado com sucesso! '
-                    'Aguarde a aprovação do administrador.'
-                )
-                return redirect('agendamentos:detalhe', pk=agendamento.pk)
+                if recorrencia.repetir:
+                    criados, ocorrencias_serie = (
+                        SerieAgendamentoService.criar(
+                            form=form,
+                            formset=formset,
+                            recorrencia=recorrencia,
+                            usuario=request.user
+                        )
+                    )
+                    if criados:
+                        _mensagens_serie(request, criados, ocorrencias_serie)
+                        return redirect('agendamentos:lista')
+                    messages.error(
+                        request,
+                        'Nenhum agendamento foi criado: há datas com '
+                        'conflito ou acima do limite de KM (veja abaixo).'
+                    )
+                else:
+                    agendamento = AgendamentoService.criar_agendamento(
+                        form=form,
+                        formset=formset,
+                        usuario=request.user
+                    )
+                    messages.success(
+                        request,
+                        'Agendamento criado com sucesso! '
+                        'Aguarde a aprovação do administrador.'
+                    )
+                    return redirect(
+                        'agendamentos:detalhe', pk=agendamento.pk
+                    )
             except ValidationError as e:
-                messages.error(request, str(e))
+                messages.error(request, ' '.join(e.messages))
     else:
         form = AgendamentoForm(user=request.user)
         formset = TrajetoFormSet()
+        recorrencia = RecorrenciaForm(prefix='recorrencia')
 
     context = {
         'form': form,
         'formset': formset,
+        'recorrencia': recorrencia,
+        'ocorrencias_serie': ocorrencias_serie,
         'titulo': 'Novo Agendamento'
     }
     return render(request, 'agendamentos/form.html', context)
@@ -128,7 +178,7 @@ def editar_agendamento(request, pk):
                 )
                 return redirect('agendamentos:detalhe', pk=agendamento.pk)
             except ValidationError as e:
-                messages.error(request, str(e))
+                messages.error(request, ' '.join(e.messages))
     else:
         form = AgendamentoForm(instance=agendamento, user=request.user)
         formset = TrajetoFormSetEdit(instance=agendamento)
@@ -169,25 +219,29 @@ def detalhe_agendamento(request, pk):
         agendamento.professor == request.user
     )
 
-    trajetos = agendamento.trajetos.select_related('motorista').all()
-    total_km = agendamento.get_total_km()
-
-    # Lista de motoristas disponíveis para atribuição (admin/responsável)
-    motoristas = []
-    if is_admin or is_responsavel:
-        from usuarios.models import Usuario
-        motoristas = (
-            Usuario.objects
-            .filter(groups__name='Motoristas', is_active=True)
-            .order_by('first_name', 'last_name')
-        )
+    trajetos = list(agendamento.trajetos.select_related('motorista').all())
+    total_km = agendamento.total_km
+
+    # Motoristas para atribuição (admin/responsável), cada um marcado
+    # com o trajeto que o ocupa na janela de cada trajeto, se houver
+    motoristas_disponiveis = (
+        motoristas() if is_admin or is_responsavel else []
+    )
+    if motoristas_disponiveis:
+        ocupacao = DisponibilidadeMotoristaService.ocupacao(trajetos)
+        for trajeto in trajetos:
+            ocupados = ocupacao[trajeto.pk]
+            trajeto.opcoes_motoristas = [
+                (motorista, ocupados.get(motorista.pk))
+                for motorista in motoristas_disponiveis
+            ]
 
     context = {
         'agendamento': agendamento,
         'trajetos': trajetos,
         'total_km': total_km,
         'can_edit': can_edit,
-        'motoristas': motoristas,
+        'motoristas': motoristas_disponiveis,
         'can_atribuir': is_admin or is_responsavel,
     }
 
@@ -234,15 +288,18 @@ def atribuir_motorista_trajeto(request, pk):
             motorista = get_object_or_404(
                 Usuario, pk=motorista_id, groups__name='Motoristas'
             )
-            trajeto.motorista = motorista
-            nome = motorista.get_full_name() or motorista.username
-            messages.success(
-                request,
-                f'Motorista "{nome}" atribuído ao trajeto com sucesso.',
-            )
+            try:
+                DisponibilidadeMotoristaService.atribuir(trajeto, motorista)
+            except ValidationError as e:
+                messages.error(request, ' '.join(e.messages))
+            else:
+                nome = motorista.get_full_name() or motorista.username
+                messages.success(
+                    request,
+                    f'Motorista "{nome}" atribuído ao trajeto com sucesso.',
+                )
         else:
-            trajeto.motorista = None
+            DisponibilidadeMotoristaService.atribuir(trajeto, None)
             messages.success(request, 'Motorista removido do trajeto.')
-        trajeto.save(update_fields=['motorista'])
 
     return redirect('agendamentos:detalhe', pk=trajeto.agendamento_id)
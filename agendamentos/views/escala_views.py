@@ -0,0 +1,116 @@
+"""
+Views da escala automática de motoristas.
+
+Este módulo contém a view que permite a administradores e responsáveis de
+campus visualizar e aplicar a escala de motoristas dos trajetos aprovados
+sem motorista.
+"""
+
+import uuid
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils import timezone
+
+from common.constants import ESCALA_DIAS_PADRAO, ESCALA_MAX_DIAS
+from common.decorators import is_responsavel_ou_admin
+from common.periodos import intervalo_dias, ler_data
+from common.referencia import campi_ativos
+
+from ..services import EscalaMotoristaService
+
+
+def _parametros_escala(usuario, dados):
+    """
+    Lê a janela e o campus da escala.
+
+    Responsáveis de campus escalam apenas os veículos do próprio campus;
+    administradores podem escolher o campus (padrão: todos).
+
+    Returns:
+        dict: inicio (date), dias e campus_id
+
+    Raises:
+        ValueError: Se algum parâmetro for inválido
+    """
+    inicio = timezone.localdate()
+    if dados.get('inicio'):
+        inicio = ler_data(dados['inicio'])
+        if inicio is None:
+            raise ValueError('Data inicial inválida.')
+    dias = dados.get('dias') or str(ESCALA_DIAS_PADRAO)
+    if not dias.isdigit() or not 1 <= int(dias) <= ESCALA_MAX_DIAS:
+        raise ValueError(f'Informe de 1 a {ESCALA_MAX_DIAS} dias.')
+    campus_id = usuario.campus_id
+    if usuario.is_administrador():
+        try:
+            campus = dados.get('campus')
+            campus_id = uuid.UUID(campus) if campus else None
+        except ValueError:
+            raise ValueError('Campus inválido.')
+    elif campus_id is None:
+        raise ValueError('Seu usuário não está vinculado a um campus.')
+    return {'inicio': inicio, 'dias': int(dias), 'campus_id': campus_id}
+
+
+@login_required
+@user_passes_test(is_responsavel_ou_admin)
+def escala_motoristas(request):
+    """
+    Escala automática de motoristas.
+
+    GET mostra a prévia da escala da janela, sem gravar; POST com os
+    mesmos parâmetros grava as atribuições.
+    """
+    dados = request.POST if request.method == 'POST' else request.GET
+    escala = []
+    try:
+        parametros = _parametros_escala(request.user, dados)
+    except ValueError as e:
+        messages.error(request, str(e))
+        parametros = None
+
+    if parametros:
+        janela = intervalo_dias(
+            parametros['inicio'],
+            parametros['inicio'] + timedelta(days=parametros['dias'] - 1),
+        )
+        escala = EscalaMotoristaService.escalar(
+            *janela,
+            campus_id=parametros['campus_id'],
+            aplicar=request.method == 'POST',
+        )
+
+    if request.method == 'POST':
+        if parametros:
+            escalados = sum(1 for item in escala if item['motorista'])
+            messages.success(
+                request,
+                f'Motoristas atribuídos a {escalados} de {len(escala)} '
+                f'trajeto(s) sem motorista.',
+            )
+        consulta = urlencode({
+            campo: dados[campo]
+            for campo in ('inicio', 'dias', 'campus') if dados.get(campo)
+        })
+        url = reverse('agendamentos:escala_motoristas')
+        return redirect(f'{url}?{consulta}')
+
+    is_admin = request.user.is_administrador()
+    context = {
+        **(parametros or {
+            'inicio': timezone.localdate(),
+            'dias': ESCALA_DIAS_PADRAO,
+            'campus_id': None,
+        }),
+        'escala': escala,
+        'escalados': sum(1 for item in escala if item['motorista']),
+        'is_admin': is_admin,
+        'campi': campi_ativos() if is_admin else [],
+        'max_dias': ESCALA_MAX_DIAS,
+    }
+    return render(request, 'agendamentos/escala_motoristas.html', context)
@@ -2,7 +2,9 @@
 Views para exportação de relatórios em diversos formatos.
 
 Este módulo contém views para exportar relatórios de agendamentos
-em formato Excel e PDF.
+em formato Excel e PDF. As views validam os filtros e enfileiram a
+exportação (ver app exportacoes); os arquivos são gerados pelos geradores
+de agendamentos/exports/geradores.py.
 """
 
 from django.contrib import messages
@@ -10,108 +12,68 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
 
-from common.constants import NOMES_MESES
 from common.decorators import is_responsavel_ou_admin
+from common.referencia import cursos_ativos
 from cursos.models import Curso
+from exportacoes.services import ExportacaoService
+from exportacoes.views import redirecionar_para_exportacao
 
-from ..exports.excel_exporter import (AgendamentosExcelExporter,
-                                      CursoExcelExporter,
-                                      ProfessorExcelExporter)
-from ..exports.pdf_exporter import (AgendamentosPDFExporter,
-                                    ProfessorPDFExporter)
-from ..models import Agendamento
-from ..services import RelatorioService
-from ..view_helpers import (preparar_dados_exportacao_geral,
-                            preparar_dados_relatorio_curso,
-                            preparar_dados_relatorio_professor)
 
-
-@login_required
-@user_passes_test(is_responsavel_ou_admin)
-def exportar_relatorio_excel(request):
-    """Exporta relatório geral em Excel."""
-    # Obter parâmetros
+def _parametros_relatorio_geral(request):
+    """Extrai os parâmetros do relatório geral da requisição."""
     hoje = timezone.now()
-    ano = int(request.GET.get('ano', hoje.year))
-    mes = int(request.GET.get('mes', hoje.month))
-
-    # Buscar agendamentos
-    agendamentos = Agendamento.objects.filter(
-        data_inicio__year=ano,
-        data_inicio__month=mes
-    ).select_related('curso', 'professor', 'veiculo')
-
-    if not request.user.is_administrador():
-        agendamentos = agendamentos.filter(
-            professor__campus=request.user.campus
-        )
-
-    # Aplicar filtros usando service
-    filtros = {
-        'curso_id': request.GET.get('curso'),
+    return {
+        'ano': int(request.GET.get('ano', hoje.year)),
+        'mes': int(request.GET.get('mes', hoje.month)),
+        'curso': request.GET.get('curso'),
         'status': request.GET.get('status'),
     }
-    agendamentos = RelatorioService.aplicar_filtros(agendamentos, filtros)
-
-    # Preparar dados para exportação
-    dados = preparar_dados_exportacao_geral(
-        agendamentos,
-        ano,
-        mes,
-        filtros
-    )
 
-    # Usar exporter para criar arquivo
-    titulo = f'Relatório de Agendamentos - {NOMES_MESES[mes]} {ano}'
-    filename = (
-        f'relatorio_agendamentos_{NOMES_MESES[mes].lower()}_{ano}.xlsx'
+
+def _parametros_professor(request):
+    """
+    Extrai os parâmetros do relatório por professor da requisição.
+
+    Returns:
+        dict ou None: Parâmetros, ou None se nenhum professor foi informado
+    """
+    from usuarios.models import Usuario
+
+    professor_id = request.GET.get('professor')
+    if not professor_id:
+        return None
+
+    professor = get_object_or_404(
+        Usuario,
+        id=professor_id,
+        groups__name='Professores'
     )
+    return {
+        'professor': professor.pk,
+        'data_inicio': request.GET.get('data_inicio'),
+        'data_fim': request.GET.get('data_fim'),
+        'status': request.GET.get('status'),
+    }
 
-    exporter = AgendamentosExcelExporter(dados, titulo, filename)
-    return exporter.exportar()
+
+@login_required
+@user_passes_test(is_responsavel_ou_admin)
+def exportar_relatorio_excel(request):
+    """Exporta relatório geral em Excel."""
+    job = ExportacaoService.solicitar(
+        'relatorio_excel', _parametros_relatorio_geral(request), request.user
+    )
+    return redirecionar_para_exportacao(job)
 
 
 @login_required
 @user_passes_test(is_responsavel_ou_admin)
 def exportar_relatorio_pdf(request):
     """Exporta relatório geral em PDF."""
-    # Obter parâmetros
-    hoje = timezone.now()
-    ano = int(request.GET.get('ano', hoje.year))
-    mes = int(request.GET.get('mes', hoje.month))
-
-    # Buscar agendamentos
-    agendamentos = Agendamento.objects.filter(
-        data_inicio__year=ano,
-        data_inicio__month=mes
-    ).select_related('curso', 'professor', 'veiculo')
-
-    if not request.user.is_administrador():
-        agendamentos = agendamentos.filter(
-            professor__campus=request.user.campus
-        )
-
-    # Aplicar filtros usando service
-    filtros = {
-        'curso_id': request.GET.get('curso'),
-        'status': request.GET.get('status'),
-    }
-    agendamentos = RelatorioService.aplicar_filtros(agendamentos, filtros)
-
-    # Preparar dados para exportação
-    dados = preparar_dados_exportacao_geral(
-        agendamentos,
-        ano,
-        mes,
-        filtros
+    job = ExportacaoService.solicitar(
+        'relatorio_pdf', _parametros_relatorio_geral(request), request.user
     )
-
-    # Usar exporter para criar arquivo
-    titulo = f'Relatório de Agendamentos - {NOMES_MESES[mes]} {ano}'
-    filename = f'relatorio_agendamentos_{NOMES_MESES[mes].lower()}_{ano}.pdf'
-
-    exporter = AgendamentosPDFExporter(dados, titulo, filename)
-    return exporter.exportar()
+    return redirecionar_para_exportacao(job)
 
 
 @login_required
@@ -125,110 +87,43 @@ def exportar_curso_excel(request):
 
     # Obter curso
     if not curso_id:
-        primeiro_curso = Curso.objects.filter(ativo=True).first()
-        if primeiro_curso:
-            curso_id = primeiro_curso.id
+        cursos = cursos_ativos()
+        if cursos:
+            curso_id = cursos[0].id
 
     curso = get_object_or_404(Curso, id=curso_id)
 
-    # Preparar dados usando view_helper
-    dados = preparar_dados_relatorio_curso(curso, ano)
-
-    # Usar exporter para criar arquivo
-    titulo = f'{curso.nome} - {ano}'
-    filename = f'relatorio_{curso.nome.lower().replace(" ", "_")}_{ano}.xlsx'
-
-    exporter = CursoExcelExporter(dados, titulo, filename)
-    return exporter.exportar()
+    job = ExportacaoService.solicitar(
+        'curso_excel', {'curso': curso.pk, 'ano': ano}, request.user
+    )
+    return redirecionar_para_exportacao(job)
 
 
 @login_required
 @user_passes_test(is_responsavel_ou_admin)
 def exportar_professor_excel(request):
     """Exporta relatório por professor em Excel."""
-    from usuarios.models import Usuario
-
-    professor_id = request.GET.get('professor')
-
-    if not professor_id:
+    parametros = _parametros_professor(request)
+    if parametros is None:
         messages.error(request, 'Selecione um professor para exportar.')
         return redirect('agendamentos:relatorio_por_professor')
 
-    professor = get_object_or_404(
-        Usuario,
-        id=professor_id,
-        groups__name='Professores'
+    job = ExportacaoService.solicitar(
+        'professor_excel', parametros, request.user
     )
-
-    # Filtrar agendamentos
-    agendamentos = Agendamento.objects.filter(professor=professor)
-
-    data_inicio = request.GET.get('data_inicio')
-    data_fim = request.GET.get('data_fim')
-    status_filtro = request.GET.get('status')
-
-    if data_inicio:
-        agendamentos = agendamentos.filter(data_inicio__gte=data_inicio)
-    if data_fim:
-        agendamentos = agendamentos.filter(data_fim__lte=data_fim)
-    if status_filtro:
-        agendamentos = agendamentos.filter(status=status_filtro)
-
-    agendamentos = agendamentos.order_by('-data_inicio')
-
-    # Preparar dados usando view_helper
-    dados = preparar_dados_relatorio_professor(professor, agendamentos)
-
-    # Usar exporter para criar arquivo
-    titulo = f'Relatório - {professor.get_full_name()}'
-    nome_professor = professor.get_full_name().lower().replace(" ", "_")
-    filename = f'relatorio_professor_{nome_professor}.xlsx'
-
-    exporter = ProfessorExcelExporter(dados, titulo, filename)
-    return exporter.exportar()
+    return redirecionar_para_exportacao(job)
 
 
 @login_required
 @user_passes_test(is_responsavel_ou_admin)
 def exportar_professor_pdf(request):
     """Exporta relatório por professor em PDF."""
-    from usuarios.models import Usuario
-
-    professor_id = request.GET.get('professor')
-
-    if not professor_id:
+    parametros = _parametros_professor(request)
+    if parametros is None:
         messages.error(request, 'Selecione um professor para exportar.')
         return redirect('agendamentos:relatorio_por_professor')
 
-    professor = get_object_or_404(
-        Usuario,
-        id=professor_id,
-        groups__name='Professores'
+    job = ExportacaoService.solicitar(
+        'professor_pdf', parametros, request.user
     )
-
-    # Filtrar agendamentos
-    agendamentos = Agendamento.objects.filter(professor=professor)
-
-    data_inicio = request.GET.get('data_inicio')
-    data_fim = request.GET.get('data_fim')
-    status_filtro = request.GET.get('status')
-
-    if data_inicio:
-        agendamentos = agendamentos.filter(data_inicio__gte=data_inicio)
-    if data_fim:
-        agendamentos = agendamentos.filter(data_fim__lte=data_fim)
-    if status_filtro:
-        agendamentos = agendamentos.filter(status=status_filtro)
-
-    agendamentos = agendamentos.order_by('-data_inicio')
-
-    # Preparar dados usando view_helper
-    dados = preparar_dados_relatorio_professor(professor, agendamentos)
-
-    # Usar exporter para criar arquivo
-    titulo = f'Relatório - {professor.get_full_name()}'
-    nome_professor = professor.get_full_name().lower().replace(" ", "_")
-    filename = f'relatorio_professor_{nome_professor}.pdf'
-
-    exporter = ProfessorPDFExporter(dados, titulo, filename)
-    return exporter.exportar()
+    return redirecionar_para_exportacao(job)
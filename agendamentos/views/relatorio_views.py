@@ -3,21 +3,36 @@ Views para geração de relatórios de agendamentos.
 
 Este módulo contém views para visualização de relatórios gerais,
 por curso e por professor.
+
+As estatísticas dos relatórios ficam em fragmentos de template em cache
+({% cache %}), com a versão dos dados (VersaoRelatorioService) e os
+filtros na chave. Os dados dos fragmentos são passados como objetos
+preguiçosos (SimpleLazyObject): com o fragmento em cache, nem as
+agregações nem a renderização são refeitas, e a troca de página da
+lista de agendamentos não recalcula as estatísticas.
 """
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
 from common.constants import (AGENDAMENTOS_RELATORIO_POR_PAGINA,
-                              PROFESSORES_POR_PAGINA, VEICULOS_POR_PAGINA)
+                              NOMES_MESES, PROFESSORES_POR_PAGINA,
+                              VEICULOS_POR_PAGINA)
 from common.decorators import is_administrador, is_responsavel_ou_admin
 from common.pagination import PaginationHelper
+from common.periodos import filtro_periodo, intervalo_mes
+from common.referencia import chave_versao, cursos_ativos
+from common.versoes import versoes
 from cursos.models import Curso
 
 from ..models import Agendamento
-from ..services import RelatorioService
-from ..view_helpers import (obter_opcoes_filtros,
+from ..services import RelatorioService, VersaoRelatorioService
+from ..view_helpers import (chave_cache_relatorio,
+                            obter_agendamentos_ano_curso,
+                            obter_opcoes_filtros,
                             preparar_dados_relatorio_curso,
                             preparar_dados_relatorio_geral,
                             preparar_dados_relatorio_professor)
@@ -34,11 +49,13 @@ def relatorio_geral(request):
 
     # Buscar agendamentos base
     agendamentos = Agendamento.objects.filter(
-        data_inicio__year=ano,
-        data_inicio__month=mes
+        **filtro_periodo('data_inicio', *intervalo_mes(ano, mes))
     ).select_related('curso', 'professor', 'veiculo')
 
-    if not request.user.is_administrador():
+    if request.user.is_administrador():
+        escopo = VersaoRelatorioService.TODOS
+    else:
+        escopo = request.user.campus_id
         agendamentos = agendamentos.filter(
             professor__campus=request.user.campus
         )
@@ -50,8 +67,19 @@ def relatorio_geral(request):
     }
     agendamentos = RelatorioService.aplicar_filtros(agendamentos, filtros)
 
-    # Preparar dados usando view_helper
-    dados = preparar_dados_relatorio_geral(agendamentos, ano, mes, filtros)
+    # Chave dos fragmentos: versão dos agendamentos do mês e das listas de
+    # cursos e veículos (nomes e limites exibidos nas tabelas)
+    chave_cache = chave_cache_relatorio(
+        VersaoRelatorioService.versao_mes(escopo, ano, mes),
+        *versoes(chave_versao('cursos'), chave_versao('veiculos')),
+        escopo, ano, mes, filtros['curso_id'], filtros['status'],
+    )
+
+    # Preparar dados usando view_helper (só se o fragmento não estiver em
+    # cache)
+    dados = SimpleLazyObject(lambda: preparar_dados_relatorio_geral(
+        agendamentos, ano, mes, filtros
+    ))
 
     # Paginação dos agendamentos principais
     agendamentos_ordenados = agendamentos.order_by('-criado_em')
@@ -62,38 +90,38 @@ def relatorio_geral(request):
     agendamentos_paginados = pagination.get_page(request.GET.get('page'))
 
     # Paginação de veículos
-    veiculos_pagination = PaginationHelper(
+    page_veiculos = request.GET.get('page_veiculos')
+    veiculos_paginados = SimpleLazyObject(lambda: PaginationHelper(
         dados['veiculos_stats'],
         VEICULOS_POR_PAGINA
-    )
-    veiculos_paginados = veiculos_pagination.get_page(
-        request.GET.get('page_veiculos')
-    )
+    ).get_page(page_veiculos))
 
     # Paginação de professores
-    professores_pagination = PaginationHelper(
+    page_professores = request.GET.get('page_professores')
+    professores_paginados = SimpleLazyObject(lambda: PaginationHelper(
         dados['professores_stats'],
         PROFESSORES_POR_PAGINA
-    )
-    professores_paginados = professores_pagination.get_page(
-        request.GET.get('page_professores')
-    )
+    ).get_page(page_professores))
 
     # Obter opções para filtros
     opcoes_filtros = obter_opcoes_filtros()
 
     # Montar context
     context = {
-        'stats_status': dados['stats_status'],
-        'cursos_km': dados['cursos_km'],
-        'total_km': dados['total_km'],
+        'stats_status': SimpleLazyObject(lambda: dados['stats_status']),
+        'cursos_km': SimpleLazyObject(lambda: dados['cursos_km']),
+        'total_km': SimpleLazyObject(lambda: dados['total_km']),
         'veiculos_stats': veiculos_paginados,
         'professores_stats': professores_paginados,
+        'page_veiculos': page_veiculos,
+        'page_professores': page_professores,
+        'chave_cache': chave_cache,
+        'cache_relatorio_segundos': settings.CACHE_RELATORIOS_SEGUNDOS,
         'agendamentos': agendamentos_paginados,
-        'total_agendamentos_periodo': agendamentos_ordenados.count(),
+        'total_agendamentos_periodo': pagination.count,
         'ano_atual': ano,
         'mes_atual': mes,
-        'nome_mes': dados['nome_mes'],
+        'nome_mes': NOMES_MESES[mes],
         'curso_atual': filtros['curso_id'],
         'status_atual': filtros['status'],
         'anos_disponiveis': opcoes_filtros['anos_disponiveis'],
@@ -116,19 +144,28 @@ def relatorio_por_curso(request):
 
     # Se não especificar curso, pegar o primeiro ativo
     if not curso_id:
-        primeiro_curso = Curso.objects.filter(ativo=True).first()
-        if primeiro_curso:
-            curso_id = primeiro_curso.id
+        cursos = cursos_ativos()
+        if cursos:
+            curso_id = cursos[0].id
 
     curso = get_object_or_404(Curso, id=curso_id)
 
-    # Preparar dados usando view_helper
-    dados = preparar_dados_relatorio_curso(curso, ano)
+    # Chave dos fragmentos: versão dos agendamentos do ano e o curso como
+    # gravado (nome e limite mensal)
+    chave_cache = chave_cache_relatorio(
+        VersaoRelatorioService.versao_ano(ano),
+        curso.pk, curso.atualizado_em.timestamp(), ano,
+    )
+
+    # Preparar dados usando view_helper (só se o fragmento não estiver em
+    # cache)
+    dados = SimpleLazyObject(
+        lambda: preparar_dados_relatorio_curso(curso, ano)
+    )
 
     # Aplicar paginação aos agendamentos do ano
-    agendamentos_ordenados = dados['agendamentos_ano'].order_by('-data_inicio')
     pagination = PaginationHelper(
-        agendamentos_ordenados,
+        obter_agendamentos_ano_curso(curso, ano),
         AGENDAMENTOS_RELATORIO_POR_PAGINA
     )
     agendamentos_paginados = pagination.get_page(request.GET.get('page'))
@@ -139,10 +176,12 @@ def relatorio_por_curso(request):
     context = {
         'curso': curso,
         'ano': ano,
-        'dados_mensais': dados['dados_mensais'],
+        'dados_mensais': SimpleLazyObject(lambda: dados['dados_mensais']),
         'agendamentos_ano': agendamentos_paginados,
-        'total_agendamentos_ano': agendamentos_ordenados.count(),
-        'stats_ano': dados['stats_ano'],
+        'total_agendamentos_ano': pagination.count,
+        'stats_ano': SimpleLazyObject(lambda: dados['stats_ano']),
+        'chave_cache': chave_cache,
+        'cache_relatorio_segundos': settings.CACHE_RELATORIOS_SEGUNDOS,
         'cursos_disponiveis': opcoes_filtros['cursos_disponiveis'],
         'anos_disponiveis': opcoes_filtros['anos_disponiveis'],
     }
@@ -173,7 +212,8 @@ def relatorio_por_professor(request):
     # Professor selecionado
     professor_selecionado = None
     agendamentos = Agendamento.objects.none()
-    dados = {}
+    estatisticas = {}
+    chave_cache = ''
 
     if professor_id:
         try:
@@ -187,21 +227,30 @@ def relatorio_por_professor(request):
                 professor=professor_selecionado
             )
 
-            if data_inicio:
-                agendamentos = agendamentos.filter(
-                    data_inicio__gte=data_inicio
-                )
-            if data_fim:
-                agendamentos = agendamentos.filter(data_fim__lte=data_fim)
-            if status:
-                agendamentos = agendamentos.filter(status=status)
+            agendamentos = RelatorioService.aplicar_filtros(agendamentos, {
+                'data_inicio': data_inicio,
+                'data_fim': data_fim,
+                'status': status,
+            })
 
             agendamentos = agendamentos.order_by('-criado_em')
 
-            # Preparar dados usando view_helper
-            dados = preparar_dados_relatorio_professor(
-                professor_selecionado,
-                agendamentos
+            # Chave dos fragmentos: versão dos agendamentos do campus do
+            # professor e os filtros
+            chave_cache = chave_cache_relatorio(
+                VersaoRelatorioService.versao_campus(
+                    professor_selecionado.campus_id
+                ),
+                professor_selecionado.pk, data_inicio, data_fim, status,
+            )
+
+            # Preparar dados usando view_helper (só se o fragmento não
+            # estiver em cache)
+            estatisticas = SimpleLazyObject(
+                lambda: preparar_dados_relatorio_professor(
+                    professor_selecionado,
+                    agendamentos
+                )['estatisticas']
             )
 
         except Usuario.DoesNotExist:
@@ -218,7 +267,9 @@ def relatorio_por_professor(request):
         'professores': professores,
         'professor_selecionado': professor_selecionado,
         'agendamentos': agendamentos_paginados,
-        'estatisticas': dados.get('estatisticas', {}),
+        'estatisticas': estatisticas,
+        'chave_cache': chave_cache,
+        'cache_relatorio_segundos': settings.CACHE_RELATORIOS_SEGUNDOS,
         'professor_filter': professor_id,
         'data_inicio_filter': data_inicio,
         'data_fim_filter': data_fim,
@@ -0,0 +1,18 @@
+"""
+Sinais do app campus.
+
+Invalida a lista de campi ativos em cache (ver common/referencia.py).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.referencia import invalidar
+
+from .models import Campus
+
+
+@receiver(post_save, sender=Campus)
+@receiver(post_delete, sender=Campus)
+def invalidar_referencia(sender, **kwargs):
+    invalidar('campi')
@@ -0,0 +1,325 @@
+"""
+Benchmark das views mais pesadas.
+
+Popula um conjunto de dados fixo (load_sample_data --scale com semente
+fixa), executa cada cenário pelo test client e mede consultas SQL,
+latência (p50/p95/máximo) e pico de memória Python (tracemalloc). Os
+resultados são comparados com a linha de base versionada em
+common/benchmark_baseline.json.
+
+Usado pelo comando benchmark_views e pelo teste BenchmarkViewsTest
+(dashboard/tests.py).
+
+Regras de comparação:
+    consultas: falha se passar da linha de base (o número de consultas
+        não depende da máquina)
+    memória: falha se passar da linha de base mais a tolerância
+    latência (p95): falha se passar da linha de base mais a tolerância;
+        sem tolerância a latência não é comparada, já que varia entre
+        máquinas
+"""
+
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from .metricas import _quantil
+from .middleware import ContadorConsultas
+
+ESCALA = 0.002
+SEMENTE = 42
+
+ARQUIVO_BASELINE = Path(__file__).with_name('benchmark_baseline.json')
+
+TOLERANCIA_MEMORIA = 0.25
+
+# Cenários: nome → (URL, função que monta os parâmetros GET a partir das
+# referências do conjunto de dados, se é uma exportação)
+CENARIOS = {
+    'dashboard': ('/', lambda ref: {}, False),
+    'agendamentos_json': (
+        '/agendamentos/json/',
+        lambda ref: {'start': ref['inicio_mes'], 'end': ref['fim_mes']},
+        False,
+    ),
+    'relatorio_geral': ('/agendamentos/relatorios/', lambda ref: {}, False),
+    'relatorio_por_curso': (
+        '/agendamentos/relatorios/curso/',
+        lambda ref: {'curso': ref['curso']},
+        False,
+    ),
+    'relatorio_por_professor': (
+        '/agendamentos/relatorios/professor/',
+        lambda ref: {'professor': ref['professor']},
+        False,
+    ),
+    'aprovacao_agendamentos': ('/agendamentos/aprovacao/',
+                               lambda ref: {}, False),
+    'boletim_diario': (
+        '/frotas/boletim/',
+        lambda ref: {'periodo': '30dias'},
+        False,
+    ),
+    'exportar_relatorio_excel': (
+        '/agendamentos/relatorios/exportar/excel/', lambda ref: {}, True,
+    ),
+    'exportar_relatorio_pdf': (
+        '/agendamentos/relatorios/exportar/pdf/', lambda ref: {}, True,
+    ),
+    'exportar_curso_excel': (
+        '/agendamentos/relatorios/curso/exportar/excel/',
+        lambda ref: {'curso': ref['curso']},
+        True,
+    ),
+    'exportar_professor_pdf': (
+        '/agendamentos/relatorios/professor/exportar/pdf/',
+        lambda ref: {'professor': ref['professor']},
+        True,
+    ),
+    'exportar_boletim_pdf': (
+        '/frotas/boletim/exportar/pdf/',
+        lambda ref: {'periodo': '30dias', 'veiculo': ref['veiculo']},
+        True,
+    ),
+}
+
+
+class FalhaCenario(Exception):
+    """Cenário que não respondeu como esperado (erro ou redirecionamento)."""
+
+
+def popular_dados():
+    """Cria o conjunto de dados do benchmark no banco atual."""
+    call_command(
+        'load_sample_data',
+        scale=ESCALA,
+        seed=SEMENTE,
+        administradores=1,
+        stdout=io.StringIO(),
+    )
+
+
+def _referencias():
+    """Ids e datas usados nos parâmetros dos cenários."""
+    from cursos.models import Curso
+    from usuarios.models import Usuario
+    from veiculos.models import Veiculo
+
+    hoje = timezone.localdate()
+    inicio_mes = hoje.replace(day=1)
+    fim_mes = (inicio_mes + timedelta(days=31)).replace(day=1)
+    return {
+        'curso': Curso.objects.order_by('nome').values_list(
+            'pk', flat=True
+        ).first(),
+        'professor': Usuario.objects.filter(
+            groups__name='Professores'
+        ).order_by('username').values_list('pk', flat=True).first(),
+        'veiculo': Veiculo.objects.order_by('placa').values_list(
+            'pk', flat=True
+        ).first(),
+        'inicio_mes': inicio_mes.isoformat(),
+        'fim_mes': fim_mes.isoformat(),
+    }
+
+
+def _requisitar(cliente, url, parametros, exportacao):
+    """
+    Executa uma requisição e confere a resposta.
+
+    Páginas devem responder 200; exportações (processadas na hora) devem
+    redirecionar para o download.
+
+    Raises:
+        FalhaCenario: Se a resposta não for a esperada
+    """
+    response = cliente.get(url, parametros)
+    if exportacao:
+        destino = response.get('Location', '')
+        if response.status_code != 302 or '/baixar/' not in destino:
+            raise FalhaCenario(
+                f'{url} respondeu {response.status_code} ({destino}); '
+                f'a exportação não foi concluída'
+            )
+    elif response.status_code != 200:
+        raise FalhaCenario(f'{url} respondeu {response.status_code}')
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def medir_cenario(cliente, url, parametros, exportacao, repeticoes):
+    """
+    Mede um cenário.
+
+    Faz uma execução de aquecimento, `repeticoes` execuções cronometradas
+    (contando consultas) e uma execução com tracemalloc para o pico de
+    memória, medido à parte para não distorcer a latência.
+
+    Returns:
+        dict: consultas, latencia_p50_ms, latencia_p95_ms,
+        latencia_max_ms, memoria_pico_kb
+    """
+    from exportacoes.models import ExportacaoJob
+
+    def executar():
+        # Sem o job anterior a exportação é gerada de novo
+        if exportacao:
+            ExportacaoJob.objects.all().delete()
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contador):
+            _requisitar(cliente, url, parametros, exportacao)
+        return contador.consultas, time.perf_counter() - inicio
+
+    executar()
+
+    consultas = 0
+    tempos = []
+    for _ in range(repeticoes):
+        n, duracao = executar()
+        consultas = max(consultas, n)
+        tempos.append(duracao * 1000)
+    tempos.sort()
+
+    tracemalloc.start()
+    try:
+        executar()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'consultas': consultas,
+        'latencia_p50_ms': round(_quantil(tempos, 0.5), 1),
+        'latencia_p95_ms': round(_quantil(tempos, 0.95), 1),
+        'latencia_max_ms': round(tempos[-1], 1),
+        'memoria_pico_kb': round(pico / 1024),
+    }
+
+
+def executar(repeticoes=5, cenarios=None, ao_medir=None):
+    """
+    Executa os cenários sobre o conjunto de dados já populado.
+
+    Args:
+        repeticoes: Execuções cronometradas por cenário
+        cenarios: Nomes dos cenários (padrão: todos)
+        ao_medir: Função chamada com (nome, resultado) após cada cenário
+
+    Returns:
+        dict: {cenario: resultado de medir_cenario}
+    """
+    from usuarios.models import Usuario
+
+    referencias = _referencias()
+    cliente = Client()
+    cliente.force_login(Usuario.objects.get(username='admin'))
+
+    resultados = {}
+    # Fragmentos dos relatórios sem cache (validade 0): o benchmark mede a
+    # montagem completa, não a leitura do fragmento em cache
+    with tempfile.TemporaryDirectory() as media, override_settings(
+        EXPORTACAO_ASSINCRONA=False,
+        METRICAS_ATIVAS=False,
+        MEDIA_ROOT=media,
+        CACHE_RELATORIOS_SEGUNDOS=0,
+    ):
+        for nome in cenarios or CENARIOS:
+            url, parametros, exportacao = CENARIOS[nome]
+            resultados[nome] = medir_cenario(
+                cliente, url, parametros(referencias), exportacao,
+                repeticoes,
+            )
+            if ao_medir:
+                ao_medir(nome, resultados[nome])
+    return resultados
+
+
+def carregar_baseline(caminho=ARQUIVO_BASELINE):
+    """
+    Lê a linha de base.
+
+    Returns:
+        dict: {cenario: resultado}; vazio se o arquivo não existir
+    """
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)['cenarios']
+    except FileNotFoundError:
+        return {}
+
+
+def salvar_baseline(resultados, caminho=ARQUIVO_BASELINE):
+    """Grava os resultados como nova linha de base."""
+    dados = {
+        'escala': ESCALA,
+        'semente': SEMENTE,
+        'cenarios': resultados,
+    }
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def comparar(resultados, baseline, tolerancia_latencia=None,
+             tolerancia_memoria=TOLERANCIA_MEMORIA):
+    """
+    Compara os resultados com a linha de base.
+
+    Args:
+        resultados: Resultado de executar()
+        baseline: Resultado de carregar_baseline()
+        tolerancia_latencia: Aumento relativo aceito no p95 (ex.: 0.5);
+            None não compara latência
+        tolerancia_memoria: Aumento relativo aceito no pico de memória
+
+    Returns:
+        tuple: (falhas, avisos), listas de mensagens
+    """
+    falhas = []
+    avisos = []
+    for nome, resultado in resultados.items():
+        base = baseline.get(nome)
+        if base is None:
+            avisos.append(f'{nome}: sem linha de base')
+            continue
+
+        if resultado['consultas'] > base['consultas']:
+            falhas.append(
+                f"{nome}: {resultado['consultas']} consultas "
+                f"(linha de base {base['consultas']})"
+            )
+        elif resultado['consultas'] < base['consultas']:
+            avisos.append(
+                f"{nome}: {resultado['consultas']} consultas, abaixo da "
+                f"linha de base ({base['consultas']}); atualize-a"
+            )
+
+        limite = base['memoria_pico_kb'] * (1 + tolerancia_memoria)
+        if resultado['memoria_pico_kb'] > limite:
+            falhas.append(
+                f"{nome}: pico de {resultado['memoria_pico_kb']} KB "
+                f"(linha de base {base['memoria_pico_kb']} KB, "
+                f"limite {limite:.0f} KB)"
+            )
+
+        if tolerancia_latencia is not None:
+            limite = base['latencia_p95_ms'] * (1 + tolerancia_latencia)
+            if resultado['latencia_p95_ms'] > limite:
+                falhas.append(
+                    f"{nome}: p95 de {resultado['latencia_p95_ms']} ms "
+                    f"(linha de base {base['latencia_p95_ms']} ms, "
+                    f"limite {limite:.1f} ms)"
+                )
+    return falhas, avisos
@@ -13,6 +13,25 @@ CURSOS_POR_PAGINA = 10
 VEICULOS_POR_PAGINA = 5
 PROFESSORES_POR_PAGINA = 5
 PROFESSORES_RELATORIO_POR_PAGINA = 10
+# Paginação por cursor: a contagem exata vai até este limite; acima dele
+# o total é estimado
+PAGINACAO_LIMITE_CONTAGEM = 1000
+
+# Grade de ocupação da frota: máximo de dias por granularidade
+OCUPACAO_MAX_DIAS = {'dia': 90, 'hora': 14}
+
+# Máximo de ocorrências de uma série de agendamentos recorrentes
+RECORRENCIA_MAX_OCORRENCIAS = 30
+
+# Escala automática de motoristas: dias da janela (padrão e máximo) e dias
+# anteriores à janela cujas horas de trajeto entram na carga de cada motorista
+ESCALA_DIAS_PADRAO = 7
+ESCALA_MAX_DIAS = 31
+ESCALA_CARGA_DIAS = 30
+
+# Exportação
+# Linhas buscadas por vez do banco ao exportar (QuerySet.iterator)
+EXPORTACAO_CHUNK_SIZE = 2000
 
 # Meses do ano
 MESES_DO_ANO = [
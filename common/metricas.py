@@ -0,0 +1,188 @@
+"""
+Métricas de desempenho por view.
+
+Guarda, em memória, as últimas requisições de cada rota (nome da URL) em
+um buffer circular: quantidade de consultas SQL, tempo no banco, tempo
+total e tamanho da resposta. As amostras são registradas por
+MetricasMiddleware (common/middleware.py) e expostas pela view
+dashboard.views.metricas, em JSON ou no formato texto do Prometheus.
+
+Cada processo (worker do gunicorn) mantém o próprio buffer; os valores
+refletem as requisições atendidas por aquele processo.
+"""
+
+import math
+import threading
+from collections import deque, namedtuple
+
+from django.conf import settings
+
+Amostra = namedtuple(
+    'Amostra', ['consultas', 'tempo_db_ms', 'tempo_total_ms', 'bytes']
+)
+
+# Campos resumidos, com o nome e a descrição usados no Prometheus
+CAMPOS = [
+    ('consultas', 'queries', 'Consultas SQL por requisição'),
+    ('tempo_db_ms', 'db_ms', 'Tempo no banco por requisição (ms)'),
+    ('tempo_total_ms', 'total_ms', 'Tempo total por requisição (ms)'),
+    ('bytes', 'response_bytes', 'Tamanho da resposta (bytes)'),
+]
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+_trava = threading.Lock()
+_amostras = {}
+_acima_orcamento = {}
+_total_requisicoes = {}
+
+
+def orcamento_consultas(rota):
+    """
+    Retorna o máximo de consultas esperado para a rota.
+
+    Usa METRICAS_ORCAMENTOS[rota], se definido, ou
+    METRICAS_ORCAMENTO_CONSULTAS.
+    """
+    return settings.METRICAS_ORCAMENTOS.get(
+        rota, settings.METRICAS_ORCAMENTO_CONSULTAS
+    )
+
+
+def registrar(rota, amostra):
+    """
+    Registra a amostra de uma requisição.
+
+    Args:
+        rota: Nome da URL (ex.: 'agendamentos:relatorio_geral')
+        amostra: Amostra com as medições da requisição
+
+    Returns:
+        bool: True se a requisição excedeu o orçamento de consultas
+    """
+    excedeu = amostra.consultas > orcamento_consultas(rota)
+    with _trava:
+        buffer = _amostras.get(rota)
+        if buffer is None:
+            buffer = _amostras[rota] = deque(maxlen=settings.METRICAS_JANELA)
+        buffer.append(amostra)
+        _total_requisicoes[rota] = _total_requisicoes.get(rota, 0) + 1
+        if excedeu:
+            _acima_orcamento[rota] = _acima_orcamento.get(rota, 0) + 1
+    return excedeu
+
+
+def limpar():
+    """Descarta todas as amostras registradas."""
+    with _trava:
+        _amostras.clear()
+        _acima_orcamento.clear()
+        _total_requisicoes.clear()
+
+
+def _quantil(valores_ordenados, q):
+    """Quantil pelo método do posto mais próximo."""
+    indice = max(0, math.ceil(q * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+def resumo():
+    """
+    Resume as amostras de cada rota.
+
+    Returns:
+        dict: {rota: {'requisicoes', 'amostras', 'orcamento_consultas',
+        'acima_orcamento', <campo>: {'soma', 'media', 'max', 'p50',
+        'p95', 'p99'}}}, ordenado pela rota
+    """
+    with _trava:
+        copia = {rota: list(buffer) for rota, buffer in _amostras.items()}
+        acima = dict(_acima_orcamento)
+        totais = dict(_total_requisicoes)
+
+    dados = {}
+    for rota in sorted(copia):
+        amostras = copia[rota]
+        rota_dados = {
+            'requisicoes': totais.get(rota, 0),
+            'amostras': len(amostras),
+            'orcamento_consultas': orcamento_consultas(rota),
+            'acima_orcamento': acima.get(rota, 0),
+        }
+        for campo, _, _ in CAMPOS:
+            valores = sorted(getattr(a, campo) for a in amostras)
+            soma = sum(valores)
+            estatisticas = {
+                'soma': round(soma, 2),
+                'media': round(soma / len(valores), 2),
+                'max': valores[-1],
+            }
+            for q in QUANTIS:
+                estatisticas[f'p{int(q * 100)}'] = _quantil(valores, q)
+            rota_dados[campo] = estatisticas
+        dados[rota] = rota_dados
+    return dados
+
+
+def formato_prometheus(dados):
+    """
+    Converte o resumo para o formato texto do Prometheus (0.0.4).
+
+    Args:
+        dados: Resultado de resumo()
+
+    Returns:
+        str: Métricas no formato de exposição do Prometheus
+    """
+    linhas = []
+
+    def rotulo(rota, **extras):
+        rotulos = {'view': rota, **extras}
+        conteudo = ','.join(
+            '{}="{}"'.format(
+                nome, str(valor).replace('\\', '\\\\').replace('"', '\\"')
+            )
+            for nome, valor in rotulos.items()
+        )
+        return '{' + conteudo + '}'
+
+    linhas.append(
+        '# HELP agendamento_requests_total Requisições atendidas por view'
+    )
+    linhas.append('# TYPE agendamento_requests_total counter')
+    for rota, rota_dados in dados.items():
+        linhas.append(
+            f'agendamento_requests_total{rotulo(rota)} '
+            f'{rota_dados["requisicoes"]}'
+        )
+
+    linhas.append(
+        '# HELP agendamento_query_budget_exceeded_total Requisições acima '
+        'do orçamento de consultas'
+    )
+    linhas.append('# TYPE agendamento_query_budget_exceeded_total counter')
+    for rota, rota_dados in dados.items():
+        linhas.append(
+            f'agendamento_query_budget_exceeded_total{rotulo(rota)} '
+            f'{rota_dados["acima_orcamento"]}'
+        )
+
+    for campo, nome, descricao in CAMPOS:
+        metrica = f'agendamento_{nome}'
+        linhas.append(f'# HELP {metrica} {descricao}')
+        linhas.append(f'# TYPE {metrica} summary')
+        for rota, rota_dados in dados.items():
+            estatisticas = rota_dados[campo]
+            for q in QUANTIS:
+                valor = estatisticas[f'p{int(q * 100)}']
+                linhas.append(
+                    f'{metrica}{rotulo(rota, quantile=q)} {valor}'
+                )
+            linhas.append(
+                f'{metrica}_count{rotulo(rota)} {rota_dados["amostras"]}'
+            )
+            linhas.append(
+                f'{metrica}_sum{rotulo(rota)} {estatisticas["soma"]}'
+            )
+
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,115 @@
+"""
+Middlewares compartilhados.
+
+MetricasMiddleware mede o custo de cada requisição (consultas SQL, tempo
+no banco, tempo total e tamanho da resposta) e registra as medições por
+rota em common.metricas. Requisições que passam do orçamento de consultas
+geram um aviso no log.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+
+class ContadorConsultas:
+    """
+    Execute wrapper que conta consultas e soma o tempo gasto no banco.
+
+    Não depende de DEBUG nem guarda o SQL executado, então pode ficar
+    ligado em produção.
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_db = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_db += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class MetricasMiddleware:
+    """
+    Registra consultas, tempo no banco, tempo total e tamanho da resposta
+    de cada requisição, agrupados pelo nome da URL.
+
+    Configuração (settings):
+        METRICAS_ATIVAS: Liga/desliga a coleta
+        METRICAS_ORCAMENTO_CONSULTAS: Máximo de consultas por requisição
+            antes do aviso
+        METRICAS_ORCAMENTOS: Orçamentos por rota ({'app:nome': n})
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICAS_ATIVAS:
+            return self.get_response(request)
+
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(contador))
+            response = self.get_response(request)
+        tempo_total = time.perf_counter() - inicio
+
+        rota = self.nome_rota(request)
+        if rota is None:
+            return response
+
+        amostra = metricas.Amostra(
+            consultas=contador.consultas,
+            tempo_db_ms=round(contador.tempo_db * 1000, 2),
+            tempo_total_ms=round(tempo_total * 1000, 2),
+            bytes=self.tamanho_resposta(response),
+        )
+        if metricas.registrar(rota, amostra):
+            logger.warning(
+                'Orçamento de consultas excedido em %s: %d consultas '
+                '(orçamento %d), %.1f ms no banco, %.1f ms no total (%s)',
+                rota,
+                amostra.consultas,
+                metricas.orcamento_consultas(rota),
+                amostra.tempo_db_ms,
+                amostra.tempo_total_ms,
+                request.get_full_path(),
+            )
+        return response
+
+    @staticmethod
+    def nome_rota(request):
+        """
+        Retorna o nome da URL atendida (com namespace).
+
+        Returns:
+            str ou None: Nome da rota; None para URLs não resolvidas (404),
+            que não são registradas para não criar uma série por caminho
+        """
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return None
+        return resolver_match.view_name
+
+    @staticmethod
+    def tamanho_resposta(response):
+        """Tamanho do corpo da resposta em bytes (0 se desconhecido)."""
+        if response.streaming:
+            try:
+                return int(response.get('Content-Length', 0))
+            except ValueError:
+                return 0
+        return len(response.content)
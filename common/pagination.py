@@ -3,9 +3,33 @@ Utilitários para paginação.
 
 Este módulo fornece uma classe helper para facilitar e padronizar
 a paginação em todo o projeto.
+
+Há dois modos:
+    páginas (padrão): Paginator do Django, com número de página, total
+        e última página. Cada página faz um COUNT(*) e um OFFSET, que
+        ficam mais lentos quanto mais fundo se navega.
+    cursor: paginação pela chave de ordenação (keyset). O parâmetro
+        `page` leva um token opaco (assinado) com os valores da chave do
+        último (ou primeiro) item exibido, e a página seguinte é buscada
+        com WHERE sobre a chave em vez de OFFSET. Só há navegação para a
+        página anterior e a próxima; o total é opcional e estimado.
 """
 
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core import signing
+from django.core.exceptions import ValidationError
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import F, Q
+
+from .constants import PAGINACAO_LIMITE_CONTAGEM
+
+SALT_CURSOR = 'common.pagination.cursor'
 
 
 class PaginationHelper:
@@ -15,28 +39,51 @@ class PaginationHelper:
     Uso:
         pagination = PaginationHelper(queryset, per_page=10)
         page_obj = pagination.get_page(request.GET.get('page'))
+
+        # Paginação por cursor (sem COUNT/OFFSET), com total estimado
+        pagination = PaginationHelper(
+            queryset, per_page=10, cursor=True, estimar_total=True
+        )
+        page_obj = pagination.get_page(request.GET.get('page'))
     """
 
-    def __init__(self, queryset, per_page=10):
+    def __init__(self, queryset, per_page=10, cursor=False,
+                 estimar_total=False):
         """
         Inicializa o helper de paginação.
 
         Args:
             queryset: QuerySet do Django a ser paginado
             per_page: Número de itens por página (padrão: 10)
+            cursor: Usa paginação por cursor na ordenação do queryset
+                (order_by ou Meta.ordering, só com nomes de campos)
+            estimar_total: No modo cursor, calcula o total de itens
+                (exato até PAGINACAO_LIMITE_CONTAGEM, estimado acima)
         """
-        self.paginator = Paginator(queryset, per_page)
+        self.cursor = cursor
+        self.estimar_total = estimar_total
+        if cursor:
+            self.paginator = None
+            self.queryset = queryset
+            self.per_page = per_page
+            self.ordenacao = self._ordenacao(queryset)
+        else:
+            self.paginator = Paginator(queryset, per_page)
 
     def get_page(self, page_number):
         """
         Retorna a página solicitada, tratando erros automaticamente.
 
         Args:
-            page_number: Número da página solicitada
+            page_number: Número da página solicitada (no modo cursor, o
+                token da página; vazio ou inválido volta à primeira)
 
         Returns:
-            Page: Objeto Page do Django com os itens da página
+            Page: Objeto Page do Django com os itens da página (no modo
+            cursor, PaginaCursor)
         """
+        if self.cursor:
+            return self._pagina_cursor(page_number)
         try:
             return self.paginator.page(page_number)
         except PageNotAnInteger:
@@ -48,10 +95,298 @@ class PaginationHelper:
 
     @property
     def num_pages(self):
-        """Retorna o número total de páginas."""
+        """Retorna o número total de páginas (None no modo cursor)."""
+        if self.cursor:
+            return None
         return self.paginator.num_pages
 
     @property
     def count(self):
-        """Retorna o número total de itens."""
+        """
+        Retorna o número total de itens.
+
+        No modo cursor, retorna o total estimado (ver estimar_total).
+        """
+        if self.cursor:
+            return self._total()[0]
         return self.paginator.count
+
+    # ------------------------------------------------------------------ #
+    #  Modo cursor                                                         #
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _ordenacao(queryset):
+        """
+        Retorna a chave de ordenação como [(campo, crescente)].
+
+        A chave termina sempre na pk, para que seja única.
+        """
+        ordering = list(queryset.query.order_by or (
+            queryset.query.default_ordering
+            and queryset.model._meta.ordering or []
+        ))
+        ordenacao = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                raise ValueError(
+                    'A paginação por cursor exige ordenação por nomes de '
+                    f'campos; recebido {item!r}.'
+                )
+            crescente = not item.startswith('-')
+            campo = item.lstrip('-')
+            ordenacao.append(('pk' if campo == 'id' else campo, crescente))
+        if not any(campo == 'pk' for campo, _ in ordenacao):
+            crescente = ordenacao[0][1] if ordenacao else True
+            ordenacao.append(('pk', crescente))
+        return ordenacao
+
+    def _pagina_cursor(self, token):
+        direcao, valores = self._ler_token(token)
+        # Para voltar, busca em ordem inversa a partir do primeiro item
+        # da página atual e inverte o resultado
+        inverter = direcao == 'anterior'
+
+        queryset = self.queryset.order_by(*[
+            self._expressao_ordem(campo, crescente != inverter)
+            for campo, crescente in self.ordenacao
+        ])
+        if valores is not None:
+            queryset = queryset.filter(self._depois(valores, inverter))
+
+        itens = list(queryset[:self.per_page + 1])
+        ha_mais = len(itens) > self.per_page
+        itens = itens[:self.per_page]
+        if inverter:
+            itens.reverse()
+            tem_anterior, tem_proxima = ha_mais, True
+        else:
+            tem_anterior, tem_proxima = valores is not None, ha_mais
+
+        total, tipo_total = (
+            self._total() if self.estimar_total else (None, None)
+        )
+        return PaginaCursor(
+            itens,
+            self,
+            token_anterior=(
+                self._gerar_token('anterior', itens[0])
+                if tem_anterior and itens else None
+            ),
+            token_proxima=(
+                self._gerar_token('proxima', itens[-1])
+                if tem_proxima and itens else None
+            ),
+            total=total,
+            tipo_total=tipo_total,
+        )
+
+    def _expressao_ordem(self, campo, crescente):
+        """
+        Expressão de ordenação do campo.
+
+        Campos anuláveis levam NULLS FIRST/LAST explícito (NULL como menor
+        valor em qualquer banco); os demais ficam sem a cláusula, para que
+        o índice da coluna continue servindo à ordenação.
+        """
+        if self._anulavel(campo):
+            if crescente:
+                return F(campo).asc(nulls_first=True)
+            return F(campo).desc(nulls_last=True)
+        return F(campo).asc() if crescente else F(campo).desc()
+
+    def _depois(self, valores, inverter):
+        """
+        Filtro dos itens após a chave `valores` na ordem de busca.
+
+        Comparação lexicográfica: (a > x) OR (a = x AND b > y) OR ...
+        NULL é tratado como o menor valor, de acordo com NULLS FIRST nas
+        colunas crescentes e NULLS LAST nas decrescentes.
+        """
+        condicao = Q(pk__in=[])
+        anteriores_iguais = Q()
+        for (campo, crescente), valor in zip(self.ordenacao, valores):
+            crescente = crescente != inverter
+            if valor is None:
+                igual = Q(**{f'{campo}__isnull': True})
+                maior = Q(**{f'{campo}__isnull': False})
+                menor = Q(pk__in=[])
+            else:
+                igual = Q(**{campo: valor})
+                maior = Q(**{f'{campo}__gt': valor})
+                menor = Q(**{f'{campo}__lt': valor})
+                if self._anulavel(campo):
+                    menor |= Q(**{f'{campo}__isnull': True})
+            condicao |= anteriores_iguais & (maior if crescente else menor)
+            anteriores_iguais &= igual
+        return condicao
+
+    @staticmethod
+    def _valor(obj, campo):
+        """Lê o valor de um campo (inclusive relacionado) do objeto."""
+        valor = obj
+        for parte in campo.split('__'):
+            if valor is None:
+                return None
+            valor = getattr(valor, parte)
+        return valor
+
+    @staticmethod
+    def _serializar(valor):
+        if isinstance(valor, (datetime, date)):
+            return valor.isoformat()
+        if isinstance(valor, (UUID, Decimal)):
+            return str(valor)
+        return valor
+
+    def _assinatura(self):
+        """Identifica a ordenação, para recusar tokens de outra listagem."""
+        return [
+            f"{'' if crescente else '-'}{campo}"
+            for campo, crescente in self.ordenacao
+        ]
+
+    def _gerar_token(self, direcao, obj):
+        return signing.dumps(
+            {
+                'd': direcao,
+                'o': self._assinatura(),
+                'v': [
+                    self._serializar(self._valor(obj, campo))
+                    for campo, _ in self.ordenacao
+                ],
+            },
+            salt=SALT_CURSOR,
+            compress=True,
+        )
+
+    def _ler_token(self, token):
+        """
+        Decodifica o token da página.
+
+        Returns:
+            tuple: (direcao, valores); (None, None) para a primeira página
+        """
+        if not token:
+            return None, None
+        try:
+            dados = signing.loads(token, salt=SALT_CURSOR)
+        except (signing.BadSignature, json.JSONDecodeError):
+            return None, None
+        if (
+            not isinstance(dados, dict)
+            or dados.get('o') != self._assinatura()
+            or dados.get('d') not in ('anterior', 'proxima')
+            or not isinstance(dados.get('v'), list)
+            or len(dados['v']) != len(self.ordenacao)
+        ):
+            return None, None
+        try:
+            # Valida os valores antes de usá-los no filtro
+            for (campo, _), valor in zip(self.ordenacao, dados['v']):
+                if valor is not None:
+                    self._campo_modelo(campo).to_python(valor)
+        except (ValidationError, ValueError, TypeError):
+            return None, None
+        return dados['d'], dados['v']
+
+    def _anulavel(self, campo):
+        """Indica se o caminho de ordenação pode resultar em NULL."""
+        model = self.queryset.model
+        for parte in campo.split('__'):
+            field = (
+                model._meta.pk if parte == 'pk'
+                else model._meta.get_field(parte)
+            )
+            if field.null:
+                return True
+            model = field.related_model
+        return False
+
+    def _campo_modelo(self, campo):
+        """Retorna o Field de um caminho de ordenação (ex.: campus__nome)."""
+        model = self.queryset.model
+        partes = campo.split('__')
+        for parte in partes[:-1]:
+            model = model._meta.get_field(parte).related_model
+        if partes[-1] == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(partes[-1])
+
+    def _total(self):
+        """
+        Conta os itens, exatamente até PAGINACAO_LIMITE_CONTAGEM.
+
+        Acima do limite, usa a estimativa do planejador no PostgreSQL
+        (EXPLAIN); nos demais bancos, retorna o próprio limite.
+
+        Returns:
+            tuple: (total, tipo), com tipo 'exato', 'estimado' ou 'minimo'
+            (há mais itens que o total)
+        """
+        if not hasattr(self, '_total_cache'):
+            limite = PAGINACAO_LIMITE_CONTAGEM
+            queryset = self.queryset.order_by()
+            total = queryset[:limite + 1].count()
+            if total <= limite:
+                self._total_cache = (total, 'exato')
+            else:
+                estimativa = self._estimativa_planejador(queryset)
+                if estimativa and estimativa > limite:
+                    self._total_cache = (estimativa, 'estimado')
+                else:
+                    self._total_cache = (limite, 'minimo')
+        return self._total_cache
+
+    @staticmethod
+    def _estimativa_planejador(queryset):
+        """Linhas estimadas pelo PostgreSQL para o queryset (ou None)."""
+        conexao = connections[queryset.db]
+        if conexao.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with conexao.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plano = cursor.fetchone()[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]['Plan']['Plan Rows'])
+
+
+class PaginaCursor(Sequence):
+    """
+    Página da paginação por cursor.
+
+    Imita a parte da interface de Page usada nos templates (iteração,
+    object_list, has_next/has_previous/has_other_pages) e traz os tokens
+    da página anterior e da próxima.
+    """
+
+    cursor = True
+
+    def __init__(self, object_list, paginator, token_anterior=None,
+                 token_proxima=None, total=None, tipo_total=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.token_anterior = token_anterior
+        self.token_proxima = token_proxima
+        self.total = total
+        self.tipo_total = tipo_total
+
+    def __repr__(self):
+        return f'<PaginaCursor com {len(self.object_list)} itens>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.token_proxima is not None
+
+    def has_previous(self):
+        return self.token_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
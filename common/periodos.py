@@ -0,0 +1,146 @@
+"""
+Resolução de períodos em intervalos de data/hora.
+
+Filtros como `data_inicio__year=ano, data_inicio__month=mes` ou
+`data_hora__date__gte=dia` aplicam, com USE_TZ, uma conversão de fuso
+sobre a coluna (ex.: EXTRACT(... AT TIME ZONE ...) no PostgreSQL,
+django_datetime_extract() no SQLite), o que impede o uso de índices. As
+funções deste módulo convertem o período em um intervalo semiaberto
+[inicio, fim) de datetimes aware no fuso atual, para filtros sobre a
+coluna pura (`campo__gte=inicio, campo__lt=fim`), que usam o índice.
+
+Uso:
+    Agendamento.objects.filter(
+        **filtro_periodo('data_inicio', *intervalo_mes(ano, mes))
+    )
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def inicio_do_dia(dia):
+    """
+    Retorna o início (00:00) do dia no fuso atual.
+
+    Args:
+        dia: date
+
+    Returns:
+        datetime: Datetime aware
+    """
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def intervalo_dias(data_inicio, data_fim):
+    """
+    Converte um período de dias (inclusivo) em [inicio, fim).
+
+    Args:
+        data_inicio: Primeiro dia (date)
+        data_fim: Último dia, inclusivo (date)
+
+    Returns:
+        tuple: (inicio, fim), datetimes aware; fim é o início do dia
+        seguinte a data_fim
+    """
+    return (
+        inicio_do_dia(data_inicio),
+        inicio_do_dia(data_fim + timedelta(days=1)),
+    )
+
+
+def intervalo_mes(ano, mes):
+    """
+    Converte um mês em [inicio, fim).
+
+    Args:
+        ano: Ano
+        mes: Mês (1-12)
+
+    Returns:
+        tuple: (inicio, fim), do dia 1 do mês ao dia 1 do mês seguinte
+    """
+    ano_seguinte, mes_seguinte = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return (
+        inicio_do_dia(date(ano, mes, 1)),
+        inicio_do_dia(date(ano_seguinte, mes_seguinte, 1)),
+    )
+
+
+def intervalo_ano(ano):
+    """
+    Converte um ano em [inicio, fim).
+
+    Returns:
+        tuple: (inicio, fim), de 1º de janeiro a 1º de janeiro seguinte
+    """
+    return inicio_do_dia(date(ano, 1, 1)), inicio_do_dia(date(ano + 1, 1, 1))
+
+
+def ler_data(valor):
+    """
+    Converte um parâmetro de data (AAAA-MM-DD) em date.
+
+    Returns:
+        date ou None: None se vazio ou inválido
+    """
+    if isinstance(valor, date):
+        return valor
+    if not valor:
+        return None
+    try:
+        return parse_date(valor)
+    except ValueError:
+        return None
+
+
+def ler_data_hora(valor):
+    """
+    Converte um parâmetro de data/hora em datetime aware.
+
+    Aceita ISO 8601 com ou sem hora/fuso (ex.: o FullCalendar envia
+    ``start``/``end`` nesse formato, e inputs datetime-local enviam
+    AAAA-MM-DDThh:mm); sem fuso, usa o fuso atual.
+
+    Returns:
+        datetime ou None: None se vazio ou inválido
+    """
+    if not valor:
+        return None
+    # '+' do fuso pode chegar como espaço se não vier codificado na URL
+    valor = valor.strip().replace(' ', '+')
+    try:
+        data_hora = parse_datetime(valor)
+        if data_hora is None:
+            data = parse_date(valor)
+            if data is None:
+                return None
+            data_hora = datetime.combine(data, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(data_hora):
+        data_hora = timezone.make_aware(data_hora)
+    return data_hora
+
+
+def filtro_periodo(campo, inicio=None, fim=None):
+    """
+    Monta os argumentos de filter() de um intervalo [inicio, fim).
+
+    Args:
+        campo: Nome do campo (ex.: 'data_inicio', 'agendamento__data_inicio')
+        inicio: Início inclusivo (None para não limitar)
+        fim: Fim exclusivo (None para não limitar)
+
+    Returns:
+        dict: Ex.: {'data_inicio__gte': inicio, 'data_inicio__lt': fim}
+    """
+    filtro = {}
+    if inicio is not None:
+        filtro[f'{campo}__gte'] = inicio
+    if fim is not None:
+        filtro[f'{campo}__lt'] = fim
+    return filtro
@@ -0,0 +1,180 @@
+"""
+Cache dos dados de referência (cursos, veículos, campi e motoristas).
+
+Formulários e filtros consultam, a cada requisição, as mesmas listas
+pequenas e que quase não mudam. Este módulo guarda essas listas no cache
+do Django, sob chaves versionadas:
+
+    ref:versao:<nome>        versão atual da lista
+    ref:<nome>:<versao>      lista de instâncias da versão
+
+Quando um registro muda, os sinais (cursos/signals.py, veiculos/signals.py,
+campus/signals.py e usuarios/signals.py) chamam invalidar(), que troca a
+versão; a lista antiga deixa de ser lida e expira pelo TTL
+(CACHE_REFERENCIA_SEGUNDOS). Com mais de um processo (ex.: vários workers
+do Gunicorn), o cache precisa ser compartilhado (CACHE_BACKEND), ou cada
+processo só verá as invalidações feitas por ele mesmo até o TTL. Por
+isso o cache serve apenas para exibir as listas: os valores enviados em
+formulários são sempre validados no banco.
+
+Uso:
+    {'cursos_disponiveis': cursos_ativos()}
+
+    # Em formulários: choices lidas do cache, validação no banco
+    self.fields['curso'] = CampoReferencia.a_partir_de(
+        self.fields['curso'], 'cursos'
+    )
+"""
+
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+
+from .versoes import incrementar, versao
+
+
+def _cursos():
+    from cursos.models import Curso
+    return Curso.objects.filter(ativo=True)
+
+
+def _veiculos():
+    from veiculos.models import Veiculo
+    return Veiculo.objects.filter(ativo=True)
+
+
+def _campi():
+    from campus.models import Campus
+    return Campus.objects.filter(ativo=True)
+
+
+def _motoristas():
+    # Só os campos exibidos: a lista em cache não deve levar senhas e
+    # demais dados pessoais dos usuários
+    from usuarios.models import Usuario
+    return (
+        Usuario.objects
+        .filter(groups__name='Motoristas', is_active=True)
+        .only('id', 'username', 'first_name', 'last_name')
+        .order_by('first_name', 'last_name')
+    )
+
+
+# Listas de referência: nome → função que monta o queryset
+REFERENCIAS = {
+    'cursos': _cursos,
+    'veiculos': _veiculos,
+    'campi': _campi,
+    'motoristas': _motoristas,
+}
+
+
+def chave_versao(nome):
+    """Chave da versão da lista (ver common/versoes.py)."""
+    return f'ref:versao:{nome}'
+
+
+def queryset(nome):
+    """Retorna o queryset (sem cache) da lista de referência."""
+    return REFERENCIAS[nome]()
+
+
+def obter(nome):
+    """
+    Retorna a lista de referência, do cache ou do banco.
+
+    Args:
+        nome: Nome da lista (chave de REFERENCIAS)
+
+    Returns:
+        list: Instâncias, na ordem do queryset
+    """
+    chave = f'ref:{nome}:{versao(chave_versao(nome))}'
+    itens = cache.get(chave)
+    if itens is None:
+        itens = list(queryset(nome))
+        cache.set(chave, itens, settings.CACHE_REFERENCIA_SEGUNDOS)
+    return itens
+
+
+def invalidar(*nomes):
+    """Descarta as listas de referência indicadas."""
+    incrementar(*[chave_versao(nome) for nome in nomes])
+
+
+def cursos_ativos():
+    """Cursos ativos, por nome."""
+    return obter('cursos')
+
+
+def veiculos_ativos():
+    """Veículos ativos, por placa."""
+    return obter('veiculos')
+
+
+def campi_ativos():
+    """Campi ativos, por nome."""
+    return obter('campi')
+
+
+def motoristas():
+    """Motoristas ativos, por nome."""
+    return obter('motoristas')
+
+
+class IteradorReferencia(forms.models.ModelChoiceIterator):
+    """Gera as choices do campo a partir da lista em cache."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in obter(self.field.referencia):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return (
+            len(obter(self.field.referencia))
+            + (1 if self.field.empty_label is not None else 0)
+        )
+
+    def __bool__(self):
+        return (
+            self.field.empty_label is not None
+            or bool(obter(self.field.referencia))
+        )
+
+
+class CampoReferencia(forms.ModelChoiceField):
+    """
+    ModelChoiceField alimentado por uma lista de referência.
+
+    As opções são renderizadas com a lista em cache; o valor enviado é
+    validado pelo queryset, para que um registro desativado em outro
+    processo (cujo cache ainda o lista) não seja aceito.
+    """
+
+    iterator = IteradorReferencia
+
+    def __init__(self, referencia, **kwargs):
+        self.referencia = referencia
+        kwargs.setdefault('queryset', queryset(referencia))
+        super().__init__(**kwargs)
+
+    @classmethod
+    def a_partir_de(cls, campo, referencia):
+        """
+        Cria o campo copiando rótulo, widget e mensagens de outro.
+
+        Útil em ModelForms, cujos campos são gerados a partir do modelo.
+        """
+        return cls(
+            referencia,
+            required=campo.required,
+            label=campo.label,
+            initial=campo.initial,
+            widget=campo.widget,
+            help_text=campo.help_text,
+            error_messages=campo.error_messages,
+            empty_label=campo.empty_label,
+            to_field_name=campo.to_field_name,
+        )
@@ -0,0 +1,38 @@
+"""
+Utilitários compartilhados pelos testes das apps.
+
+Uso:
+    class MeuIndiceTest(PlanoConsultaMixin, TestCase):
+
+        def test_filtro(self):
+            self.assertUsaIndice(queryset, 'nome_do_indice')
+"""
+
+from django.db import connection
+
+
+def plano(queryset):
+    """
+    Retorna o plano de execução (EXPLAIN) do queryset.
+
+    No PostgreSQL desliga a varredura sequencial na transação do teste:
+    com as tabelas vazias o planejador a preferiria mesmo havendo índice.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+class PlanoConsultaMixin:
+    """Asserções sobre o SQL e o plano de execução das consultas."""
+
+    def assertUsaIndice(self, queryset, indice):
+        resultado = plano(queryset)
+        self.assertIn(indice, resultado, resultado)
+
+    def assertSemConversaoDeFuso(self, queryset):
+        """O filtro compara a coluna pura, sem extrair partes da data."""
+        sql = str(queryset.query)
+        self.assertNotIn('django_datetime', sql)
+        self.assertNotIn('AT TIME ZONE', sql)
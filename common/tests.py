@@ -0,0 +1,91 @@
+from django.test import TestCase
+
+from veiculos.models import Veiculo
+
+from .pagination import PaginationHelper
+
+
+class PaginacaoCursorTest(TestCase):
+
+    def setUp(self):
+        # Modelos repetidos: a ordem entre eles é decidida pela pk (UUID)
+        for indice in range(7):
+            Veiculo.objects.create(
+                placa=f'AAA{indice}A11', modelo=f'Modelo {indice // 2}',
+                marca='VW', ano=2020,
+            )
+        self.ordenados = list(Veiculo.objects.order_by('modelo', 'pk'))
+
+    def paginador(self, queryset=None):
+        return PaginationHelper(
+            queryset if queryset is not None
+            else Veiculo.objects.order_by('modelo'),
+            per_page=3,
+            cursor=True,
+        )
+
+    def percorrer(self):
+        """Percorre todas as páginas para frente; retorna as páginas."""
+        paginas = [self.paginador().get_page(None)]
+        while paginas[-1].has_next():
+            paginas.append(
+                self.paginador().get_page(paginas[-1].token_proxima)
+            )
+        return paginas
+
+    def test_empates_desfeitos_pela_pk(self):
+        paginas = self.percorrer()
+
+        self.assertEqual(
+            [len(pagina) for pagina in paginas], [3, 3, 1]
+        )
+        self.assertEqual(
+            [veiculo for pagina in paginas for veiculo in pagina],
+            self.ordenados,
+        )
+
+    def test_ida_e_volta(self):
+        primeira, segunda, terceira = self.percorrer()
+        self.assertFalse(primeira.has_previous())
+        self.assertFalse(terceira.has_next())
+
+        voltando = self.paginador().get_page(terceira.token_anterior)
+        self.assertEqual(list(voltando), list(segunda))
+        self.assertTrue(voltando.has_next())
+
+        voltando = self.paginador().get_page(voltando.token_anterior)
+        self.assertEqual(list(voltando), list(primeira))
+        self.assertFalse(voltando.has_previous())
+
+        avancando = self.paginador().get_page(voltando.token_proxima)
+        self.assertEqual(list(avancando), list(segunda))
+
+    def test_ordem_decrescente(self):
+        paginador = self.paginador(Veiculo.objects.order_by('-modelo'))
+        primeira = paginador.get_page(None)
+        segunda = paginador.get_page(primeira.token_proxima)
+
+        self.assertEqual(
+            list(primeira) + list(segunda),
+            list(Veiculo.objects.order_by('-modelo', '-pk'))[:6],
+        )
+
+    def test_token_invalido_volta_para_a_primeira_pagina(self):
+        primeira = self.paginador().get_page(None)
+        token = self.paginador().get_page(
+            primeira.token_proxima
+        ).token_proxima
+        adulterado = token[:-2] + ('aa' if token[-2:] != 'aa' else 'bb')
+
+        for invalido in (adulterado, 'lixo', '2'):
+            with self.subTest(token=invalido):
+                pagina = self.paginador().get_page(invalido)
+                self.assertEqual(list(pagina), list(primeira))
+                self.assertFalse(pagina.has_previous())
+
+        # Token de outra ordenação não é aceito
+        outra = self.paginador(Veiculo.objects.order_by('-modelo'))
+        self.assertEqual(
+            list(outra.get_page(token)),
+            list(outra.get_page(None)),
+        )
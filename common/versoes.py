@@ -0,0 +1,82 @@
+"""
+Contadores de versão no cache.
+
+Uma versão identifica o estado de um conjunto de dados: quem grava dados
+em cache inclui a versão na chave, e quem altera os dados incrementa a
+versão, o que faz as entradas antigas deixarem de ser lidas (e expirarem
+pelo TTL). Usado pelas listas de referência (common/referencia.py) e pelos
+fragmentos dos relatórios (agendamentos.services.VersaoRelatorioService).
+
+Uso:
+    chave = f'minha_lista:{versao("minha_lista:versao")}'
+    ...
+    incrementar('minha_lista:versao')
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Backends cujo conteúdo fica na memória do próprio processo
+BACKENDS_LOCAIS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_compartilhado():
+    """
+    Indica se o cache padrão é visto pelos outros processos.
+
+    Com um cache local, as versões incrementadas por um management command
+    só valem para o próprio comando: o servidor continua lendo os dados
+    antigos até o TTL.
+    """
+    return settings.CACHES['default']['BACKEND'] not in BACKENDS_LOCAIS
+
+
+def versoes(*chaves):
+    """
+    Retorna as versões atuais das chaves.
+
+    Chaves sem versão (cache vazio ou chave despejada) começam de um valor
+    novo (o relógio em ns), para não reaproveitar dados gravados antes.
+
+    Returns:
+        list: Versões, na ordem das chaves
+    """
+    atuais = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in atuais:
+            novo = time.time_ns()
+            if cache.add(chave, novo, timeout=None):
+                atuais[chave] = novo
+            else:
+                atuais[chave] = cache.get(chave, novo)
+    return [atuais[chave] for chave in chaves]
+
+
+def versao(chave):
+    """Retorna a versão atual de uma chave."""
+    return versoes(chave)[0]
+
+
+def incrementar(*chaves):
+    """
+    Incrementa as versões das chaves.
+
+    A versão é trocada na hora e de novo após o commit, para que uma
+    requisição concorrente que leia o banco antes do commit não deixe os
+    dados antigos gravados na versão nova.
+    """
+    def trocar():
+        for chave in chaves:
+            try:
+                cache.incr(chave)
+            except ValueError:
+                cache.set(chave, time.time_ns(), timeout=None)
+
+    trocar()
+    transaction.on_commit(trocar)
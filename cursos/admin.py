@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Curso
+from .models import ConsumoKmMensal, Curso
 
 
 @admin.register(Curso)
@@ -8,3 +8,11 @@ class CursoAdmin(admin.ModelAdmin):
     list_filter = ['ativo', 'criado_em']
     search_fields = ['nome', 'descricao']
     readonly_fields = ['criado_em', 'atualizado_em']
+
+
+@admin.register(ConsumoKmMensal)
+class ConsumoKmMensalAdmin(admin.ModelAdmin):
+    list_display = ['curso', 'ano', 'mes', 'km_utilizados', 'atualizado_em']
+    list_filter = ['ano', 'mes']
+    search_fields = ['curso__nome']
+    readonly_fields = ['atualizado_em']
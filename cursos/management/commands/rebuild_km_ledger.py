@@ -0,0 +1,49 @@
+"""
+Management command para reconstruir ou verificar o consumo mensal de KM.
+
+Uso:
+  python manage.py rebuild_km_ledger            # reconstrói a tabela
+  python manage.py rebuild_km_ledger --verify   # só compara e reporta
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from cursos.services import ConsumoKmService
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói (ou verifica) o consumo mensal de KM por curso '
+        'a partir dos trajetos dos agendamentos aprovados'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Apenas verifica divergências, sem alterar o banco',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            divergencias = ConsumoKmService.verificar()
+            for (curso_id, ano, mes), gravado, calculado in divergencias:
+                self.stdout.write(
+                    f"   ✗ curso {curso_id} {mes:02d}/{ano}: "
+                    f"gravado {gravado} km, calculado {calculado} km"
+                )
+            if divergencias:
+                raise CommandError(
+                    f'{len(divergencias)} divergência(s) encontrada(s). '
+                    f'Execute rebuild_km_ledger sem --verify para corrigir.'
+                )
+            self.stdout.write(
+                self.style.SUCCESS('Consumo mensal de KM consistente.')
+            )
+            return
+
+        total = ConsumoKmService.reconstruir()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Consumo mensal de KM reconstruído: {total} registro(s).'
+            )
+        )
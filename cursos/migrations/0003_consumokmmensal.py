@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def popular_consumo(apps, schema_editor):
+    Trajeto = apps.get_model('agendamentos', 'Trajeto')
+    ConsumoKmMensal = apps.get_model('cursos', 'ConsumoKmMensal')
+
+    linhas = Trajeto.objects.filter(
+        agendamento__status='aprovado'
+    ).annotate(
+        ano=ExtractYear('agendamento__data_inicio'),
+        mes=ExtractMonth('agendamento__data_inicio'),
+    ).values(
+        'agendamento__curso_id', 'ano', 'mes'
+    ).annotate(km=Sum('quilometragem')).order_by()
+
+    ConsumoKmMensal.objects.bulk_create([
+        ConsumoKmMensal(
+            curso_id=linha['agendamento__curso_id'],
+            ano=linha['ano'],
+            mes=linha['mes'],
+            km_utilizados=linha['km'],
+        )
+        for linha in linhas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0003_trajeto_motorista'),
+        ('cursos', '0002_curso_campus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoKmMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField(verbose_name='Ano')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mês')),
+                ('km_utilizados', models.PositiveIntegerField(default=0, verbose_name='KM Utilizados')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos_km', to='cursos.curso', verbose_name='Curso')),
+            ],
+            options={
+                'verbose_name': 'Consumo de KM Mensal',
+                'verbose_name_plural': 'Consumos de KM Mensais',
+                'ordering': ['-ano', '-mes'],
+                'constraints': [models.UniqueConstraint(fields=('curso', 'ano', 'mes'), name='consumo_km_curso_ano_mes_unico')],
+            },
+        ),
+        migrations.RunPython(popular_consumo, migrations.RunPython.noop),
+    ]
@@ -48,23 +48,55 @@ class Curso(models.Model):
         """
         Retorna a quilometragem total utilizada pelo curso
         em um mês específico. Considera apenas agendamentos APROVADOS.
-        """
-        from agendamentos.models import Agendamento
-
-        agendamentos = Agendamento.objects.filter(
-            curso=self,
-            status='aprovado',
-            data_inicio__year=ano,
-            data_inicio__month=mes
-        )
-
-        total_km = 0
-        for agendamento in agendamentos:
-            total_km += agendamento.get_total_km()
 
-        return total_km
+        O valor vem do consumo mensal materializado (ConsumoKmMensal),
+        mantido pelos signals de Agendamento e Trajeto.
+        """
+        km = self.consumos_km.filter(ano=ano, mes=mes).values_list(
+            'km_utilizados', flat=True
+        ).first()
+        return km or 0
 
     def get_km_disponiveis_mes(self, ano, mes):
         """Retorna a quilometragem disponível no mês"""
         utilizados = self.get_km_utilizados_mes(ano, mes)
         return self.limite_km_mensal - utilizados
+
+
+class ConsumoKmMensal(models.Model):
+    """
+    Quilometragem consumida por um curso em um mês.
+
+    Soma dos trajetos dos agendamentos APROVADOS cujo início cai no mês.
+    Atualizado na mesma transação em que agendamentos e trajetos são
+    gravados (ver agendamentos/signals.py) e reconstruído pelo comando
+    rebuild_km_ledger.
+    """
+    curso = models.ForeignKey(
+        Curso,
+        on_delete=models.CASCADE,
+        related_name='consumos_km',
+        verbose_name='Curso'
+    )
+    ano = models.PositiveSmallIntegerField(verbose_name='Ano')
+    mes = models.PositiveSmallIntegerField(verbose_name='Mês')
+    km_utilizados = models.PositiveIntegerField(
+        default=0,
+        verbose_name='KM Utilizados'
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Consumo de KM Mensal'
+        verbose_name_plural = 'Consumos de KM Mensais'
+        ordering = ['-ano', '-mes']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['curso', 'ano', 'mes'],
+                name='consumo_km_curso_ano_mes_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.curso} - {self.mes:02d}/{self.ano}: {self.km_utilizados} km"
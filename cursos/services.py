@@ -0,0 +1,211 @@
+"""
+Serviços de negócio para cursos.
+
+Este módulo mantém o consumo mensal de KM por curso (ConsumoKmMensal),
+usado na validação do limite mensal e nos relatórios.
+"""
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from common.periodos import filtro_periodo, intervalo_mes
+
+from .models import ConsumoKmMensal
+
+
+class ConsumoKmService:
+    """
+    Serviço para manutenção do consumo mensal de KM por curso.
+    """
+
+    @staticmethod
+    def chave(curso_id, data_inicio, status):
+        """
+        Retorna a chave (curso_id, ano, mes) de um agendamento no consumo.
+
+        Args:
+            curso_id: ID do curso do agendamento
+            data_inicio: Data/hora de início do agendamento
+            status: Status do agendamento
+
+        Returns:
+            tuple ou None: Chave do consumo, ou None se o agendamento
+            não conta para o limite (não aprovado ou incompleto)
+        """
+        if status != 'aprovado' or not curso_id or not data_inicio:
+            return None
+        data_local = timezone.localtime(data_inicio)
+        return (curso_id, data_local.year, data_local.month)
+
+    @staticmethod
+    def trajetos_aprovados(curso_id, ano, mes):
+        """
+        Trajetos dos agendamentos aprovados de um curso em um mês.
+
+        Args:
+            curso_id: ID do curso
+            ano: Ano
+            mes: Mês
+
+        Returns:
+            QuerySet: Trajetos, filtrados pelo início do agendamento
+        """
+        from agendamentos.models import Trajeto
+
+        return Trajeto.objects.filter(
+            agendamento__curso_id=curso_id,
+            agendamento__status='aprovado',
+            **filtro_periodo(
+                'agendamento__data_inicio', *intervalo_mes(ano, mes)
+            )
+        )
+
+    @staticmethod
+    def calcular_km(curso_id, ano, mes):
+        """
+        Calcula no banco o KM aprovado de um curso em um mês.
+
+        Args:
+            curso_id: ID do curso
+            ano: Ano
+            mes: Mês
+
+        Returns:
+            int: Soma da quilometragem dos trajetos aprovados
+        """
+        total = ConsumoKmService.trajetos_aprovados(
+            curso_id, ano, mes
+        ).aggregate(total=Sum('quilometragem'))['total']
+        return total or 0
+
+    @staticmethod
+    def obter(chaves, travar=False):
+        """
+        Lê o consumo gravado de várias chaves em uma consulta.
+
+        Args:
+            chaves: Iterável de chaves (curso_id, ano, mes)
+            travar: Bloqueia as linhas até o fim da transação
+                (SELECT ... FOR UPDATE)
+
+        Returns:
+            dict: {(curso_id, ano, mes): km}; 0 para chaves sem consumo
+        """
+        consumo = dict.fromkeys(chaves, 0)
+        if not consumo:
+            return consumo
+        filtro = Q()
+        for curso_id, ano, mes in consumo:
+            filtro |= Q(curso_id=curso_id, ano=ano, mes=mes)
+        linhas = ConsumoKmMensal.objects.filter(filtro)
+        if travar:
+            linhas = linhas.select_for_update()
+        for curso_id, ano, mes, km in linhas.values_list(
+            'curso_id', 'ano', 'mes', 'km_utilizados'
+        ):
+            consumo[(curso_id, ano, mes)] = km
+        return consumo
+
+    @staticmethod
+    def recalcular(curso_id, ano, mes):
+        """
+        Recalcula e grava o consumo de um curso em um mês.
+
+        Args:
+            curso_id: ID do curso
+            ano: Ano
+            mes: Mês
+
+        Returns:
+            int: KM gravado
+        """
+        with transaction.atomic():
+            km = ConsumoKmService.calcular_km(curso_id, ano, mes)
+            ConsumoKmMensal.objects.update_or_create(
+                curso_id=curso_id,
+                ano=ano,
+                mes=mes,
+                defaults={'km_utilizados': km}
+            )
+        return km
+
+    @staticmethod
+    def recalcular_chaves(chaves):
+        """
+        Recalcula o consumo de um conjunto de chaves (curso_id, ano, mes).
+
+        Args:
+            chaves: Iterável de chaves; valores None são ignorados
+        """
+        for chave in {c for c in chaves if c}:
+            ConsumoKmService.recalcular(*chave)
+
+    @staticmethod
+    def calcular_todos():
+        """
+        Calcula o consumo de todos os cursos e meses em uma consulta.
+
+        Returns:
+            dict: {(curso_id, ano, mes): km}
+        """
+        from agendamentos.models import Trajeto
+
+        linhas = Trajeto.objects.filter(
+            agendamento__status='aprovado'
+        ).annotate(
+            ano=ExtractYear('agendamento__data_inicio'),
+            mes=ExtractMonth('agendamento__data_inicio'),
+        ).values(
+            'agendamento__curso_id', 'ano', 'mes'
+        ).annotate(
+            km=Sum('quilometragem')
+        ).order_by()
+
+        return {
+            (linha['agendamento__curso_id'], linha['ano'], linha['mes']):
+                linha['km']
+            for linha in linhas
+        }
+
+    @staticmethod
+    def verificar():
+        """
+        Compara o consumo gravado com o calculado a partir dos trajetos.
+
+        Returns:
+            list: Tuplas (chave, km_gravado, km_calculado) divergentes
+        """
+        calculado = ConsumoKmService.calcular_todos()
+        gravado = {
+            (c.curso_id, c.ano, c.mes): c.km_utilizados
+            for c in ConsumoKmMensal.objects.all()
+        }
+
+        divergencias = []
+        for chave in sorted(set(calculado) | set(gravado), key=str):
+            km_gravado = gravado.get(chave, 0)
+            km_calculado = calculado.get(chave, 0)
+            if km_gravado != km_calculado:
+                divergencias.append((chave, km_gravado, km_calculado))
+        return divergencias
+
+    @staticmethod
+    def reconstruir():
+        """
+        Reconstrói todo o consumo mensal a partir dos trajetos.
+
+        Returns:
+            int: Quantidade de linhas gravadas
+        """
+        calculado = ConsumoKmService.calcular_todos()
+        with transaction.atomic():
+            ConsumoKmMensal.objects.all().delete()
+            ConsumoKmMensal.objects.bulk_create([
+                ConsumoKmMensal(
+                    curso_id=curso_id, ano=ano, mes=mes, km_utilizados=km
+                )
+                for (curso_id, ano, mes), km in calculado.items()
+            ])
+        return len(calculado)
@@ -0,0 +1,18 @@
+"""
+Sinais do app cursos.
+
+Invalida a lista de cursos ativos em cache (ver common/referencia.py).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.referencia import invalidar
+
+from .models import Curso
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_referencia(sender, **kwargs):
+    invalidar('cursos')
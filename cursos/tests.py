@@ -1,3 +1,231 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from common.referencia import CampoReferencia, cursos_ativos, motoristas
+from usuarios.models import Usuario
+
+from .models import ConsumoKmMensal, Curso
+from .services import ConsumoKmService
+
+
+class ReferenciaCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.curso = Curso.objects.create(nome='Agronomia')
+
+    def test_lista_em_cache_sem_consultas(self):
+        self.assertEqual(cursos_ativos(), [self.curso])
+        with self.assertNumQueries(0):
+            self.assertEqual(cursos_ativos(), [self.curso])
+
+    def test_alteracoes_invalidam_a_lista(self):
+        cursos_ativos()
+        outro = Curso.objects.create(nome='Biologia')
+        self.assertEqual(cursos_ativos(), [self.curso, outro])
+
+        self.curso.ativo = False
+        self.curso.save()
+        self.assertEqual(cursos_ativos(), [outro])
+
+        outro.delete()
+        self.assertEqual(cursos_ativos(), [])
+
+    def test_vinculo_ao_grupo_invalida_motoristas(self):
+        grupo = Group.objects.get_or_create(name='Motoristas')[0]
+        usuario = Usuario.objects.create_user('mot', password='x')
+        self.assertEqual(motoristas(), [])
+
+        usuario.groups.add(grupo)
+        self.assertEqual(motoristas(), [usuario])
+
+        grupo.user_set.remove(usuario)
+        self.assertEqual(motoristas(), [])
+
+    def test_campo_exibe_pela_lista_e_valida_no_banco(self):
+        campo = CampoReferencia('cursos')
+        cursos_ativos()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [valor for valor, _ in campo.choices],
+                ['', self.curso.pk],
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(campo.clean(str(self.curso.pk)), self.curso)
+
+        # Desativado sem sinal (como em outro processo): a lista em cache
+        # ainda o exibe, mas o valor enviado é recusado
+        Curso.objects.filter(pk=self.curso.pk).update(ativo=False)
+        self.assertEqual(cursos_ativos(), [self.curso])
+        with self.assertRaises(ValidationError):
+            campo.clean(str(self.curso.pk))
+
+    def test_motoristas_em_cache_sem_senha(self):
+        grupo = Group.objects.get_or_create(name='Motoristas')[0]
+        usuario = Usuario.objects.create_user(
+            'mot', first_name='Ana', password='x'
+        )
+        usuario.groups.add(grupo)
+
+        motorista, = motoristas()
+        self.assertEqual(motorista.get_full_name(), 'Ana')
+        self.assertEqual(
+            motorista.get_deferred_fields() & {'password', 'email'},
+            {'password', 'email'},
+        )
+
+
+class ConsumoKmMensalTest(TestCase):
+    """
+    Os signals mantêm o consumo mensal igual à soma calculada a partir
+    dos trajetos dos agendamentos aprovados.
+    """
+
+    def setUp(self):
+        from veiculos.models import Veiculo
+
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.agronomia = Curso.objects.create(
+            nome='Agronomia', limite_km_mensal=1000
+        )
+        self.biologia = Curso.objects.create(
+            nome='Biologia', limite_km_mensal=1000
+        )
+        self.veiculo = Veiculo.objects.create(
+            placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            capacidade_passageiros=5,
+        )
+
+    def agendamento(self, mes, dia, km, status='aprovado', hora=8):
+        from agendamentos.models import Agendamento, Trajeto
+
+        inicio = timezone.make_aware(datetime(2025, mes, dia, hora))
+        agendamento = Agendamento.objects.create(
+            curso=self.agronomia, professor=self.professor,
+            veiculo=self.veiculo, data_inicio=inicio,
+            data_fim=inicio + timedelta(hours=2), status=status,
+        )
+        Trajeto.objects.create(
+            agendamento=agendamento, origem='Campus',
+            destino='Fazenda-escola', data_saida=inicio,
+            data_chegada=inicio + timedelta(hours=1),
+            quilometragem=km, descricao='Aula de campo',
+        )
+        return agendamento
+
+    def assertConsumo(self, esperado):
+        """Compara o consumo gravado (sem zeros) e o calculado."""
+        gravado = {
+            (consumo.curso_id, consumo.ano, consumo.mes):
+                consumo.km_utilizados
+            for consumo in ConsumoKmMensal.objects.exclude(km_utilizados=0)
+        }
+        self.assertEqual(gravado, esperado)
+        self.assertEqual(ConsumoKmService.verificar(), [])
+
+    def recalculos(self, consultas):
+        """Quantas somas de quilometragem foram feitas nas consultas."""
+        return sum(
+            'SUM(' in consulta['sql'].upper()
+            for consulta in consultas.captured_queries
+        )
+
+    def test_criacao_e_edicao_de_trajetos(self):
+        agendamento = self.agendamento(3, 10, 100)
+        self.agendamento(3, 11, 50)
+        self.agendamento(3, 12, 70, status='pendente')
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 150})
+
+        trajeto = agendamento.trajetos.get()
+        trajeto.quilometragem = 120
+        trajeto.save()
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 170})
+
+        trajeto.delete()
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 50})
+
+    def test_mudanca_de_mes_e_de_curso(self):
+        agendamento = self.agendamento(3, 10, 100)
+
+        agendamento.data_inicio = timezone.make_aware(
+            datetime(2025, 4, 10, 8)
+        )
+        agendamento.data_fim = agendamento.data_inicio + timedelta(hours=2)
+        agendamento.save()
+        self.assertConsumo({(self.agronomia.pk, 2025, 4): 100})
+
+        agendamento.curso = self.biologia
+        agendamento.save()
+        self.assertConsumo({(self.biologia.pk, 2025, 4): 100})
+
+    def test_aprovacao_reprovacao_e_remocao(self):
+        agendamento = self.agendamento(3, 10, 100, status='pendente')
+        self.assertConsumo({})
+
+        agendamento.aprovar()
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 100})
+
+        agendamento.reprovar('Veículo indisponível')
+        self.assertConsumo({})
+
+        agendamento.aprovar()
+        agendamento.delete()
+        self.assertConsumo({})
+
+    def test_remocao_do_curso_com_agendamentos_aprovados(self):
+        from agendamentos.models import Trajeto
+
+        agendamento = self.agendamento(3, 10, 100)
+        Trajeto.objects.create(
+            agendamento=agendamento, origem='Fazenda-escola',
+            destino='Campus', data_saida=agendamento.data_inicio,
+            data_chegada=agendamento.data_fim,
+            quilometragem=100, descricao='Retorno',
+        )
+        self.agendamento(4, 10, 50)
+        self.assertConsumo({
+            (self.agronomia.pk, 2025, 3): 200,
+            (self.agronomia.pk, 2025, 4): 50,
+        })
+
+        # O consumo sai junto com o curso, sem recálculos na cascata
+        with CaptureQueriesContext(connection) as consultas:
+            self.agronomia.delete()
+        self.assertEqual(self.recalculos(consultas), 0)
+        self.assertConsumo({})
+
+    def test_remocao_do_agendamento_recalcula_uma_vez(self):
+        agendamento = self.agendamento(3, 10, 100)
+        self.agendamento(3, 11, 50)
+
+        with CaptureQueriesContext(connection) as consultas:
+            agendamento.delete()
+        self.assertEqual(self.recalculos(consultas), 1)
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 50})
+
+    def test_limite_pelo_mes_local(self):
+        # 31/03 às 22h em São Paulo já é abril em UTC
+        self.agendamento(3, 31, 600, hora=22)
+        pendente = self.agendamento(3, 31, 500, status='pendente', hora=21)
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 600})
+
+        pendente.refresh_from_db()
+        with self.assertRaises(ValidationError):
+            pendente.aprovar()
+
+    def test_reconstruir(self):
+        self.agendamento(3, 10, 100)
+        ConsumoKmMensal.objects.update(km_utilizados=999)
+        self.assertEqual(len(ConsumoKmService.verificar()), 1)
 
-# Create your tests here.
+        ConsumoKmService.reconstruir()
+        self.assertConsumo({(self.agronomia.pk, 2025, 3): 100})
@@ -0,0 +1,136 @@
+"""
+Management command para o benchmark das views mais pesadas.
+
+Cria um banco de teste, popula o conjunto de dados fixo do benchmark,
+executa os cenários de common/benchmark.py e compara consultas, latência
+e memória com a linha de base (common/benchmark_baseline.json). Termina
+com erro se algum orçamento for excedido.
+
+Uso:
+  python manage.py benchmark_views
+  python manage.py benchmark_views --cenarios relatorio_geral dashboard
+  python manage.py benchmark_views --tolerancia-latencia 1.0
+  python manage.py benchmark_views --atualizar-baseline
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from common import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede consultas, latência e memória das views mais pesadas e '
+        'compara com a linha de base'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Execuções cronometradas por cenário (padrão: 5)',
+        )
+        parser.add_argument(
+            '--cenarios',
+            nargs='+',
+            choices=list(benchmark.CENARIOS),
+            help='Cenários a executar (padrão: todos)',
+        )
+        parser.add_argument(
+            '--tolerancia-latencia',
+            type=float,
+            default=0.5,
+            help=(
+                'Aumento relativo aceito no p95 em relação à linha de base '
+                '(padrão: 0.5); use um valor negativo para não comparar'
+            ),
+        )
+        parser.add_argument(
+            '--tolerancia-memoria',
+            type=float,
+            default=benchmark.TOLERANCIA_MEMORIA,
+            help=(
+                'Aumento relativo aceito no pico de memória (padrão: '
+                f'{benchmark.TOLERANCIA_MEMORIA})'
+            ),
+        )
+        parser.add_argument(
+            '--atualizar-baseline',
+            action='store_true',
+            help='Grava os resultados como nova linha de base',
+        )
+        parser.add_argument(
+            '--json',
+            help='Grava os resultados também neste arquivo',
+        )
+
+    def handle(self, *args, **options):
+        # Banco de teste isolado: o banco de desenvolvimento não é tocado
+        setup_test_environment()
+        nome_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write('Populando o conjunto de dados...')
+            benchmark.popular_dados()
+            self.stdout.write(
+                f"\n{'Cenário':<28} {'Consultas':>9} {'p50 (ms)':>9} "
+                f"{'p95 (ms)':>9} {'Pico (KB)':>10}"
+            )
+            resultados = benchmark.executar(
+                repeticoes=options['repeticoes'],
+                cenarios=options['cenarios'],
+                ao_medir=self._imprimir,
+            )
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as arquivo:
+                json.dump(resultados, arquivo, indent=2, sort_keys=True)
+
+        if options['atualizar_baseline']:
+            baseline = benchmark.carregar_baseline()
+            baseline.update(resultados)
+            benchmark.salvar_baseline(baseline)
+            self.stdout.write(self.style.SUCCESS(
+                f'\nLinha de base atualizada: {benchmark.ARQUIVO_BASELINE}'
+            ))
+            return
+
+        tolerancia_latencia = options['tolerancia_latencia']
+        falhas, avisos = benchmark.comparar(
+            resultados,
+            benchmark.carregar_baseline(),
+            tolerancia_latencia=(
+                tolerancia_latencia if tolerancia_latencia >= 0 else None
+            ),
+            tolerancia_memoria=options['tolerancia_memoria'],
+        )
+        for aviso in avisos:
+            self.stdout.write(self.style.WARNING(f'   ! {aviso}'))
+        for falha in falhas:
+            self.stdout.write(self.style.ERROR(f'   ✗ {falha}'))
+        if falhas:
+            raise CommandError(
+                f'{len(falhas)} orçamento(s) excedido(s) em relação à '
+                f'linha de base.'
+            )
+        self.stdout.write(
+            self.style.SUCCESS('\nDentro dos orçamentos da linha de base.')
+        )
+
+    def _imprimir(self, nome, resultado):
+        self.stdout.write(
+            f"{nome:<28} {resultado['consultas']:>9} "
+            f"{resultado['latencia_p50_ms']:>9.1f} "
+            f"{resultado['latencia_p95_ms']:>9.1f} "
+            f"{resultado['memoria_pico_kb']:>10}"
+        )
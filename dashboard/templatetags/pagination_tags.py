@@ -30,6 +30,13 @@ def render_pagination(context, page_obj, **kwargs):
     if 'page' in current_params:
         current_params.pop('page')
 
+    # Paginação por cursor: apenas anterior/próxima, sem números
+    if getattr(page_obj, 'cursor', False):
+        return {
+            'page_obj': page_obj,
+            'query_params': current_params.urlencode(),
+        }
+
     # Calcular range de páginas para exibir
     current_page = page_obj.number
     total_pages = page_obj.paginator.num_pages
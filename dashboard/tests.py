@@ -1,3 +1,30 @@
-from django.test import TestCase
+import os
 
-# Create your tests here.
+from django.test import TestCase, tag
+
+from common import benchmark
+
+
+@tag('benchmark')
+class BenchmarkViewsTest(TestCase):
+    """
+    Compara as views mais pesadas com a linha de base do benchmark.
+
+    Consultas e memória são sempre comparadas; a latência só com
+    BENCHMARK_TOLERANCIA_LATENCIA definido (ex.: 0.5), já que depende da
+    máquina. Para pular: python manage.py test --exclude-tag benchmark
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmark.popular_dados()
+
+    def test_orcamentos(self):
+        tolerancia = os.getenv('BENCHMARK_TOLERANCIA_LATENCIA')
+        resultados = benchmark.executar(repeticoes=3)
+        falhas, _ = benchmark.comparar(
+            resultados,
+            benchmark.carregar_baseline(),
+            tolerancia_latencia=float(tolerancia) if tolerancia else None,
+        )
+        self.assertEqual(falhas, [], '\n'.join(falhas))
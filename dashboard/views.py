@@ -1,30 +1,33 @@
 from datetime import datetime
 
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.db.models import Q
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 
 from agendamentos.models import Agendamento
+from common.metricas import formato_prometheus
+from common.metricas import resumo as resumo_metricas
+from common.periodos import filtro_periodo, intervalo_mes
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 
 
-@login_required
-def dashboard(request):
-    if request.user.is_motorista():
-        return redirect('frotas:dashboard_motorista')
-    if request.user.is_responsavel_campus():
-        return redirect('frotas:dashboard_responsavel')
+def agendamentos_do_mes(usuario, ano, mes):
+    """
+    Agendamentos do mês exibidos no dashboard do usuário.
 
-    # Obter o mês e ano do calendário (padrão: mês atual)
-    try:
-        mes = int(request.GET.get('mes', timezone.now().month))
-        ano = int(request.GET.get('ano', timezone.now().year))
-    except (ValueError, TypeError):
-        mes = timezone.now().month
-        ano = timezone.now().year
+    Args:
+        usuario: Usuário da requisição
+        ano: Ano
+        mes: Mês
 
+    Returns:
+        QuerySet: Agendamentos do mês, por data de início
+    """
     # Filtrar agendamentos do mês específico
     # Administradores veem todos os agendamentos (exceto cancelados)
     # Usuários comuns veem:
@@ -32,25 +35,42 @@ def dashboard(request):
     #   - Apenas seus próprios pendentes (não mostra cancelados)
     # Usuários não autenticados veem apenas aprovados
 
-    if not request.user.is_authenticated:
+    if not usuario.is_authenticated:
         # Não autenticado: apenas aprovados
         agendamentos = Agendamento.objects.filter(status='aprovado')
-    elif request.user.is_administrador():
+    elif usuario.is_administrador():
         # Admin: todos exceto cancelados
         agendamentos = Agendamento.objects.exclude(status='reprovado')
     else:
         # Usuários comuns: aprovados de todos + seus próprios pendentes
         agendamentos = Agendamento.objects.filter(
             Q(status='aprovado') |
-            Q(professor=request.user, status='pendente')
+            Q(professor=usuario, status='pendente')
         )
 
-    agendamentos = agendamentos.select_related(
+    return agendamentos.select_related(
         'curso', 'professor', 'veiculo'
     ).filter(
-        data_inicio__year=ano,
-        data_inicio__month=mes
-    ).order_by('data_inicio__day', 'data_inicio__time')
+        **filtro_periodo('data_inicio', *intervalo_mes(ano, mes))
+    ).order_by('data_inicio')
+
+
+@login_required
+def dashboard(request):
+    if request.user.is_motorista():
+        return redirect('frotas:dashboard_motorista')
+    if request.user.is_responsavel_campus():
+        return redirect('frotas:dashboard_responsavel')
+
+    # Obter o mês e ano do calendário (padrão: mês atual)
+    try:
+        mes = int(request.GET.get('mes', timezone.now().month))
+        ano = int(request.GET.get('ano', timezone.now().year))
+    except (ValueError, TypeError):
+        mes = timezone.now().month
+        ano = timezone.now().year
+
+    agendamentos = agendamentos_do_mes(request.user, ano, mes)
 
     # Paginação (6 agendamentos por página para mobile)
     paginator = Paginator(agendamentos, 6)
@@ -65,3 +85,35 @@ def dashboard(request):
     }
 
     return render(request, 'dashboard/index.html', context)
+
+
+def metricas(request):
+    """
+    Expõe as métricas de desempenho por view (ver common.metricas).
+
+    Acesso restrito a usuários staff ou, para coletores como o
+    Prometheus, ao cabeçalho "Authorization: Bearer <METRICAS_TOKEN>".
+    Retorna JSON por padrão e o formato texto do Prometheus com
+    ?formato=prometheus.
+    """
+    token = settings.METRICAS_TOKEN
+    autorizacao = request.headers.get('Authorization', '')
+    token_valido = bool(token) and constant_time_compare(
+        autorizacao, f'Bearer {token}'
+    )
+    if not token_valido and not (
+        request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+
+    dados = resumo_metricas()
+    if request.GET.get('formato') == 'prometheus':
+        return HttpResponse(
+            formato_prometheus(dados),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+    return JsonResponse({
+        'janela': settings.METRICAS_JANELA,
+        'orcamento_consultas': settings.METRICAS_ORCAMENTO_CONSULTAS,
+        'views': dados,
+    })
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import ExportacaoJob
+
+
+@admin.register(ExportacaoJob)
+class ExportacaoJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'tipo', 'status', 'solicitante', 'tentativas',
+        'criado_em', 'concluido_em',
+    ]
+    list_filter = ['status', 'tipo']
+    search_fields = ['chave', 'nome_arquivo']
+    readonly_fields = [
+        'chave', 'versao_dados', 'criado_em', 'iniciado_em', 'concluido_em',
+    ]
@@ -0,0 +1,97 @@
+"""
+Geradores de exportação.
+
+Cada tipo de exportação é descrito por um gerador, que sabe calcular a
+versão dos dados de um conjunto de parâmetros e montar o exportador
+(BaseExporter) correspondente. Os geradores ficam nos apps de domínio e são
+registrados em GERADORES pelo caminho da classe, para que este app não
+dependa deles na importação.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.module_loading import import_string
+
+GERADORES = {
+    'relatorio_excel': 'agendamentos.exports.geradores.RelatorioExcelGerador',
+    'relatorio_pdf': 'agendamentos.exports.geradores.RelatorioPDFGerador',
+    'curso_excel': 'agendamentos.exports.geradores.CursoExcelGerador',
+    'professor_excel': 'agendamentos.exports.geradores.ProfessorExcelGerador',
+    'professor_pdf': 'agendamentos.exports.geradores.ProfessorPDFGerador',
+    'boletim_pdf': 'frotas.exports.BoletimPDFGerador',
+}
+
+
+def obter_gerador(tipo):
+    """
+    Retorna uma instância do gerador do tipo de exportação.
+
+    Raises:
+        KeyError: Se o tipo não estiver registrado
+    """
+    return import_string(GERADORES[tipo])()
+
+
+class GeradorExportacao:
+    """
+    Base dos geradores de exportação.
+
+    Atributos:
+        descricao: Nome exibido ao usuário
+        escopo_campus: Se True, os parâmetros de usuários não
+            administradores trazem o campus e só podem ser baixados por
+            usuários do mesmo campus
+    """
+
+    descricao = ''
+    escopo_campus = False
+
+    def versao(self, parametros):
+        """
+        Calcula a impressão digital dos dados usados na exportação.
+
+        Args:
+            parametros: Parâmetros normalizados
+
+        Returns:
+            str: Hash que muda quando os dados exportados mudam
+        """
+        raise NotImplementedError
+
+    def exportador(self, parametros):
+        """
+        Monta o exportador com os dados da exportação.
+
+        Args:
+            parametros: Parâmetros normalizados
+
+        Returns:
+            BaseExporter: Exportador pronto para exportar()
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def impressao_digital(*partes):
+        """Gera o hash de versão a partir de valores agregados."""
+        return hashlib.md5(repr(partes).encode()).hexdigest()
+
+    @staticmethod
+    def agregados_agendamentos(agendamentos):
+        """
+        Resume um queryset de agendamentos para o cálculo de versão.
+
+        Usa a última alteração (que inclui mudanças nos trajetos), a
+        contagem de agendamentos e os totais de trajetos e quilometragem
+        gravados nos agendamentos, em uma única consulta.
+
+        Returns:
+            tuple: Valores agregados
+        """
+        agregado = agendamentos.order_by().aggregate(
+            ultima_alteracao=Max('atualizado_em'),
+            total=Count('id'),
+            soma_trajetos=Sum('total_trajetos'),
+            soma_km=Sum('total_km'),
+        )
+        return tuple(sorted(agregado.items()))
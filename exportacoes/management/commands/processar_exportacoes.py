@@ -0,0 +1,87 @@
+"""
+Management command do worker de exportações.
+
+Consome a fila de exportações (ExportacaoJob) gravada no banco, sem
+depender de broker externo. Vários workers podem rodar em paralelo.
+
+Uso:
+  python manage.py processar_exportacoes              # roda continuamente
+  python manage.py processar_exportacoes --uma-vez    # esvazia a fila e sai
+  python manage.py processar_exportacoes --limpar-dias 7
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from exportacoes.services import ExportacaoService
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de exportações de relatórios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa os jobs pendentes e encerra',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)',
+        )
+        parser.add_argument(
+            '--timeout-minutos',
+            type=int,
+            default=30,
+            help=(
+                'Devolve à fila jobs em processamento há mais tempo que '
+                'isso (padrão: 30)'
+            ),
+        )
+        parser.add_argument(
+            '--limpar-dias',
+            type=int,
+            default=None,
+            help='Remove exportações finalizadas há mais de N dias e sai',
+        )
+
+    def handle(self, *args, **options):
+        if options['limpar_dias'] is not None:
+            total = ExportacaoService.remover_expirados(options['limpar_dias'])
+            self.stdout.write(
+                self.style.SUCCESS(f'{total} exportação(ões) removida(s).')
+            )
+            return
+
+        devolvidos = ExportacaoService.recuperar_travados(
+            options['timeout_minutos']
+        )
+        if devolvidos:
+            self.stdout.write(
+                f'{devolvidos} job(s) interrompido(s) devolvido(s) à fila.'
+            )
+
+        while True:
+            # Processo de longa duração: descarta conexões expiradas
+            close_old_connections()
+            job = ExportacaoService.reservar_proximo()
+            if job is None:
+                if options['uma_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.monotonic()
+            if ExportacaoService.processar(job):
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {job.tipo} {job.pk} '
+                    f'({time.monotonic() - inicio:.1f}s)'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'✗ {job.tipo} {job.pk} '
+                    f'(tentativa {job.tentativas}, status {job.status})'
+                ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=30, verbose_name='Tipo')),
+                ('parametros', models.JSONField(default=dict, verbose_name='Parâmetros')),
+                ('chave', models.CharField(help_text='Hash do tipo e dos parâmetros normalizados', max_length=64, verbose_name='Chave')),
+                ('versao_dados', models.CharField(blank=True, help_text='Impressão digital dos dados usados na geração', max_length=32, verbose_name='Versão dos Dados')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=15, verbose_name='Status')),
+                ('arquivo', models.FileField(blank=True, upload_to='exportacoes/%Y/%m/', verbose_name='Arquivo')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255, verbose_name='Nome do Arquivo')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content-Type')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('solicitante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exportacoes', to=settings.AUTH_USER_MODEL, verbose_name='Solicitante')),
+            ],
+            options={
+                'verbose_name': 'Exportação',
+                'verbose_name_plural': 'Exportações',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='exportacao_fila_idx'), models.Index(fields=['chave', 'criado_em'], name='exportacao_chave_idx')],
+            },
+        ),
+    ]
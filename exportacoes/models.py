@@ -0,0 +1,103 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class ExportacaoJob(models.Model):
+    """
+    Exportação de relatório processada em segundo plano.
+
+    Funciona como fila (status pendente → processando → concluido/erro),
+    consumida pelo comando processar_exportacoes, e como cache do arquivo
+    gerado: solicitações com a mesma chave (tipo + parâmetros
+    normalizados) reaproveitam o arquivo enquanto versao_dados não mudar.
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluido', 'Concluído'),
+        ('erro', 'Erro'),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    tipo = models.CharField(max_length=30, verbose_name='Tipo')
+    parametros = models.JSONField(default=dict, verbose_name='Parâmetros')
+    chave = models.CharField(
+        max_length=64,
+        verbose_name='Chave',
+        help_text='Hash do tipo e dos parâmetros normalizados',
+    )
+    versao_dados = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Versão dos Dados',
+        help_text='Impressão digital dos dados usados na geração',
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=STATUS_CHOICES,
+        default='pendente',
+        verbose_name='Status',
+    )
+    solicitante = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exportacoes',
+        verbose_name='Solicitante',
+    )
+    arquivo = models.FileField(
+        upload_to='exportacoes/%Y/%m/',
+        blank=True,
+        verbose_name='Arquivo',
+    )
+    nome_arquivo = models.CharField(
+        max_length=255, blank=True, verbose_name='Nome do Arquivo'
+    )
+    content_type = models.CharField(
+        max_length=100, blank=True, verbose_name='Content-Type'
+    )
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    tentativas = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Tentativas'
+    )
+    criado_em = models.DateTimeField(
+        auto_now_add=True, verbose_name='Criado em'
+    )
+    iniciado_em = models.DateTimeField(
+        null=True, blank=True, verbose_name='Iniciado em'
+    )
+    concluido_em = models.DateTimeField(
+        null=True, blank=True, verbose_name='Concluído em'
+    )
+
+    class Meta:
+        verbose_name = 'Exportação'
+        verbose_name_plural = 'Exportações'
+        ordering = ['-criado_em']
+        indexes = [
+            # Próximo job da fila
+            models.Index(
+                fields=['status', 'criado_em'],
+                name='exportacao_fila_idx',
+            ),
+            # Reaproveitamento por chave
+            models.Index(
+                fields=['chave', 'criado_em'],
+                name='exportacao_chave_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f'{self.tipo} — {self.get_status_display()} — '
+            f'{self.criado_em:%d/%m/%Y %H:%M}'
+        )
+
+    @property
+    def em_andamento(self):
+        return self.status in ('pendente', 'processando')
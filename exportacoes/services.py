@@ -0,0 +1,294 @@
+"""
+Serviços de negócio para exportações.
+
+Este módulo implementa a fila de exportações em banco (ExportacaoJob):
+solicitação com reaproveitamento de arquivos já gerados, reserva de jobs
+pelo worker e geração do arquivo.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import traceback
+from datetime import date, timedelta
+from uuid import UUID
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .geradores import obter_gerador
+from .models import ExportacaoJob
+
+
+class ExportacaoService:
+    """
+    Serviço para a fila de exportações.
+    """
+
+    @staticmethod
+    def normalizar(parametros):
+        """
+        Normaliza os parâmetros de uma exportação.
+
+        Remove valores vazios e converte UUIDs e datas em texto, para que
+        filtros equivalentes gerem sempre a mesma chave.
+
+        Args:
+            parametros: Dict de parâmetros da exportação
+
+        Returns:
+            dict: Parâmetros normalizados, ordenados pela chave
+        """
+        normalizados = {}
+        for nome, valor in sorted(parametros.items()):
+            if valor is None or valor == '':
+                continue
+            if isinstance(valor, date):
+                valor = valor.isoformat()
+            elif isinstance(valor, UUID):
+                valor = str(valor)
+            normalizados[nome] = valor
+        return normalizados
+
+    @staticmethod
+    def escopo(usuario):
+        """
+        Retorna o campus que limita as exportações do usuário.
+
+        Returns:
+            str ou None: ID do campus do usuário, ou None se não tiver
+        """
+        return str(usuario.campus_id) if usuario.campus_id else None
+
+    @staticmethod
+    def chave(tipo, parametros):
+        """
+        Calcula a chave de cache de uma exportação.
+
+        Args:
+            tipo: Tipo da exportação
+            parametros: Parâmetros normalizados
+
+        Returns:
+            str: Hash SHA-256 do tipo e dos parâmetros
+        """
+        conteudo = json.dumps(
+            {'tipo': tipo, 'parametros': parametros}, sort_keys=True
+        )
+        return hashlib.sha256(conteudo.encode()).hexdigest()
+
+    @staticmethod
+    def solicitar(tipo, parametros, usuario):
+        """
+        Solicita uma exportação, reaproveitando o que já existir.
+
+        Retorna, nesta ordem: um job concluído com a mesma chave cujos
+        dados não mudaram (dentro de EXPORTACAO_VALIDADE_HORAS); um job
+        com a mesma chave ainda na fila; ou um novo job pendente. Com
+        EXPORTACAO_ASSINCRONA desligado, o novo job é processado na hora.
+
+        Args:
+            tipo: Tipo da exportação (ver geradores.GERADORES)
+            parametros: Dict de parâmetros (filtros) da exportação
+            usuario: Usuário solicitante
+
+        Returns:
+            ExportacaoJob: Job da exportação
+        """
+        gerador = obter_gerador(tipo)
+        parametros = ExportacaoService.normalizar(parametros)
+        if gerador.escopo_campus and not usuario.is_administrador():
+            parametros['campus'] = ExportacaoService.escopo(usuario)
+        chave = ExportacaoService.chave(tipo, parametros)
+
+        limite = timezone.now() - timedelta(
+            hours=settings.EXPORTACAO_VALIDADE_HORAS
+        )
+        existentes = ExportacaoJob.objects.filter(
+            chave=chave
+        ).exclude(status='erro').order_by('-criado_em')
+
+        versao = None
+        for job in existentes[:5]:
+            if job.em_andamento:
+                return job
+            recente = job.concluido_em and job.concluido_em >= limite
+            if recente and job.arquivo:
+                if versao is None:
+                    versao = gerador.versao(parametros)
+                if job.versao_dados == versao:
+                    return job
+
+        job = ExportacaoJob.objects.create(
+            tipo=tipo,
+            parametros=parametros,
+            chave=chave,
+            solicitante=usuario,
+        )
+        if not settings.EXPORTACAO_ASSINCRONA:
+            if ExportacaoService.reservar(job):
+                ExportacaoService.processar(job)
+        return job
+
+    @staticmethod
+    def reservar(job):
+        """
+        Marca o job como em processamento, se ainda estiver pendente.
+
+        A troca de status é um UPDATE condicional, então dois workers
+        nunca reservam o mesmo job.
+
+        Args:
+            job: Job pendente
+
+        Returns:
+            bool: True se este processo reservou o job
+        """
+        agora = timezone.now()
+        reservado = ExportacaoJob.objects.filter(
+            pk=job.pk, status='pendente'
+        ).update(
+            status='processando',
+            iniciado_em=agora,
+            tentativas=job.tentativas + 1,
+        )
+        if reservado:
+            job.status = 'processando'
+            job.iniciado_em = agora
+            job.tentativas += 1
+        return bool(reservado)
+
+    @staticmethod
+    def reservar_proximo():
+        """
+        Reserva o job pendente mais antigo da fila.
+
+        Returns:
+            ExportacaoJob ou None: Job reservado, ou None se a fila
+            estiver vazia
+        """
+        while True:
+            job = ExportacaoJob.objects.filter(
+                status='pendente'
+            ).order_by('criado_em').first()
+            if job is None:
+                return None
+            if ExportacaoService.reservar(job):
+                return job
+            # Outro worker reservou antes; tenta o próximo
+
+    @staticmethod
+    def processar(job):
+        """
+        Gera o arquivo de um job reservado.
+
+        Em caso de falha o job volta para a fila até atingir
+        EXPORTACAO_MAX_TENTATIVAS, quando fica com status erro.
+
+        Args:
+            job: Job com status processando
+
+        Returns:
+            bool: True se o arquivo foi gerado
+        """
+        try:
+            gerador = obter_gerador(job.tipo)
+            versao = gerador.versao(job.parametros)
+            exporter = gerador.exportador(job.parametros)
+            response = exporter.exportar()
+
+            with tempfile.TemporaryFile() as temporario:
+                for bloco in response:
+                    temporario.write(bloco)
+                # Libera o arquivo temporário do FileResponse, se houver
+                arquivo_resposta = getattr(response, 'file_to_stream', None)
+                if arquivo_resposta is not None:
+                    arquivo_resposta.close()
+
+                nome_arquivo = exporter.get_filename()
+                extensao = os.path.splitext(nome_arquivo)[1]
+                job.arquivo.save(
+                    f'{job.pk}{extensao}', File(temporario), save=False
+                )
+        except Exception:
+            job.erro = traceback.format_exc()
+            if job.tentativas >= settings.EXPORTACAO_MAX_TENTATIVAS:
+                job.status = 'erro'
+                job.concluido_em = timezone.now()
+            else:
+                job.status = 'pendente'
+            job.save(update_fields=['erro', 'status', 'concluido_em'])
+            return False
+
+        job.status = 'concluido'
+        job.versao_dados = versao
+        job.nome_arquivo = nome_arquivo
+        job.content_type = exporter.get_content_type()
+        job.erro = ''
+        job.concluido_em = timezone.now()
+        job.save(update_fields=[
+            'arquivo', 'status', 'versao_dados', 'nome_arquivo',
+            'content_type', 'erro', 'concluido_em',
+        ])
+        return True
+
+    @staticmethod
+    def recuperar_travados(minutos):
+        """
+        Devolve à fila jobs em processamento há mais de `minutos`.
+
+        Cobre workers interrompidos no meio de uma geração.
+
+        Returns:
+            int: Quantidade de jobs devolvidos
+        """
+        limite = timezone.now() - timedelta(minutes=minutos)
+        return ExportacaoJob.objects.filter(
+            status='processando', iniciado_em__lt=limite
+        ).update(status='pendente')
+
+    @staticmethod
+    def remover_expirados(dias):
+        """
+        Remove jobs finalizados há mais de `dias` e seus arquivos.
+
+        Returns:
+            int: Quantidade de jobs removidos
+        """
+        limite = timezone.now() - timedelta(days=dias)
+        expirados = ExportacaoJob.objects.filter(
+            status__in=('concluido', 'erro'), criado_em__lt=limite
+        )
+        total = 0
+        for job in expirados.iterator():
+            if job.arquivo:
+                job.arquivo.delete(save=False)
+            job.delete()
+            total += 1
+        return total
+
+    @staticmethod
+    def pode_acessar(job, usuario):
+        """
+        Verifica se o usuário pode acompanhar e baixar a exportação.
+
+        Exportações são restritas a administradores e responsáveis de
+        campus; as de escopo por campus só são liberadas para usuários
+        do mesmo campus (ou administradores).
+
+        Returns:
+            bool: True se o acesso é permitido
+        """
+        if usuario.is_administrador():
+            return True
+        if not usuario.is_responsavel_campus():
+            return False
+        if obter_gerador(job.tipo).escopo_campus:
+            escopo = ExportacaoService.escopo(usuario)
+            return (
+                'campus' in job.parametros
+                and job.parametros['campus'] == escopo
+            )
+        return True
@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from campus.models import Campus
+from usuarios.models import Usuario
+
+from .models import ExportacaoJob
+from .services import ExportacaoService
+
+MEDIA_TESTES = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TESTES)
+class ExportacaoTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TESTES, ignore_errors=True)
+
+    def setUp(self):
+        self.central = Campus.objects.create(nome='Central')
+        self.norte = Campus.objects.create(nome='Norte')
+        self.admin = Usuario.objects.create_superuser(
+            'admin', email='admin@uespi.br', password='x'
+        )
+        self.responsavel = self.usuario('resp', self.central)
+        self.responsavel_norte = self.usuario('respnorte', self.norte)
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x', campus=self.central
+        )
+
+    def usuario(self, username, campus):
+        usuario = Usuario.objects.create_user(
+            username, email=f'{username}@uespi.br', password='x',
+            campus=campus,
+        )
+        usuario.groups.add(Group.objects.get_or_create(
+            name='Responsaveis de Campus'
+        )[0])
+        return usuario
+
+
+class ExportacaoAcessoTest(ExportacaoTestCase):
+    """Status e download só para administradores e responsáveis."""
+
+    def job(self, tipo='relatorio_excel', parametros=None,
+            status='concluido'):
+        job = ExportacaoJob.objects.create(
+            tipo=tipo,
+            parametros=parametros or {},
+            chave=tipo,
+            status=status,
+            nome_arquivo='relatorio.xlsx',
+        )
+        if status == 'concluido':
+            job.arquivo.save(f'{job.pk}.xlsx', ContentFile(b'xlsx'))
+        return job
+
+    def baixar(self, usuario, job):
+        if usuario:
+            self.client.force_login(usuario)
+        return self.client.get(reverse('exportacoes:baixar', args=[job.pk]))
+
+    def test_download_restrito_ao_campus_do_responsavel(self):
+        job = self.job(parametros={
+            'ano': 2025, 'mes': 3, 'campus': str(self.central.pk),
+        })
+
+        for usuario in (self.admin, self.responsavel):
+            with self.subTest(usuario=usuario.username):
+                response = self.baixar(usuario, job)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    b''.join(response.streaming_content), b'xlsx'
+                )
+
+        for usuario in (self.responsavel_norte, self.professor):
+            with self.subTest(usuario=usuario.username):
+                self.assertEqual(self.baixar(usuario, job).status_code, 404)
+                for nome in ('exportacoes:status', 'exportacoes:status_json'):
+                    response = self.client.get(reverse(nome, args=[job.pk]))
+                    self.assertEqual(response.status_code, 404)
+
+        self.client.logout()
+        self.assertEqual(self.baixar(None, job).status_code, 302)
+
+    def test_job_sem_campus_negado_a_responsaveis(self):
+        job = self.job(parametros={'ano': 2025, 'mes': 3})
+        self.assertEqual(self.baixar(self.responsavel, job).status_code, 404)
+        self.assertEqual(self.baixar(self.admin, job).status_code, 200)
+
+    def test_tipo_sem_escopo_liberado_a_responsaveis(self):
+        job = self.job(tipo='curso_excel', parametros={'ano': 2025})
+        self.assertEqual(
+            self.baixar(self.responsavel_norte, job).status_code, 200
+        )
+        self.assertEqual(self.baixar(self.professor, job).status_code, 404)
+
+    def test_job_em_andamento_redireciona_para_o_status(self):
+        job = self.job(status='processando')
+        response = self.baixar(self.admin, job)
+        self.assertRedirects(
+            response, reverse('exportacoes:status', args=[job.pk])
+        )
+        response = self.client.get(
+            reverse('exportacoes:status_json', args=[job.pk])
+        )
+        self.assertEqual(response.json()['download_url'], None)
+        self.assertTrue(response.json()['em_andamento'])
+
+
+@override_settings(EXPORTACAO_ASSINCRONA=True, EXPORTACAO_MAX_TENTATIVAS=2)
+class ExportacaoFilaTest(ExportacaoTestCase):
+    """Fila com reserva condicional e reaproveitamento de arquivos."""
+
+    parametros = {'ano': 2025, 'mes': 3, 'curso': '', 'status': None}
+
+    def solicitar(self, usuario=None):
+        return ExportacaoService.solicitar(
+            'relatorio_excel', self.parametros, usuario or self.admin
+        )
+
+    def test_solicitacoes_iguais_compartilham_o_job(self):
+        job = self.solicitar()
+        self.assertEqual(job.status, 'pendente')
+        self.assertEqual(job.parametros, {'ano': 2025, 'mes': 3})
+        self.assertEqual(self.solicitar(), job)
+
+        # O campus do responsável entra nos parâmetros (outra chave)
+        do_responsavel = self.solicitar(self.responsavel)
+        self.assertNotEqual(do_responsavel, job)
+        self.assertEqual(
+            do_responsavel.parametros['campus'], str(self.central.pk)
+        )
+
+    def test_reserva_condicional(self):
+        job = self.solicitar()
+        concorrente = ExportacaoJob.objects.get(pk=job.pk)
+
+        self.assertTrue(ExportacaoService.reservar(job))
+        self.assertFalse(ExportacaoService.reservar(concorrente))
+        self.assertIsNone(ExportacaoService.reservar_proximo())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.tentativas), ('processando', 1))
+
+    def test_arquivo_reaproveitado_ate_os_dados_mudarem(self):
+        from agendamentos.models import Agendamento
+        from cursos.models import Curso
+        from veiculos.models import Veiculo
+
+        job = self.solicitar()
+        ExportacaoService.reservar(job)
+        self.assertTrue(ExportacaoService.processar(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'concluido')
+        self.assertTrue(job.arquivo)
+
+        self.assertEqual(self.solicitar(), job)
+
+        inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        Agendamento.objects.create(
+            curso=Curso.objects.create(nome='Agronomia'),
+            professor=self.professor,
+            veiculo=Veiculo.objects.create(
+                placa='ABC1D23', modelo='Gol', marca='VW', ano=2020,
+            ),
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+        novo = self.solicitar()
+        self.assertNotEqual(novo, job)
+        self.assertEqual(novo.status, 'pendente')
+
+    def test_falha_volta_para_a_fila_ate_o_limite(self):
+        job = self.solicitar()
+        with mock.patch(
+            'exportacoes.services.obter_gerador',
+            side_effect=RuntimeError('falhou'),
+        ):
+            for status in ('pendente', 'erro'):
+                self.assertTrue(ExportacaoService.reservar(job))
+                self.assertFalse(ExportacaoService.processar(job))
+                job.refresh_from_db()
+                self.assertEqual(job.status, status)
+                self.assertIn('falhou', job.erro)
+
+        # Jobs com erro não são reaproveitados
+        self.assertNotEqual(self.solicitar(), job)
+
+    def test_recupera_jobs_travados(self):
+        job = self.solicitar()
+        ExportacaoService.reservar(job)
+        ExportacaoJob.objects.filter(pk=job.pk).update(
+            iniciado_em=timezone.now() - timedelta(minutes=30)
+        )
+
+        self.assertEqual(ExportacaoService.recuperar_travados(60), 0)
+        self.assertEqual(ExportacaoService.recuperar_travados(10), 1)
+        self.assertEqual(ExportacaoService.reservar_proximo(), job)
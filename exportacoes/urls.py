@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'exportacoes'
+
+urlpatterns = [
+    path('<uuid:pk>/', views.status_exportacao, name='status'),
+    path('<uuid:pk>/status/', views.status_exportacao_json,
+         name='status_json'),
+    path('<uuid:pk>/baixar/', views.baixar_exportacao, name='baixar'),
+]
@@ -0,0 +1,81 @@
+"""
+Views para acompanhamento e download de exportações.
+
+As views de exportação dos apps apenas enfileiram o job (via
+ExportacaoService.solicitar) e redirecionam para cá com
+redirecionar_para_exportacao.
+"""
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from .geradores import obter_gerador
+from .models import ExportacaoJob
+from .services import ExportacaoService
+
+
+def redirecionar_para_exportacao(job):
+    """
+    Redireciona para o download, se pronto, ou para a página de status.
+
+    Args:
+        job: Job retornado por ExportacaoService.solicitar
+
+    Returns:
+        HttpResponseRedirect: Redirecionamento apropriado
+    """
+    if job.status == 'concluido':
+        return redirect('exportacoes:baixar', pk=job.pk)
+    return redirect('exportacoes:status', pk=job.pk)
+
+
+def _obter_job(request, pk):
+    """Busca o job e verifica se o usuário pode acessá-lo."""
+    job = get_object_or_404(ExportacaoJob, pk=pk)
+    if not ExportacaoService.pode_acessar(job, request.user):
+        raise Http404('Exportação não encontrada.')
+    return job
+
+
+@login_required
+def status_exportacao(request, pk):
+    """Página de acompanhamento de uma exportação."""
+    job = _obter_job(request, pk)
+    return render(request, 'exportacoes/status.html', {
+        'job': job,
+        'descricao': obter_gerador(job.tipo).descricao,
+    })
+
+
+@login_required
+def status_exportacao_json(request, pk):
+    """Status da exportação em JSON, para consulta periódica."""
+    job = _obter_job(request, pk)
+    dados = {
+        'id': str(job.pk),
+        'status': job.status,
+        'em_andamento': job.em_andamento,
+        'download_url': None,
+    }
+    if job.status == 'concluido':
+        dados['download_url'] = reverse('exportacoes:baixar', args=[job.pk])
+    return JsonResponse(dados)
+
+
+@login_required
+def baixar_exportacao(request, pk):
+    """Envia o arquivo de uma exportação concluída."""
+    job = _obter_job(request, pk)
+    if job.status != 'concluido' or not job.arquivo:
+        messages.info(request, 'A exportação ainda não está pronta.')
+        return redirect('exportacoes:status', pk=job.pk)
+
+    return FileResponse(
+        job.arquivo.open('rb'),
+        as_attachment=True,
+        filename=job.nome_arquivo,
+        content_type=job.content_type or None,
+    )
@@ -2,7 +2,7 @@ from django import forms
 from django.utils import timezone
 
 from agendamentos.models import Agendamento, Trajeto
-from veiculos.models import Veiculo
+from common.referencia import CampoReferencia
 
 from .models import Abastecimento, Deslocamento, Ocorrencia
 
@@ -81,7 +81,9 @@ class AbastecimentoForm(forms.ModelForm):
         self.fields['trajeto'].required = False
         self.fields['trajeto'].empty_label = '— Selecione um trajeto atribuído —'
         self.fields['veiculo'].required = False
-        self.fields['veiculo'].queryset = Veiculo.objects.filter(ativo=True)
+        self.fields['veiculo'] = CampoReferencia.a_partir_de(
+            self.fields['veiculo'], 'veiculos'
+        )
         self.fields['agendamento'].required = False
         self.fields['agendamento'].empty_label = '— Sem agendamento vinculado —'
 
@@ -205,7 +207,9 @@ class DeslocamentoForm(forms.ModelForm):
 
     def __init__(self, *args, motorista=None, is_admin=False, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['veiculo'].queryset = Veiculo.objects.filter(ativo=True)
+        self.fields['veiculo'] = CampoReferencia.a_partir_de(
+            self.fields['veiculo'], 'veiculos'
+        )
         self.fields['veiculo'].empty_label = '— Selecione o veículo —'
         self.fields['veiculo'].required = True
         self.fields['origem'].required = False
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0007_agendamento_indices_periodo'),
+        ('frotas', '0004_abastecimento_trajeto_ocorrencia_trajeto_and_more'),
+        ('veiculos', '0002_veiculo_campus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='abastecimento',
+            index=models.Index(fields=['veiculo', 'data_hora'], name='abastecimento_veiculo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocorrencia',
+            index=models.Index(fields=['veiculo', 'data_hora'], name='ocorrencia_veiculo_data_idx'),
+        ),
+    ]
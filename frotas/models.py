@@ -68,6 +68,13 @@ class Abastecimento(models.Model):
         verbose_name = 'Abastecimento'
         verbose_name_plural = 'Abastecimentos'
         ordering = ['-data_hora']
+        indexes = [
+            # Boletim diário: abastecimentos do veículo no período
+            models.Index(
+                fields=['veiculo', 'data_hora'],
+                name='abastecimento_veiculo_data_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.veiculo.placa} — {self.data_hora:%d/%m/%Y %H:%M} — R$ {self.valor_gasto}'
@@ -210,6 +217,13 @@ class Ocorrencia(models.Model):
         verbose_name = 'Ocorrência'
         verbose_name_plural = 'Ocorrências'
         ordering = ['-data_hora']
+        indexes = [
+            # Boletim diário: ocorrências do veículo no período
+            models.Index(
+                fields=['veiculo', 'data_hora'],
+                name='ocorrencia_veiculo_data_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.get_tipo_display()} — {self.veiculo.placa} — {self.data_hora:%d/%m/%Y}'
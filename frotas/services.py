@@ -0,0 +1,145 @@
+"""
+Serviços de negócio para frotas.
+
+Este módulo monta o boletim de veículos (viagens, abastecimentos e
+ocorrências por veículo em um período), usado pela página do boletim e
+pela exportação em PDF.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, Q, Sum
+
+from agendamentos.models import Agendamento
+from common.periodos import intervalo_dias
+
+from .models import Abastecimento, Ocorrencia
+
+
+class BoletimService:
+    """
+    Serviço para montagem do boletim de veículos.
+    """
+
+    @staticmethod
+    def montar(veiculos, data_inicio, data_fim, incluir_vazios=False):
+        """
+        Monta o boletim dos veículos no período.
+
+        Executa uma consulta por tipo de entidade (agendamentos, trajetos,
+        abastecimentos, ocorrências) para todo o período e agrupa os
+        resultados por veículo em Python. Os totais de km, litros, gasto e
+        ocorrências críticas são agregados no banco, agrupados por veículo.
+        A quantidade de consultas não depende do número de veículos.
+
+        Args:
+            veiculos: QuerySet ou lista de veículos
+            data_inicio: Primeiro dia do período (date)
+            data_fim: Último dia do período (date, inclusivo)
+            incluir_vazios: Se True, inclui veículos sem movimentação
+
+        Returns:
+            list: Um dict por veículo com agendamentos, abastecimentos,
+            ocorrencias, total_km, total_litros, total_gasto_combustivel
+            e ocorrencias_criticas
+        """
+        veiculos = list(veiculos)
+        if not veiculos:
+            return []
+        veiculo_ids = [veiculo.pk for veiculo in veiculos]
+
+        # Limites do período em horário local: [inicio, fim)
+        inicio, fim = intervalo_dias(data_inicio, data_fim)
+
+        agendamentos = Agendamento.objects.filter(
+            veiculo_id__in=veiculo_ids,
+            data_inicio__lt=fim,
+            data_fim__gte=inicio,
+            status='aprovado',
+        )
+        abastecimentos = Abastecimento.objects.filter(
+            veiculo_id__in=veiculo_ids,
+            data_hora__gte=inicio,
+            data_hora__lt=fim,
+        )
+        ocorrencias = Ocorrencia.objects.filter(
+            veiculo_id__in=veiculo_ids,
+            data_hora__gte=inicio,
+            data_hora__lt=fim,
+        )
+
+        # Registros do período, agrupados por veículo
+        agendamentos_por_veiculo = defaultdict(list)
+        for agendamento in (
+            agendamentos
+            .select_related('professor', 'curso')
+            .prefetch_related('trajetos')
+            .order_by('data_inicio')
+        ):
+            agendamentos_por_veiculo[agendamento.veiculo_id].append(
+                agendamento
+            )
+
+        abastecimentos_por_veiculo = defaultdict(list)
+        for abastecimento in (
+            abastecimentos.select_related('motorista').order_by('data_hora')
+        ):
+            abastecimentos_por_veiculo[abastecimento.veiculo_id].append(
+                abastecimento
+            )
+
+        ocorrencias_por_veiculo = defaultdict(list)
+        for ocorrencia in (
+            ocorrencias.select_related('motorista').order_by('data_hora')
+        ):
+            ocorrencias_por_veiculo[ocorrencia.veiculo_id].append(ocorrencia)
+
+        # Totais agregados no banco, por veículo
+        km_por_veiculo = dict(
+            agendamentos.order_by().values('veiculo_id').annotate(
+                total=Sum('total_km')
+            ).values_list('veiculo_id', 'total')
+        )
+        combustivel_por_veiculo = {
+            linha['veiculo_id']: linha
+            for linha in abastecimentos.order_by().values(
+                'veiculo_id'
+            ).annotate(
+                litros=Sum('litros_abastecidos'),
+                gasto=Sum('valor_gasto'),
+            )
+        }
+        criticas_por_veiculo = dict(
+            ocorrencias.order_by().values('veiculo_id').annotate(
+                criticas=Count('id', filter=Q(gravidade='critica'))
+            ).values_list('veiculo_id', 'criticas')
+        )
+
+        boletim = []
+        for veiculo in veiculos:
+            itens_agendamentos = agendamentos_por_veiculo[veiculo.pk]
+            itens_abastecimentos = abastecimentos_por_veiculo[veiculo.pk]
+            itens_ocorrencias = ocorrencias_por_veiculo[veiculo.pk]
+
+            if not incluir_vazios and not (
+                itens_agendamentos
+                or itens_abastecimentos
+                or itens_ocorrencias
+            ):
+                continue
+
+            combustivel = combustivel_por_veiculo.get(veiculo.pk, {})
+            boletim.append({
+                'veiculo': veiculo,
+                'agendamentos': itens_agendamentos,
+                'abastecimentos': itens_abastecimentos,
+                'ocorrencias': itens_ocorrencias,
+                'total_km': km_por_veiculo.get(veiculo.pk) or 0,
+                'total_litros': combustivel.get('litros') or 0,
+                'total_gasto_combustivel': combustivel.get('gasto') or 0,
+                'ocorrencias_criticas': criticas_por_veiculo.get(
+                    veiculo.pk, 0
+                ),
+            })
+
+        return boletim
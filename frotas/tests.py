@@ -1,3 +1,28 @@
+import uuid
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+from common.periodos import filtro_periodo, intervalo_dias
+from common.testes import PlanoConsultaMixin
+
+from .models import Abastecimento, Ocorrencia
+
+
+class BoletimIndiceTest(PlanoConsultaMixin, TestCase):
+    """Consultas do boletim por veículo e período usam o índice."""
+
+    def setUp(self):
+        self.periodo = filtro_periodo(
+            'data_hora', *intervalo_dias(date(2025, 3, 1), date(2025, 3, 7))
+        )
+
+    def test_abastecimentos(self):
+        self.assertUsaIndice(Abastecimento.objects.filter(
+            veiculo_id__in=[uuid.uuid4(), uuid.uuid4()], **self.periodo
+        ), 'abastecimento_veiculo_data_idx')
+
+    def test_ocorrencias(self):
+        self.assertUsaIndice(Ocorrencia.objects.filter(
+            veiculo_id__in=[uuid.uuid4(), uuid.uuid4()], **self.periodo
+        ), 'ocorrencia_veiculo_data_idx')
@@ -1,26 +1,16 @@
-import io
 from datetime import date, timedelta
 
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import (HRFlowable, Paragraph, SimpleDocTemplate,
-                                Spacer, Table, TableStyle)
 
-from agendamentos.models import Agendamento
+from common.referencia import veiculos_ativos
+from exportacoes.services import ExportacaoService
+from exportacoes.views import redirecionar_para_exportacao
 from veiculos.models import Veiculo
 
 from ..models import Abastecimento, Ocorrencia
-
-AZUL = colors.HexColor('#0d6efd')
-AZUL_CLARO = colors.HexColor('#cfe2ff')
-CINZA = colors.HexColor('#f8f9fa')
-VERMELHO = colors.HexColor('#dc3545')
+from ..services import BoletimService
 
 PERIODOS = ('hoje', '7dias', '15dias', '30dias', 'personalizado')
 
@@ -76,63 +66,7 @@ def boletim_diario(request):
     if veiculo_pk:
         veiculos_qs = veiculos_qs.filter(pk=veiculo_pk)
 
-    boletim_data = []
-    for veiculo in veiculos_qs:
-        agendamentos = (
-            Agendamento.objects
-            .filter(
-                veiculo=veiculo,
-                data_inicio__date__lte=data_fim,
-                data_fim__date__gte=data_inicio,
-                status='aprovado',
-            )
-            .select_related('professor', 'curso')
-            .prefetch_related('trajetos', 'ocorrencias')
-            .order_by('data_inicio')
-        )
-        abastecimentos = (
-            Abastecimento.objects
-            .filter(
-                veiculo=veiculo,
-                data_hora__date__gte=data_inicio,
-                data_hora__date__lte=data_fim,
-            )
-            .select_related('motorista')
-            .order_by('data_hora')
-        )
-        ocorrencias = (
-            Ocorrencia.objects
-            .filter(
-                veiculo=veiculo,
-                data_hora__date__gte=data_inicio,
-                data_hora__date__lte=data_fim,
-            )
-            .select_related('motorista')
-            .order_by('data_hora')
-        )
-
-        if not (
-            agendamentos.exists()
-            or abastecimentos.exists()
-            or ocorrencias.exists()
-        ):
-            continue
-
-        total_km = sum(a.get_total_km() for a in agendamentos)
-        total_litros = sum(ab.litros_abastecidos for ab in abastecimentos)
-        total_gasto = sum(ab.valor_gasto for ab in abastecimentos)
-        criticas = ocorrencias.filter(gravidade='critica').count()
-
-        boletim_data.append({
-            'veiculo': veiculo,
-            'agendamentos': agendamentos,
-            'abastecimentos': abastecimentos,
-            'ocorrencias': ocorrencias,
-            'total_km': total_km,
-            'total_litros': total_litros,
-            'total_gasto_combustivel': total_gasto,
-            'ocorrencias_criticas': criticas,
-        })
+    boletim_data = BoletimService.montar(veiculos_qs, data_inicio, data_fim)
 
     context = {
         'boletim_data': boletim_data,
@@ -140,7 +74,7 @@ def boletim_diario(request):
         'data_fim': data_fim,
         'periodo': periodo,
         'multiplos_dias': multiplos_dias,
-        'todos_veiculos': Veiculo.objects.filter(ativo=True),
+        'todos_veiculos': veiculos_ativos(),
         'veiculo_selecionado': veiculo_pk,
         'periodos': [
             ('Hoje', 'hoje'),
@@ -170,250 +104,12 @@ def exportar_boletim_pdf(request):
     veiculo = get_object_or_404(Veiculo, pk=veiculo_pk)
     data_inicio, data_fim, _ = _resolver_periodo(request)
 
-    agendamentos = (
-        Agendamento.objects
-        .filter(
-            veiculo=veiculo,
-            data_inicio__date__lte=data_fim,
-            data_fim__date__gte=data_inicio,
-            status='aprovado',
-        )
-        .select_related('professor', 'curso')
-        .prefetch_related('trajetos')
-        .order_by('data_inicio')
-    )
-    abastecimentos = (
-        Abastecimento.objects
-        .filter(
-            veiculo=veiculo,
-            data_hora__date__gte=data_inicio,
-            data_hora__date__lte=data_fim,
-        )
-        .select_related('motorista')
-        .order_by('data_hora')
-    )
-    ocorrencias = (
-        Ocorrencia.objects
-        .filter(
-            veiculo=veiculo,
-            data_hora__date__gte=data_inicio,
-            data_hora__date__lte=data_fim,
-        )
-        .select_related('motorista')
-        .order_by('data_hora')
-    )
-
-    total_km = sum(a.get_total_km() for a in agendamentos)
-    total_litros = sum(ab.litros_abastecidos for ab in abastecimentos)
-    total_gasto = sum(ab.valor_gasto for ab in abastecimentos)
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=2 * cm,
-        rightMargin=2 * cm,
-        topMargin=2 * cm,
-        bottomMargin=2 * cm,
-    )
-
-    styles = getSampleStyleSheet()
-    titulo_style = ParagraphStyle(
-        'Titulo',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=AZUL,
-        spaceAfter=4,
-    )
-    subtitulo_style = ParagraphStyle(
-        'Subtitulo',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.grey,
-        spaceAfter=2,
-    )
-    secao_style = ParagraphStyle(
-        'Secao',
-        parent=styles['Heading2'],
-        fontSize=11,
-        textColor=AZUL,
-        spaceBefore=12,
-        spaceAfter=4,
-    )
-    normal = styles['Normal']
-    normal.fontSize = 8
-
-    periodo_fmt = (
-        f'{data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y}'
-        if data_inicio != data_fim
-        else f'{data_inicio:%d/%m/%Y}'
-    )
-
-    elementos = []
-
-    # Cabeçalho
-    elementos.append(Paragraph('Boletim de Veículo', titulo_style))
-    elementos.append(Paragraph(
-        f'{veiculo.placa} — {veiculo.marca} {veiculo.modelo} ({veiculo.ano})',
-        subtitulo_style,
-    ))
-    if veiculo.campus:
-        elementos.append(Paragraph(
-            f'Campus: {veiculo.campus.nome}', subtitulo_style
-        ))
-    elementos.append(Paragraph(f'Período: {periodo_fmt}', subtitulo_style))
-    elementos.append(HRFlowable(width='100%', thickness=1, color=AZUL))
-    elementos.append(Spacer(1, 6))
-
-    # Resumo
-    resumo_data = [
-        ['Total de km', 'Total de litros', 'Gasto combustível'],
-        [
-            f'{total_km} km',
-            f'{total_litros} L',
-            f'R$ {total_gasto:.2f}',
-        ],
-    ]
-    resumo_table = Table(resumo_data, colWidths=['33%', '33%', '34%'])
-    resumo_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), AZUL),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('BACKGROUND', (0, 1), (-1, 1), AZUL_CLARO),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.white),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [AZUL_CLARO]),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
-    elementos.append(resumo_table)
-
-    # Seção A: Viagens
-    elementos.append(Paragraph('Viagens', secao_style))
-    if agendamentos:
-        viagens_data = [
-            ['Professor', 'Curso', 'Início', 'Fim', 'Km', 'Trajetos'],
-        ]
-        for ag in agendamentos:
-            trajetos = '; '.join(
-                f'{t.origem}→{t.destino}' for t in ag.trajetos.all()
-            ) or '—'
-            viagens_data.append([
-                ag.professor.get_full_name(),
-                ag.curso.nome,
-                ag.data_inicio.strftime('%d/%m %H:%M'),
-                ag.data_fim.strftime('%d/%m %H:%M'),
-                f'{ag.get_total_km()} km',
-                Paragraph(trajetos, normal),
-            ])
-        col_w = [3.5 * cm, 3.5 * cm, 2 * cm, 2 * cm, 1.5 * cm, None]
-        t = Table(viagens_data, colWidths=col_w, repeatRows=1)
-        t.setStyle(_estilo_tabela())
-        elementos.append(t)
-    else:
-        elementos.append(Paragraph('Nenhuma viagem no período.', normal))
-
-    # Seção B: Abastecimentos
-    elementos.append(Paragraph('Abastecimentos', secao_style))
-    if abastecimentos:
-        ab_data = [
-            ['Data/Hora', 'Posto', 'Combustível', 'Litros', 'Valor (R$)',
-             'Hodômetro', 'Motorista'],
-        ]
-        for ab in abastecimentos:
-            ab_data.append([
-                ab.data_hora.strftime('%d/%m %H:%M'),
-                ab.local_posto,
-                ab.get_tipo_combustivel_display(),
-                f'{ab.litros_abastecidos} L',
-                f'R$ {ab.valor_gasto:.2f}',
-                f'{ab.km_atual} km',
-                ab.motorista.get_full_name() if ab.motorista else '—',
-            ])
-        ab_data.append([
-            'Total', '', '', f'{total_litros} L',
-            f'R$ {total_gasto:.2f}', '', '',
-        ])
-        col_w = [2 * cm, 3 * cm, 2.2 * cm, 1.8 * cm,
-                 2 * cm, 2 * cm, None]
-        t = Table(ab_data, colWidths=col_w, repeatRows=1)
-        estilo = _estilo_tabela()
-        n = len(ab_data) - 1
-        estilo.add('BACKGROUND', (0, n), (-1, n), AZUL_CLARO)
-        estilo.add('FONTNAME', (0, n), (-1, n), 'Helvetica-Bold')
-        t.setStyle(estilo)
-        elementos.append(t)
-    else:
-        elementos.append(Paragraph('Nenhum abastecimento no período.', normal))
-
-    # Seção C: Ocorrências
-    elementos.append(Paragraph('Ocorrências', secao_style))
-    if ocorrencias:
-        oc_data = [
-            ['Data/Hora', 'Tipo', 'Gravidade', 'Local', 'Responsável',
-             'Status'],
-        ]
-        for oc in ocorrencias:
-            oc_data.append([
-                oc.data_hora.strftime('%d/%m %H:%M'),
-                oc.get_tipo_display(),
-                oc.get_gravidade_display(),
-                oc.local,
-                oc.motorista.get_full_name() if oc.motorista else '—',
-                'Resolvida' if oc.resolvido else 'Pendente',
-            ])
-        col_w = [2 * cm, 2.5 * cm, 2 * cm, 3 * cm, None, 2 * cm]
-        t = Table(oc_data, colWidths=col_w, repeatRows=1)
-        estilo = _estilo_tabela()
-        for i, oc in enumerate(ocorrencias, start=1):
-            if oc.gravidade == 'critica':
-                estilo.add('BACKGROUND', (2, i), (2, i), VERMELHO)
-                estilo.add('TEXTCOLOR', (2, i), (2, i), colors.white)
-        t.setStyle(estilo)
-        elementos.append(t)
-    else:
-        elementos.append(Paragraph('Nenhuma ocorrência no período.', normal))
-
-    # Rodapé
-    elementos.append(Spacer(1, 12))
-    elementos.append(HRFlowable(width='100%', thickness=0.5, color=colors.grey))
-    elementos.append(Paragraph(
-        f'Gerado em {timezone.localtime():%d/%m/%Y %H:%M} — '
-        f'Sistema de Agendamento de Veículos UESPI',
-        ParagraphStyle('Rodape', parent=normal, textColor=colors.grey,
-                       fontSize=7, alignment=1),
-    ))
-
-    doc.build(elementos)
-    buffer.seek(0)
-
-    nome_arquivo = (
-        f'boletim_{veiculo.placa}_{data_inicio:%Y%m%d}'
-        f'{"_" + data_fim.strftime("%Y%m%d") if data_inicio != data_fim else ""}'
-        '.pdf'
-    )
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = (
-        f'attachment; filename="{nome_arquivo}"'
-    )
-    return response
-
-
-def _estilo_tabela():
-    return TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), AZUL),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, CINZA]),
-        ('GRID', (0, 0), (-1, -1), 0.3, colors.lightgrey),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-    ])
+    job = ExportacaoService.solicitar('boletim_pdf', {
+        'veiculo': veiculo.pk,
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+    }, user)
+    return redirecionar_para_exportacao(job)
 
 
 @login_required
@@ -22,7 +22,7 @@ def lista_deslocamentos(request):
             motorista=user
         ).select_related('veiculo')
 
-    pagination = PaginationHelper(qs, 10)
+    pagination = PaginationHelper(qs, 10, cursor=True, estimar_total=True)
     deslocamentos = pagination.get_page(request.GET.get('page'))
     return render(
         request,
@@ -20,7 +20,7 @@ def lista_ocorrencias(request):
             motorista=user
         ).select_related('veiculo', 'agendamento')
 
-    pagination = PaginationHelper(qs, 10)
+    pagination = PaginationHelper(qs, 10, cursor=True, estimar_total=True)
     ocorrencias = pagination.get_page(request.GET.get('page'))
     return render(
         request,
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.utils import timezone
 
-from .models import Usuario
+from .models import EmailSaida, Usuario
 
 
 @admin.register(Usuario)
@@ -21,3 +22,23 @@ class UsuarioAdmin(UserAdmin):
             'fields': ('campus', 'telefone', 'numero_habilitacao'),
         }),
     )
+
+
+@admin.register(EmailSaida)
+class EmailSaidaAdmin(admin.ModelAdmin):
+    list_display = [
+        'assunto', 'status', 'tentativas', 'criado_em', 'enviado_em',
+    ]
+    list_filter = ['status']
+    search_fields = ['assunto', 'destinatarios']
+    readonly_fields = ['criado_em', 'enviado_em', 'erro']
+    actions = ['reenviar']
+
+    @admin.action(description='Reenviar e-mails selecionados')
+    def reenviar(self, request, queryset):
+        total = queryset.exclude(status='enviando').update(
+            status='pendente',
+            tentativas=0,
+            proxima_tentativa=timezone.now(),
+        )
+        self.message_user(request, f'{total} e-mail(s) devolvido(s) à fila.')
@@ -3,7 +3,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 
-from campus.models import Campus
+from common.referencia import CampoReferencia
 
 from .models import Usuario
 
@@ -59,8 +59,8 @@ class RegistroForm(UserCreationForm):
         })
     )
 
-    campus = forms.ModelChoiceField(
-        queryset=Campus.objects.filter(ativo=True),
+    campus = CampoReferencia(
+        'campi',
         required=True,
         label='Campus',
         widget=forms.Select(attrs={'class': 'form-select'}),
@@ -468,8 +468,8 @@ class CriarMotoristaForm(UserCreationForm):
         label='Número da CNH',
         widget=forms.TextInput(attrs={'class': 'form-control'}),
     )
-    campus = forms.ModelChoiceField(
-        queryset=Campus.objects.filter(ativo=True),
+    campus = CampoReferencia(
+        'campi',
         required=False,
         label='Campus',
         widget=forms.Select(attrs={'class': 'form-select select2-campus'}),
@@ -547,8 +547,8 @@ class CriarProfessorForm(UserCreationForm):
             'placeholder': '(00) 00000-0000',
         }),
     )
-    campus = forms.ModelChoiceField(
-        queryset=Campus.objects.filter(ativo=True),
+    campus = CampoReferencia(
+        'campi',
         required=False,
         label='Campus',
         widget=forms.Select(attrs={'class': 'form-select select2-campus'}),
@@ -0,0 +1,85 @@
+"""
+Management command do worker de e-mails.
+
+Entrega os e-mails da caixa de saída (EmailSaida) em lotes, usando uma
+conexão com o servidor de e-mail por lote. Vários workers podem rodar em
+paralelo.
+
+Uso:
+  python manage.py enviar_emails              # roda continuamente
+  python manage.py enviar_emails --uma-vez    # envia os pendentes e sai
+  python manage.py enviar_emails --lote 100
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from usuarios.services import EmailService
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails da caixa de saída'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Envia os e-mails pendentes e encerra',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=settings.EMAIL_LOTE,
+            help=(
+                'E-mails enviados por conexão '
+                f'(padrão: {settings.EMAIL_LOTE})'
+            ),
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)',
+        )
+        parser.add_argument(
+            '--timeout-minutos',
+            type=int,
+            default=10,
+            help=(
+                'Devolve à fila e-mails em envio há mais tempo que isso '
+                '(padrão: 10)'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        devolvidos = EmailService.recuperar_travados(
+            options['timeout_minutos']
+        )
+        if devolvidos:
+            self.stdout.write(
+                f'{devolvidos} e-mail(s) interrompido(s) devolvido(s) '
+                f'à fila.'
+            )
+
+        while True:
+            # Processo de longa duração: descarta conexões expiradas
+            close_old_connections()
+            emails = EmailService.reservar_lote(options['lote'])
+            if not emails:
+                if options['uma_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            enviados, falhas = EmailService.enviar_lote(emails)
+            if enviados:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {enviados} e-mail(s) enviado(s)'
+                ))
+            if falhas:
+                self.stdout.write(self.style.ERROR(
+                    f'✗ {falhas} e-mail(s) com falha (reagendados ou '
+                    f'marcados como erro)'
+                ))
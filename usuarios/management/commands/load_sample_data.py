@@ -1,18 +1,24 @@
 """
 Management command para carregar dados de exemplo no sistema
 Uso: python manage.py load_sample_data
+     python manage.py load_sample_data --scale 1 --seed 42
 """
 import random
 from datetime import timedelta
 
 from django.contrib.auth.models import Group
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from faker import Faker
 
 from agendamentos.models import Agendamento, Trajeto
 from campus.models import Campus
 from cursos.models import Curso
+from usuarios.management.dados_escala import (
+    PREFIXO,
+    SENHA,
+    GeradorDadosEscala,
+)
 from usuarios.models import Usuario
 from veiculos.models import Veiculo
 
@@ -147,10 +153,42 @@ class Command(BaseCommand):
             default=3,
             help='Quantidade de administradores (padrão: 3, máx 3)'
         )
+        parser.add_argument(
+            '--scale',
+            type=float,
+            help=(
+                'Gera dados em escala de produção com inserções em lote; '
+                '1 = ~200 veículos, 5 mil usuários, 1 milhão de '
+                'agendamentos e 3 milhões de trajetos (ex.: 0.01 para um '
+                'centésimo). Ignora --professores, --motoristas e '
+                '--agendamentos'
+            )
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Semente dos dados gerados com --scale (padrão: 42)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Linhas por lote gravado com --scale (padrão: 5000)'
+        )
+        parser.add_argument(
+            '--sem-copy',
+            action='store_true',
+            help='Usa bulk_create em vez de COPY no PostgreSQL (--scale)'
+        )
 
     def handle(self, *args, **options):
         self.fake = Faker('pt_BR')
 
+        if options['scale'] is not None:
+            self.carregar_escala(options)
+            return
+
         self.stdout.write("\n" + "=" * 60)
         self.stdout.write(
             self.style.SUCCESS("  CARREGANDO DADOS DE EXEMPLO COM FAKER")
@@ -181,6 +219,47 @@ class Command(BaseCommand):
             import traceback
             traceback.print_exc()
 
+    def carregar_escala(self, options):
+        """
+        Gera o conjunto de dados em escala (ver management/dados_escala.py).
+
+        Campi, administradores e responsáveis são os mesmos do modo
+        padrão; o restante é gerado a partir da semente.
+        """
+        if options['scale'] <= 0:
+            raise CommandError('--scale deve ser maior que zero.')
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(self.style.SUCCESS(
+            f"  CARREGANDO DADOS EM ESCALA ({options['scale']:g}x)"
+        ))
+        self.stdout.write("=" * 60)
+
+        self.fake.seed_instance(options['seed'])
+        campi = self.criar_campi(len(CAMPI_DATA))
+        self.criar_administradores(options['administradores'])
+        self.criar_responsaveis(campi)
+
+        gerador = GeradorDadosEscala(
+            self,
+            escala=options['scale'],
+            semente=options['seed'],
+            tamanho_lote=options['lote'],
+            usar_copy=not options['sem_copy'],
+        )
+        totais = gerador.executar(campi)
+
+        self.stdout.write("\nLinhas geradas:")
+        for nome, total in totais.items():
+            self.stdout.write(
+                f"  • {nome.capitalize():<16}{total:,}".replace(',', '.')
+            )
+        self.stdout.write(
+            f"\nUsuários gerados: {PREFIXO}_prof00001, "
+            f"{PREFIXO}_motor00001... (senha: {SENHA})"
+        )
+        self.stdout.write("=" * 60)
+
     # ------------------------------------------------------------------ #
     #  Campi                                                               #
     # ------------------------------------------------------------------ #
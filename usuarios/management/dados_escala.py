@@ -0,0 +1,642 @@
+"""
+Gerador de dados sintéticos em escala de produção.
+
+Usado por `load_sample_data --scale`. Com escala 1 gera cerca de 200
+veículos, 5 mil usuários, 1 milhão de agendamentos, 3 milhões de trajetos
+e o histórico de abastecimentos e ocorrências dos veículos.
+
+Os dados são determinísticos: a mesma semente (e a mesma data de
+execução, já que a linha do tempo termina alguns dias após hoje) gera os
+mesmos registros, inclusive os UUIDs. As linhas são gravadas em lotes, com
+COPY no PostgreSQL e bulk_create nos demais bancos. Como bulk_create e
+COPY não disparam signals, os totais de cada agendamento (total_km,
+total_trajetos) são preenchidos na geração, o consumo mensal de KM é
+reconstruído e as listas de referência e os relatórios em cache são
+invalidados ao final.
+"""
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+
+from agendamentos.models import Agendamento, Trajeto
+from agendamentos.services import VersaoRelatorioService
+from common.referencia import REFERENCIAS, invalidar
+from common.versoes import cache_compartilhado
+from cursos.models import Curso
+from cursos.services import ConsumoKmService
+from frotas.models import Abastecimento, Ocorrencia
+from usuarios.models import Usuario
+from veiculos.models import Veiculo
+
+# Volumes com escala 1
+VOLUMES = {
+    'veiculos': 200,
+    'usuarios': 5000,
+    'cursos': 100,
+    'agendamentos': 1_000_000,
+    'abastecimentos': 100_000,
+    'ocorrencias': 10_000,
+}
+
+# Prefixo dos usernames, cursos e placas gerados
+PREFIXO = 'esc'
+
+SENHA = 'senha123'
+
+# Proporção de motoristas entre os usuários gerados
+PROPORCAO_MOTORISTAS = 0.08
+
+# Quantidade de trajetos por agendamento e pesos (média ~3)
+TRAJETOS_POR_AGENDAMENTO = ([1, 2, 3, 4, 5], [10, 25, 30, 20, 15])
+
+# Intervalo entre agendamentos do mesmo veículo e duração (horas)
+INTERVALO_HORAS = (1, 16)
+DURACAO_HORAS = (2, 8)
+
+# Dias após hoje em que termina a linha do tempo (agendamentos futuros)
+DIAS_FUTURO = 60
+
+VEICULOS_MODELOS = [
+    ('Mercedes', 'Sprinter', 15), ('Toyota', 'Hilux', 5),
+    ('Fiat', 'Ducato', 16), ('Iveco', 'Daily', 16),
+    ('Renault', 'Master', 16), ('Ford', 'Transit', 15),
+    ('Peugeot', 'Boxer', 16), ('Citroën', 'Jumper', 16),
+    ('Mercedes', 'Vito', 8), ('Chevrolet', 'Spin', 7),
+    ('Volkswagen', 'Gol', 5), ('Marcopolo', 'Volare', 28),
+]
+CORES = ['Branco', 'Prata', 'Cinza', 'Preto']
+COMBUSTIVEIS = ['diesel', 'gasolina', 'etanol']
+PRECO_LITRO = {'diesel': 6.1, 'gasolina': 5.9, 'etanol': 4.2}
+
+CURSOS_NOMES = [
+    'Engenharia Mecânica', 'Engenharia Civil', 'Engenharia Elétrica',
+    'Arquitetura e Urbanismo', 'Administração', 'Ciências Contábeis',
+    'Direito', 'Enfermagem', 'Medicina Veterinária', 'Agronomia',
+    'Geografia', 'História', 'Biologia', 'Química', 'Física',
+]
+
+LOCAIS = [
+    'Campus Universitário', 'Centro de Pesquisa', 'Laboratório Central',
+    'Usina Hidrelétrica', 'Canteiro de Obras', 'Parque Industrial',
+    'Hospital Regional', 'Fórum da Comarca', 'Fazenda Experimental',
+    'Porto de Luís Correia', 'Parque Nacional da Serra da Capivara',
+    'Delta do Parnaíba', 'Secretaria de Educação', 'Museu do Piauí',
+    'Estação de Tratamento', 'Aeroporto de Teresina',
+]
+POSTOS = [
+    'Posto Ipiranga BR-343', 'Posto Shell Centro', 'Posto BR Avenida',
+    'Posto Petrobras Rodovia', 'Posto Ale Bairro',
+]
+OBSERVACOES = [
+    'Levar equipamentos de medição.',
+    'Saída em frente ao bloco administrativo.',
+    'Turma dividida em dois grupos.',
+    'Confirmar horário de retorno com a coordenação.',
+]
+MOTIVOS_REPROVACAO = [
+    'Veículo indisponível no período solicitado.',
+    'Limite mensal de KM do curso atingido.',
+    'Documentação da atividade incompleta.',
+]
+OCORRENCIAS = [
+    ('pane', 'Falha no sistema elétrico durante o trajeto.'),
+    ('avaria', 'Retrovisor danificado no estacionamento.'),
+    ('multa', 'Multa por excesso de velocidade.'),
+    ('acidente', 'Colisão leve sem vítimas.'),
+    ('outro', 'Pneu furado na rodovia.'),
+]
+
+
+class GravadorLotes:
+    """
+    Grava linhas de um model em lotes.
+
+    No PostgreSQL usa COPY (CSV em memória por lote); nos demais bancos,
+    bulk_create. As linhas são dicts de attname → valor; campos ausentes
+    recebem o default do campo (ou o instante atual, para auto_now).
+    """
+
+    def __init__(self, model, tamanho_lote, usar_copy, depende_de=()):
+        self.model = model
+        self.tamanho_lote = tamanho_lote
+        self.usar_copy = usar_copy
+        # Gravadores cujas linhas são referenciadas por este (FKs)
+        self.depende_de = depende_de
+        self.campos = list(model._meta.concrete_fields)
+        self.linhas = []
+        self.total = 0
+        self.agora = timezone.now()
+
+    def adicionar(self, **valores):
+        self.linhas.append(valores)
+        if len(self.linhas) >= self.tamanho_lote:
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava as linhas acumuladas."""
+        if not self.linhas:
+            return
+        for gravador in self.depende_de:
+            gravador.descarregar()
+        if self.usar_copy:
+            self._copiar()
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**valores) for valores in self.linhas]
+            )
+        self.total += len(self.linhas)
+        self.linhas = []
+
+    def _copiar(self):
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for valores in self.linhas:
+            escritor.writerow(
+                [self._valor_csv(campo, valores) for campo in self.campos]
+            )
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        tabela = quote(self.model._meta.db_table)
+        colunas = ', '.join(quote(campo.column) for campo in self.campos)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {tabela} ({colunas}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def _valor_csv(self, campo, valores):
+        if campo.attname in valores:
+            valor = valores[campo.attname]
+        elif getattr(campo, 'auto_now', False) or getattr(
+            campo, 'auto_now_add', False
+        ):
+            valor = self.agora
+        elif campo.has_default():
+            valor = campo.get_default()
+        else:
+            valor = None
+
+        if valor is None:
+            return '\\N'
+        if isinstance(valor, datetime):
+            return valor.isoformat()
+        return valor
+
+
+class GeradorDadosEscala:
+    """
+    Gera o conjunto de dados em escala.
+
+    Args:
+        comando: Management command (para stdout e style)
+        escala: Fator aplicado a VOLUMES (1 = volume de produção)
+        semente: Semente dos geradores aleatórios
+        tamanho_lote: Linhas por lote gravado
+        usar_copy: Usa COPY no PostgreSQL (ignorado nos demais bancos)
+    """
+
+    def __init__(self, comando, escala, semente, tamanho_lote,
+                 usar_copy=True):
+        self.comando = comando
+        self.stdout = comando.stdout
+        self.style = comando.style
+        self.semente = semente
+        self.tamanho_lote = tamanho_lote
+        self.usar_copy = usar_copy and connection.vendor == 'postgresql'
+        self.rng = random.Random(semente)
+        self.fake = Faker('pt_BR')
+        self.fake.seed_instance(semente)
+
+        self.volumes = {
+            nome: max(1, round(valor * escala))
+            for nome, valor in VOLUMES.items()
+        }
+
+    def executar(self, campi):
+        """
+        Gera todos os dados em uma transação.
+
+        Args:
+            campi: Campi existentes, entre os quais os dados são divididos
+
+        Returns:
+            dict: Quantidade de linhas gravadas por tipo
+        """
+        if Usuario.objects.filter(
+            username__startswith=f'{PREFIXO}_'
+        ).exists():
+            raise CommandError(
+                'Os dados em escala já foram carregados. Use '
+                '"python manage.py reset_db --no-seed" antes de gerar '
+                'novamente.'
+            )
+
+        # Ao menos um curso e um veículo por campus
+        for nome in ('cursos', 'veiculos'):
+            self.volumes[nome] = max(self.volumes[nome], len(campi))
+
+        metodo = 'COPY' if self.usar_copy else 'bulk_create'
+        self.stdout.write(
+            f"\nGerando dados em escala (semente {self.semente}, "
+            f"lotes de {self.tamanho_lote} via {metodo}):"
+        )
+        for nome, valor in self.volumes.items():
+            self.stdout.write(f"   • {nome}: {valor:,}".replace(',', '.'))
+
+        inicio = time.monotonic()
+        with transaction.atomic():
+            cursos = self.criar_cursos(campi)
+            veiculos = self.criar_veiculos(campi)
+            professores, motoristas = self.criar_usuarios(campi)
+            totais = self.criar_agendamentos(
+                veiculos, cursos, professores, motoristas
+            )
+            self._etapa('Reconstruindo consumo mensal de KM')
+            ConsumoKmService.reconstruir()
+            invalidar(*REFERENCIAS)
+            VersaoRelatorioService.invalidar_tudo()
+
+        totais.update({
+            'cursos': len(cursos),
+            'veiculos': len(veiculos),
+            'usuarios': sum(len(p) for p in professores.values())
+            + sum(len(m) for m in motoristas.values()),
+        })
+        self.stdout.write(self.style.SUCCESS(
+            f"\nDados em escala gerados em "
+            f"{time.monotonic() - inicio:.0f}s."
+        ))
+        if not cache_compartilhado():
+            self.stdout.write(self.style.WARNING(
+                'Cache local (CACHE_BACKEND): o servidor só verá as listas '
+                'e os relatórios atualizados após o TTL.'
+            ))
+        return totais
+
+    def _etapa(self, descricao):
+        self.stdout.write(f"\n→ {descricao}...")
+
+    def _uuid(self):
+        """UUID derivado da semente (determinístico)."""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    # ------------------------------------------------------------------ #
+    #  Cadastros                                                           #
+    # ------------------------------------------------------------------ #
+
+    def criar_cursos(self, campi):
+        self._etapa(f"Criando {self.volumes['cursos']} cursos")
+        # Limite mensal próximo do uso médio esperado por curso, para que
+        # parte dos meses fique perto do limite
+        meses = self._dias_linha_do_tempo() / 30
+        km_medio = (
+            self.volumes['agendamentos'] * 3 * 77
+            / self.volumes['cursos'] / meses
+        )
+
+        cursos = []
+        for i in range(self.volumes['cursos']):
+            campus = campi[i % len(campi)]
+            nome = CURSOS_NOMES[i % len(CURSOS_NOMES)]
+            limite = int(km_medio * self.rng.uniform(0.9, 1.6)) // 100 * 100
+            cursos.append(Curso(
+                id=self._uuid(),
+                nome=f"{nome} {PREFIXO.upper()}-{i + 1:04d} — {campus.nome}",
+                campus=campus,
+                limite_km_mensal=max(limite, 100),
+                descricao='Curso gerado para testes de carga',
+            ))
+        Curso.objects.bulk_create(cursos, batch_size=self.tamanho_lote)
+        return cursos
+
+    def criar_veiculos(self, campi):
+        self._etapa(f"Criando {self.volumes['veiculos']} veículos")
+        letras = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        placas = set(Veiculo.objects.values_list('placa', flat=True))
+
+        veiculos = []
+        for i in range(self.volumes['veiculos']):
+            # Placa no padrão Mercosul (ABC1D23)
+            while True:
+                placa = (
+                    ''.join(self.rng.choice(letras) for _ in range(3))
+                    + str(self.rng.randint(0, 9))
+                    + self.rng.choice(letras)
+                    + f'{self.rng.randint(0, 99):02d}'
+                )
+                if placa not in placas:
+                    placas.add(placa)
+                    break
+            marca, modelo, capacidade = self.rng.choice(VEICULOS_MODELOS)
+            veiculos.append(Veiculo(
+                id=self._uuid(),
+                campus=campi[i % len(campi)],
+                placa=placa,
+                marca=marca,
+                modelo=modelo,
+                ano=self.rng.randint(2012, 2024),
+                cor=self.rng.choice(CORES),
+                capacidade_passageiros=capacidade,
+                observacoes=f'Veículo {PREFIXO.upper()} gerado para testes',
+            ))
+        Veiculo.objects.bulk_create(veiculos, batch_size=self.tamanho_lote)
+        return veiculos
+
+    def criar_usuarios(self, campi):
+        total = self.volumes['usuarios']
+        n_motoristas = max(len(campi), round(total * PROPORCAO_MOTORISTAS))
+        n_professores = max(len(campi), total - n_motoristas)
+        self._etapa(
+            f"Criando {n_professores} professores e {n_motoristas} "
+            f"motoristas (senha: {SENHA})"
+        )
+        # Um único hash para todos: set_password por usuário levaria
+        # minutos com o hasher padrão
+        senha = make_password(SENHA)
+
+        def novo_usuario(papel, indice, campus):
+            username = f'{PREFIXO}_{papel}{indice:05d}'
+            return Usuario(
+                username=username,
+                email=f'{username}@escala.uespi.br',
+                password=senha,
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                telefone=f'(86) 9{self.rng.randint(8000, 9999)}-'
+                         f'{self.rng.randint(0, 9999):04d}',
+                campus=campus,
+                uuid=self._uuid(),
+                numero_habilitacao=(
+                    f'{self.rng.randint(0, 10 ** 10 - 1):010d}'
+                    if papel == 'motor' else ''
+                ),
+            )
+
+        usuarios = {'prof': [], 'motor': []}
+        for papel, quantidade in (
+            ('prof', n_professores), ('motor', n_motoristas)
+        ):
+            for i in range(quantidade):
+                usuario = novo_usuario(papel, i + 1, campi[i % len(campi)])
+                # bulk_create não chama save(), que mantém a busca
+                usuario.atualizar_busca()
+                usuarios[papel].append(usuario)
+            Usuario.objects.bulk_create(
+                usuarios[papel], batch_size=self.tamanho_lote
+            )
+
+        # Grupos (bulk_create não retorna o pk em todos os bancos)
+        grupos = {
+            'prof': Group.objects.get_or_create(name='Professores')[0],
+            'motor': Group.objects.get_or_create(name='Motoristas')[0],
+        }
+        ids = dict(Usuario.objects.filter(
+            username__startswith=f'{PREFIXO}_'
+        ).values_list('username', 'id'))
+        Membro = Usuario.groups.through
+        Membro.objects.bulk_create(
+            [
+                Membro(usuario_id=ids[usuario.username],
+                       group_id=grupos[papel].pk)
+                for papel, lista in usuarios.items()
+                for usuario in lista
+            ],
+            batch_size=self.tamanho_lote,
+        )
+
+        # Ids por campus, usados na geração dos agendamentos
+        professores = {}
+        motoristas = {}
+        for papel, destino in (('prof', professores), ('motor', motoristas)):
+            for usuario in usuarios[papel]:
+                destino.setdefault(usuario.campus_id, []).append(
+                    ids[usuario.username]
+                )
+        return professores, motoristas
+
+    # ------------------------------------------------------------------ #
+    #  Agendamentos, trajetos e histórico dos veículos                     #
+    # ------------------------------------------------------------------ #
+
+    def _dias_linha_do_tempo(self):
+        """Dias cobertos pelos agendamentos de cada veículo."""
+        por_veiculo = self.volumes['agendamentos'] / self.volumes['veiculos']
+        passo_medio = sum(INTERVALO_HORAS) / 2 + sum(DURACAO_HORAS) / 2
+        return max(1, por_veiculo * passo_medio / 24)
+
+    def criar_agendamentos(self, veiculos, cursos, professores, motoristas):
+        total = self.volumes['agendamentos']
+        self._etapa(
+            f"Criando {total:,} agendamentos e trajetos".replace(',', '.')
+        )
+
+        g_agendamentos = GravadorLotes(
+            Agendamento, self.tamanho_lote, self.usar_copy
+        )
+        g_trajetos = GravadorLotes(
+            Trajeto, self.tamanho_lote, self.usar_copy,
+            depende_de=[g_agendamentos]
+        )
+        g_abastecimentos = GravadorLotes(
+            Abastecimento, self.tamanho_lote, self.usar_copy,
+            depende_de=[g_agendamentos, g_trajetos]
+        )
+        g_ocorrencias = GravadorLotes(
+            Ocorrencia, self.tamanho_lote, self.usar_copy,
+            depende_de=[g_agendamentos, g_trajetos]
+        )
+
+        # Abastecimentos e ocorrências só entram em viagens realizadas
+        # (aprovadas e já encerradas); as probabilidades compensam isso
+        dias = self._dias_linha_do_tempo()
+        realizadas = total * 0.75 * max(0.01, (dias - DIAS_FUTURO) / dias)
+        p_abastecimento = min(1, self.volumes['abastecimentos'] / realizadas)
+        p_ocorrencia = min(1, self.volumes['ocorrencias'] / realizadas)
+
+        agora = timezone.now()
+        fim_linha = (agora + timedelta(days=DIAS_FUTURO)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        inicio_linha = fim_linha - timedelta(days=dias)
+
+        cursos_por_campus = {}
+        for curso in cursos:
+            cursos_por_campus.setdefault(curso.campus_id, []).append(curso.pk)
+
+        # Distribui os agendamentos entre os veículos
+        base, resto = divmod(total, len(veiculos))
+        proximo_aviso = 0.1
+        gerados = 0
+        inicio_execucao = time.monotonic()
+
+        for indice, veiculo in enumerate(veiculos):
+            quantidade = base + (1 if indice < resto else 0)
+            campus_id = veiculo.campus_id
+            cursos_campus = cursos_por_campus[campus_id]
+            professores_campus = professores[campus_id]
+            motoristas_campus = motoristas.get(campus_id, [])
+            combustivel = self.rng.choice(COMBUSTIVEIS)
+            hodometro = self.rng.randint(5_000, 80_000)
+
+            # Primeiro agendamento em um horário aleatório do início
+            cursor = inicio_linha + timedelta(
+                minutes=30 * self.rng.randint(0, 48)
+            )
+            for _ in range(quantidade):
+                cursor += timedelta(
+                    minutes=30 * self.rng.randint(
+                        INTERVALO_HORAS[0] * 2, INTERVALO_HORAS[1] * 2
+                    )
+                )
+                data_inicio = cursor
+                data_fim = data_inicio + timedelta(
+                    minutes=30 * self.rng.randint(
+                        DURACAO_HORAS[0] * 2, DURACAO_HORAS[1] * 2
+                    )
+                )
+                cursor = data_fim
+
+                passado = data_fim < agora
+                sorteio = self.rng.random()
+                if passado:
+                    status = (
+                        'aprovado' if sorteio < 0.75
+                        else 'reprovado' if sorteio < 0.85
+                        else 'pendente'
+                    )
+                else:
+                    status = 'aprovado' if sorteio < 0.5 else 'pendente'
+
+                agendamento_id = self._uuid()
+                motorista_id = None
+                if (status == 'aprovado' and motoristas_campus
+                        and self.rng.random() < 0.8):
+                    motorista_id = self.rng.choice(motoristas_campus)
+
+                # Trajetos em sequência dentro do período
+                n_trajetos = self.rng.choices(*TRAJETOS_POR_AGENDAMENTO)[0]
+                segmento = (data_fim - data_inicio) / n_trajetos
+                origem = LOCAIS[0]
+                total_km = 0
+                primeiro_trajeto = None
+                for t in range(n_trajetos):
+                    destino = self.rng.choice(LOCAIS[1:])
+                    km = self.rng.randint(5, 150)
+                    total_km += km
+                    trajeto_id = self._uuid()
+                    primeiro_trajeto = primeiro_trajeto or trajeto_id
+                    saida = data_inicio + segmento * t
+                    g_trajetos.adicionar(
+                        id=trajeto_id,
+                        agendamento_id=agendamento_id,
+                        motorista_id=motorista_id,
+                        origem=origem,
+                        destino=destino,
+                        data_saida=saida,
+                        data_chegada=saida + segmento * 0.8,
+                        quilometragem=km,
+                        descricao=f'Deslocamento para {destino}',
+                    )
+                    origem = destino
+
+                g_agendamentos.adicionar(
+                    id=agendamento_id,
+                    curso_id=self.rng.choice(cursos_campus),
+                    professor_id=self.rng.choice(professores_campus),
+                    veiculo_id=veiculo.pk,
+                    data_inicio=data_inicio,
+                    data_fim=data_fim,
+                    status=status,
+                    motivo_reprovacao=(
+                        self.rng.choice(MOTIVOS_REPROVACAO)
+                        if status == 'reprovado' else ''
+                    ),
+                    observacoes=(
+                        self.rng.choice(OBSERVACOES)
+                        if self.rng.random() < 0.2 else ''
+                    ),
+                    total_km=total_km,
+                    total_trajetos=n_trajetos,
+                )
+
+                # Histórico do veículo: só viagens realizadas
+                if status == 'aprovado' and passado:
+                    hodometro += total_km
+                    if self.rng.random() < p_abastecimento:
+                        litros = Decimal(
+                            self.rng.uniform(20, 70)
+                        ).quantize(Decimal('0.01'))
+                        preco = Decimal(
+                            PRECO_LITRO[combustivel]
+                            * self.rng.uniform(0.95, 1.1)
+                        ).quantize(Decimal('0.001'))
+                        g_abastecimentos.adicionar(
+                            id=self._uuid(),
+                            trajeto_id=primeiro_trajeto,
+                            veiculo_id=veiculo.pk,
+                            motorista_id=motorista_id,
+                            agendamento_id=agendamento_id,
+                            local_posto=self.rng.choice(POSTOS),
+                            data_hora=data_fim - timedelta(minutes=30),
+                            km_atual=hodometro,
+                            litros_abastecidos=litros,
+                            valor_gasto=(litros * preco).quantize(
+                                Decimal('0.01')
+                            ),
+                            tipo_combustivel=combustivel,
+                        )
+                    if self.rng.random() < p_ocorrencia:
+                        tipo, descricao = self.rng.choice(OCORRENCIAS)
+                        g_ocorrencias.adicionar(
+                            id=self._uuid(),
+                            trajeto_id=primeiro_trajeto,
+                            agendamento_id=agendamento_id,
+                            veiculo_id=veiculo.pk,
+                            motorista_id=motorista_id,
+                            tipo=tipo,
+                            gravidade=self.rng.choice(
+                                ['baixa', 'media', 'alta']
+                            ),
+                            data_hora=data_inicio + segmento / 2,
+                            local=self.rng.choice(LOCAIS),
+                            descricao=descricao,
+                            resolvido=self.rng.random() < 0.8,
+                        )
+
+                gerados += 1
+
+            if gerados / total >= proximo_aviso:
+                decorrido = time.monotonic() - inicio_execucao
+                self.stdout.write(
+                    f"   {gerados / total:4.0%} — "
+                    f"{gerados:,} agendamentos ({decorrido:.0f}s)".replace(
+                        ',', '.'
+                    )
+                )
+                while proximo_aviso <= gerados / total:
+                    proximo_aviso += 0.1
+
+        for gravador in (
+            g_agendamentos, g_trajetos, g_abastecimentos, g_ocorrencias
+        ):
+            gravador.descarregar()
+
+        return {
+            'agendamentos': g_agendamentos.total,
+            'trajetos': g_trajetos.total,
+            'abastecimentos': g_abastecimentos.total,
+            'ocorrencias': g_ocorrencias.total,
+        }
@@ -0,0 +1,70 @@
+"""
+Coluna de busca normalizada de Usuario e seu índice.
+
+Usuario.busca guarda nome, e-mail e usuário em minúsculas e sem acentos
+(mantida por Usuario.save()). O índice depende do banco:
+    PostgreSQL: índice GIN de trigramas (extensão pg_trgm), usado por
+        LIKE '%trecho%'
+    SQLite: tabela FTS5 criada após cada migrate (sinal post_migrate,
+        ver BuscaUsuarioService.instalar_fts), já que o SQLite recria a
+        tabela de usuários em alterações de schema e descartaria
+        triggers criados em uma migração
+"""
+
+import unicodedata
+
+from django.db import migrations, models
+
+INDICE = 'usuario_busca_trgm_idx'
+
+
+def _normalizar(texto):
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def preencher_busca(apps, schema_editor):
+    Usuario = apps.get_model('usuarios', 'Usuario')
+    usuarios = list(Usuario.objects.only(
+        'first_name', 'last_name', 'email', 'username'
+    ))
+    for usuario in usuarios:
+        usuario.busca = _normalizar(' '.join([
+            usuario.first_name, usuario.last_name,
+            usuario.email, usuario.username,
+        ]))
+    Usuario.objects.bulk_update(usuarios, ['busca'], batch_size=500)
+
+
+def criar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDICE} ON usuarios_usuario '
+        f'USING gin (busca gin_trgm_ops)'
+    )
+
+
+def remover_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDICE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_email_saida'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='busca',
+            field=models.TextField(blank=True, editable=False, verbose_name='Texto de Busca'),
+        ),
+        migrations.RunPython(preencher_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -2,6 +2,7 @@ import uuid as _uuid
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 
@@ -47,6 +48,14 @@ class Usuario(AbstractUser):
         verbose_name='Número da CNH'
     )
 
+    # Nome, e-mail e usuário normalizados (minúsculas, sem acentos) para a
+    # busca indexada (ver BuscaUsuarioService); mantido por save()
+    busca = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Texto de Busca'
+    )
+
     token_ativacao = models.CharField(
         max_length=100,
         blank=True,
@@ -84,27 +93,139 @@ class Usuario(AbstractUser):
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
 
+    # Nomes dos grupos em cache (ver get_grupos)
+    _grupos_cache = None
+
+    # Campos que compõem o texto de busca
+    CAMPOS_BUSCA = ('first_name', 'last_name', 'email', 'username')
+
     def __str__(self):
-        grupo = self.groups.first()
-        grupo_nome = grupo.name if grupo else 'Sem grupo'
+        grupos = self.get_grupos()
+        grupo_nome = grupos[0] if grupos else 'Sem grupo'
         return f'{self.get_full_name()} ({grupo_nome})'
 
+    def get_grupos(self):
+        """
+        Retorna os nomes dos grupos do usuário, carregados uma única vez.
+
+        Os nomes ficam em cache na instância; como request.user é carregado
+        uma vez por requisição, todas as verificações de papel da
+        requisição usam uma só consulta. Aproveita prefetch_related('groups')
+        quando disponível. O cache é descartado por refresh_from_db() e
+        pelo sinal m2m_changed de groups (ver usuarios/signals.py).
+
+        Returns:
+            tuple: Nomes dos grupos, na ordem de criação dos grupos
+        """
+        if self._grupos_cache is None:
+            if not self.pk:
+                return ()
+            prefetch = getattr(self, '_prefetched_objects_cache', {})
+            if 'groups' in prefetch:
+                grupos = sorted(prefetch['groups'], key=lambda g: g.pk)
+                self._grupos_cache = tuple(g.name for g in grupos)
+            else:
+                self._grupos_cache = tuple(
+                    self.groups.order_by('pk').values_list('name', flat=True)
+                )
+        return self._grupos_cache
+
+    def limpar_cache_grupos(self):
+        """Descarta os grupos em cache (após alterar os grupos do usuário)."""
+        self._grupos_cache = None
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.limpar_cache_grupos()
+        super().refresh_from_db(*args, **kwargs)
+
+    def atualizar_busca(self):
+        """Recalcula o texto de busca a partir de CAMPOS_BUSCA."""
+        from .services import BuscaUsuarioService
+
+        self.busca = BuscaUsuarioService.texto_busca(self)
+
+    def save(self, *args, **kwargs):
+        self.atualizar_busca()
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is not None
+                and set(update_fields) & set(self.CAMPOS_BUSCA)):
+            kwargs['update_fields'] = {*update_fields, 'busca'}
+        super().save(*args, **kwargs)
+
     def is_administrador(self):
-        return self.is_superuser or self.groups.filter(
-            name='Administradores'
-        ).exists()
+        return self.is_superuser or 'Administradores' in self.get_grupos()
 
     def is_professor(self):
-        return self.groups.filter(name='Professores').exists()
+        return 'Professores' in self.get_grupos()
 
     def is_motorista(self):
-        return self.groups.filter(name='Motoristas').exists()
+        return 'Motoristas' in self.get_grupos()
 
     def is_responsavel_campus(self):
-        return self.groups.filter(name='Responsaveis de Campus').exists()
+        return 'Responsaveis de Campus' in self.get_grupos()
 
     def gerar_token_ativacao(self):
-        from django.utils import timezone
         self.token_ativacao = get_random_string(64)
         self.token_criado_em = timezone.now()
         return self.token_ativacao
+
+
+class EmailSaida(models.Model):
+    """
+    E-mail na caixa de saída.
+
+    As views apenas gravam a mensagem (ver EmailService.enfileirar); o
+    envio é feito pelo comando enviar_emails, que reaproveita uma conexão
+    com o servidor de e-mail por lote e reagenda falhas com espera
+    exponencial (status pendente → enviando → enviado/erro).
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('erro', 'Erro'),
+    ]
+
+    assunto = models.CharField(max_length=255, verbose_name='Assunto')
+    mensagem = models.TextField(verbose_name='Mensagem')
+    remetente = models.CharField(max_length=255, verbose_name='Remetente')
+    destinatarios = models.JSONField(
+        default=list, verbose_name='Destinatários'
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=STATUS_CHOICES,
+        default='pendente',
+        verbose_name='Status',
+    )
+    tentativas = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Tentativas'
+    )
+    proxima_tentativa = models.DateTimeField(
+        default=timezone.now, verbose_name='Próxima Tentativa'
+    )
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    criado_em = models.DateTimeField(
+        auto_now_add=True, verbose_name='Criado em'
+    )
+    enviado_em = models.DateTimeField(
+        null=True, blank=True, verbose_name='Enviado em'
+    )
+
+    class Meta:
+        verbose_name = 'E-mail'
+        verbose_name_plural = 'Caixa de Saída'
+        ordering = ['-criado_em']
+        indexes = [
+            # Próximo lote da fila
+            models.Index(
+                fields=['status', 'proxima_tentativa'],
+                name='email_saida_fila_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f'{self.assunto} — {", ".join(self.destinatarios)} '
+            f'({self.get_status_display()})'
+        )
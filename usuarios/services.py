@@ -0,0 +1,403 @@
+"""
+Serviços de negócio para usuários.
+
+Este módulo implementa a caixa de saída de e-mails (EmailSaida): as views
+enfileiram as mensagens e o comando enviar_emails as entrega em lotes. Também
+implementa a busca indexada de usuários por nome, e-mail e usuário.
+"""
+
+import traceback
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.db.utils import OperationalError
+from django.utils import timezone
+
+from .models import EmailSaida, Usuario
+
+
+class EmailService:
+    """
+    Serviço para a caixa de saída de e-mails.
+    """
+
+    @staticmethod
+    def enfileirar(assunto, mensagem, destinatarios, remetente=None):
+        """
+        Grava um e-mail na caixa de saída.
+
+        Com EMAIL_ASSINCRONO desligado, o e-mail é enviado na hora (útil
+        em desenvolvimento sem o worker); falhas ficam registradas no
+        próprio e-mail, sem interromper a requisição.
+
+        Args:
+            assunto: Assunto do e-mail
+            mensagem: Corpo em texto puro
+            destinatarios: Lista de endereços
+            remetente: Endereço do remetente (padrão: DEFAULT_FROM_EMAIL)
+
+        Returns:
+            EmailSaida: E-mail enfileirado
+        """
+        email = EmailSaida.objects.create(
+            assunto=assunto,
+            mensagem=mensagem,
+            remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+            destinatarios=list(destinatarios),
+        )
+        if not settings.EMAIL_ASSINCRONO:
+            if EmailService.reservar(email):
+                EmailService.enviar_lote([email])
+        return email
+
+    @staticmethod
+    def reservar(email):
+        """
+        Marca o e-mail como em envio, se ainda estiver pendente.
+
+        A troca de status é um UPDATE condicional, então dois workers
+        nunca enviam o mesmo e-mail.
+
+        Returns:
+            bool: True se este processo reservou o e-mail
+        """
+        agora = timezone.now()
+        reservado = EmailSaida.objects.filter(
+            pk=email.pk, status='pendente'
+        ).update(
+            status='enviando',
+            proxima_tentativa=agora,
+            tentativas=email.tentativas + 1,
+        )
+        if reservado:
+            email.status = 'enviando'
+            email.proxima_tentativa = agora
+            email.tentativas += 1
+        return bool(reservado)
+
+    @staticmethod
+    def reservar_lote(tamanho):
+        """
+        Reserva até `tamanho` e-mails pendentes cuja tentativa já venceu.
+
+        Returns:
+            list: E-mails reservados, do mais antigo ao mais novo
+        """
+        candidatos = EmailSaida.objects.filter(
+            status='pendente',
+            proxima_tentativa__lte=timezone.now(),
+        ).order_by('proxima_tentativa')[:tamanho]
+        return [
+            email for email in candidatos
+            if EmailService.reservar(email)
+        ]
+
+    @staticmethod
+    def enviar_lote(emails):
+        """
+        Envia os e-mails reservados usando uma única conexão.
+
+        A conexão vem de get_connection(), então respeita EMAIL_BACKEND
+        (SMTP em produção; console, file ou locmem em desenvolvimento e
+        testes). Se um envio falhar, o e-mail é reagendado (ver
+        registrar_falha) e a conexão é reaberta para os próximos; se não
+        for possível conectar, todo o restante do lote é reagendado.
+
+        Args:
+            emails: Lista de e-mails com status enviando
+
+        Returns:
+            tuple: (enviados, falhas)
+        """
+        enviados = falhas = 0
+        conexao = get_connection(fail_silently=False)
+        try:
+            for posicao, email in enumerate(emails):
+                try:
+                    # Abre a conexão na primeira mensagem (ou após falha);
+                    # nas demais, open() reaproveita a conexão aberta
+                    conexao.open()
+                except Exception:
+                    # Servidor indisponível: reagenda o restante do lote
+                    # sem tentar uma conexão por e-mail
+                    erro = traceback.format_exc()
+                    for pendente in emails[posicao:]:
+                        EmailService.registrar_falha(pendente, erro)
+                    falhas += len(emails) - posicao
+                    break
+
+                mensagem = EmailMessage(
+                    email.assunto,
+                    email.mensagem,
+                    email.remetente,
+                    email.destinatarios,
+                    connection=conexao,
+                )
+                try:
+                    mensagem.send()
+                except Exception:
+                    EmailService.registrar_falha(
+                        email, traceback.format_exc()
+                    )
+                    falhas += 1
+                    # A conexão pode ter ficado inválida
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
+                    continue
+
+                email.status = 'enviado'
+                email.erro = ''
+                email.enviado_em = timezone.now()
+                email.save(update_fields=['status', 'erro', 'enviado_em'])
+                enviados += 1
+        finally:
+            try:
+                conexao.close()
+            except Exception:
+                pass
+        return enviados, falhas
+
+    @staticmethod
+    def registrar_falha(email, erro):
+        """
+        Registra a falha de envio e reagenda o e-mail.
+
+        A espera dobra a cada tentativa (EMAIL_ESPERA_SEGUNDOS, 2x, 4x...);
+        ao atingir EMAIL_MAX_TENTATIVAS o e-mail fica com status erro.
+        """
+        email.erro = erro
+        if email.tentativas >= settings.EMAIL_MAX_TENTATIVAS:
+            email.status = 'erro'
+        else:
+            espera = settings.EMAIL_ESPERA_SEGUNDOS * 2 ** (
+                email.tentativas - 1
+            )
+            email.status = 'pendente'
+            email.proxima_tentativa = (
+                timezone.now() + timedelta(seconds=espera)
+            )
+        email.save(update_fields=['erro', 'status', 'proxima_tentativa'])
+
+    @staticmethod
+    def recuperar_travados(minutos):
+        """
+        Devolve à fila e-mails em envio há mais de `minutos`.
+
+        Cobre workers interrompidos no meio de um lote.
+
+        Returns:
+            int: Quantidade de e-mails devolvidos
+        """
+        limite = timezone.now() - timedelta(minutes=minutos)
+        return EmailSaida.objects.filter(
+            status='enviando', proxima_tentativa__lt=limite
+        ).update(status='pendente')
+
+
+class BuscaUsuarioService:
+    """
+    Busca de usuários por nome, e-mail e usuário.
+
+    A coluna Usuario.busca guarda esses campos normalizados (minúsculas,
+    sem acentos). Cada palavra do termo deve aparecer nela como trecho:
+        PostgreSQL: LIKE '%palavra%' com índice GIN de trigramas
+            (pg_trgm, migração usuarios 0010)
+        SQLite: tabela FTS5 com tokenizador trigram
+            (usuarios_usuario_busca, mantida por triggers; ver
+            instalar_fts); sem FTS5, a busca funciona sem índice
+    Palavras com menos de 3 letras, que os índices de trigramas não
+    cobrem, só filtram as linhas já encontradas pelas demais.
+    """
+
+    TABELA_FTS = 'usuarios_usuario_busca'
+
+    # Tamanho mínimo de palavra coberto pelos índices de trigramas
+    MINIMO_TRIGRAMA = 3
+
+    # Conexões (alias) com a tabela FTS5 instalada
+    _fts_disponivel = {}
+
+    @staticmethod
+    def instalar_fts(conexao):
+        """
+        Cria (se preciso) a tabela FTS5 da busca no SQLite e seus triggers.
+
+        Chamado após cada migrate (ver usuarios/signals.py): alterações de
+        schema no SQLite recriam a tabela de usuários e descartam os
+        triggers, e o índice é então reconstruído.
+
+        Returns:
+            bool: Se a tabela FTS5 está disponível
+        """
+        if conexao.vendor != 'sqlite':
+            return False
+        tabela = BuscaUsuarioService.TABELA_FTS
+        triggers = {
+            f'{tabela}_ai': (
+                f'AFTER INSERT ON usuarios_usuario BEGIN '
+                f'INSERT INTO {tabela}(rowid, busca) '
+                f'VALUES (new.id, new.busca); END'
+            ),
+            f'{tabela}_ad': (
+                f'AFTER DELETE ON usuarios_usuario BEGIN '
+                f'INSERT INTO {tabela}({tabela}, rowid, busca) '
+                f"VALUES ('delete', old.id, old.busca); END"
+            ),
+            f'{tabela}_au': (
+                f'AFTER UPDATE OF busca ON usuarios_usuario BEGIN '
+                f'INSERT INTO {tabela}({tabela}, rowid, busca) '
+                f"VALUES ('delete', old.id, old.busca); "
+                f'INSERT INTO {tabela}(rowid, busca) '
+                f'VALUES (new.id, new.busca); END'
+            ),
+        }
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                'SELECT name FROM sqlite_master '
+                'WHERE name IN (%s, %s, %s, %s)',
+                [tabela, *triggers],
+            )
+            existentes = {nome for (nome,) in cursor.fetchall()}
+            if existentes != {tabela, *triggers}:
+                try:
+                    cursor.execute(
+                        f'CREATE VIRTUAL TABLE IF NOT EXISTS {tabela} '
+                        f"USING fts5(busca, content='usuarios_usuario', "
+                        f"content_rowid='id', tokenize='trigram')"
+                    )
+                except OperationalError:
+                    # SQLite sem FTS5 ou sem o tokenizador trigram
+                    BuscaUsuarioService._fts_disponivel[conexao.alias] = False
+                    return False
+                for nome, corpo in triggers.items():
+                    cursor.execute(
+                        f'CREATE TRIGGER IF NOT EXISTS {nome} {corpo}'
+                    )
+                cursor.execute(
+                    f"INSERT INTO {tabela}({tabela}) VALUES ('rebuild')"
+                )
+        BuscaUsuarioService._fts_disponivel[conexao.alias] = True
+        return True
+
+    @staticmethod
+    def _usar_fts(conexao):
+        if conexao.vendor != 'sqlite':
+            return False
+        if conexao.alias not in BuscaUsuarioService._fts_disponivel:
+            with conexao.cursor() as cursor:
+                cursor.execute(
+                    'SELECT 1 FROM sqlite_master WHERE name = %s',
+                    [BuscaUsuarioService.TABELA_FTS],
+                )
+                BuscaUsuarioService._fts_disponivel[conexao.alias] = (
+                    cursor.fetchone() is not None
+                )
+        return BuscaUsuarioService._fts_disponivel[conexao.alias]
+
+    @staticmethod
+    def normalizar(texto):
+        """
+        Normaliza um texto para a busca: minúsculas, sem acentos e com
+        espaços simples.
+
+        Returns:
+            str: Ex.: 'Conceição  Araújo' → 'conceicao araujo'
+        """
+        decomposto = unicodedata.normalize('NFKD', texto or '')
+        sem_acentos = ''.join(
+            c for c in decomposto if not unicodedata.combining(c)
+        )
+        return ' '.join(sem_acentos.casefold().split())
+
+    @staticmethod
+    def texto_busca(usuario):
+        """Texto de busca do usuário (valor de Usuario.busca)."""
+        return BuscaUsuarioService.normalizar(' '.join(
+            getattr(usuario, campo) or ''
+            for campo in Usuario.CAMPOS_BUSCA
+        ))
+
+    @staticmethod
+    def buscar(termo, queryset=None):
+        """
+        Filtra usuários cujo nome, e-mail ou usuário contenha cada palavra
+        do termo, sem diferenciar acentos e maiúsculas.
+
+        Args:
+            termo: Texto digitado
+            queryset: QuerySet de Usuario a filtrar (padrão: todos)
+
+        Returns:
+            QuerySet: Usuários encontrados; todos, se o termo for vazio
+        """
+        if queryset is None:
+            queryset = Usuario.objects.all()
+        palavras = BuscaUsuarioService.normalizar(termo).split()
+
+        longas = [
+            palavra for palavra in palavras
+            if len(palavra) >= BuscaUsuarioService.MINIMO_TRIGRAMA
+        ]
+        if longas and BuscaUsuarioService._usar_fts(connections[queryset.db]):
+            consulta = ' AND '.join(
+                '"{}"'.format(palavra.replace('"', '""'))
+                for palavra in longas
+            )
+            tabela = BuscaUsuarioService.TABELA_FTS
+            queryset = queryset.filter(id__in=RawSQL(
+                f'SELECT rowid FROM {tabela} WHERE {tabela} MATCH %s',
+                [consulta],
+            ))
+
+        for palavra in palavras:
+            queryset = queryset.filter(busca__contains=palavra)
+        return queryset
+
+    @staticmethod
+    def ids(termo, queryset=None):
+        """
+        Resolve o termo nos ids dos usuários encontrados.
+
+        Returns:
+            list: Ids, para filtrar outras tabelas pela FK do usuário
+        """
+        return list(
+            BuscaUsuarioService.buscar(termo, queryset)
+            .order_by()
+            .values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def autocompletar(termo, queryset=None, limite=10):
+        """
+        Sugestões de usuários para um campo de busca.
+
+        Returns:
+            list: Dicts com id, nome, email e username, por nome
+        """
+        if not BuscaUsuarioService.normalizar(termo):
+            return []
+        usuarios = (
+            BuscaUsuarioService.buscar(termo, queryset)
+            .order_by('first_name', 'last_name')
+            .values('id', 'first_name', 'last_name', 'email', 'username')
+            [:limite]
+        )
+        return [
+            {
+                'id': usuario['id'],
+                'nome': (
+                    f"{usuario['first_name']} {usuario['last_name']}".strip()
+                    or usuario['username']
+                ),
+                'email': usuario['email'],
+                'username': usuario['username'],
+            }
+            for usuario in usuarios
+        ]
@@ -0,0 +1,59 @@
+"""
+Sinais do app usuarios.
+
+Mantém consistente o cache de grupos da instância de Usuario
+(ver Usuario.get_grupos), invalida a lista de motoristas em cache
+(ver common/referencia.py) e instala o índice da busca no SQLite.
+"""
+
+from django.db import connections
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+
+from common.referencia import invalidar
+
+from .models import Usuario
+from .services import BuscaUsuarioService
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def limpar_cache_grupos(sender, instance, action, reverse, **kwargs):
+    """
+    Descarta o cache de grupos quando os grupos do usuário mudam.
+
+    Alterações feitas pelo lado do grupo (group.user_set.add(...)) não
+    alcançam as instâncias já carregadas; elas se corrigem na próxima
+    requisição, que carrega o usuário novamente.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse and isinstance(instance, Usuario):
+        instance.limpar_cache_grupos()
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def invalidar_motoristas_grupos(sender, action, **kwargs):
+    """Invalida a lista de motoristas quando algum vínculo de grupo muda."""
+    if action.startswith('post_'):
+        invalidar('motoristas')
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_motoristas(sender, update_fields=None, **kwargs):
+    """
+    Invalida a lista de motoristas quando um usuário muda.
+
+    O save feito a cada login (só last_login) é ignorado.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar('motoristas')
+
+
+@receiver(post_migrate)
+def instalar_indice_busca(sender, app_config, using, **kwargs):
+    """Recria a tabela FTS5 da busca de usuários no SQLite, se preciso."""
+    if app_config.label == 'usuarios':
+        BuscaUsuarioService.instalar_fts(connections[using])
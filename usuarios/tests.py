@@ -1,3 +1,188 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from agendamentos.services import RelatorioService
+from campus.models import Campus
+
+from .models import EmailSaida, Usuario
+from .services import BuscaUsuarioService, EmailService
+
+
+class BuscaUsuarioTest(TestCase):
+
+    def setUp(self):
+        self.professores = Group.objects.get_or_create(name='Professores')[0]
+        self.campus = Campus.objects.create(nome='Central')
+        self.conceicao = self._professor(
+            'mconceicao', 'Maria', 'Conceição Araújo'
+        )
+        self.joao = self._professor('jsilva', 'João', 'Silva')
+
+    def _professor(self, username, nome, sobrenome, campus=None):
+        usuario = Usuario.objects.create_user(
+            username, email=f'{username}@uespi.br', password='x',
+            first_name=nome, last_name=sobrenome,
+            campus=campus or self.campus,
+        )
+        usuario.groups.add(self.professores)
+        return usuario
+
+    def test_texto_de_busca_mantido_no_save(self):
+        self.assertEqual(
+            self.conceicao.busca,
+            'maria conceicao araujo mconceicao@uespi.br mconceicao',
+        )
+        self.conceicao.last_name = 'Souza'
+        self.conceicao.save(update_fields=['last_name'])
+        self.conceicao.refresh_from_db()
+        self.assertIn('souza', self.conceicao.busca)
+
+    def test_busca_sem_acentos_e_por_palavras(self):
+        for termo in ('conceição', 'CONCEICAO', 'araujo maria', 'jsil'):
+            with self.subTest(termo=termo):
+                self.assertEqual(
+                    BuscaUsuarioService.buscar(termo).count(), 1
+                )
+        self.assertFalse(BuscaUsuarioService.buscar('maria silva').exists())
+
+    def test_usa_tabela_fts_no_sqlite(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Índice FTS5 só existe no SQLite')
+        self.assertTrue(BuscaUsuarioService._usar_fts(connection))
+        sql = str(BuscaUsuarioService.buscar('araujo').query)
+        self.assertIn(BuscaUsuarioService.TABELA_FTS, sql)
+
+        # Triggers mantêm o índice em atualizações
+        self.joao.first_name = 'Joaquim'
+        self.joao.save()
+        self.assertEqual(
+            list(BuscaUsuarioService.buscar('joaquim')), [self.joao]
+        )
+        self.assertFalse(BuscaUsuarioService.buscar('joão').exists())
+
+    def test_filtro_professor_dos_agendamentos(self):
+        from agendamentos.models import Agendamento
+
+        queryset = RelatorioService.aplicar_filtros(
+            Agendamento.objects.all(), {'professor_search': 'Araújo'}
+        )
+        self.assertIn(f'{self.conceicao.pk}', str(queryset.query))
+
+    def test_autocompletar_limita_ao_campus(self):
+        outro = Campus.objects.create(nome='Norte')
+        self._professor('mnorte', 'Maria', 'Norte', campus=outro)
+        responsavel = Usuario.objects.create_user(
+            'resp', password='x', campus=self.campus
+        )
+        responsavel.groups.add(Group.objects.get_or_create(
+            name='Responsaveis de Campus'
+        )[0])
+        self.client.force_login(responsavel)
+
+        resposta = self.client.get(
+            reverse('usuarios:buscar_professores'), {'q': 'mari'}
+        )
+
+        self.assertEqual(resposta.json(), {'resultados': [{
+            'id': self.conceicao.pk,
+            'nome': 'Maria Conceição Araújo',
+            'email': 'mconceicao@uespi.br',
+            'username': 'mconceicao',
+        }]})
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_ASSINCRONO=True,
+    EMAIL_MAX_TENTATIVAS=2,
+    EMAIL_ESPERA_SEGUNDOS=60,
+)
+class EmailSaidaTest(TestCase):
+    """Caixa de saída: reserva, envio em lote, reenvio e recuperação."""
+
+    def enfileirar(self, destinatario):
+        return EmailService.enfileirar(
+            'Agendamento aprovado', 'Seu agendamento foi aprovado.',
+            [destinatario],
+        )
+
+    def enviar(self):
+        return EmailService.enviar_lote(EmailService.reservar_lote(10))
+
+    def test_envio_em_lote(self):
+        primeiro = self.enfileirar('a@uespi.br')
+        self.enfileirar('b@uespi.br')
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(self.enviar(), (2, 0))
+
+        self.assertEqual(
+            [mensagem.to for mensagem in mail.outbox],
+            [['a@uespi.br'], ['b@uespi.br']],
+        )
+        primeiro.refresh_from_db()
+        self.assertEqual(primeiro.status, 'enviado')
+        self.assertIsNotNone(primeiro.enviado_em)
+        self.assertEqual(self.enviar(), (0, 0))
+
+    def test_reserva_condicional(self):
+        email = self.enfileirar('a@uespi.br')
+        concorrente = EmailSaida.objects.get(pk=email.pk)
+
+        self.assertTrue(EmailService.reservar(email))
+        self.assertFalse(EmailService.reservar(concorrente))
+        self.assertEqual(EmailService.reservar_lote(10), [])
+
+    def test_falha_reagenda_com_espera_ate_o_limite(self):
+        falha = self.enfileirar('falha@uespi.br')
+        self.enfileirar('ok@uespi.br')
+        enviar_original = EmailBackend.send_messages
+
+        def enviar(backend, mensagens):
+            if mensagens[0].to == ['falha@uespi.br']:
+                raise OSError('caixa cheia')
+            return enviar_original(backend, mensagens)
+
+        with mock.patch.object(EmailBackend, 'send_messages', enviar):
+            antes = timezone.now()
+            self.assertEqual(self.enviar(), (1, 1))
+            falha.refresh_from_db()
+            self.assertEqual((falha.status, falha.tentativas), ('pendente', 1))
+            self.assertIn('caixa cheia', falha.erro)
+            self.assertGreaterEqual(
+                falha.proxima_tentativa, antes + timedelta(seconds=60)
+            )
+
+            # Antes da espera vencer o e-mail não é reservado
+            self.assertEqual(EmailService.reservar_lote(10), [])
+
+            EmailSaida.objects.filter(pk=falha.pk).update(
+                proxima_tentativa=timezone.now()
+            )
+            self.assertEqual(self.enviar(), (0, 1))
+            falha.refresh_from_db()
+            self.assertEqual((falha.status, falha.tentativas), ('erro', 2))
+
+        self.assertEqual(
+            [mensagem.to for mensagem in mail.outbox], [['ok@uespi.br']]
+        )
+
+    def test_recupera_emails_travados(self):
+        email = self.enfileirar('a@uespi.br')
+        EmailService.reservar(email)
+        EmailSaida.objects.filter(pk=email.pk).update(
+            proxima_tentativa=timezone.now() - timedelta(minutes=30)
+        )
+
+        self.assertEqual(EmailService.recuperar_travados(60), 0)
+        self.assertEqual(EmailService.recuperar_travados(10), 1)
+        self.assertEqual(self.enviar(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
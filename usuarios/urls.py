@@ -1,8 +1,8 @@
 from django.urls import path
 
 from .views import (CustomLoginView, CustomLogoutView, alterar_senha,
-                    confirmar_email, criar_motorista, criar_professor,
-                    desativar_motorista, desativar_professor,
+                    buscar_professores, confirmar_email, criar_motorista,
+                    criar_professor, desativar_motorista, desativar_professor,
                     editar_motorista, editar_perfil, editar_professor,
                     lista_motoristas, lista_professores,
                     recuperar_senha_step1, recuperar_senha_step2,
@@ -42,6 +42,8 @@ urlpatterns = [
     # Gerenciamento de professores (responsável de campus / admin)
     path('professores/', lista_professores, name='lista_professores'),
     path('professores/novo/', criar_professor, name='criar_professor'),
+    path('professores/buscar/', buscar_professores,
+         name='buscar_professores'),
     path('professores/<uuid:uuid>/editar/', editar_professor,
          name='editar_professor'),
     path('professores/<uuid:uuid>/desativar/', desativar_professor,
@@ -1,11 +1,10 @@
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
 from django.contrib.auth.views import LoginView, LogoutView
-from django.core.mail import send_mail
 from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
@@ -19,6 +18,7 @@ from .forms import (PERGUNTAS_SEGURANCA, AlterarSenhaForm,
                     RecuperarSenhaStep2Form, RecuperarSenhaStep3Form,
                     RegistroForm)
 from .models import Usuario
+from .services import BuscaUsuarioService, EmailService
 
 
 class CustomLoginView(LoginView):
@@ -96,48 +96,33 @@ def registro(request):
             grupo, _ = Group.objects.get_or_create(name='Professores')
             user.groups.add(grupo)
 
-            # Envia email de ativação
-            try:
-                link_ativacao = request.build_absolute_uri(
-                    reverse('usuarios:ativar_conta',
-                            args=[user.token_ativacao])
-                )
+            # Enfileira o e-mail de ativação (enviado pelo worker)
+            link_ativacao = request.build_absolute_uri(
+                reverse('usuarios:ativar_conta',
+                        args=[user.token_ativacao])
+            )
 
-                assunto = 'Ative sua conta - Sistema de Agendamento UESPI'
-                mensagem = (
-                    f'Olá, {user.get_full_name()}!\n\n'
-                    f'Obrigado por se registrar no Sistema de Agendamento '
-                    f'de Veículos da UESPI.\n\n'
-                    f'Para ativar sua conta, clique no link abaixo:\n'
-                    f'{link_ativacao}\n\n'
-                    f'Este link é válido por 24 horas.\n\n'
-                    f'Se você não se cadastrou, ignore este e-mail.\n\n'
-                    f'Atenciosamente,\n'
-                    f'Equipe Sistema de Agendamento - UESPI'
-                )
+            assunto = 'Ative sua conta - Sistema de Agendamento UESPI'
+            mensagem = (
+                f'Olá, {user.get_full_name()}!\n\n'
+                f'Obrigado por se registrar no Sistema de Agendamento '
+                f'de Veículos da UESPI.\n\n'
+                f'Para ativar sua conta, clique no link abaixo:\n'
+                f'{link_ativacao}\n\n'
+                f'Este link é válido por 24 horas.\n\n'
+                f'Se você não se cadastrou, ignore este e-mail.\n\n'
+                f'Atenciosamente,\n'
+                f'Equipe Sistema de Agendamento - UESPI'
+            )
 
-                send_mail(
-                    assunto,
-                    mensagem,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=False,
-                )
+            EmailService.enfileirar(assunto, mensagem, [user.email])
 
-                messages.success(
-                    request,
-                    f'Cadastro realizado com sucesso! '
-                    f'Um e-mail de ativação foi enviado para {user.email}. '
-                    f'Por favor, verifique sua caixa de entrada e spam.'
-                )
-            except Exception as e:
-                # Se falhar envio de email, avisa usuário
-                messages.warning(
-                    request,
-                    f'Cadastro realizado, mas houve um erro ao enviar '
-                    f'o e-mail de ativação. Entre em contato com o '
-                    f'administrador. Erro: {str(e)}'
-                )
+            messages.success(
+                request,
+                f'Cadastro realizado com sucesso! '
+                f'Um e-mail de ativação foi enviado para {user.email}. '
+                f'Por favor, verifique sua caixa de entrada e spam.'
+            )
 
             return redirect('usuarios:login')
     else:
@@ -196,42 +181,30 @@ def reenviar_email_confirmacao(request):
             usuario.gerar_token_ativacao()
             usuario.save()
 
-            # Envia email
-            try:
-                link_ativacao = request.build_absolute_uri(
-                    reverse('usuarios:ativar_conta',
-                            args=[usuario.token_ativacao])
-                )
+            # Enfileira o e-mail (enviado pelo worker)
+            link_ativacao = request.build_absolute_uri(
+                reverse('usuarios:ativar_conta',
+                        args=[usuario.token_ativacao])
+            )
 
-                assunto = 'Ative sua conta - Sistema de Agendamento UESPI'
-                mensagem = (
-                    f'Olá, {usuario.get_full_name()}!\n\n'
-                    f'Você solicitou um novo link de ativação.\n\n'
-                    f'Para ativar sua conta, clique no link abaixo:\n'
-                    f'{link_ativacao}\n\n'
-                    f'Este link é válido por 24 horas.\n\n'
-                    f'Atenciosamente,\n'
-                    f'Equipe Sistema de Agendamento - UESPI'
-                )
+            assunto = 'Ative sua conta - Sistema de Agendamento UESPI'
+            mensagem = (
+                f'Olá, {usuario.get_full_name()}!\n\n'
+                f'Você solicitou um novo link de ativação.\n\n'
+                f'Para ativar sua conta, clique no link abaixo:\n'
+                f'{link_ativacao}\n\n'
+                f'Este link é válido por 24 horas.\n\n'
+                f'Atenciosamente,\n'
+                f'Equipe Sistema de Agendamento - UESPI'
+            )
 
-                send_mail(
-                    assunto,
-                    mensagem,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [usuario.email],
-                    fail_silently=False,
-                )
+            EmailService.enfileirar(assunto, mensagem, [usuario.email])
 
-                messages.success(
-                    request,
-                    f'Um novo e-mail de ativação foi enviado para '
-                    f'{usuario.email}.'
-                )
-            except Exception as e:
-                messages.error(
-                    request,
-                    f'Erro ao enviar e-mail: {str(e)}'
-                )
+            messages.success(
+                request,
+                f'Um novo e-mail de ativação foi enviado para '
+                f'{usuario.email}.'
+            )
         except Usuario.DoesNotExist:
             # Por segurança, não informa se o email existe ou não
             messages.info(
@@ -484,7 +457,9 @@ def lista_motoristas(request):
             groups__name='Motoristas',
             campus=request.user.campus,
         ).order_by('first_name', 'last_name')
-    pagination = PaginationHelper(motoristas, 10)
+    pagination = PaginationHelper(
+        motoristas, 10, cursor=True, estimar_total=True
+    )
     motoristas_paginados = pagination.get_page(request.GET.get('page'))
     return render(
         request,
@@ -597,7 +572,9 @@ def lista_professores(request):
             groups__name='Professores',
             campus=request.user.campus,
         ).order_by('first_name', 'last_name')
-    pagination = PaginationHelper(professores, 10)
+    pagination = PaginationHelper(
+        professores, 10, cursor=True, estimar_total=True
+    )
     professores_paginados = pagination.get_page(request.GET.get('page'))
     return render(
         request,
@@ -606,6 +583,28 @@ def lista_professores(request):
     )
 
 
+@login_required
+@responsavel_campus_required
+def buscar_professores(request):
+    """
+    Sugestões de professores para campos de busca (autocompletar).
+
+    GET ?q=<termo> → {"resultados": [{id, nome, email, username}, ...]}
+    Responsáveis de campus só veem os professores do próprio campus.
+    """
+    professores = Usuario.objects.filter(
+        groups__name='Professores',
+        is_active=True,
+    )
+    if not request.user.is_administrador():
+        professores = professores.filter(campus=request.user.campus)
+    return JsonResponse({
+        'resultados': BuscaUsuarioService.autocompletar(
+            request.GET.get('q', ''), professores
+        ),
+    })
+
+
 @login_required
 @responsavel_campus_required
 def criar_professor(request):
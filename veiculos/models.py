@@ -1,9 +1,6 @@
 import uuid
 
 from django.db import models
-from django.db.models import Q
-
-from agendamentos.models import Agendamento
 
 
 class Veiculo(models.Model):
@@ -50,6 +47,24 @@ class Veiculo(models.Model):
     def __str__(self):
         return f"{self.placa} - {self.marca} {self.modelo}"
 
+    def verificar_conflito(self, data_inicio, data_fim, agendamento_id=None):
+        """
+        Verifica conflitos do veículo no período com uma única consulta.
+
+        Args:
+            data_inicio: Data/hora de início do agendamento
+            data_fim: Data/hora de fim do agendamento
+            agendamento_id: ID do agendamento atual (para edição)
+
+        Returns:
+            tuple: (bool, list) - (tem_conflito, agendamentos_conflitantes)
+        """
+        from .services import ConflitoVeiculoService
+
+        return ConflitoVeiculoService.verificar(
+            self.pk, data_inicio, data_fim, agendamento_id
+        )
+
     def tem_conflito(self, data_inicio, data_fim, agendamento_id=None):
         """
         Verifica se há conflito de agendamento para este veículo
@@ -65,22 +80,11 @@ class Veiculo(models.Model):
         Returns:
             True se houver conflito, False caso contrário
         """
+        from .services import ConflitoVeiculoService
 
-        # Query para verificar sobreposição de datas
-        # Agendamentos APROVADOS e PENDENTES bloqueiam o veículo
-        conflitos = Agendamento.objects.filter(
-            veiculo=self,
-            # Aprovados e pendentes bloqueiam
-            status__in=['aprovado', 'pendente']
-        ).filter(
-            Q(data_inicio__lt=data_fim) & Q(data_fim__gt=data_inicio)
-        )
-
-        # Exclui o próprio agendamento se estiver editando
-        if agendamento_id:
-            conflitos = conflitos.exclude(id=agendamento_id)
-
-        return conflitos.exists()
+        return ConflitoVeiculoService.consultar(
+            self.pk, data_inicio, data_fim, agendamento_id
+        ).exists()
 
     def get_agendamentos_periodo(self, data_inicio, data_fim):
         """
@@ -88,10 +92,8 @@ class Veiculo(models.Model):
         Agendamentos aprovados e pendentes são considerados para verificação
         de conflito, pois o veículo fica reservado enquanto aguarda decisão.
         """
+        from .services import ConflitoVeiculoService
 
-        return Agendamento.objects.filter(
-            veiculo=self,
-            status__in=['aprovado', 'pendente']  # Aprovados e pendentes
-        ).filter(
-            Q(data_inicio__lt=data_fim) & Q(data_fim__gt=data_inicio)
-        ).order_by('data_inicio')
+        return ConflitoVeiculoService.consultar(
+            self.pk, data_inicio, data_fim
+        )
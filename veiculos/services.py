@@ -0,0 +1,374 @@
+"""
+Serviços de negócio para veículos.
+
+Este módulo concentra a detecção de conflitos de agendamento de veículos,
+usada pelos forms, pelo model Agendamento e pelos serviços de gravação, a
+busca de veículos livres em um período e a grade de ocupação da frota.
+"""
+
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from agendamentos.models import Agendamento
+from common.periodos import inicio_do_dia
+
+from .models import Veiculo
+
+# Nome da restrição de exclusão opcional do PostgreSQL
+# (ver agendamentos/migrations/0005_agendamento_restricao_conflito.py)
+RESTRICAO_CONFLITO = 'agendamento_veiculo_sem_sobreposicao'
+
+
+class ConflitoVeiculoService:
+    """
+    Serviço para detecção de conflitos de agendamento de veículos.
+
+    Agendamentos APROVADOS e PENDENTES bloqueiam o veículo, pois ele
+    fica reservado enquanto aguarda aprovação. A consulta de sobreposição
+    usa o índice (veiculo, status, data_inicio, data_fim) de Agendamento.
+    """
+
+    STATUS_BLOQUEANTES = ('aprovado', 'pendente')
+
+    @staticmethod
+    def consultar(veiculo_id, data_inicio, data_fim, agendamento_id=None):
+        """
+        Monta a consulta de agendamentos que se sobrepõem ao período.
+
+        Args:
+            veiculo_id: ID do veículo
+            data_inicio: Data/hora de início do período
+            data_fim: Data/hora de fim do período
+            agendamento_id: ID do agendamento atual (para edição)
+
+        Returns:
+            QuerySet: Agendamentos conflitantes, ordenados pelo início
+        """
+        conflitos = Agendamento.objects.filter(
+            veiculo_id=veiculo_id,
+            status__in=ConflitoVeiculoService.STATUS_BLOQUEANTES,
+            data_inicio__lt=data_fim,
+            data_fim__gt=data_inicio,
+        )
+
+        # Exclui o próprio agendamento se estiver editando
+        if agendamento_id:
+            conflitos = conflitos.exclude(id=agendamento_id)
+
+        return conflitos.order_by('data_inicio')
+
+    @staticmethod
+    def verificar(veiculo_id, data_inicio, data_fim, agendamento_id=None):
+        """
+        Verifica conflitos do veículo no período com uma única consulta.
+
+        Args:
+            veiculo_id: ID do veículo
+            data_inicio: Data/hora de início do período
+            data_fim: Data/hora de fim do período
+            agendamento_id: ID do agendamento atual (para edição)
+
+        Returns:
+            tuple: (bool, list) - (tem_conflito, agendamentos_conflitantes)
+        """
+        conflitos = list(ConflitoVeiculoService.consultar(
+            veiculo_id, data_inicio, data_fim, agendamento_id
+        ))
+        return bool(conflitos), conflitos
+
+    @staticmethod
+    def mensagem(veiculo, conflitos):
+        """
+        Monta a mensagem de erro de conflito exibida ao usuário.
+
+        Args:
+            veiculo: Veículo em conflito
+            conflitos: Agendamentos conflitantes
+
+        Returns:
+            str: Mensagem com os períodos ocupados
+        """
+        mensagem = f"O veículo {veiculo.placa} tem um agendamento neste período:"
+        for conflito in conflitos:
+            data_inicio = conflito.data_inicio.strftime('%d/%m/%Y %H:%M')
+            data_fim = conflito.data_fim.strftime('%d/%m/%Y %H:%M')
+            mensagem += f"\n- {data_inicio} até {data_fim}"
+        return mensagem
+
+    @staticmethod
+    def validar(veiculo, data_inicio, data_fim, agendamento_id=None):
+        """
+        Valida que o veículo está livre no período.
+
+        Args:
+            veiculo: Veículo a validar
+            data_inicio: Data/hora de início do período
+            data_fim: Data/hora de fim do período
+            agendamento_id: ID do agendamento atual (para edição)
+
+        Raises:
+            ValidationError: Se houver conflito, associado ao campo veiculo
+        """
+        tem_conflito, conflitos = ConflitoVeiculoService.verificar(
+            veiculo.pk, data_inicio, data_fim, agendamento_id
+        )
+        if tem_conflito:
+            raise ValidationError({
+                'veiculo': ConflitoVeiculoService.mensagem(veiculo, conflitos)
+            })
+
+    @staticmethod
+    def reservar(agendamento):
+        """
+        Revalida o conflito e bloqueia o veículo até o fim da transação.
+
+        Deve ser chamado dentro de transaction.atomic(), antes de gravar o
+        agendamento. O SELECT ... FOR UPDATE na linha do veículo serializa
+        gravações concorrentes para o mesmo veículo, fechando a janela
+        entre a verificação e o INSERT/UPDATE.
+
+        Args:
+            agendamento: Agendamento prestes a ser gravado
+
+        Raises:
+            ValidationError: Se houver conflito
+        """
+        if agendamento.status not in ConflitoVeiculoService.STATUS_BLOQUEANTES:
+            return
+
+        veiculo = Veiculo.objects.select_for_update().get(
+            pk=agendamento.veiculo_id
+        )
+        tem_conflito, conflitos = ConflitoVeiculoService.verificar(
+            veiculo.pk,
+            agendamento.data_inicio,
+            agendamento.data_fim,
+            agendamento.pk,
+        )
+        if tem_conflito:
+            raise ValidationError(
+                ConflitoVeiculoService.mensagem(veiculo, conflitos)
+            )
+
+    @staticmethod
+    def salvar(agendamento):
+        """
+        Grava o agendamento com o veículo reservado.
+
+        Converte a violação da restrição de exclusão do PostgreSQL
+        (quando instalada) em ValidationError.
+
+        Args:
+            agendamento: Agendamento a gravar
+
+        Raises:
+            ValidationError: Se houver conflito
+        """
+        try:
+            with transaction.atomic():
+                ConflitoVeiculoService.reservar(agendamento)
+                agendamento.save()
+        except IntegrityError as e:
+            if RESTRICAO_CONFLITO not in str(e):
+                raise
+            raise ValidationError(
+                f"O veículo {agendamento.veiculo.placa} já possui um "
+                f"agendamento neste período."
+            )
+
+
+class DisponibilidadeVeiculoService:
+    """
+    Serviço para busca de veículos livres em um período.
+
+    Em vez de testar cada veículo com tem_conflito(), os veículos livres
+    saem de uma única consulta: veículos ativos sem agendamento bloqueante
+    que se sobreponha ao período (anti-join NOT EXISTS sobre a mesma
+    consulta de ConflitoVeiculoService, que usa o índice de conflito).
+    """
+
+    @staticmethod
+    def livres(data_inicio, data_fim, campus_id=None,
+               capacidade_minima=None, agendamento_id=None):
+        """
+        Monta a consulta de veículos ativos livres no período.
+
+        Args:
+            data_inicio: Data/hora de início do período
+            data_fim: Data/hora de fim do período
+            campus_id: Restringe aos veículos do campus (opcional)
+            capacidade_minima: Mínimo de passageiros (opcional)
+            agendamento_id: Agendamento em edição, que não ocupa o
+                próprio veículo (opcional)
+
+        Returns:
+            QuerySet: Veículos livres, por placa
+        """
+        veiculos = Veiculo.objects.filter(ativo=True)
+        if campus_id:
+            veiculos = veiculos.filter(campus_id=campus_id)
+        if capacidade_minima:
+            veiculos = veiculos.filter(
+                capacidade_passageiros__gte=capacidade_minima
+            )
+        ocupado = ConflitoVeiculoService.consultar(
+            OuterRef('pk'), data_inicio, data_fim, agendamento_id
+        )
+        return veiculos.filter(~Exists(ocupado)).order_by('placa')
+
+    @staticmethod
+    def serializar(veiculo):
+        """
+        Converte um veículo livre em dict para respostas JSON.
+
+        Returns:
+            dict: id, placa, texto (rótulo do select), capacidade e campus
+        """
+        return {
+            'id': str(veiculo.pk),
+            'placa': veiculo.placa,
+            'texto': str(veiculo),
+            'capacidade': veiculo.capacidade_passageiros,
+            'campus': veiculo.campus_id,
+        }
+
+
+class OcupacaoFrotaService:
+    """
+    Grade de ocupação da frota: veículos × dias (ou horas).
+
+    Cada célula traz o percentual do intervalo em que o veículo está
+    reservado por agendamentos aprovados ou pendentes. A grade sai de duas
+    consultas (veículos e agendamentos da janela) e de uma varredura dos
+    agendamentos em ordem de início: os períodos sobrepostos de cada
+    veículo são unidos, e cada período unido é distribuído nas células que
+    cobre. Nenhuma célula é consultada no banco, e agendamentos sobrepostos
+    não contam duas vezes.
+    """
+
+    GRANULARIDADES = ('dia', 'hora')
+
+    @staticmethod
+    def limites(dia_inicial, dias, granularidade='dia'):
+        """
+        Calcula os limites das células da grade.
+
+        Args:
+            dia_inicial: Primeiro dia (date)
+            dias: Quantidade de dias
+            granularidade: 'dia' ou 'hora'
+
+        Returns:
+            list: Datetimes aware; a célula i é [limites[i], limites[i+1])
+        """
+        if granularidade == 'hora':
+            inicio = inicio_do_dia(dia_inicial)
+            return [
+                inicio + timedelta(hours=hora)
+                for hora in range(dias * 24 + 1)
+            ]
+        return [
+            inicio_do_dia(dia_inicial + timedelta(days=dia))
+            for dia in range(dias + 1)
+        ]
+
+    @staticmethod
+    def _distribuir(linha, limites, inicio, fim):
+        """Soma à linha os segundos de [inicio, fim) em cada célula."""
+        inicio = max(inicio, limites[0])
+        fim = min(fim, limites[-1])
+        celula = bisect_right(limites, inicio) - 1
+        while celula < len(linha) and limites[celula] < fim:
+            trecho = (
+                min(fim, limites[celula + 1])
+                - max(inicio, limites[celula])
+            )
+            linha[celula] += trecho.total_seconds()
+            celula += 1
+
+    @staticmethod
+    def calcular(veiculos, dia_inicial, dias, granularidade='dia'):
+        """
+        Monta a grade de ocupação dos veículos.
+
+        Args:
+            veiculos: QuerySet de Veiculo (linhas da grade)
+            dia_inicial: Primeiro dia (date)
+            dias: Quantidade de dias
+            granularidade: 'dia' ou 'hora'
+
+        Returns:
+            dict: {
+                'granularidade': str,
+                'celulas': [início de cada célula, ISO 8601],
+                'veiculos': [{'id', 'placa', 'descricao'}],
+                'ocupacao': [[percentual por célula] por veículo],
+            }
+        """
+        limites = OcupacaoFrotaService.limites(
+            dia_inicial, dias, granularidade
+        )
+        veiculos = veiculos.order_by('placa')
+        linhas_veiculos = list(
+            veiculos.values_list('id', 'placa', 'marca', 'modelo')
+        )
+        indice = {
+            veiculo_id: posicao
+            for posicao, (veiculo_id, *_) in enumerate(linhas_veiculos)
+        }
+        celulas = len(limites) - 1
+        segundos = [[0.0] * celulas for _ in linhas_veiculos]
+
+        agendamentos = Agendamento.objects.filter(
+            veiculo_id__in=veiculos.values('pk'),
+            status__in=ConflitoVeiculoService.STATUS_BLOQUEANTES,
+            data_inicio__lt=limites[-1],
+            data_fim__gt=limites[0],
+        ).order_by('data_inicio').values_list(
+            'veiculo_id', 'data_inicio', 'data_fim'
+        )
+
+        # Varredura em ordem de início: período aberto (unido) por veículo
+        abertos = {}
+        for veiculo_id, inicio, fim in agendamentos:
+            aberto = abertos.get(veiculo_id)
+            if aberto and inicio <= aberto[1]:
+                aberto[1] = max(aberto[1], fim)
+                continue
+            if aberto:
+                OcupacaoFrotaService._distribuir(
+                    segundos[indice[veiculo_id]], limites, *aberto
+                )
+            abertos[veiculo_id] = [inicio, fim]
+        for veiculo_id, aberto in abertos.items():
+            OcupacaoFrotaService._distribuir(
+                segundos[indice[veiculo_id]], limites, *aberto
+            )
+
+        duracoes = [
+            (limites[celula + 1] - limites[celula]).total_seconds()
+            for celula in range(celulas)
+        ]
+        return {
+            'granularidade': granularidade,
+            'celulas': [limite.isoformat() for limite in limites[:-1]],
+            'veiculos': [
+                {
+                    'id': str(veiculo_id),
+                    'placa': placa,
+                    'descricao': f'{marca} {modelo}',
+                }
+                for veiculo_id, placa, marca, modelo in linhas_veiculos
+            ],
+            'ocupacao': [
+                [
+                    round(100 * valor / duracao)
+                    for valor, duracao in zip(linha, duracoes)
+                ]
+                for linha in segundos
+            ],
+        }
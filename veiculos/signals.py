@@ -0,0 +1,18 @@
+"""
+Sinais do app veiculos.
+
+Invalida a lista de veículos ativos em cache (ver common/referencia.py).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.referencia import invalidar
+
+from .models import Veiculo
+
+
+@receiver(post_save, sender=Veiculo)
+@receiver(post_delete, sender=Veiculo)
+def invalidar_referencia(sender, **kwargs):
+    invalidar('veiculos')
@@ -1,3 +1,273 @@
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
+
+from agendamentos.models import Agendamento
+from campus.models import Campus
+from cursos.models import Curso
+from usuarios.models import Usuario
+
+from .models import Veiculo
+from .services import (RESTRICAO_CONFLITO, ConflitoVeiculoService,
+                       DisponibilidadeVeiculoService, OcupacaoFrotaService)
+
+
+class ConflitoVeiculoTest(TestCase):
+    """
+    Agendamentos aprovados e pendentes reservam o veículo: outro
+    agendamento sobreposto do mesmo veículo é rejeitado ao gravar.
+    """
+
+    def setUp(self):
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.veiculo = Veiculo.objects.create(
+            placa='AAA1A11', modelo='Gol', marca='VW', ano=2020,
+        )
+        self.inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        self.fim = self.inicio + timedelta(hours=4)
+
+    def salvar(self, inicio, fim, status='pendente', veiculo=None):
+        agendamento = Agendamento(
+            curso=self.curso, professor=self.professor,
+            veiculo=veiculo or self.veiculo,
+            data_inicio=inicio, data_fim=fim, status=status,
+        )
+        ConflitoVeiculoService.salvar(agendamento)
+        return agendamento
+
+    def test_rejeita_sobreposicao_com_aprovado_ou_pendente(self):
+        for status in ('aprovado', 'pendente'):
+            with self.subTest(status=status):
+                existente = self.salvar(self.inicio, self.fim, status=status)
+                with self.assertRaises(ValidationError):
+                    self.salvar(self.inicio + timedelta(hours=3),
+                                self.fim + timedelta(hours=3))
+                existente.delete()
+        self.assertEqual(Agendamento.objects.count(), 0)
+
+    def test_permite_reprovado_periodo_encostado_e_outro_veiculo(self):
+        self.salvar(self.inicio, self.fim, status='aprovado')
+        self.salvar(self.inicio, self.fim, status='reprovado')
+        # fim == início do seguinte não é sobreposição
+        self.salvar(self.fim, self.fim + timedelta(hours=2))
+        self.salvar(self.inicio - timedelta(hours=2), self.inicio)
+        outro = Veiculo.objects.create(
+            placa='BBB2B22', modelo='Uno', marca='Fiat', ano=2019,
+        )
+        self.salvar(self.inicio, self.fim, veiculo=outro)
+        self.assertEqual(Agendamento.objects.count(), 5)
+
+    def test_edicao_nao_conflita_consigo(self):
+        agendamento = self.salvar(self.inicio, self.fim)
+
+        agendamento.data_fim = self.fim + timedelta(hours=1)
+        ConflitoVeiculoService.salvar(agendamento)
+
+        agendamento.refresh_from_db()
+        self.assertEqual(agendamento.data_fim, self.fim + timedelta(hours=1))
+
+    def test_violacao_da_restricao_vira_erro_de_validacao(self):
+        erro = IntegrityError(f'violates constraint "{RESTRICAO_CONFLITO}"')
+        with mock.patch.object(Agendamento, 'save', side_effect=erro):
+            with self.assertRaises(ValidationError):
+                self.salvar(self.inicio, self.fim)
+
+
+class DisponibilidadeVeiculoTest(TestCase):
+
+    def setUp(self):
+        self.campus = Campus.objects.create(nome='Central')
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.inicio = timezone.make_aware(datetime(2025, 3, 10, 8))
+        self.fim = self.inicio + timedelta(hours=4)
+        self.gol = self.veiculo('AAA1A11', 5)
+        self.van = self.veiculo('BBB2B22', 15)
+        self.onibus = self.veiculo('CCC3C33', 40)
+
+    def veiculo(self, placa, capacidade, **extra):
+        extra.setdefault('campus', self.campus)
+        return Veiculo.objects.create(
+            placa=placa, modelo='Modelo', marca='Marca', ano=2020,
+            capacidade_passageiros=capacidade, **extra
+        )
+
+    def agendamento(self, veiculo, inicio, fim, status='pendente'):
+        return Agendamento.objects.create(
+            curso=self.curso, professor=self.professor, veiculo=veiculo,
+            data_inicio=inicio, data_fim=fim, status=status,
+        )
+
+    def livres(self, **filtros):
+        return list(DisponibilidadeVeiculoService.livres(
+            self.inicio, self.fim, **filtros
+        ))
+
+    def test_exclui_veiculos_ocupados_em_uma_consulta(self):
+        self.agendamento(self.gol, self.inicio + timedelta(hours=1),
+                         self.fim + timedelta(hours=1))
+        self.agendamento(self.van, self.inicio - timedelta(hours=2),
+                         self.inicio + timedelta(minutes=1),
+                         status='aprovado')
+        # Reprovados e períodos apenas encostados não ocupam o veículo
+        self.agendamento(self.onibus, self.inicio, self.fim,
+                         status='reprovado')
+        self.agendamento(self.onibus, self.fim, self.fim + timedelta(hours=2))
+        self.veiculo('DDD4D44', 5, ativo=False)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.livres(), [self.onibus])
+
+    def test_filtros_de_campus_capacidade_e_edicao(self):
+        self.veiculo('EEE5E55', 50,
+                     campus=Campus.objects.create(nome='Norte'))
+        self.assertEqual(
+            self.livres(campus_id=self.campus.pk, capacidade_minima=10),
+            [self.van, self.onibus],
+        )
+
+        proprio = self.agendamento(self.gol, self.inicio, self.fim)
+        self.assertNotIn(self.gol, self.livres())
+        self.assertIn(self.gol, self.livres(agendamento_id=proprio.pk))
+
+    def test_endpoint_json(self):
+        self.client.force_login(self.professor)
+        self.agendamento(self.gol, self.inicio, self.fim)
+
+        response = self.client.get('/veiculos/disponiveis/', {
+            'inicio': '2025-03-10T09:00',
+            'fim': '2025-03-10T10:00',
+            'capacidade': '10',
+        })
+        self.assertEqual(
+            [v['placa'] for v in response.json()['veiculos']],
+            ['BBB2B22', 'CCC3C33'],
+        )
+
+        for parametros in ({'inicio': '2025-03-10T09:00'},
+                           {'inicio': '2025-03-10T10:00',
+                            'fim': '2025-03-10T09:00'},
+                           {'inicio': '2025-03-10T09:00',
+                            'fim': '2025-03-10T10:00', 'campus': 'x'}):
+            with self.subTest(parametros=parametros):
+                response = self.client.get('/veiculos/disponiveis/',
+                                           parametros)
+                self.assertEqual(response.status_code, 400)
+
+
+class OcupacaoFrotaTest(TestCase):
+
+    def setUp(self):
+        self.campus = Campus.objects.create(nome='Central')
+        self.professor = Usuario.objects.create_user(
+            'prof', email='prof@uespi.br', password='x'
+        )
+        self.curso = Curso.objects.create(nome='Agronomia')
+        self.gol = Veiculo.objects.create(
+            placa='AAA1A11', modelo='Gol', marca='VW', ano=2020,
+            campus=self.campus,
+        )
+        self.van = Veiculo.objects.create(
+            placa='BBB2B22', modelo='Sprinter', marca='MB', ano=2021,
+            capacidade_passageiros=15, campus=self.campus,
+        )
+
+    def agendamento(self, veiculo, inicio, horas, status='aprovado'):
+        inicio = timezone.make_aware(inicio)
+        Agendamento.objects.create(
+            curso=self.curso, professor=self.professor, veiculo=veiculo,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=horas),
+            status=status,
+        )
+
+    def grade(self, dias=3, granularidade='dia'):
+        return OcupacaoFrotaService.calcular(
+            Veiculo.objects.all(), date(2025, 3, 10), dias, granularidade
+        )
+
+    def test_percentual_por_dia_com_periodos_sobrepostos(self):
+        # 18h do dia 10 às 06h do dia 11: 6h em cada dia
+        self.agendamento(self.gol, datetime(2025, 3, 10, 18), 12)
+        # Sobrepostos no dia 12 (08h-14h unidos): 6h, sem contar em dobro
+        self.agendamento(self.gol, datetime(2025, 3, 12, 8), 4)
+        self.agendamento(self.gol, datetime(2025, 3, 12, 10), 4,
+                         status='pendente')
+        # Reprovados e agendamentos fora da janela não ocupam
+        self.agendamento(self.van, datetime(2025, 3, 11, 8), 4,
+                         status='reprovado')
+        self.agendamento(self.van, datetime(2025, 3, 9, 8), 4)
+
+        with self.assertNumQueries(2):
+            grade = self.grade()
+
+        self.assertEqual(
+            [veiculo['placa'] for veiculo in grade['veiculos']],
+            ['AAA1A11', 'BBB2B22'],
+        )
+        self.assertEqual(grade['ocupacao'], [[25, 25, 25], [0, 0, 0]])
+
+    def test_percentual_por_hora(self):
+        self.agendamento(self.van, datetime(2025, 3, 10, 8, 30), 2)
+
+        grade = self.grade(dias=1, granularidade='hora')
+
+        self.assertEqual(len(grade['celulas']), 24)
+        self.assertEqual(grade['ocupacao'][1][7:11], [0, 50, 100, 50])
+
+    def test_endpoint_restrito_ao_campus_do_responsavel(self):
+        from django.contrib.auth.models import Group
+
+        outro = Campus.objects.create(nome='Norte')
+        Veiculo.objects.create(
+            placa='CCC3C33', modelo='Uno', marca='Fiat', ano=2019,
+            campus=outro,
+        )
+        responsavel = Usuario.objects.create_user(
+            'resp', email='resp@uespi.br', password='x', campus=self.campus
+        )
+        responsavel.groups.add(Group.objects.get_or_create(
+            name='Responsaveis de Campus'
+        )[0])
+        self.client.force_login(responsavel)
+
+        response = self.client.get('/veiculos/ocupacao/dados/', {
+            'inicio': '2025-03-10', 'dias': 2, 'campus': outro.pk,
+        })
+        self.assertEqual(
+            [veiculo['placa'] for veiculo in response.json()['veiculos']],
+            ['AAA1A11', 'BBB2B22'],
+        )
+
+        response = self.client.get('/veiculos/ocupacao/dados/', {
+            'granularidade': 'hora', 'dias': 30,
+        })
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_login(self.professor)
+        response = self.client.get('/veiculos/ocupacao/dados/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_responsavel_sem_campus_nao_ve_a_frota(self):
+        from django.contrib.auth.models import Group
+
+        responsavel = Usuario.objects.create_user(
+            'resp', email='resp@uespi.br', password='x'
+        )
+        responsavel.groups.add(Group.objects.get_or_create(
+            name='Responsaveis de Campus'
+        )[0])
+        self.client.force_login(responsavel)
 
-# Create your tests here.
+        for url in ('/veiculos/ocupacao/', '/veiculos/ocupacao/dados/'):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'inicio': '2025-03-10'})
+                self.assertEqual(response.status_code, 403)
@@ -7,6 +7,9 @@ app_name = 'veiculos'
 urlpatterns = [
     path('', views.lista_veiculos, name='lista'),
     path('novo/', views.criar_veiculo, name='criar'),
+    path('disponiveis/', views.veiculos_disponiveis, name='disponiveis'),
+    path('ocupacao/', views.ocupacao_frota, name='ocupacao'),
+    path('ocupacao/dados/', views.ocupacao_dados, name='ocupacao_dados'),
     path('<uuid:pk>/editar/', views.editar_veiculo, name='editar'),
     path('<uuid:pk>/deletar/', views.deletar_veiculo, name='deletar'),
 ]
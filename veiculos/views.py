@@ -1,13 +1,21 @@
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 
-from common.constants import VEICULOS_POR_PAGINA
+from common.constants import OCUPACAO_MAX_DIAS, VEICULOS_POR_PAGINA
 from common.decorators import is_responsavel_ou_admin
 from common.pagination import PaginationHelper
+from common.periodos import ler_data, ler_data_hora
+from common.referencia import campi_ativos
 
 from .forms import VeiculoForm
 from .models import Veiculo
+from .services import DisponibilidadeVeiculoService, OcupacaoFrotaService
 
 
 @login_required
@@ -103,3 +111,148 @@ def deletar_veiculo(request, pk):
         return redirect('veiculos:lista')
 
     return render(request, 'veiculos/deletar.html', {'veiculo': veiculo})
+
+
+@login_required
+def veiculos_disponiveis(request):
+    """
+    Veículos ativos livres em um período, em JSON.
+
+    Parâmetros GET:
+        inicio, fim: período (ISO 8601, ex.: 2025-03-10T08:00)
+        campus: id do campus (opcional)
+        capacidade: mínimo de passageiros (opcional)
+        agendamento: id do agendamento em edição (opcional)
+
+    Resposta: {"veiculos": [{id, placa, texto, capacidade, campus}, ...]}
+    """
+    inicio = ler_data_hora(request.GET.get('inicio'))
+    fim = ler_data_hora(request.GET.get('fim'))
+    if not inicio or not fim or fim <= inicio:
+        return JsonResponse(
+            {'erro': 'Informe um período válido (inicio e fim).'},
+            status=400,
+        )
+    try:
+        capacidade = int(request.GET.get('capacidade') or 0)
+        campus_id, agendamento_id = (
+            uuid.UUID(valor) if valor else None
+            for valor in (
+                request.GET.get('campus'), request.GET.get('agendamento')
+            )
+        )
+    except ValueError:
+        return JsonResponse({'erro': 'Parâmetros inválidos.'}, status=400)
+
+    veiculos = DisponibilidadeVeiculoService.livres(
+        inicio,
+        fim,
+        campus_id=campus_id,
+        capacidade_minima=capacidade,
+        agendamento_id=agendamento_id,
+    )
+    return JsonResponse({
+        'veiculos': [
+            DisponibilidadeVeiculoService.serializar(veiculo)
+            for veiculo in veiculos
+        ],
+    })
+
+
+def _parametros_ocupacao(request):
+    """
+    Lê os filtros da grade de ocupação.
+
+    Responsáveis de campus veem apenas os veículos do próprio campus;
+    administradores podem escolher o campus (padrão: todos).
+
+    Returns:
+        dict: inicio (date), dias, granularidade e campus_id
+
+    Raises:
+        PermissionDenied: Se o responsável não estiver vinculado a um
+            campus (sem campus não há frota a exibir, e não a frota toda)
+        ValueError: Se algum parâmetro for inválido
+    """
+    is_admin = request.user.is_administrador()
+    if not is_admin and request.user.campus_id is None:
+        raise PermissionDenied('Seu usuário não está vinculado a um campus.')
+    granularidade = request.GET.get('granularidade') or 'dia'
+    if granularidade not in OcupacaoFrotaService.GRANULARIDADES:
+        raise ValueError('Granularidade inválida.')
+    inicio = timezone.localdate()
+    if request.GET.get('inicio'):
+        inicio = ler_data(request.GET['inicio'])
+        if inicio is None:
+            raise ValueError('Data inicial inválida.')
+    maximo = OCUPACAO_MAX_DIAS[granularidade]
+    dias = request.GET.get('dias') or '14'
+    if not dias.isdigit() or not 1 <= int(dias) <= maximo:
+        raise ValueError(f'Informe de 1 a {maximo} dias.')
+    campus_id = request.user.campus_id
+    if is_admin:
+        try:
+            campus = request.GET.get('campus')
+            campus_id = uuid.UUID(campus) if campus else None
+        except ValueError:
+            raise ValueError('Campus inválido.')
+    return {
+        'inicio': inicio,
+        'dias': int(dias),
+        'granularidade': granularidade,
+        'campus_id': campus_id,
+    }
+
+
+@login_required
+@user_passes_test(is_responsavel_ou_admin)
+def ocupacao_frota(request):
+    """Página da grade de ocupação da frota (dados via ocupacao_dados)."""
+    is_admin = request.user.is_administrador()
+    try:
+        parametros = _parametros_ocupacao(request)
+    except ValueError as e:
+        messages.error(request, str(e))
+        parametros = {
+            'inicio': timezone.localdate(),
+            'dias': 14,
+            'granularidade': 'dia',
+            'campus_id': None if is_admin else request.user.campus_id,
+        }
+    context = {
+        **parametros,
+        'is_admin': is_admin,
+        'campi': campi_ativos() if is_admin else [],
+        'max_dias': OCUPACAO_MAX_DIAS,
+    }
+    return render(request, 'veiculos/ocupacao.html', context)
+
+
+@login_required
+@user_passes_test(is_responsavel_ou_admin)
+def ocupacao_dados(request):
+    """
+    Grade de ocupação da frota em JSON.
+
+    Parâmetros GET:
+        inicio: primeiro dia (AAAA-MM-DD; padrão: hoje)
+        dias: quantidade de dias (padrão: 14; máximo em OCUPACAO_MAX_DIAS)
+        granularidade: 'dia' (padrão) ou 'hora'
+        campus: id do campus (apenas administradores)
+
+    Resposta: ver OcupacaoFrotaService.calcular
+    """
+    try:
+        parametros = _parametros_ocupacao(request)
+    except ValueError as e:
+        return JsonResponse({'erro': str(e)}, status=400)
+
+    veiculos = Veiculo.objects.filter(ativo=True)
+    if parametros['campus_id']:
+        veiculos = veiculos.filter(campus_id=parametros['campus_id'])
+    return JsonResponse(OcupacaoFrotaService.calcular(
+        veiculos,
+        parametros['inicio'],
+        parametros['dias'],
+        parametros['granularidade'],
+    ))